@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+AST benchmark: memory of the slotted node tree vs the old dict-based tree,
+and tree-walking speed of the dispatch-table Executor.
+
+Usage:
+    python benchmarks/bench_ast.py [size_in_mb]
+
+The dict tree is built with Node.to_dict(), which produces exactly the
+structure the parser used to return, so both trees hold the same data.
+"""
+
+import gc
+import io
+import sys
+import tracemalloc
+
+import common  # puts the repository root on sys.path
+
+from novascriptx.interpreter import Executor, Lexer, Parser
+from novascriptx.nodes import walk
+from bench_lexer import best_of, make_source
+
+FIB_SOURCE = """
+function fib(n): {
+    if (n < 2): { return n }
+    return fib(n - 1) + fib(n - 2)
+}
+var total = 0
+for (var i = 0 : i < 3000 : i = i + 1): {
+    total = total + i * 2 % 7
+}
+print(fib(18))
+print(total)
+"""
+
+
+def traced_size(build):
+    """Return (object, bytes still allocated after build())."""
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    size_mb = float(argv[0]) if argv else 0.5
+    source = make_source(size_mb)
+    statements = Parser(Lexer(source).scan()).parse()
+    count = sum(1 for _ in walk(statements))
+
+    nodes, node_size = traced_size(lambda: Parser(Lexer(source).scan()).parse())
+    del nodes
+    # The token stream is garbage once parsed, so both measurements only
+    # count the finished tree; to_dict() runs over an already-built tree.
+    dicts, dict_size = traced_size(lambda: [node.to_dict() for node in statements])
+    del dicts
+
+    print(f"source size:   {len(source) / 1024 / 1024:.2f} MB")
+    print(f"AST nodes:     {count}")
+    print(f"{'representation':<22}{'bytes/node':>12}{'total MB':>12}")
+    for label, size in (('dict AST', dict_size), ('__slots__ nodes', node_size)):
+        print(f"{label:<22}{size / count:>12.1f}{size / 1024 / 1024:>12.2f}")
+    print(f"reduction:     {1 - node_size / dict_size:.0%}")
+
+    program = Parser(Lexer(FIB_SOURCE).scan()).parse()
+    elapsed = best_of(lambda: Executor(stdout=io.StringIO()).execute(program))
+    print(f"fib(18) + 3000-iteration loop: {elapsed * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Execution engine benchmark: run the same programs on every engine.
+
+Usage:
+    python benchmarks/bench_engines.py [engine ...]
+
+Each program is parsed once; only execution is timed. Engines are run in
+interleaved rounds and the best CPU time of each is kept, which keeps the
+ratios stable on a noisy machine. Output is checked against the
+tree-walking Executor, which is also the baseline for the speedup column.
+"""
+
+import sys
+import time
+
+from common import run
+
+from novascriptx.interpreter import ENGINES, Lexer, Parser
+
+PROGRAMS = {
+    'fibonacci': """
+function fib(n): {
+    if (n < 2): { return n }
+    return fib(n - 1) + fib(n - 2)
+}
+print(fib(20))
+""",
+    'loops': """
+var total = 0
+for (var i = 0 : i < 200 : i = i + 1): {
+    var j = 0
+    while (j < 100): {
+        if (j % 3 == 0): { total = total + j * 2 } else: { total = total - 1 }
+        j = j + 1
+    }
+}
+print(total)
+""",
+    'calls': """
+function add(a, b): { return a + b }
+function square(x): { return x * x }
+var sum = 0
+for (var i = 0 : i < 20000 : i = i + 1): {
+    sum = add(sum, square(i % 10))
+}
+print(sum)
+""",
+    'strings': """
+var s = ""
+var i = 0
+while (i < 5000): {
+    s = "n=" + i + ", ok=" + (i % 2 == 0)
+    i = i + 1
+}
+print(s)
+""",
+}
+
+
+def interleaved_best(engines, statements, rounds: int = 7):
+    """Best CPU time per engine over several interleaved rounds."""
+    best = dict.fromkeys(engines, float('inf'))
+    for _ in range(rounds):
+        for engine in engines:
+            start = time.process_time()
+            run(engine, statements)
+            best[engine] = min(best[engine], time.process_time() - start)
+    return best
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    engines = argv or list(ENGINES)
+    status = 0
+    print(f"{'program':<12}" + ''.join(f"{engine:>16}" for engine in engines))
+    for name, source in PROGRAMS.items():
+        statements = Parser(Lexer(source).scan()).parse()
+        expected = run('tree', statements)
+        correct = [engine for engine in engines if run(engine, statements) == expected]
+        times = interleaved_best(['tree'] + correct, statements)
+        cells = []
+        for engine in engines:
+            if engine not in correct:
+                cells.append('WRONG OUTPUT')
+                status = 1
+                continue
+            elapsed = times[engine]
+            cells.append(f"{elapsed * 1000:.0f}ms {times['tree'] / elapsed:.1f}x")
+        print(f"{name:<12}" + ''.join(f"{cell:>16}" for cell in cells))
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+For-in benchmark: counting loops on each engine.
+
+Usage:
+    python benchmarks/bench_forin.py [engine ...]
+
+Both programs sum the integers below N. The 'c-style' column uses
+`for (var i = 0 : i < N : i = i + 1)`, which evaluates the condition and
+the update through the engine on every pass; the 'for-in' column uses
+`for (i in range(0, N))`, where Python drives the loop and the engine
+only stores the variable. The 'peak' column is the tracemalloc peak of
+the for-in program at N and at 10 * N: range() is lazy, so it should not
+grow with N.
+"""
+
+import sys
+import time
+import tracemalloc
+
+from common import run
+
+from novascriptx.interpreter import ENGINES, Lexer, Parser
+
+N = 100000
+
+LOOPS = {
+    'c-style': """
+var total = 0
+for (var i = 0 : i < N : i = i + 1): { total = total + i }
+print(total)
+""",
+    'for-in': """
+var total = 0
+for (i in range(0, N)): { total = total + i }
+print(total)
+""",
+}
+
+
+def parse(source, n):
+    return Parser(Lexer(source.replace('N', str(n))).scan()).parse()
+
+
+def peak_kib(engine, statements):
+    """Run statements under tracemalloc and return the peak in KiB."""
+    tracemalloc.start()
+    try:
+        run(engine, statements)
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    engines = argv or list(ENGINES)
+    parsed = {name: parse(source, N) for name, source in LOOPS.items()}
+    expected = str(sum(range(N)))
+    print(f"{'engine':<9}{'c-style':>10}{'for-in':>10}{'speedup':>9}{'peak (N / 10N)':>20}")
+    for engine in engines:
+        if any(run(engine, statements).strip() != expected for statements in parsed.values()):
+            print(f"{engine:<9}{'WRONG OUTPUT':>38}")
+            return 1
+        best = {name: float('inf') for name in parsed}
+        for _ in range(5):
+            for name, statements in parsed.items():
+                start = time.process_time()
+                run(engine, statements)
+                best[name] = min(best[name], time.process_time() - start)
+        small = peak_kib(engine, parse(LOOPS['for-in'], N))
+        large = peak_kib(engine, parse(LOOPS['for-in'], 10 * N))
+        peaks = f"{small:.0f} / {large:.0f} KiB"
+        print(f"{engine:<9}{best['c-style'] * 1000:>8.1f}ms{best['for-in'] * 1000:>8.1f}ms"
+              f"{best['c-style'] / best['for-in']:>8.1f}x{peaks:>20}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Function inlining benchmark: small helpers called in a loop.
+
+Usage:
+    python benchmarks/bench_inline.py [engine ...]
+
+The loop calls three one-line helpers per iteration (`add`, `sq` and
+`clamp01`, which itself calls `add`). 'calls' runs the program with
+every pass except inline-functions; 'inlined' runs it at -O2, where the
+calls are replaced by the expressions the helpers return.
+"""
+
+import sys
+import time
+
+import common
+
+from novascriptx.interpreter import ENGINES, Lexer, Parser
+from novascriptx.optimizer import LEVELS, PASSES
+
+N = 20000
+
+PROGRAM = """
+function add(a, b): return a + b
+function sq(x): return x * x
+function clamp01(x): return add(x > 0, x > 1)
+var total = 0
+for (i in range(N)): total = add(total, sq(i % 10) + clamp01(i % 3))
+print(total)
+"""
+
+# Passes run by each case: -O2 with and without inline-functions
+CASES = {
+    'calls': [name for name in LEVELS[2] if name != 'inline-functions'],
+    'inlined': list(LEVELS[2]),
+}
+
+
+def run(engine, passes):
+    """Parse the program, run the given passes over it, execute it and return the output."""
+    statements = Parser(Lexer(PROGRAM.replace('N', str(N))).scan()).parse()
+    for name in passes:
+        PASSES[name](statements)
+    return common.run(engine, statements, opt_level=0)
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    engines = argv or list(ENGINES)
+    print(f"{'engine':<9}{'calls':>10}{'inlined':>10}{'speedup':>9}")
+    for engine in engines:
+        if len({run(engine, passes) for passes in CASES.values()}) != 1:
+            print(f"{engine:<9}{'WRONG OUTPUT':>20}")
+            return 1
+        best = {name: float('inf') for name in CASES}
+        for _ in range(5):
+            for name, passes in CASES.items():
+                start = time.process_time()
+                run(engine, passes)
+                best[name] = min(best[name], time.process_time() - start)
+        print(f"{engine:<9}" + ''.join(f"{best[name] * 1000:>8.1f}ms" for name in CASES)
+              + f"{best['calls'] / best['inlined']:>8.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
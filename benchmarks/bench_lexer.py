@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Lexer benchmark: master-pattern Lexer vs. the former character-at-a-time scanner.
+
+Usage:
+    python benchmarks/bench_lexer.py [size_in_mb]
+
+A large script is synthesised by repeating examples/functions_loops/main.nova
+until it reaches the requested size (default 4 MB).
+"""
+
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+import common  # puts the repository root on sys.path
+
+from novascriptx.interpreter import Lexer, Token
+
+
+class CharLexer:
+    """Reference implementation of the previous peek()/advance() lexer."""
+
+    def __init__(self, source):
+        self.source = source
+        self.position = 0
+        self.line = 1
+        self.tokens = []
+
+    def peek(self):
+        if self.position < len(self.source):
+            return self.source[self.position]
+        return None
+
+    def advance(self):
+        char = self.source[self.position]
+        if char == '\n':
+            self.line += 1
+        self.position += 1
+        return char
+
+    def tokenize(self):
+        two_char = {'==', '!=', '<=', '>='}
+        while self.position < len(self.source):
+            while self.peek() and self.peek() in ' \t\n\r':
+                self.advance()
+            if self.position >= len(self.source):
+                break
+            char = self.peek()
+            line = self.line
+            if char == '#':
+                while self.peek() and self.peek() != '\n':
+                    self.advance()
+                continue
+            if char in '"\'':
+                value = ""
+                self.advance()
+                while self.peek() != char:
+                    if self.peek() == '\\':
+                        self.advance()
+                        next_char = self.advance()
+                        value += Lexer.ESCAPES.get(next_char, next_char)
+                    else:
+                        value += self.advance()
+                self.advance()
+                self.tokens.append(Token('STRING', value, line))
+            elif char.isdigit():
+                value = ""
+                while self.peek() and (self.peek().isdigit() or self.peek() == '.'):
+                    value += self.advance()
+                self.tokens.append(Token('NUMBER', value, line))
+            elif char.isalpha() or char == '_':
+                value = ""
+                while self.peek() and (self.peek().isalnum() or self.peek() == '_'):
+                    value += self.advance()
+                self.tokens.append(Token(Lexer.KEYWORDS.get(value, 'IDENTIFIER'), value, line))
+            else:
+                self.advance()
+                if char + (self.peek() or '') in two_char:
+                    char += self.advance()
+                self.tokens.append(Token(Lexer.OPERATORS[char], char, line))
+        self.tokens.append(Token('EOF', '', self.line))
+        return self.tokens
+
+
+def make_source(size_mb: float) -> str:
+    """Repeat the functions/loops example until it reaches size_mb."""
+    root = Path(__file__).resolve().parent.parent
+    chunk = (root / 'examples' / 'functions_loops' / 'main.nova').read_text(encoding='utf-8')
+    repeat = max(1, int(size_mb * 1024 * 1024 / len(chunk)))
+    return chunk * repeat
+
+
+def best_of(func, runs: int = 3) -> float:
+    """Return the best wall-clock time of several runs."""
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    size_mb = float(argv[0]) if argv else 4.0
+    source = make_source(size_mb)
+
+    new_tokens = Lexer(source).tokenize()
+    old_tokens = CharLexer(source).tokenize()
+    same = [(t.type, t.value, t.line) for t in new_tokens[:-1]] == \
+           [(t.type, t.value, t.line) for t in old_tokens[:-1]]
+
+    new_time = best_of(lambda: Lexer(source).tokenize())
+    # Streamed tokens are consumed and dropped, as the parser does; keeping
+    # them all in a list would measure the garbage collector instead
+    scan_time = best_of(lambda: deque(Lexer(source).scan(), maxlen=0))
+    old_time = best_of(lambda: CharLexer(source).tokenize(), runs=1)
+
+    print(f"source size:       {len(source) / 1024 / 1024:.2f} MB")
+    print(f"tokens:            {len(new_tokens)}")
+    print(f"identical stream:  {same}")
+    print(f"char-at-a-time:    {old_time:.3f} s")
+    print(f"master pattern:    {new_time:.3f} s  ({old_time / new_time:.1f}x, TokenBuffer)")
+    print(f"streamed tokens:   {scan_time:.3f} s  ({old_time / scan_time:.1f}x, Token objects)")
+    return 0 if same else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
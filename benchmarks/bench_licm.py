@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Loop-invariant code motion and common-subexpression benchmark.
+
+Usage:
+    python benchmarks/bench_licm.py [engine ...]
+
+The loop's condition and body recompute expressions of variables the
+loop never assigns (`n * 2`, `math.pi * r * r`, `math.max(w, h)`), and
+its body computes `i % 7 * 3` twice. 'plain' runs the program with every
+-O2 pass except hoist-invariants and common-subexpressions; 'moved' runs
+it at -O2, where the invariant expressions are computed once before the
+loop and the repeated one once per iteration.
+"""
+
+import sys
+import time
+
+import common
+
+from novascriptx.interpreter import ENGINES, Lexer, Parser
+from novascriptx.optimizer import LEVELS, PASSES
+
+N = 20000
+
+PROGRAM = """
+var math = require("math")
+var n = N
+var r = 1.5
+var w = 3
+var h = 4
+var total = 0
+var i = 0
+while (i < n * 2): {
+    var k = i % 7 * 3
+    total = total + math.pi * r * r + math.max(w, h) * k - (i % 7 * 3)
+    i = i + 1
+}
+print(total)
+"""
+
+MOVING = ('hoist-invariants', 'common-subexpressions')
+
+# Passes run by each case: -O2 with and without the two that move expressions
+CASES = {
+    'plain': [name for name in LEVELS[2] if name not in MOVING],
+    'moved': list(LEVELS[2]),
+}
+
+
+def run(engine, passes):
+    """Parse the program, run the given passes over it, execute it and return the output."""
+    statements = Parser(Lexer(PROGRAM.replace('N', str(N))).scan()).parse()
+    for name in passes:
+        PASSES[name](statements)
+    return common.run(engine, statements, opt_level=0)
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    engines = argv or list(ENGINES)
+    print(f"{'engine':<9}{'plain':>10}{'moved':>10}{'speedup':>9}")
+    for engine in engines:
+        if len({run(engine, passes) for passes in CASES.values()}) != 1:
+            print(f"{engine:<9}{'WRONG OUTPUT':>20}")
+            return 1
+        best = {name: float('inf') for name in CASES}
+        for _ in range(5):
+            for name, passes in CASES.items():
+                start = time.process_time()
+                run(engine, passes)
+                best[name] = min(best[name], time.process_time() - start)
+        print(f"{engine:<9}" + ''.join(f"{best[name] * 1000:>8.1f}ms" for name in CASES)
+              + f"{best['plain'] / best['moved']:>8.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
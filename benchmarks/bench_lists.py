@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+List benchmark: bulk list methods against the same work as NovaScript loops.
+
+Usage:
+    python benchmarks/bench_lists.py [engine ...]
+
+Both programs take a list of N integers and compute its sum, the index
+of its last element, its doubled values, its odd values, a reduce and a
+joined string. The 'loops' column writes each step as a for-in loop in
+NovaScript; the 'methods' column calls sum(), indexOf(), map(),
+filter(), reduce() and join(), whose loops run in Python (only the
+map/filter/reduce callbacks run as NovaScript). Both programs print the
+same summary, which is checked before timing.
+"""
+
+import sys
+import time
+
+from common import run
+
+from novascriptx.interpreter import ENGINES, Lexer, Parser
+
+N = 5000
+
+PRELUDE = """
+function double(x): { return x * 2 }
+function odd(x): { return x % 2 == 1 }
+function add(x, y): { return x + y }
+var items = []
+for (i in range(N)): items.push(i)
+"""
+
+PROGRAMS = {
+    'loops': PRELUDE + """
+var total = 0
+for (x in items): total = total + x
+var position = -1
+var index = 0
+for (x in items): {
+    if (position == -1 and x == N - 1): { position = index }
+    index = index + 1
+}
+var doubled = []
+for (x in items): doubled.push(double(x))
+var odds = []
+for (x in items): { if (odd(x)): { odds.push(x) } }
+var reduced = 0
+for (x in doubled): reduced = add(reduced, x)
+var text = ""
+var first = True
+for (x in odds): {
+    if (first): { text = text + x } else: { text = text + "," + x }
+    first = False
+}
+print(total + " " + position + " " + reduced + " " + text.length)
+""",
+    'methods': PRELUDE + """
+var total = items.sum()
+var position = items.indexOf(N - 1)
+var doubled = items.map(double)
+var odds = items.filter(odd)
+var reduced = doubled.reduce(add, 0)
+var text = odds.join(",")
+print(total + " " + position + " " + reduced + " " + text.length)
+""",
+}
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    engines = argv or list(ENGINES)
+    parsed = {name: Parser(Lexer(source.replace('N', str(N))).scan()).parse()
+              for name, source in PROGRAMS.items()}
+    print(f"{'engine':<9}{'loops':>10}{'methods':>10}{'speedup':>9}")
+    for engine in engines:
+        outputs = {run(engine, statements) for statements in parsed.values()}
+        if len(outputs) != 1:
+            print(f"{engine:<9}{'WRONG OUTPUT':>28}")
+            return 1
+        best = {name: float('inf') for name in parsed}
+        for _ in range(5):
+            for name, statements in parsed.items():
+                start = time.process_time()
+                run(engine, statements)
+                best[name] = min(best[name], time.process_time() - start)
+        print(f"{engine:<9}{best['loops'] * 1000:>8.1f}ms{best['methods'] * 1000:>8.1f}ms"
+              f"{best['loops'] / best['methods']:>8.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Short-circuit benchmark: guard expressions on each engine.
+
+Usage:
+    python benchmarks/bench_logic.py [engine ...]
+
+Each loop tests a cheap guard first, `if (i % 10 != 0 or slow(i))` and
+`if (i % 10 == 0 and slow(i))`, so nine times in ten the right side is
+skipped. The 'eager' column runs the same loop with slow(i) hoisted out
+of the condition, which is what every call cost before 'and' and 'or'
+short-circuited. Both programs print how many times slow() ran.
+"""
+
+import sys
+import time
+
+from common import run
+
+from novascriptx.interpreter import ENGINES, Lexer, Parser
+
+TEMPLATE = """
+var calls = 0
+function slow(n): {
+    calls = calls + 1
+    var total = 0
+    for (var k = 0 : k < 40 : k = k + 1): { total = total + k * n }
+    return total % 2 == 0
+}
+var kept = 0
+for (var i = 0 : i < 3000 : i = i + 1): {
+    PRELUDE
+    if (EITHER): { kept = kept + 1 }
+    if (BOTH): { kept = kept - 1 }
+}
+print(kept)
+print(calls)
+"""
+
+
+def guard_program(prelude, either, both):
+    """Fill in the loop body of TEMPLATE."""
+    return TEMPLATE.replace('PRELUDE', prelude).replace('EITHER', either).replace('BOTH', both)
+
+
+GUARDS = {
+    'short': guard_program('', 'i % 10 != 0 or slow(i)', 'i % 10 == 0 and slow(i)'),
+    'eager': guard_program('var hit = slow(i)', 'i % 10 != 0 or hit', 'i % 10 == 0 and hit'),
+}
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    engines = argv or list(ENGINES)
+    parsed = {name: Parser(Lexer(source).scan()).parse() for name, source in GUARDS.items()}
+    print(f"{'engine':<9}{'slow() calls':>14}{'eager':>10}{'short':>10}{'speedup':>9}")
+    for engine in engines:
+        outputs = {name: run(engine, statements) for name, statements in parsed.items()}
+        kept = {name: output.split()[0] for name, output in outputs.items()}
+        if kept['short'] != kept['eager']:
+            print(f"{engine:<9}{'WRONG OUTPUT':>43}")
+            return 1
+        calls = f"{outputs['short'].split()[1]}/{outputs['eager'].split()[1]}"
+        best = {name: float('inf') for name in parsed}
+        for _ in range(5):
+            for name, statements in parsed.items():
+                start = time.process_time()
+                run(engine, statements)
+                best[name] = min(best[name], time.process_time() - start)
+        print(f"{engine:<9}{calls:>14}{best['eager'] * 1000:>8.1f}ms{best['short'] * 1000:>8.1f}ms"
+              f"{best['eager'] / best['short']:>8.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Inline cache benchmark: stdlib member access and method calls per engine.
+
+Usage:
+    python benchmarks/bench_members.py [engine ...]
+
+Each program is run twice on every engine: with the sites' inline caches,
+and with caches that never keep an object, so every access repeats the
+type, membership and callable checks (plus the call to load(), which the
+code before inline caches did not pay). Times are the best of
+interleaved rounds; output must match.
+"""
+
+import sys
+import time
+
+from common import run
+
+from novascriptx.inline_cache import MemberCache
+from novascriptx.interpreter import ENGINES, Lexer, Parser
+from novascriptx.nodes import MemberAccess, MemberCall, walk
+
+MEMBER_PROGRAMS = {
+    'sqrt': """
+var math = require("math")
+var total = 0
+for (var i = 0 : i < 20000 : i = i + 1): {
+    total = total + math.sqrt(i)
+}
+print(math.floor(total))
+""",
+    'members': """
+var math = require("math")
+function area(r): { return math.pi * math.pow(r, 2) }
+var total = 0
+var i = 0
+while (i < 10000): {
+    total = total + area(i % 7) + math.abs(0 - i) + math.e
+    i = i + 1
+}
+print(math.round(total))
+""",
+}
+
+
+class UncachedMember(MemberCache):
+    """A MemberCache that validates every lookup and never hits."""
+
+    __slots__ = ()
+
+    def fill(self, obj, value):
+        return value
+
+
+def set_caches(statements, cache_class):
+    """Give every member site of a program a fresh cache_class cache."""
+    for node in walk(statements):
+        if isinstance(node, (MemberAccess, MemberCall)):
+            node.cache = cache_class(node.member)
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    engines = argv or list(ENGINES)
+    status = 0
+    modes = {'uncached': UncachedMember, 'cached': MemberCache}
+    print(f"{'program':<10}{'engine':<9}{'uncached':>10}{'cached':>10}{'speedup':>9}")
+    for name, source in MEMBER_PROGRAMS.items():
+        for engine in engines:
+            # Parsed per mode: the VM and py engines keep the caches they compiled
+            programs = {}
+            for mode, cache_class in modes.items():
+                programs[mode] = Parser(Lexer(source).scan()).parse()
+                set_caches(programs[mode], cache_class)
+            outputs = {mode: run(engine, statements) for mode, statements in programs.items()}
+            if outputs['cached'] != outputs['uncached']:
+                print(f"{name:<10}{engine:<9}{'WRONG OUTPUT':>29}")
+                status = 1
+                continue
+            best = dict.fromkeys(modes, float('inf'))
+            for _ in range(5):
+                for mode, statements in programs.items():
+                    start = time.process_time()
+                    run(engine, statements)
+                    best[mode] = min(best[mode], time.process_time() - start)
+            uncached, cached = best['uncached'], best['cached']
+            print(f"{name:<10}{engine:<9}{uncached * 1000:>8.1f}ms{cached * 1000:>8.1f}ms"
+                  f"{uncached / cached:>8.2f}x")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
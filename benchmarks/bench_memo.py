@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Memoization benchmark: each engine with and without --memoize-pure.
+
+Usage:
+    python benchmarks/bench_memo.py [engine ...]
+
+'fibonacci' is the naive exponential recursion memoization is for;
+'calls' makes 20000 calls with mostly distinct arguments, so it shows
+the cost of cache lookups and evictions when memoization cannot help.
+Times are the best of interleaved rounds; output must match the
+unmemoized run.
+"""
+
+import sys
+import time
+
+from common import run
+
+from novascriptx.interpreter import ENGINES, Lexer, Parser
+from bench_engines import PROGRAMS
+
+MEMO_PROGRAMS = {
+    'fibonacci': """
+function fib(n): {
+    if (n < 2): { return n }
+    return fib(n - 1) + fib(n - 2)
+}
+print(fib(24))
+""",
+    'calls': PROGRAMS['calls'],
+}
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    engines = argv or list(ENGINES)
+    status = 0
+    print(f"{'program':<12}{'engine':<9}{'plain':>10}{'memo':>10}{'speedup':>9}")
+    for name, source in MEMO_PROGRAMS.items():
+        statements = Parser(Lexer(source).scan()).parse()
+        for engine in engines:
+            if run(engine, statements, memoize_pure=True) != run(engine, statements, memoize_pure=False):
+                print(f"{name:<12}{engine:<9}{'WRONG OUTPUT':>29}")
+                status = 1
+                continue
+            best = {False: float('inf'), True: float('inf')}
+            for _ in range(5):
+                for memoize_pure in best:
+                    start = time.process_time()
+                    run(engine, statements, memoize_pure=memoize_pure)
+                    best[memoize_pure] = min(best[memoize_pure], time.process_time() - start)
+            plain, memo = best[False], best[True]
+            print(f"{name:<12}{engine:<9}{plain * 1000:>8.1f}ms{memo * 1000:>8.1f}ms"
+                  f"{plain / memo:>8.1f}x")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Object benchmark: shape-cached property reads, and memory per object.
+
+Usage:
+    python benchmarks/bench_objects.py [engine ...]
+
+Both programs build N records and sum three properties of each, five
+times over. In the 'one shape' column every record comes from the same
+literal, so each member site keeps hitting its cached (shape, offset)
+pair. In the 'two shapes' column the records alternate between two
+literals with the properties in different orders, so every read misses
+the monomorphic cache and looks the offset up again, as an uncached
+lookup would.
+
+The memory table builds N records of three and of six properties
+directly as NovaObjects and as one dict per record, and reports the
+tracemalloc size per record. The property values are small shared ints,
+so only the record itself (and its slot in the list) is counted.
+"""
+
+import sys
+import time
+import tracemalloc
+
+from common import run
+
+from novascriptx.interpreter import ENGINES, Lexer, Parser
+from novascriptx.objects import NovaObject, shape_of
+
+N = 20000
+
+PROGRAMS = {
+    'one shape': """
+var points = []
+for (i in range(N)): points.push({x: i, y: i * 2, z: 1})
+var total = 0
+for (pass in range(5)): { for (p in points): total = total + p.x + p.y + p.z }
+print(total)
+""",
+    'two shapes': """
+var points = []
+for (i in range(N)): {
+    if (i % 2 == 0): { points.push({x: i, y: i * 2, z: 1}) } else: { points.push({z: 1, y: i * 2, x: i}) }
+}
+var total = 0
+for (pass in range(5)): { for (p in points): total = total + p.x + p.y + p.z }
+print(total)
+""",
+}
+
+
+def bytes_per_record(build) -> float:
+    """Return the traced memory per record of the list build() returns."""
+    tracemalloc.start()
+    try:
+        records = build()
+        return tracemalloc.get_traced_memory()[0] / len(records)
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    engines = argv or list(ENGINES)
+    parsed = {name: Parser(Lexer(source.replace('N', str(N))).scan()).parse()
+              for name, source in PROGRAMS.items()}
+    expected = str(5 * sum(3 * i + 1 for i in range(N)))
+    print(f"{'engine':<9}{'one shape':>11}{'two shapes':>12}{'speedup':>9}")
+    for engine in engines:
+        if any(run(engine, statements).strip() != expected for statements in parsed.values()):
+            print(f"{engine:<9}{'WRONG OUTPUT':>32}")
+            return 1
+        best = {name: float('inf') for name in parsed}
+        for _ in range(5):
+            for name, statements in parsed.items():
+                start = time.process_time()
+                run(engine, statements)
+                best[name] = min(best[name], time.process_time() - start)
+        print(f"{engine:<9}{best['one shape'] * 1000:>9.1f}ms{best['two shapes'] * 1000:>10.1f}ms"
+              f"{best['two shapes'] / best['one shape']:>8.1f}x")
+
+    print()
+    print(f"{'properties':<12}{'NovaObject':>12}{'dict':>8}{'saved':>8}")
+    for keys in ('xyz', 'xyzabc'):
+        shape = shape_of(keys)
+        values = list(range(len(keys)))
+        objects = bytes_per_record(lambda: [NovaObject(shape, values[:]) for _ in range(N)])
+        dicts = bytes_per_record(lambda: [dict(zip(keys, values)) for _ in range(N)])
+        print(f"{len(keys):<12}{objects:>11.0f}B{dicts:>7.0f}B{1 - objects / dicts:>8.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Optimisation level benchmark: the same program at -O0, -O1 and -O2.
+
+Usage:
+    python benchmarks/bench_optimizer.py [engine ...]
+
+The loop body recomputes constant expressions (`60 * 60 * 24`, `-1`,
+`!False`) and carries a disabled debug branch, a loop that never runs
+and a dead tail after `continue`. -O1 folds the constants; -O2
+also drops the dead branch and the unreachable statements. Each case
+is parsed afresh, so the passes run on an unoptimised tree every time.
+"""
+
+import sys
+import time
+
+import common
+
+from novascriptx.interpreter import ENGINES, Lexer, Parser
+from novascriptx.optimizer import LEVELS
+
+N = 20000
+
+PROGRAM = """
+var total = 0
+var seconds = 0
+for (i in range(N)): {
+    seconds = i % 7 * (60 * 60 * 24) + 60 * 60 - 1
+    if (False and i > 0): print("debug " + i)
+    if (!False): total = total + seconds % (1000 * 1000) * -1
+    while (0 > 1): total = 0
+    if (i % 2 == 0): {
+        continue
+        total = total + 1
+    }
+}
+print(total)
+"""
+
+
+def run(engine, opt_level):
+    """Parse and execute the program on an engine and return the output."""
+    statements = Parser(Lexer(PROGRAM.replace('N', str(N))).scan()).parse()
+    return common.run(engine, statements, opt_level=opt_level)
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    engines = argv or list(ENGINES)
+    levels = sorted(LEVELS)
+    print(f"{'engine':<9}" + ''.join(f"{f'-O{level}':>10}" for level in levels) + f"{'speedup':>9}")
+    for engine in engines:
+        outputs = {run(engine, level) for level in levels}
+        if len(outputs) != 1:
+            print(f"{engine:<9}{'WRONG OUTPUT':>30}")
+            return 1
+        best = {level: float('inf') for level in levels}
+        for _ in range(5):
+            for level in levels:
+                start = time.process_time()
+                run(engine, level)
+                best[level] = min(best[level], time.process_time() - start)
+        print(f"{engine:<9}" + ''.join(f"{best[level] * 1000:>8.1f}ms" for level in levels)
+              + f"{best[levels[0]] / best[levels[-1]]:>8.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
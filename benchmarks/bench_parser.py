@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Parser benchmark: precedence-climbing expressions vs. the former
+eight-level recursive-descent chain.
+
+Usage:
+    python benchmarks/bench_parser.py [size_in_mb]
+
+Times parsing of a synthesised script (see bench_lexer.make_source) and an
+expression-heavy one, checks both parsers build the same AST, and reports
+the deepest parenthesised expression each can parse before hitting the
+recursion limit.
+"""
+
+import sys
+
+import common  # puts the repository root on sys.path
+
+from novascriptx.interpreter import (
+    Lexer, Parser, TK_IDENTIFIER, TK_EQUAL, TK_NOT_EQUAL, TK_LESS, TK_GREATER,
+    TK_LESS_EQUAL, TK_GREATER_EQUAL, TK_PLUS, TK_MINUS, TK_MULTIPLY, TK_DIVIDE,
+    TK_MODULO, TK_NOT, TK_LPAREN, TK_RPAREN,
+)
+from novascriptx.nodes import BinaryOp, UnaryOp
+from bench_lexer import best_of, make_source
+
+EXPRESSION_LINE = "var r = (a + b * 2 - c / 3) * -d % 7 == 1 and !(x < y or x >= 10 - z)\n"
+
+
+class DescentParser(Parser):
+    """Equivalent of the previous parse_or -> ... -> parse_unary chain."""
+
+    def parse_expression(self):
+        return self.parse_binary(0)
+
+    LEVELS = (
+        ('or',), ('and',), (TK_EQUAL, TK_NOT_EQUAL),
+        (TK_LESS, TK_GREATER, TK_LESS_EQUAL, TK_GREATER_EQUAL),
+        (TK_PLUS, TK_MINUS), (TK_MULTIPLY, TK_DIVIDE, TK_MODULO),
+    )
+
+    def matches(self, level):
+        token = self.current_token()
+        if isinstance(self.LEVELS[level][0], str):
+            return token.kind == TK_IDENTIFIER and token.value == self.LEVELS[level][0]
+        return token.kind in self.LEVELS[level]
+
+    def parse_binary(self, level):
+        # One Python frame per precedence level, as before
+        if level == len(self.LEVELS):
+            return self.parse_unary()
+        left = self.parse_binary(level + 1)
+        while self.matches(level):
+            op = self.advance().value
+            left = BinaryOp(op, left, self.parse_binary(level + 1))
+        return left
+
+    def parse_unary(self):
+        if self.current_token().kind in (TK_NOT, TK_MINUS):
+            op = self.advance().value
+            return UnaryOp(op, self.parse_unary())
+        if self.current_token().kind == TK_LPAREN:
+            self.advance()
+            expr = self.parse_expression()
+            self.expect(TK_RPAREN)
+            return expr
+        return self.parse_primary()
+
+
+def max_depth(parser_class, limit=100000):
+    """Deepest ((((1)))) nesting parser_class accepts, by bisection."""
+    low, high = 1, limit
+    while low < high:
+        mid = (low + high + 1) // 2
+        try:
+            parser_class(Lexer('var r = ' + '(' * mid + '1' + ')' * mid).scan()).parse()
+            low = mid
+        except RecursionError:
+            high = mid - 1
+    return low
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    size_mb = float(argv[0]) if argv else 1.0
+    same = True
+    print(f"{'script':<14}{'descent':>10}{'pratt':>10}{'speedup':>9}")
+    for label, source in (('examples', make_source(size_mb)),
+                          ('expressions', EXPRESSION_LINE * int(size_mb * 14000))):
+        tokens = Lexer(source).tokenize()
+        old_ast = [node.to_dict() for node in DescentParser(tokens).parse()]
+        new_ast = [node.to_dict() for node in Parser(tokens).parse()]
+        same = same and old_ast == new_ast
+        old_time = best_of(lambda: DescentParser(tokens).parse())
+        new_time = best_of(lambda: Parser(tokens).parse())
+        print(f"{label:<14}{old_time:>9.3f}s{new_time:>9.3f}s{old_time / new_time:>8.2f}x")
+    print(f"identical AST: {same}")
+    print(f"max nesting:   descent {max_depth(DescentParser)}, pratt {max_depth(Parser)}"
+          f" (recursion limit {sys.getrecursionlimit()})")
+    return 0 if same else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
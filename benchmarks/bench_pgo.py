@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Profile-guided optimisation benchmark.
+
+Usage:
+    python benchmarks/bench_pgo.py [engine ...]
+
+The loop calls a helper whose returned expression is too big for
+inline-functions (more than INLINE_BUDGET nodes) and adds up values read
+from a list, whose types inference cannot prove. A training run records
+a profile of the program once. 'O2' then runs it at -O2 and 'profiled' at
+-O2 with the profile, which inlines the hot helper and, on the
+tree-walking engine, quickens the list arithmetic before it first runs.
+"""
+
+import io
+import sys
+import time
+
+import common
+
+from novascriptx.interpreter import ENGINES, Executor, Lexer, Parser
+from novascriptx.profiling import Profile
+
+N = 20000
+
+PROGRAM = """
+function blend(a, b): { return a * 3 + b * 5 + a * b + a % 7 + b % 11 + a - b + 1 }
+var values = [3, 1, 4, 1, 5, 9, 2, 6]
+var total = 0
+var i = 0
+while (i < N): {
+    var v = values[i % 8]
+    total = total + blend(i, v) + v * v
+    i = i + 1
+}
+print(total)
+"""
+
+
+def parse():
+    return Parser(Lexer(PROGRAM.replace('N', str(N))).scan()).parse()
+
+
+def record():
+    """Run the program once with profiling on and return the profile as JSON data."""
+    statements = parse()
+    executor = Executor(stdout=io.StringIO())
+    profile = executor.record_profile()
+    executor.execute(statements)
+    return profile.to_json(statements)
+
+
+def run(engine, profile_data):
+    """Parse the program, run it at -O2 (with the profile, if any) and return the output."""
+    statements = parse()
+    profile = None if profile_data is None else Profile.from_json(profile_data, statements)
+    return common.run(engine, statements, opt_level=2, whole_program=True, profile=profile)
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    engines = argv or list(ENGINES)
+    cases = {'O2': None, 'profiled': record()}
+    print(f"{'engine':<9}{'O2':>10}{'profiled':>10}{'speedup':>9}")
+    for engine in engines:
+        if len({run(engine, data) for data in cases.values()}) != 1:
+            print(f"{engine:<9}{'WRONG OUTPUT':>20}")
+            return 1
+        best = {name: float('inf') for name in cases}
+        for _ in range(5):
+            for name, data in cases.items():
+                start = time.process_time()
+                run(engine, data)
+                best[name] = min(best[name], time.process_time() - start)
+        print(f"{engine:<9}" + ''.join(f"{best[name] * 1000:>8.1f}ms" for name in cases)
+              + f"{best['O2'] / best['profiled']:>8.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Quickening benchmark: the tree-walking Executor with and without
+type-specialised binary operations.
+
+Usage:
+    python benchmarks/bench_quicken.py
+
+Runs numeric loops (plus fibonacci and the string program from
+bench_engines) with `quicken` off, where every BinaryOp takes the
+generic path, and on. Each run parses afresh, so quickening starts from
+generic nodes every time; only execution is timed. Times are the best
+of interleaved rounds; output must match.
+"""
+
+import io
+import sys
+import time
+
+import common  # puts the repository root on sys.path
+
+from novascriptx.interpreter import Executor, Lexer, Parser
+from bench_engines import PROGRAMS
+
+QUICKEN_PROGRAMS = {
+    'int-sum': """
+function sumsq(n): {
+    var total = 0
+    for (var i = 0 : i < n : i = i + 1): { total = total + i * i }
+    return total
+}
+print(sumsq(30000))
+""",
+    'float-loop': """
+var x = 0.0
+var i = 0
+while (i < 20000): {
+    x = x * 0.5 + 1.5
+    i = i + 1
+}
+print(x)
+""",
+    'loops': PROGRAMS['loops'],
+    'fibonacci': PROGRAMS['fibonacci'],
+    'strings': PROGRAMS['strings'],
+}
+
+
+def run(source, quicken):
+    """Parse and execute a program; return the output and the execution time."""
+    statements = Parser(Lexer(source).scan()).parse()
+    output = io.StringIO()
+    executor = Executor(stdout=output)
+    executor.quicken = quicken
+    start = time.process_time()
+    executor.execute(statements)
+    return output.getvalue(), time.process_time() - start
+
+
+def main(argv=None) -> int:
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+    status = 0
+    print(f"{'program':<12}{'generic':>10}{'quick':>10}{'speedup':>9}")
+    for name, source in QUICKEN_PROGRAMS.items():
+        if run(source, True)[0] != run(source, False)[0]:
+            print(f"{name:<12}{'WRONG OUTPUT':>29}")
+            status = 1
+            continue
+        best = {False: float('inf'), True: float('inf')}
+        for _ in range(7):
+            for quicken in best:
+                best[quicken] = min(best[quicken], run(source, quicken)[1])
+        generic, quick = best[False], best[True]
+        print(f"{name:<12}{generic * 1000:>8.1f}ms{quick * 1000:>8.1f}ms{generic / quick:>8.2f}x")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Scope benchmark: resolved slots and global cells vs. the former dict scopes.
+
+Usage:
+    python benchmarks/bench_scopes.py
+
+Runs call-heavy programs (including the recursive ones from
+bench_engines) on the tree-walking Executor and on DictScopeExecutor, a
+copy of the previous executor that looked every name up in a local dict,
+then the global dict, and built a fresh dict per call.
+"""
+
+import io
+import sys
+import time
+
+import common  # puts the repository root on sys.path
+
+from novascriptx.interpreter import Executor, Lexer, Parser
+from novascriptx.nodes import FunctionDef
+from bench_engines import PROGRAMS
+
+SCOPE_PROGRAMS = {
+    'fibonacci': PROGRAMS['fibonacci'],
+    'calls': PROGRAMS['calls'],
+    'ackermann': """
+function ack(m, n): {
+    if (m == 0): { return n + 1 }
+    if (n == 0): { return ack(m - 1, 1) }
+    return ack(m - 1, ack(m, n - 1))
+}
+print(ack(2, 300))
+""",
+    'locals': """
+function mix(a, b): {
+    var x = a * 2
+    var y = b + x
+    var z = x - y
+    return x + y + z
+}
+var total = 0
+for (var i = 0 : i < 20000 : i = i + 1): {
+    total = total + mix(i, 3)
+}
+print(total)
+""",
+}
+
+
+class DictScopeExecutor(Executor):
+    """Equivalent of the previous dict-scoped variable and call handling."""
+
+    def create_global_scope(self):
+        return {}
+
+    def execute(self, statements):
+        return self.execute_block(statements)
+
+    def visit_VarDecl(self, stmt):
+        self.get_scope()[stmt.name] = self.dispatch[stmt.value.__class__](stmt.value)
+
+    def visit_FunctionDef(self, stmt):
+        self.get_scope()[stmt.name] = stmt
+
+    def visit_Assignment(self, stmt):
+        name = stmt.target.name
+        value = self.dispatch[stmt.value.__class__](stmt.value)
+        if self.local_scope is not None and name in self.local_scope:
+            self.local_scope[name] = value
+        elif name in self.global_scope:
+            self.global_scope[name] = value
+        else:
+            self.get_scope()[name] = value
+
+    def visit_Identifier(self, expr):
+        name = expr.name
+        if self.local_scope is not None and name in self.local_scope:
+            return self.local_scope[name]
+        elif name in self.global_scope:
+            return self.global_scope[name]
+        raise NameError(f"Undefined variable: {name}")
+
+    def visit_Call(self, expr):
+        args = [self.dispatch[arg.__class__](arg) for arg in expr.args]
+        func_def = self.global_scope[expr.name]
+        if not isinstance(func_def, FunctionDef) or len(args) != len(func_def.params):
+            raise TypeError(f"bad call to {expr.name}")
+        prev_local = self.local_scope
+        self.local_scope = dict(zip(func_def.params, args))
+        try:
+            if self.execute_block(func_def.body) is None:
+                return None
+            return self.return_value
+        finally:
+            self.local_scope = prev_local
+
+
+def run(executor_class, statements):
+    output = io.StringIO()
+    executor = executor_class(stdout=output)
+    # Quickened operations read slots and cells, which DictScopeExecutor
+    # does not resolve; both compare scopes on the generic operations
+    executor.quicken = False
+    executor.execute(statements)
+    return output.getvalue()
+
+
+def main(argv=None) -> int:
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+    status = 0
+    classes = (DictScopeExecutor, Executor)
+    print(f"{'program':<12}{'dicts':>10}{'slots':>10}{'speedup':>9}")
+    for name, source in SCOPE_PROGRAMS.items():
+        statements = Parser(Lexer(source).scan()).parse()
+        if run(DictScopeExecutor, statements) != run(Executor, statements):
+            print(f"{name:<12}{'WRONG OUTPUT':>29}")
+            status = 1
+            continue
+        best = dict.fromkeys(classes, float('inf'))
+        for _ in range(7):
+            for executor_class in classes:
+                start = time.process_time()
+                run(executor_class, statements)
+                best[executor_class] = min(best[executor_class], time.process_time() - start)
+        old, new = best[DictScopeExecutor], best[Executor]
+        print(f"{name:<12}{old * 1000:>8.0f}ms{new * 1000:>8.0f}ms{old / new:>8.2f}x")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Parser memory benchmark: materialised token list vs. streamed tokens.
+
+Usage:
+    python benchmarks/bench_stream.py [size_in_mb]
+
+Reports the peak traced memory of lexing + parsing a synthesised script
+when the parser is fed Lexer.tokenize() (whole token list in memory)
+versus Lexer.scan() (tokens produced on demand).
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+
+import common  # puts the repository root on sys.path
+
+from novascriptx.interpreter import Lexer, Parser
+from bench_lexer import make_source
+
+
+def measure(source: str, streaming: bool):
+    """Return (peak bytes, retained AST bytes, seconds) for one parse."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    lexer = Lexer(source)
+    tokens = lexer.scan() if streaming else lexer.tokenize()
+    statements = Parser(tokens).parse()
+    elapsed = time.perf_counter() - start
+    del tokens, lexer
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del statements
+    return peak, retained, elapsed
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    size_mb = float(argv[0]) if argv else 1.0
+    source = make_source(size_mb)
+    mb = 1024 * 1024
+
+    print(f"source size: {len(source) / mb:.2f} MB")
+    print(f"{'mode':<12}{'peak MB':>10}{'AST MB':>10}{'seconds':>10}")
+    for label, streaming in (('token list', False), ('streamed', True)):
+        peak, retained, elapsed = measure(source, streaming)
+        print(f"{label:<12}{peak / mb:>10.1f}{retained / mb:>10.1f}{elapsed:>10.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
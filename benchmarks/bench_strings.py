@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+String building benchmark: repeated `s = s + line` with and without ropes.
+
+Usage:
+    python benchmarks/bench_strings.py [engine ...]
+
+The program appends a 13-character line N times to one string, then
+prints its length. With ropes each append adds one piece to a list, so
+doubling N should roughly double the time. The 'flat' columns raise
+ROPE_THRESHOLD out of reach so every result is a plain Python string,
+as before ropes: each append copies the whole string and doubling N
+roughly quadruples the time.
+"""
+
+import sys
+import time
+
+from common import run
+
+from novascriptx import interpreter, ropes
+from novascriptx.interpreter import ENGINES, Lexer, Parser
+
+SIZES = (20000, 40000)
+
+PROGRAM = """
+var s = ""
+for (i in range(N)): s = s + "line of text\\n"
+print(s.length)
+"""
+
+
+def best_time(engine, statements, expected, repeat) -> float:
+    """Return the fastest of `repeat` runs, checking the output."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.process_time()
+        output = run(engine, statements)
+        best = min(best, time.process_time() - start)
+        if output.strip() != expected:
+            raise AssertionError(f"{engine}: wrong output {output!r}")
+    return best
+
+
+def set_threshold(threshold: float) -> None:
+    """Set the rope threshold everywhere it is read."""
+    interpreter.ROPE_THRESHOLD = ropes.ROPE_THRESHOLD = threshold
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    engines = argv or list(ENGINES)
+    parsed = {n: Parser(Lexer(PROGRAM.replace('N', str(n))).scan()).parse() for n in SIZES}
+    small, large = SIZES
+    header = f"{'engine':<9}"
+    for label in ('rope', 'flat'):
+        header += f"{f'{label} {small}':>12}{f'{label} {large}':>12}{'growth':>8}"
+    print(header)
+    threshold = ropes.ROPE_THRESHOLD
+    for engine in engines:
+        line = f"{engine:<9}"
+        for label, limit, repeat in (('rope', threshold, 5), ('flat', float('inf'), 1)):
+            set_threshold(limit)
+            try:
+                times = [best_time(engine, parsed[n], str(13 * n), repeat) for n in SIZES]
+            finally:
+                set_threshold(threshold)
+            line += f"{times[0] * 1000:>10.0f}ms{times[1] * 1000:>10.0f}ms{times[1] / times[0]:>7.1f}x"
+        print(line)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+String formatting benchmark: `+` chains, folded chains and template literals.
+
+Usage:
+    python benchmarks/bench_templates.py [engine ...]
+
+Each program builds N short report lines from five values. 'chain' runs
+the `+` chain as parsed (-O0), one concatenation per operator; 'folded'
+runs the same program after optimizer.optimize() has turned the chain
+into a single format; 'template' writes the line as a template literal.
+"""
+
+import sys
+import time
+
+import common
+
+from novascriptx.interpreter import ENGINES, Lexer, Parser
+
+N = 20000
+
+CHAIN = """
+var line = ""
+var done = 0
+for (i in range(N)): {
+    done = i % 7
+    line = "Item " + i + ": " + done + " of " + 7 + " done (" + done * 100 / 7 + "%), ok=" + (done > 3)
+}
+print(line)
+"""
+
+TEMPLATE = """
+var line = ""
+var done = 0
+for (i in range(N)): {
+    done = i % 7
+    line = `Item ${i}: ${done} of ${7} done (${done * 100 / 7}%), ok=${done > 3}`
+}
+print(line)
+"""
+
+# (program, optimisation level)
+CASES = {
+    'chain': (CHAIN, 0),
+    'folded': (CHAIN, 1),
+    'template': (TEMPLATE, 1),
+}
+
+
+def run(engine, source, opt_level):
+    """Parse and execute a program on an engine and return the output."""
+    statements = Parser(Lexer(source.replace('N', str(N))).scan()).parse()
+    return common.run(engine, statements, opt_level=opt_level)
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    engines = argv or list(ENGINES)
+    print(f"{'engine':<9}{'chain':>10}{'folded':>10}{'template':>10}{'speedup':>9}")
+    for engine in engines:
+        outputs = {run(engine, source, opt_level) for source, opt_level in CASES.values()}
+        if len(outputs) != 1:
+            print(f"{engine:<9}{'WRONG OUTPUT':>30}")
+            return 1
+        best = {name: float('inf') for name in CASES}
+        for _ in range(5):
+            for name, (source, opt_level) in CASES.items():
+                start = time.process_time()
+                run(engine, source, opt_level)
+                best[name] = min(best[name], time.process_time() - start)
+        print(f"{engine:<9}" + ''.join(f"{best[name] * 1000:>8.1f}ms" for name in CASES)
+              + f"{best['chain'] / best['folded']:>8.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
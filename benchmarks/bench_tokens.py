@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Token storage benchmark: bytes per token for each token representation.
+
+Usage:
+    python benchmarks/bench_tokens.py [size_in_mb]
+
+Compares a list of dict-backed tokens (the former Token class), a list of
+__slots__ Tokens (what Lexer.scan() yields) and the struct-of-arrays
+TokenBuffer returned by Lexer.tokenize().
+"""
+
+import gc
+import sys
+import tracemalloc
+
+import common  # puts the repository root on sys.path
+
+from novascriptx.interpreter import Lexer
+from bench_lexer import make_source
+
+
+class DictToken:
+    """The former Token layout: one __dict__ per token, string type."""
+
+    def __init__(self, token_type, value, line):
+        self.type = token_type
+        self.value = value
+        self.line = line
+
+
+def traced_size(build):
+    """Return (object, bytes still allocated after build())."""
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    size_mb = float(argv[0]) if argv else 1.0
+    source = make_source(size_mb)
+    source_mb = len(source) / 1024 / 1024
+
+    dicts, dict_size = traced_size(
+        lambda: [DictToken(t.type, t.value, t.line) for t in Lexer(source).scan()])
+    del dicts
+    slots, slots_size = traced_size(lambda: list(Lexer(source).scan()))
+    del slots
+    buffer, buffer_size = traced_size(lambda: Lexer(source).tokenize())
+    count = len(buffer)
+
+    print(f"source size:   {source_mb:.2f} MB")
+    print(f"tokens:        {count} ({count / source_mb:,.0f} tokens per MB of source)")
+    print(f"{'representation':<22}{'bytes/token':>12}{'tokens/MB RAM':>16}")
+    for label, size in (('dict Token list', dict_size),
+                        ('__slots__ Token list', slots_size),
+                        ('TokenBuffer', buffer_size)):
+        per_token = size / count
+        print(f"{label:<22}{per_token:>12.1f}{1024 * 1024 / per_token:>16,.0f}")
+    print(f"TokenBuffer arrays alone: {buffer.nbytes() / count:.1f} bytes/token")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Type specialisation benchmark.
+
+Usage:
+    python benchmarks/bench_types.py [engine ...]
+
+The loop adds, divides and concatenates variables whose types inference
+can prove: int counters, a float sum, an int divided by an int and a
+string that grows. 'generic' runs the program after the -O2 passes;
+'proven' also specialises the proven operations, as -O2 does, so their
+'+' and '/' skip the string and integer checks (and, on the tree-walking
+engine, the type checks of quickening).
+"""
+
+import sys
+import time
+
+import common
+
+from novascriptx.inference import infer_types, specialise
+from novascriptx.interpreter import ENGINES, Lexer, Parser
+from novascriptx.optimizer import optimize
+
+N = 20000
+
+PROGRAM = """
+var count = 0
+var sum = 0.0
+var buckets = 0
+var text = ""
+var i = 0
+while (i < N): {
+    count = count + i % 3
+    sum = sum + i / 2.0 + 0.25
+    buckets = buckets + i / 100
+    if (i % 1000 == 0): { text = text + "." }
+    i = i + 1
+}
+print(count + " " + sum + " " + buckets + " " + text.length)
+"""
+
+
+def run(engine, proven):
+    """Parse and optimise the program, specialise it if asked, execute it and return the output."""
+    statements = Parser(Lexer(PROGRAM.replace('N', str(N))).scan()).parse()
+    optimize(statements, 2)
+    if proven:
+        specialise(statements, infer_types(statements))
+    return common.run(engine, statements, opt_level=0)
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    engines = argv or list(ENGINES)
+    print(f"{'engine':<9}{'generic':>10}{'proven':>10}{'speedup':>9}")
+    for engine in engines:
+        if run(engine, False) != run(engine, True):
+            print(f"{engine:<9}{'WRONG OUTPUT':>20}")
+            return 1
+        best = {False: float('inf'), True: float('inf')}
+        for _ in range(5):
+            for proven in best:
+                start = time.process_time()
+                run(engine, proven)
+                best[proven] = min(best[proven], time.process_time() - start)
+        print(f"{engine:<9}{best[False] * 1000:>8.1f}ms{best[True] * 1000:>8.1f}ms"
+              f"{best[False] / best[True]:>8.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,28 @@
+"""
+Helpers shared by the benchmarks.
+
+Importing this module puts the repository root on sys.path, so that the
+scripts, run as `python benchmarks/bench_x.py`, can import novascriptx.
+"""
+
+import io
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from novascriptx.interpreter import get_executor_class
+
+
+def run(engine, statements, **settings):
+    """
+    Execute parsed statements on an engine and return the output.
+
+    settings are set as attributes of the executor first (memoize_pure=True).
+    """
+    output = io.StringIO()
+    executor = get_executor_class(engine)(stdout=output)
+    for name, value in settings.items():
+        setattr(executor, name, value)
+    executor.execute(statements)
+    return output.getvalue()
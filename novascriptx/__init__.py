@@ -8,6 +8,7 @@ Main API:
 - run_code(source): Execute NovaScript code from string
 - run_file(filename): Execute NovaScript file
 - run_repl(): Start interactive REPL
+- nodes: AST node classes and NodeVisitor
 
 Example:
     from novascriptx import run_code
@@ -20,10 +21,12 @@ from novascriptx.interpreter import (
     Parser,
     Executor,
     Token,
+    TokenBuffer,
     run_code,
     run_file,
     run_repl,
 )
+from novascriptx import nodes
 
 __all__ = [
     '__version__',
@@ -31,7 +34,9 @@ __all__ = [
     'Parser',
     'Executor',
     'Token',
+    'TokenBuffer',
     'run_code',
     'run_file',
     'run_repl',
+    'nodes',
 ]
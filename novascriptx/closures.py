@@ -0,0 +1,949 @@
+"""
+Closure-compilation engine for NovaScript.
+
+ClosureCompiler walks the AST once and turns every node into a prebuilt
+Python closure: a '+' node becomes a function that calls its two child
+closures and adds the results, an identifier becomes a function that
+looks one name up, and so on. ClosureExecutor runs the compiled program,
+so execution never re-dispatches on node types. Code outside functions
+runs with no local scope, so its names compile to global lookups, and a
+function's parameters compile to local ones.
+
+Statement closures return None when they complete normally, or the
+completion signal RETURN, BREAK or CONTINUE (shared with Executor); a
+returned value is left in ClosureExecutor.return_value. No exceptions
+are raised for control flow. Inside a function, `return f(...)` leaves
+f's body and scope in ClosureExecutor.tail_call instead of calling it,
+and the call site that is returning runs it next, so tail recursion does
+not grow the Python stack. Calls to memoized functions (see memo.py) go
+through ClosureExecutor.run_memoized().
+
+Select the engine with run_code(source, engine='closure').
+"""
+
+import operator
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from novascriptx.interpreter import (
+    BREAK, CONTINUE, RETURN, STACK_DEPTH_MESSAGE, Executor, ReturnException,
+)
+from novascriptx.lists import get_item, get_slice, set_item
+from novascriptx.memo import MISS, MemoCache, memo_key
+from novascriptx.nodes import (
+    BUILTIN_FUNCTIONS, Node, NodeVisitor,
+    VarDecl, FunctionDef, Print, If, While, For, ForIn, Return, Break, Continue,
+    Assignment, ExpressionStatement, Literal, Identifier, BinaryOp, UnaryOp,
+    Call, MemberAccess, MemberCall, ArrayLiteral, ObjectLiteral, Template, Index, Slice,
+)
+from novascriptx.objects import NovaObject
+from novascriptx.quicken import ProvenBinaryOp
+from novascriptx.ropes import STRING_TYPES
+
+Code = Callable[[], Any]
+
+# Operators whose result does not depend on operand types beyond Python's
+# own: op -> (closure over two operand closures, closure over a left
+# operand closure and a constant right operand)
+SIMPLE_OPERATORS: Dict[str, Tuple[Callable[[Code, Code], Code], Callable[[Code, Any], Code]]] = {
+    '-': (lambda l, r: lambda: l() - r(), lambda l, c: lambda: l() - c),
+    '*': (lambda l, r: lambda: l() * r(), lambda l, c: lambda: l() * c),
+    '%': (lambda l, r: lambda: l() % r(), lambda l, c: lambda: l() % c),
+    '==': (lambda l, r: lambda: l() == r(), lambda l, c: lambda: l() == c),
+    '!=': (lambda l, r: lambda: l() != r(), lambda l, c: lambda: l() != c),
+    '<': (lambda l, r: lambda: l() < r(), lambda l, c: lambda: l() < c),
+    '>': (lambda l, r: lambda: l() > r(), lambda l, c: lambda: l() > c),
+    '<=': (lambda l, r: lambda: l() <= r(), lambda l, c: lambda: l() <= c),
+    '>=': (lambda l, r: lambda: l() >= r(), lambda l, c: lambda: l() >= c),
+}
+
+# The same operators as Python functions, for closures that fuse a
+# variable lookup with the operation (i < 10, n - 1)
+OPERATOR_FUNCTIONS: Dict[str, Callable[[Any, Any], Any]] = {
+    '-': operator.sub, '*': operator.mul, '%': operator.mod,
+    '==': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '>': operator.gt, '<=': operator.le, '>=': operator.ge,
+}
+
+# '+' and '/' on operands whose types inference.py has proven, by proven
+# operand type: the bare operation, in the same two forms as SIMPLE_OPERATORS
+PROVEN_OPERATORS: Dict[Tuple[str, str], Tuple[Callable[[Code, Code], Code], Callable[[Code, Any], Code]]] = {
+    ('int', '+'): (lambda l, r: lambda: l() + r(), lambda l, c: lambda: l() + c),
+    ('float', '+'): (lambda l, r: lambda: l() + r(), lambda l, c: lambda: l() + c),
+    ('number', '+'): (lambda l, r: lambda: l() + r(), lambda l, c: lambda: l() + c),
+    ('int', '/'): (lambda l, r: lambda: l() // r(), lambda l, c: lambda: l() // c),
+    ('float', '/'): (lambda l, r: lambda: l() / r(), lambda l, c: lambda: l() / c),
+}
+
+# Operators that always produce a bool, so conditions can skip is_truthy()
+BOOLEAN_OPERATORS = frozenset(('==', '!=', '<', '>', '<=', '>=', 'and'))
+
+
+class ClosureCompiler(NodeVisitor):
+    """Compiles AST nodes into closures bound to one ClosureExecutor."""
+
+    def __init__(self, executor: 'ClosureExecutor'):
+        super().__init__()
+        self.executor = executor
+        # Parameters of the function being compiled, None outside functions;
+        # inside a function a return statement compiles to a tail call
+        self.params: Optional[FrozenSet[str]] = None
+
+    def generic_visit(self, node: Node) -> Code:
+        raise RuntimeError(f"Unknown node type: {node.type}")
+
+    def compile_block(self, statements: List[Node]) -> Code:
+        """Compile a statement list into one closure returning a signal."""
+        codes = tuple(self.visit(stmt) for stmt in statements)
+
+        if not codes:
+            return lambda: None
+        if len(codes) == 1:
+            return codes[0]
+        if len(codes) == 2:
+            first, second = codes
+
+            def block2():
+                return first() or second()
+            return block2
+
+        def block():
+            for code in codes:
+                signal = code()
+                if signal is not None:
+                    return signal
+            return None
+        return block
+
+    def compile_function(self, func_def: FunctionDef) -> Code:
+        """Compile a function body, where returns of calls are tail calls."""
+        params, self.params = self.params, frozenset(func_def.params)
+        try:
+            return self.compile_block(func_def.body)
+        finally:
+            self.params = params
+
+    def compile_result(self, func_def: FunctionDef) -> Optional[Code]:
+        """
+        Compile the value of a function whose body is just `return <expr>`,
+        so that calls can evaluate it directly; None for any other function.
+        """
+        body = func_def.body
+        if len(body) != 1 or body[0].__class__ is not Return:
+            return None
+        value_node = body[0].value
+        # A returned call is a tail call, which only the full body handles
+        if value_node is None or (value_node.__class__ is Call
+                                  and value_node.name not in BUILTIN_FUNCTIONS):
+            return None
+        params, self.params = self.params, frozenset(func_def.params)
+        try:
+            return self.visit(value_node)
+        finally:
+            self.params = params
+
+    def compile_condition(self, expr: Node) -> Code:
+        """Compile an expression whose Python truth value is its NovaScript truthiness."""
+        code = self.visit(expr)
+        if isinstance(expr, BinaryOp) and expr.op in BOOLEAN_OPERATORS:
+            return code
+        is_truthy = self.executor.is_truthy
+        return lambda: is_truthy(code())
+
+    # ------------------------------------------------------------------
+    # Statements
+    # ------------------------------------------------------------------
+
+    def visit_VarDecl(self, stmt: VarDecl) -> Code:
+        executor = self.executor
+        global_scope = executor.global_scope
+        name = stmt.name
+        value = self.visit(stmt.value)
+
+        if self.params is None:
+            def global_var_decl():
+                global_scope[name] = value()
+            return global_var_decl
+
+        def var_decl():
+            result = value()
+            local = executor.local_scope
+            (global_scope if local is None else local)[name] = result
+        return var_decl
+
+    def visit_FunctionDef(self, stmt: FunctionDef) -> Code:
+        executor = self.executor
+        global_scope = executor.global_scope
+        name = stmt.name
+        executor.functions[stmt] = self.compile_function(stmt)
+
+        def function_def():
+            local = executor.local_scope
+            (global_scope if local is None else local)[name] = stmt
+        return function_def
+
+    def visit_Print(self, stmt: Print) -> Code:
+        executor = self.executor
+        value = self.visit(stmt.value)
+        to_string = executor.to_string
+
+        def print_():
+            print(to_string(value()), file=executor.stdout)
+        return print_
+
+    def visit_If(self, stmt: If) -> Code:
+        condition = self.compile_condition(stmt.condition)
+        then = self.compile_block(stmt.then)
+
+        if not stmt.else_:
+            def if_():
+                if condition():
+                    return then()
+                return None
+            return if_
+
+        else_ = self.compile_block(stmt.else_)
+
+        def if_else():
+            if condition():
+                return then()
+            return else_()
+        return if_else
+
+    def visit_While(self, stmt: While) -> Code:
+        condition = self.compile_condition(stmt.condition)
+        body = self.compile_block(stmt.body)
+
+        def while_():
+            while condition():
+                signal = body()
+                if signal is not None:
+                    if signal is BREAK:
+                        break
+                    if signal is RETURN:
+                        return signal
+            return None
+        return while_
+
+    def visit_For(self, stmt: For) -> Code:
+        init = self.visit(stmt.init) if stmt.init else None
+        condition = self.compile_condition(stmt.condition)
+        update = self.visit(stmt.update)
+        body = self.compile_block(stmt.body)
+
+        def for_():
+            if init is not None:
+                init()
+            while condition():
+                signal = body()
+                if signal is not None:
+                    if signal is BREAK:
+                        break
+                    if signal is RETURN:
+                        return signal
+                update()
+            return None
+        return for_
+
+    def visit_ForIn(self, stmt: ForIn) -> Code:
+        executor = self.executor
+        global_scope = executor.global_scope
+        iterate = executor.iterate
+        name = stmt.name
+        iterable = self.visit(stmt.iterable)
+        body = self.compile_block(stmt.body)
+
+        def for_in():
+            # The variable binds like var: a local inside a function
+            local = executor.local_scope
+            scope = global_scope if local is None else local
+            for scope[name] in iterate(iterable()):
+                signal = body()
+                if signal is not None:
+                    if signal is BREAK:
+                        break
+                    if signal is RETURN:
+                        return signal
+            return None
+        return for_in
+
+    def visit_Return(self, stmt: Return) -> Code:
+        value_node = stmt.value
+        if (self.params is not None and value_node.__class__ is Call
+                and value_node.name not in BUILTIN_FUNCTIONS):
+            return self.compile_call(value_node, tail=True)
+
+        executor = self.executor
+        value = self.visit(value_node) if value_node else (lambda: None)
+
+        def return_():
+            executor.return_value = value()
+            return RETURN
+        return return_
+
+    def visit_Break(self, stmt: Break) -> Code:
+        return lambda: BREAK
+
+    def visit_Continue(self, stmt: Continue) -> Code:
+        return lambda: CONTINUE
+
+    def visit_Assignment(self, stmt: Assignment) -> Code:
+        target = stmt.target
+        if target.__class__ is Index:
+            return self.compile_set_item(target, stmt.value)
+        if target.__class__ is MemberAccess:
+            return self.compile_set_member(target, stmt.value)
+        if target.__class__ is not Identifier:
+            def invalid():
+                raise RuntimeError("Invalid assignment target")
+            return invalid
+
+        name = target.name
+        value_node = stmt.value
+        if (isinstance(value_node, BinaryOp) and value_node.op in ('+', '-')
+                and value_node.left.__class__ is Identifier and value_node.left.name == name):
+            proven = value_node.function if isinstance(value_node, ProvenBinaryOp) else None
+            return self.compile_update(name, value_node.op, value_node.right, proven)
+
+        value = self.visit(value_node)
+        executor = self.executor
+        global_scope = executor.global_scope
+
+        if self.params is None:
+            def global_assignment():
+                global_scope[name] = value()
+            return global_assignment
+        if name in self.params:
+            def parameter_assignment():
+                executor.local_scope[name] = value()
+            return parameter_assignment
+
+        def assignment():
+            result = value()
+            local = executor.local_scope
+            # Look up through scope chain
+            if local is None or (name not in local and name in global_scope):
+                global_scope[name] = result
+            else:
+                local[name] = result
+        return assignment
+
+    def compile_set_item(self, target: Index, value_node: Node) -> Code:
+        """Compile `object[index] = value`."""
+        obj_code = self.visit(target.object)
+        index_code = self.visit(target.index)
+        value = self.visit(value_node)
+
+        def set_item_():
+            set_item(obj_code(), index_code(), value())
+        return set_item_
+
+    def compile_set_member(self, target: MemberAccess, value_node: Node) -> Code:
+        """Compile `object.member = value` through the target's shape cache."""
+        obj_code = self.visit(target.object)
+        value = self.visit(value_node)
+        cache = target.cache
+
+        def set_member():
+            obj = obj_code()
+            result = value()
+            if obj.__class__ is NovaObject and obj.shape is cache.shape:
+                obj.values[cache.offset] = result
+            else:
+                cache.store(obj, result)
+        return set_member
+
+    def compile_update(self, name: str, op: str, right: Node,
+                       proven: Optional[Callable[[Any, Any], Any]] = None) -> Code:
+        """
+        Compile `name = name + right` / `name = name - right` into one closure.
+
+        The variable is stored back into the scope it was read from, which
+        is where the assignment rules would put it. `proven` is the operator
+        of an operation whose operand types inference.py has proven, which
+        needs no string check.
+        """
+        executor = self.executor
+        global_scope = executor.global_scope
+        to_string = executor.to_string
+        concat = executor.concat
+        is_global = self.params is None
+        is_parameter = not is_global and name in self.params
+
+        def lookup() -> Dict[str, Any]:
+            if is_parameter:
+                return executor.local_scope
+            local = executor.local_scope
+            scope = global_scope if is_global or name not in local else local
+            if name not in scope:
+                raise NameError(f"Undefined variable: {name}")
+            return scope
+
+        if isinstance(right, Literal) and not isinstance(right.value, str):
+            constant = right.value
+            constant_string = to_string(constant)
+
+            # The hottest forms (i = i + 1) do their own lookup; outside
+            # functions the scope and the operator are known when compiling
+            if is_global and op == '-':
+                def global_decrement():
+                    try:
+                        value = global_scope[name]
+                    except KeyError:
+                        raise NameError(f"Undefined variable: {name}") from None
+                    global_scope[name] = value - constant
+                return global_decrement
+            if is_global:
+                def global_increment():
+                    try:
+                        value = global_scope[name]
+                    except KeyError:
+                        raise NameError(f"Undefined variable: {name}") from None
+                    if value.__class__ is int or proven is not None or not isinstance(value, STRING_TYPES):
+                        global_scope[name] = value + constant
+                    else:
+                        global_scope[name] = concat(value, constant_string)
+                return global_increment
+
+            def step():
+                if is_parameter:
+                    scope = executor.local_scope
+                else:
+                    local = executor.local_scope
+                    scope = local if name in local else global_scope
+                    if name not in scope:
+                        raise NameError(f"Undefined variable: {name}")
+                value = scope[name]
+                if op == '-':
+                    scope[name] = value - constant
+                elif proven is not None or not isinstance(value, STRING_TYPES):
+                    scope[name] = value + constant
+                else:
+                    scope[name] = concat(value, constant_string)
+            return step
+
+        right_code = self.visit(right)
+        if op == '-':
+            def subtract_update():
+                scope = lookup()
+                value = scope[name]
+                scope[name] = value - right_code()
+            return subtract_update
+
+        if proven is not None:
+            def proven_update():
+                scope = lookup()
+                value = scope[name]
+                scope[name] = proven(value, right_code())
+            return proven_update
+
+        def add_update():
+            scope = lookup()
+            value = scope[name]
+            rhs = right_code()
+            if isinstance(value, STRING_TYPES) or isinstance(rhs, STRING_TYPES):
+                scope[name] = concat(value, rhs)
+            else:
+                scope[name] = value + rhs
+        return add_update
+
+    def visit_ExpressionStatement(self, stmt: ExpressionStatement) -> Code:
+        value = self.visit(stmt.value)
+
+        def expression_statement():
+            value()
+        return expression_statement
+
+    # ------------------------------------------------------------------
+    # Expressions
+    # ------------------------------------------------------------------
+
+    def visit_Literal(self, expr: Literal) -> Code:
+        value = expr.value
+        return lambda: value
+
+    def visit_Identifier(self, expr: Identifier) -> Code:
+        executor = self.executor
+        global_scope = executor.global_scope
+        name = expr.name
+
+        if self.params is None:
+            def global_identifier():
+                try:
+                    return global_scope[name]
+                except KeyError:
+                    raise NameError(f"Undefined variable: {name}") from None
+            return global_identifier
+        if name in self.params:
+            return lambda: executor.local_scope[name]
+
+        def identifier():
+            local = executor.local_scope
+            # Look up in local scope first, then global
+            if local is not None and name in local:
+                return local[name]
+            if name in global_scope:
+                return global_scope[name]
+            raise NameError(f"Undefined variable: {name}")
+        return identifier
+
+    def compile_name_operation(self, name: str, function: Callable[[Any, Any], Any],
+                               constant: Any) -> Code:
+        """Compile `name <op> constant` into one closure that also does the lookup."""
+        executor = self.executor
+        global_scope = executor.global_scope
+
+        if self.params is None:
+            def global_operation():
+                try:
+                    value = global_scope[name]
+                except KeyError:
+                    raise NameError(f"Undefined variable: {name}") from None
+                return function(value, constant)
+            return global_operation
+        if name in self.params:
+            return lambda: function(executor.local_scope[name], constant)
+
+        def name_operation():
+            local = executor.local_scope
+            if local is not None and name in local:
+                return function(local[name], constant)
+            if name in global_scope:
+                return function(global_scope[name], constant)
+            raise NameError(f"Undefined variable: {name}")
+        return name_operation
+
+    def visit_MemberAccess(self, expr: MemberAccess) -> Code:
+        obj_code = self.visit(expr.object)
+        cache = expr.cache
+
+        def member_access():
+            obj = obj_code()
+            if obj is cache.object:
+                return cache.value
+            if obj.__class__ is NovaObject and obj.shape is cache.shape:
+                return obj.values[cache.offset]
+            return cache.load(obj)
+        return member_access
+
+    def visit_MemberCall(self, expr: MemberCall) -> Code:
+        obj_code = self.visit(expr.object)
+        arg_codes = tuple(self.visit(arg) for arg in expr.args)
+        cache = expr.cache
+        load_method = self.executor.load_method
+
+        def member_call():
+            obj = obj_code()
+            args = [arg() for arg in arg_codes]
+            if obj is cache.object:
+                return cache.value(*args)
+            return load_method(cache, obj)(*args)
+        return member_call
+
+    def visit_ArrayLiteral(self, expr: ArrayLiteral) -> Code:
+        element_codes = tuple(self.visit(element) for element in expr.elements)
+        return lambda: [element() for element in element_codes]
+
+    def visit_ObjectLiteral(self, expr: ObjectLiteral) -> Code:
+        value_codes = tuple(self.visit(value) for value in expr.values)
+        shape = expr.shape
+        return lambda: NovaObject(shape, [value() for value in value_codes])
+
+    def visit_Template(self, expr: Template) -> Code:
+        value_codes = tuple(self.visit(value) for value in expr.values)
+        to_string = self.executor.to_string
+        build = expr.pattern.format
+        if len(value_codes) == 1:
+            (first,) = value_codes
+            return lambda: build(to_string(first()))
+        if len(value_codes) == 2:
+            first, second = value_codes
+            return lambda: build(to_string(first()), to_string(second()))
+        return lambda: build(*[to_string(value()) for value in value_codes])
+
+    def visit_Index(self, expr: Index) -> Code:
+        obj_code = self.visit(expr.object)
+        index_code = self.visit(expr.index)
+
+        def index():
+            obj = obj_code()
+            position = index_code()
+            # Lists with an in-range int index skip the checks in get_item()
+            if obj.__class__ is list and position.__class__ is int and -len(obj) <= position < len(obj):
+                return obj[position]
+            return get_item(obj, position)
+        return index
+
+    def visit_Slice(self, expr: Slice) -> Code:
+        obj_code = self.visit(expr.object)
+        none = lambda: None
+        start = none if expr.start is None else self.visit(expr.start)
+        stop = none if expr.stop is None else self.visit(expr.stop)
+        return lambda: get_slice(obj_code(), start(), stop())
+
+    def visit_BinaryOp(self, expr: BinaryOp) -> Code:
+        op = expr.op
+        left = self.visit(expr.left)
+        right = self.visit(expr.right)
+        is_truthy = self.executor.is_truthy
+        to_string = self.executor.to_string
+        concat = self.executor.concat
+
+        simple = SIMPLE_OPERATORS.get(op)
+        function = OPERATOR_FUNCTIONS.get(op)
+        if isinstance(expr, ProvenBinaryOp):
+            # Operand types proven by inference.py: '+' and '/' need no checks either
+            if expr.operand_type == 'string':
+                return lambda: concat(left(), right())
+            simple = PROVEN_OPERATORS.get((expr.operand_type, op), simple)
+            function = expr.function
+        if simple is not None:
+            # A literal right operand (n - 1, i < 10) is folded into the closure
+            if isinstance(expr.right, Literal):
+                if isinstance(expr.left, Identifier):
+                    return self.compile_name_operation(expr.left.name, function, expr.right.value)
+                return simple[1](left, expr.right.value)
+            return simple[0](left, right)
+
+        if op == '+' and isinstance(expr.right, Literal):
+            constant = expr.right.value
+            if isinstance(constant, str):
+                return lambda: concat(left(), constant)
+            constant_string = to_string(constant)
+
+            def add_constant():
+                lhs = left()
+                if isinstance(lhs, STRING_TYPES):
+                    return concat(lhs, constant_string)
+                return lhs + constant
+            return add_constant
+
+        if op == '+' and isinstance(expr.left, Literal) and isinstance(expr.left.value, str):
+            constant = expr.left.value
+            return lambda: concat(constant, right())
+
+        if op == '+':
+            def add():
+                lhs = left()
+                rhs = right()
+                if lhs.__class__ is int and rhs.__class__ is int:
+                    return lhs + rhs
+                if isinstance(lhs, STRING_TYPES) or isinstance(rhs, STRING_TYPES):
+                    return concat(lhs, rhs)
+                return lhs + rhs
+            return add
+
+        if op == '/':
+            def divide():
+                lhs = left()
+                rhs = right()
+                if isinstance(lhs, int) and isinstance(rhs, int):
+                    return lhs // rhs
+                return lhs / rhs
+            return divide
+
+        # 'and' / 'or' only run the right operand when it decides the result
+        if op == 'and':
+            return lambda: is_truthy(left()) and is_truthy(right())
+
+        if op == 'or':
+            def or_():
+                lhs = left()
+                return lhs if is_truthy(lhs) else right()
+            return or_
+
+        def unknown():
+            left()
+            right()
+            raise RuntimeError(f"Unknown operator: {op}")
+        return unknown
+
+    def visit_UnaryOp(self, expr: UnaryOp) -> Code:
+        op = expr.op
+        operand = self.visit(expr.expr)
+
+        if op == '-':
+            return lambda: -operand()
+        if op == '!':
+            is_truthy = self.executor.is_truthy
+            return lambda: not is_truthy(operand())
+
+        def unknown():
+            operand()
+            raise RuntimeError(f"Unknown unary operator: {op}")
+        return unknown
+
+    def visit_Call(self, expr: Call) -> Code:
+        return self.compile_call(expr)
+
+    def compile_call(self, expr: Call, tail: bool = False) -> Code:
+        """
+        Compile a call. A tail call is compiled as a return statement: it
+        sets up executor.tail_call and signals RETURN.
+        """
+        executor = self.executor
+        global_scope = executor.global_scope
+        name = expr.name
+        arg_codes = tuple(self.visit(arg) for arg in expr.args)
+        count = len(arg_codes)
+
+        # Handle the built-in require() and range() functions
+        if name in BUILTIN_FUNCTIONS:
+            builtin = getattr(executor, 'builtin_' + name)
+            return lambda: builtin([arg() for arg in arg_codes])
+
+        def resolve(func_def: Any) -> FunctionDef:
+            """Validate the value bound to `name` as a callee for this call site."""
+            if func_def is None and name not in global_scope:
+                raise NameError(f"Undefined function: {name}")
+            if not isinstance(func_def, FunctionDef):
+                raise TypeError(f"{name} is not a function")
+            if count != len(func_def.params):
+                raise TypeError(
+                    f"{name}() takes {len(func_def.params)} arguments "
+                    f"({count} given)"
+                )
+            return func_def
+
+        # The callee last seen at this call site (none yet); the argument count
+        # is fixed per site, so it only has to be checked when the callee changes
+        cached: Any = object()
+        params: List[str] = []
+        body: Code = lambda: None
+        result: Optional[Code] = None
+        memo_cache: Optional[MemoCache] = None
+
+        if tail:
+            def tail_call():
+                nonlocal cached, params, body, memo_cache
+                args = [arg() for arg in arg_codes]
+
+                func_def = global_scope.get(name)
+                if func_def is not cached:
+                    params = resolve(func_def).params
+                    body = executor.function_body(func_def)
+                    memo_cache = func_def.cache
+                    cached = func_def
+
+                executor.tail_call = (body, dict(zip(params, args)), memo_cache)
+                return RETURN
+            return tail_call
+
+        if count == 1:
+            arg_code = arg_codes[0]
+            param = ''
+
+            def call1():
+                nonlocal cached, param, body, result, memo_cache
+                arg = arg_code()
+
+                func_def = global_scope.get(name)
+                if func_def is not cached:
+                    param = resolve(func_def).params[0]
+                    body = executor.function_body(func_def)
+                    result = executor.function_result(func_def)
+                    memo_cache = func_def.cache
+                    cached = func_def
+
+                if memo_cache is not None:
+                    return executor.run_memoized(body, {param: arg}, memo_cache)
+                prev_local = executor.local_scope
+                executor.local_scope = {param: arg}
+                run = body
+                try:
+                    if result is not None:
+                        return result()
+                    while run() is not None:
+                        tail_call = executor.tail_call
+                        if tail_call is None:
+                            return executor.return_value
+                        executor.tail_call = None
+                        run, executor.local_scope, cache = tail_call
+                        if cache is not None:
+                            return executor.run_memoized(run, executor.local_scope, cache)
+                    return None
+                finally:
+                    executor.local_scope = prev_local
+            return call1
+
+        if count == 2:
+            first_code, second_code = arg_codes
+            first = second = ''
+
+            def call2():
+                nonlocal cached, first, second, body, result, memo_cache
+                arg1 = first_code()
+                arg2 = second_code()
+
+                func_def = global_scope.get(name)
+                if func_def is not cached:
+                    first, second = resolve(func_def).params
+                    body = executor.function_body(func_def)
+                    result = executor.function_result(func_def)
+                    memo_cache = func_def.cache
+                    cached = func_def
+
+                if memo_cache is not None:
+                    return executor.run_memoized(body, {first: arg1, second: arg2}, memo_cache)
+                prev_local = executor.local_scope
+                executor.local_scope = {first: arg1, second: arg2}
+                run = body
+                try:
+                    if result is not None:
+                        return result()
+                    while run() is not None:
+                        tail_call = executor.tail_call
+                        if tail_call is None:
+                            return executor.return_value
+                        executor.tail_call = None
+                        run, executor.local_scope, cache = tail_call
+                        if cache is not None:
+                            return executor.run_memoized(run, executor.local_scope, cache)
+                    return None
+                finally:
+                    executor.local_scope = prev_local
+            return call2
+
+        def call():
+            nonlocal cached, params, body, result, memo_cache
+            args = [arg() for arg in arg_codes]
+
+            func_def = global_scope.get(name)
+            if func_def is not cached:
+                params = resolve(func_def).params
+                body = executor.function_body(func_def)
+                result = executor.function_result(func_def)
+                memo_cache = func_def.cache
+                cached = func_def
+
+            if memo_cache is not None:
+                return executor.run_memoized(body, dict(zip(params, args)), memo_cache)
+            prev_local = executor.local_scope
+            executor.local_scope = dict(zip(params, args))
+            run = body
+            try:
+                if result is not None:
+                    return result()
+                # Run the body, then any tail calls it hands back
+                while run() is not None:
+                    tail_call = executor.tail_call
+                    if tail_call is None:
+                        return executor.return_value
+                    executor.tail_call = None
+                    run, executor.local_scope, cache = tail_call
+                    if cache is not None:
+                        return executor.run_memoized(run, executor.local_scope, cache)
+                return None
+            finally:
+                executor.local_scope = prev_local
+        return call
+
+
+class ClosureExecutor(Executor):
+    """
+    Executes NovaScript by compiling statements to closures first.
+
+    Behaves exactly like Executor (same scopes, builtins and errors) and
+    can be used in its place.
+    """
+
+    def __init__(self, stdout=None):
+        super().__init__(stdout=stdout)
+        # Compiled bodies of the function definitions seen so far
+        self.functions: Dict[FunctionDef, Code] = {}
+        # Compiled return values of the functions that only return one
+        self.results: Dict[FunctionDef, Optional[Code]] = {}
+        self.return_value: Any = None
+        self.compiler = ClosureCompiler(self)
+
+    def create_global_scope(self) -> Dict[str, Any]:
+        # Globals are looked up by name at run time, so a plain dict is fastest
+        return {}
+
+    def function_body(self, func_def: FunctionDef) -> Code:
+        """Return the compiled body of a function definition."""
+        body = self.functions.get(func_def)
+        if body is None:
+            body = self.functions[func_def] = self.compiler.compile_function(func_def)
+        return body
+
+    def function_result(self, func_def: FunctionDef) -> Optional[Code]:
+        """Return the compiled value of a `return <expr>` function, else None."""
+        if func_def not in self.results:
+            self.results[func_def] = self.compiler.compile_result(func_def)
+        return self.results[func_def]
+
+    def run_memoized(self, body: Code, scope: Dict[str, Any], cache: Optional[MemoCache]) -> Any:
+        """
+        Run a call to a memoized function in a new scope.
+
+        `scope` maps the parameters to the arguments. The result comes from
+        the cache if it has one for them; otherwise the body runs, tail
+        calls included, and the final result is cached for every memoized
+        function the tail calls passed through.
+        """
+        pending: List[Tuple[MemoCache, tuple]] = []
+        prev_local = self.local_scope
+        try:
+            while True:
+                if cache is not None:
+                    key = memo_key(scope.values())
+                    value = cache.get(key)
+                    if value is not MISS:
+                        break
+                    pending.append((cache, key))
+                self.local_scope = scope
+                if body() is None:
+                    value = None
+                    break
+                tail_call = self.tail_call
+                if tail_call is None:
+                    value = self.return_value
+                    break
+                self.tail_call = None
+                body, scope, cache = tail_call
+        finally:
+            self.local_scope = prev_local
+        for cache, key in pending:
+            cache.put(key, value)
+        return value
+
+    def call_function(self, function: Any, args: List[Any]) -> Any:
+        if not isinstance(function, FunctionDef):
+            return super().call_function(function, args)
+        self.check_arguments(function, len(args))
+        return self.run_memoized(self.function_body(function),
+                                 dict(zip(function.params, args)), function.cache)
+
+    def compile(self, statements: List[Node]) -> Code:
+        """Compile statements into a single closure."""
+        return self.compiler.compile_block(statements)
+
+    def execute(self, statements: List[Node]) -> Any:
+        """Compile and run a list of statements."""
+        self.optimize_program(statements)
+        self.prepare_memo(statements)
+        result: Optional[Any] = None
+        # Like Executor.execute(), return the value of a trailing expression
+        if statements and isinstance(statements[-1], ExpressionStatement):
+            body = self.compile(statements[:-1])
+            tail = self.compiler.visit(statements[-1].value)
+        else:
+            body = self.compile(statements)
+            tail = None
+
+        try:
+            if body() is not None:
+                raise ReturnException(self.return_value)
+            if tail is not None:
+                result = tail()
+        except RecursionError:
+            raise RecursionError(STACK_DEPTH_MESSAGE) from None
+        return result
+
+    def execute_statement(self, stmt: Node) -> Any:
+        """Compile and run a single statement."""
+        return self.execute([stmt])
+
+    def evaluate_expression(self, expr: Node) -> Any:
+        """Compile and evaluate an expression."""
+        return self.compiler.visit(expr)()
@@ -0,0 +1,547 @@
+"""
+Static type inference, and the specialisation of the operations it proves.
+
+infer_types() works out which types the values of every variable and
+expression of a program can have: int, float, string (ropes included),
+bool, function, or other (lists, objects, modules and null). It runs the
+program abstractly, with a set of types in place of each value:
+
+- Top-level code is followed in order, so after `x = 1` x is an int and
+  after a later `x = "a"` a string. Both branches of an `if` join their
+  types, and a loop is run again until the types of its variables stop
+  growing. Globals the program starts with (earlier REPL lines) have the
+  type of their value.
+- A function defined once, at top level, and only ever called by name
+  has all its calls in view: its parameters have the types of their
+  arguments. Any other function (used as a value, redefined or nested)
+  takes parameters of any type. Locals are followed in order from the
+  start of the body; a global read inside a function has every type the
+  program ever assigns to it.
+- A call of such a function has the types its `return`s give, plus other
+  (null) when the body can end without one. A call of anything else may
+  return anything. Any call may run a function that assigns globals, so
+  the top-level types of those globals widen at every call.
+- Operators follow the executor's rules: `+` makes a string when either
+  operand may be one, `/` of two ints is an int, comparisons are bools.
+  A module constant, and a module function annotated with a single return
+  type, have that type.
+
+Functions and the code calling them feed each other, so the whole
+analysis repeats until no type grows. With whole_program False (the REPL,
+where later lines may call this line's functions with anything and change
+any global), parameters and the globals read in functions take any type.
+
+specialise() then rewrites every BinaryOp whose operand types are proven
+into a proven variant from quicken.py: int, float, number (ints and
+floats mixed; no '/') or string ('+' only). The tree-walking Executor
+runs the variant's handler, which applies the operator without checking
+the operands; ClosureExecutor, VMExecutor and the transpiler compile '+'
+and '/' of a proven variant to the bare operation, without the string
+and integer checks of the generic one. Executor.optimize_program() does
+both from SPECIALISE_LEVEL (-O2) on, after the optimiser's passes, and
+`novax --types` prints what infer_types() found.
+"""
+
+import inspect
+from collections import defaultdict
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Set, Tuple
+
+from novascriptx.nodes import (
+    BUILTIN_FUNCTIONS, Node, walk,
+    VarDecl, FunctionDef, Print, If, While, For, ForIn, Return, Break, Continue, Assignment,
+    ExpressionStatement,
+    Literal, Identifier, BinaryOp, UnaryOp, Call, MemberAccess, MemberCall,
+    ArrayLiteral, ObjectLiteral, Template, Index, Slice,
+)
+from novascriptx.optimizer import binding_name, describe
+from novascriptx.quicken import PROVEN_CLASSES, operand_shape
+from novascriptx.resolver import collect_bindings
+from novascriptx.ropes import Rope
+
+# Optimisation level from which the executors specialise proven operations
+SPECIALISE_LEVEL = 2
+
+# Types a value can have; UNSET marks a variable that may not be assigned yet
+INT, FLOAT, STRING, BOOL, FUNCTION, OTHER = 'int', 'float', 'string', 'bool', 'function', 'other'
+UNSET = 'unset'
+
+Types = FrozenSet[str]
+
+NONE: Types = frozenset()
+ANY: Types = frozenset((INT, FLOAT, STRING, BOOL, FUNCTION, OTHER))
+UNASSIGNED: Types = frozenset((UNSET,))
+INT_LIKE: Types = frozenset((INT, BOOL))
+NUMBERS: Types = frozenset((INT, FLOAT, BOOL))
+
+# Order of the types in printed type sets
+TYPE_ORDER = (INT, FLOAT, STRING, BOOL, FUNCTION, OTHER)
+
+COMPARISONS = frozenset(('==', '!=', '<', '>', '<=', '>='))
+
+# Variable types of one scope at one point of the program
+Env = Dict[str, Types]
+
+
+class ProgramTypes:
+    """
+    The types infer_types() found for a program.
+
+    expressions maps each expression node to its types, empty for one that
+    never runs (or never completes). variables maps each scope, None for
+    the top level and the FunctionDef of a function, to the types each of
+    its variables is ever given; params and returns hold each function's
+    parameter and result types.
+    """
+
+    def __init__(self, statements: List[Node], global_values: Mapping[str, Any],
+                 whole_program: bool):
+        from novascriptx.stdlib import MODULES
+
+        self.statements = statements
+        self.whole_program = whole_program
+        declared, assigned = collect_bindings(statements)
+        self.globals: Set[str] = declared | assigned | set(global_values)
+        self.initial: Dict[str, Types] = {
+            name: frozenset((type_of(value),)) for name, value in global_values.items()}
+
+        # Every function, how often each name is bound and which names are read
+        self.functions: List[FunctionDef] = []
+        bindings: Dict[str, List[Node]] = defaultdict(list)
+        read: Set[str] = set()
+        for node in walk(statements):
+            cls = node.__class__
+            if cls is FunctionDef:
+                self.functions.append(node)
+                for param in node.params:
+                    bindings[param].append(node)
+            elif cls is Identifier:
+                read.add(node.name)
+            name = binding_name(node)
+            if name is not None:
+                bindings[name].append(node)
+
+        # Functions whose every call is in view, by name
+        nested = {node for function in self.functions for node in walk(function.body)}
+        self.callable: Dict[str, FunctionDef] = {}
+        if whole_program:
+            for function in self.functions:
+                name = function.name
+                if (function not in nested and len(bindings[name]) == 1 and name not in read
+                        and name not in global_values and name not in BUILTIN_FUNCTIONS):
+                    self.callable[name] = function
+
+        # Variables only ever bound to a stdlib module: their members
+        self.modules: Dict[str, Dict[str, Any]] = {}
+        if whole_program:
+            for name, nodes in bindings.items():
+                value = getattr(nodes[0], 'value', None)
+                if (len(nodes) == 1 and nodes[0].__class__ is VarDecl and name not in global_values
+                        and value.__class__ is Call and value.name == 'require'
+                        and len(value.args) == 1 and value.args[0].__class__ is Literal
+                        and value.args[0].value in MODULES):
+                    self.modules[name] = MODULES[value.args[0].value].create_module()
+
+        self.params: Dict[FunctionDef, List[Types]] = {
+            function: [NONE if self.callable.get(function.name) is function else ANY] * len(function.params)
+            for function in self.functions}
+        self.returns: Dict[FunctionDef, Types] = {function: NONE for function in self.functions}
+        # Every type each global is given, and the types functions assign to them
+        self.summary: Dict[str, Types] = defaultdict(frozenset, self.initial)
+        self.function_writes: Dict[str, Types] = defaultdict(frozenset)
+
+        self.expressions: Dict[Node, Types] = {}
+        self.variables: Dict[Optional[FunctionDef], Dict[str, Types]] = {}
+        # (break, continue) environments of the loops being analysed
+        self.loops: List[Tuple[List[Env], List[Env]]] = []
+        self.function: Optional[FunctionDef] = None
+
+        self.grown = True
+        while self.grown:
+            self.grown = False
+            self.expressions = {}
+            self.variables = {None: {}}
+            self.function = None
+            self.analyse_block(statements, {name: self.initial.get(name, UNASSIGNED)
+                                            for name in self.globals})
+            for function in self.functions:
+                self.analyse_function(function)
+
+    def of(self, expr: Node) -> Types:
+        """Return the types of an expression's values."""
+        return self.expressions.get(expr, NONE)
+
+    def widen(self, table: Any, key: Any, types: Types) -> None:
+        """Add types to a summary, noting that the analysis must run again."""
+        old = table[key]
+        if not types <= old:
+            table[key] = old | types
+            self.grown = True
+
+    # ------------------------------------------------------------------
+    # Scopes
+    # ------------------------------------------------------------------
+
+    def analyse_function(self, function: FunctionDef) -> None:
+        self.function = function
+        variables = self.variables[function] = {}
+        declared, assigned = collect_bindings(function.body)
+        env = {name: UNASSIGNED for name in declared | assigned}
+        for param, types in zip(function.params, self.params[function]):
+            env[param] = types
+            variables[param] = types
+        if self.analyse_block(function.body, env) is not None:
+            # Running off the end returns null
+            self.widen(self.returns, function, frozenset((OTHER,)))
+
+    def may_be_global(self, name: str) -> bool:
+        return not self.whole_program or name in self.globals
+
+    def global_types(self, name: str) -> Types:
+        """Return the types a global read inside a function can have."""
+        return self.summary[name] if self.whole_program else ANY
+
+    def read(self, name: str, env: Env) -> Types:
+        types = env.get(name)
+        if self.function is None:
+            if types is None:
+                return NONE if self.whole_program else ANY
+            return types - UNASSIGNED
+        if types is None:
+            return self.global_types(name)
+        if UNSET in types:
+            # An unassigned local reads the global of the same name
+            types = types - UNASSIGNED
+            if self.may_be_global(name):
+                types |= self.global_types(name)
+        return types
+
+    def bind(self, name: str, types: Types, env: Env, declare: bool) -> None:
+        """Record an assignment; `declare` for var, function and for-in bindings."""
+        variables = self.variables[self.function]
+        variables[name] = variables.get(name, NONE) | types
+        if self.function is None:
+            env[name] = types
+            self.widen(self.summary, name, types)
+            return
+        old = env.get(name, UNASSIGNED)
+        if not declare and UNSET in old and self.may_be_global(name):
+            # An assignment to a local not yet assigned writes an existing global
+            env[name] = old | types
+            self.widen(self.summary, name, types)
+            self.widen(self.function_writes, name, types)
+        else:
+            env[name] = types
+
+    def call_effects(self, env: Env) -> None:
+        """Widen the top-level types of the globals a call may assign."""
+        if self.function is not None:
+            return
+        if not self.whole_program:
+            for name in env:
+                env[name] = env[name] | ANY
+            return
+        for name, types in self.function_writes.items():
+            if name in env:
+                env[name] = env[name] | types
+
+    # ------------------------------------------------------------------
+    # Statements
+    # ------------------------------------------------------------------
+
+    def analyse_block(self, block: List[Node], env: Env) -> Optional[Env]:
+        """Analyse statements; return the types after them, or None if they never complete."""
+        for stmt in block:
+            env = self.analyse_statement(stmt, env)
+            if env is None:
+                return None
+        return env
+
+    def analyse_statement(self, stmt: Node, env: Env) -> Optional[Env]:
+        cls = stmt.__class__
+        if cls is VarDecl:
+            self.bind(stmt.name, self.expression(stmt.value, env), env, True)
+        elif cls is Assignment:
+            target = stmt.target
+            if target.__class__ is Identifier:
+                self.bind(target.name, self.expression(stmt.value, env), env, False)
+            else:
+                for child in (getattr(target, 'object', None), getattr(target, 'index', None), stmt.value):
+                    if child is not None:
+                        self.expression(child, env)
+        elif cls is FunctionDef:
+            self.bind(stmt.name, frozenset((FUNCTION,)), env, True)
+        elif cls is Print or cls is ExpressionStatement:
+            self.expression(stmt.value, env)
+        elif cls is If:
+            self.expression(stmt.condition, env)
+            return join(self.analyse_block(stmt.then, dict(env)),
+                        self.analyse_block(stmt.else_, dict(env)))
+        elif cls is While or cls is For:
+            if cls is For and stmt.init is not None:
+                env = self.analyse_statement(stmt.init, env)
+            return self.analyse_loop(stmt, env)
+        elif cls is ForIn:
+            return self.analyse_for_in(stmt, env)
+        elif cls is Return:
+            types = frozenset((OTHER,)) if stmt.value is None else self.expression(stmt.value, env)
+            if self.function is not None:
+                self.widen(self.returns, self.function, types)
+            return None
+        elif cls is Break or cls is Continue:
+            if self.loops:
+                self.loops[-1][cls is Continue].append(env)
+            elif self.function is not None:
+                # Outside a loop the signal ends the call with no return value of its own
+                self.widen(self.returns, self.function, ANY)
+            return None
+        return env
+
+    def analyse_loop(self, stmt: Node, env: Env) -> Optional[Env]:
+        """Analyse a while or for loop until the types at its head stop growing."""
+        head = env
+        update = stmt.update if stmt.__class__ is For else None
+        while True:
+            state = dict(head)
+            self.expression(stmt.condition, state)
+            self.loops.append(([], []))
+            after = self.analyse_block(stmt.body, dict(state))
+            breaks, continues = self.loops.pop()
+            back = join_all([after] + continues)
+            if back is not None and update is not None:
+                back = self.analyse_statement(update, back)
+            grown = join(head, back)
+            if grown == head:
+                return join_all([state] + breaks)
+            head = grown
+
+    def analyse_for_in(self, stmt: ForIn, env: Env) -> Optional[Env]:
+        iterable = stmt.iterable
+        types = self.expression(iterable, env)
+        if iterable.__class__ is Call and iterable.name == 'range':
+            element = frozenset((INT,))
+        elif types and types <= {STRING}:
+            element = frozenset((STRING,))
+        else:
+            element = ANY
+        head = env
+        while True:
+            state = dict(head)
+            self.bind(stmt.name, element, state, True)
+            self.loops.append(([], []))
+            after = self.analyse_block(stmt.body, state)
+            breaks, continues = self.loops.pop()
+            grown = join(head, join_all([after] + continues))
+            if grown == head:
+                return join_all([head] + breaks)
+            head = grown
+
+    # ------------------------------------------------------------------
+    # Expressions
+    # ------------------------------------------------------------------
+
+    def expression(self, expr: Node, env: Env) -> Types:
+        """Return the types of an expression, recording them for it and its operands."""
+        types = self.expression_types(expr, env)
+        self.expressions[expr] = self.expressions.get(expr, NONE) | types
+        return types
+
+    def expression_types(self, expr: Node, env: Env) -> Types:
+        cls = expr.__class__
+        if cls is Literal:
+            return frozenset((type_of(expr.value),))
+        if cls is Identifier:
+            return self.read(expr.name, env)
+        if isinstance(expr, BinaryOp):
+            left = self.expression(expr.left, env)
+            # The right operand of 'and' / 'or' may not run; calls only widen
+            right = self.expression(expr.right, env)
+            if expr.op == 'and':
+                return frozenset((BOOL,))
+            if expr.op == 'or':
+                return left | right
+            return frozenset(result for left_type in left for right_type in right
+                             for result in binary_types(expr.op, left_type, right_type))
+        if cls is UnaryOp:
+            operand = self.expression(expr.expr, env)
+            if expr.op == '!':
+                return frozenset((BOOL,))
+            if operand <= NUMBERS:
+                # -True is the int -1
+                return frozenset(FLOAT if types == FLOAT else INT for types in operand)
+            return ANY
+        if cls is Call:
+            args = [self.expression(arg, env) for arg in expr.args]
+            if expr.name in BUILTIN_FUNCTIONS:
+                return frozenset((OTHER,))
+            self.call_effects(env)
+            function = self.callable.get(expr.name)
+            if function is None:
+                return ANY
+            if len(args) != len(function.params):
+                return NONE
+            for index, types in enumerate(args):
+                self.widen(self.params[function], index, types)
+            return self.returns[function]
+        if cls is MemberAccess:
+            obj = self.expression(expr.object, env)
+            if self.is_module(expr.object):
+                members = self.modules[expr.object.name]
+                return frozenset((type_of(members[expr.member]),)) if expr.member in members else NONE
+            if obj and obj <= {STRING} and expr.member == 'length':
+                return frozenset((INT,))
+            return ANY
+        if cls is MemberCall:
+            self.expression(expr.object, env)
+            for arg in expr.args:
+                self.expression(arg, env)
+            if self.is_module(expr.object):
+                function = self.modules[expr.object.name].get(expr.member)
+                return annotation_types(function) if callable(function) else NONE
+            self.call_effects(env)
+            return ANY
+        if cls is Template:
+            for value in expr.values:
+                self.expression(value, env)
+            return frozenset((STRING,))
+        if cls is ArrayLiteral or cls is ObjectLiteral:
+            for value in (expr.elements if cls is ArrayLiteral else expr.values):
+                self.expression(value, env)
+            return frozenset((OTHER,))
+        if cls is Index or cls is Slice:
+            obj = self.expression(expr.object, env)
+            for child in ((expr.index,) if cls is Index else (expr.start, expr.stop)):
+                if child is not None:
+                    self.expression(child, env)
+            return frozenset((STRING,)) if obj and obj <= {STRING} else ANY
+        return ANY
+
+    def is_module(self, expr: Node) -> bool:
+        return expr.__class__ is Identifier and expr.name in self.modules
+
+
+def infer_types(statements: List[Node], global_values: Optional[Mapping[str, Any]] = None,
+                whole_program: bool = True) -> ProgramTypes:
+    """
+    Infer the types of a program's variables and expressions.
+
+    global_values holds the globals it starts with; whole_program says
+    whether it is all the code that will ever run with them.
+    """
+    return ProgramTypes(statements, global_values or {}, whole_program)
+
+
+def type_of(value: Any) -> str:
+    """Return the type of a runtime value."""
+    cls = value.__class__
+    if cls is int:
+        return INT
+    if cls is float:
+        return FLOAT
+    if cls is str or cls is Rope:
+        return STRING
+    if cls is bool:
+        return BOOL
+    if cls is FunctionDef or callable(value):
+        return FUNCTION
+    return OTHER
+
+
+def annotation_types(function: Any) -> Types:
+    """Return the result types a module function's return annotation promises."""
+    annotation = inspect.signature(function).return_annotation
+    if annotation is None:
+        return frozenset((OTHER,))
+    types = {int: INT, float: FLOAT, str: STRING, bool: BOOL, list: OTHER}
+    return frozenset((types[annotation],)) if annotation in types else ANY
+
+
+def binary_types(op: str, left: str, right: str) -> Tuple[str, ...]:
+    """Return the types `left op right` can have for operands of one type each."""
+    if op in COMPARISONS:
+        return (BOOL,)
+    if op == '+' and STRING in (left, right):
+        return (STRING,)
+    if left in NUMBERS and right in NUMBERS:
+        return (INT,) if left in INT_LIKE and right in INT_LIKE else (FLOAT,)
+    if op == '*' and {left, right} in ({STRING, INT}, {STRING, BOOL}):
+        return (STRING,)
+    if op == '%' and left == STRING:
+        return (STRING,)
+    return tuple(ANY)
+
+
+def join(first: Optional[Env], second: Optional[Env]) -> Optional[Env]:
+    """Return the types either of two points may have (None: the point is never reached)."""
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return {name: types | second.get(name, NONE) for name, types in first.items()}
+
+
+def join_all(envs: List[Optional[Env]]) -> Optional[Env]:
+    result = None
+    for env in envs:
+        result = join(result, env)
+    return result
+
+
+# ----------------------------------------------------------------------------
+# Specialisation
+# ----------------------------------------------------------------------------
+
+def proven_type(op: str, left: Types, right: Types) -> Optional[str]:
+    """Return the proven variant's operand type for a BinaryOp's operand types, if any."""
+    if not left or not right:
+        return None
+    if op == '+' and left <= {STRING} and right <= {STRING}:
+        return 'string'
+    if not (left <= NUMBERS and right <= NUMBERS):
+        return None
+    if left <= INT_LIKE and right <= INT_LIKE:
+        return 'int'
+    if left <= {FLOAT} or right <= {FLOAT}:
+        return 'float'
+    return 'number'
+
+
+def specialise(statements: List[Node], types: ProgramTypes) -> List[str]:
+    """
+    Rewrite each BinaryOp whose operand types are proven into its proven variant.
+
+    Returns a description of every node rewritten.
+    """
+    changes: List[str] = []
+    for node in walk(statements):
+        if node.__class__ is not BinaryOp:
+            continue
+        operand_type = proven_type(node.op, types.of(node.left), types.of(node.right))
+        proven = PROVEN_CLASSES.get((operand_type, node.op, operand_shape(node)))
+        if proven is not None:
+            node.__class__ = proven
+            changes.append(f"{describe(node)} on {operand_type} operands")
+    return changes
+
+
+def format_types(types: ProgramTypes) -> str:
+    """Return the variable and function types of a program as text, for `novax --types`."""
+    lines = ['top level']
+    for name, variable_types in sorted(types.variables[None].items()):
+        lines.append(f"  {name}: {type_text(variable_types)}")
+    for function in types.functions:
+        params = ', '.join(f"{param}: {type_text(param_types)}"
+                           for param, param_types in zip(function.params, types.params[function]))
+        lines.append(f"function {function.name}({params}) -> {type_text(types.returns[function])}")
+        for name, variable_types in sorted(types.variables[function].items()):
+            if name not in function.params:
+                lines.append(f"  {name}: {type_text(variable_types)}")
+    return '\n'.join(lines)
+
+
+def type_text(types: Types) -> str:
+    """Return a type set as text: 'int | string', 'any', or 'never' when empty."""
+    if types >= ANY:
+        return 'any'
+    if not types:
+        return 'never'
+    return ' | '.join(name for name in TYPE_ORDER if name in types)
@@ -0,0 +1,159 @@
+"""
+Inline caches for member access and method calls.
+
+Each MemberAccess and MemberCall node owns a MemberCache: a monomorphic
+cache of the last object seen at that site and the member found on it.
+Objects are module dicts from require(), which NovaScript code cannot
+modify, so an object's identity decides its members. An engine checks
+
+    obj is cache.object
+
+and on a hit uses cache.value directly, skipping the type, membership
+and callable checks; otherwise it calls cache.load() (or load_method()),
+which validates the object, raises the usual errors and refills the
+cache. Rebinding a variable to another object therefore invalidates
+every site that reads it: the identity check fails once and the site
+caches the new object.
+
+Object literals (see objects.py) are many objects of few shapes, so for
+them the cache keeps the last shape seen and the member's offset in it.
+The engines check
+
+    obj.__class__ is NovaObject and obj.shape is cache.shape
+
+after the identity test and on a hit read obj.values[cache.offset]; a
+store to `obj.member` (cache.store()) uses the same pair. Adding a
+property gives an object a new shape, so sites that cached the old one
+miss once and cache the shape they see next.
+
+Lists (see lists.py) change as the program runs, so `items.length` (and
+a string's `length`) is looked up on every access and never cached; list
+methods are bound by the executor (Executor.load_method).
+
+All engines share a node's cache, so its counters describe the site no
+matter which engine ran it.
+"""
+
+from typing import Any, Optional
+
+from novascriptx.lists import SEQUENCE_TYPES, get_property
+from novascriptx.objects import NovaObject, Shape
+from novascriptx.ropes import type_name
+
+
+class _Empty:
+    """Type of EMPTY, the object of a cache that has not been filled."""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'EMPTY'
+
+
+EMPTY = _Empty()
+
+
+class MemberCache:
+    """
+    Monomorphic inline cache of one `object.member` site.
+
+    `object` is the last module seen (EMPTY before the first lookup) and
+    `value` its member; `shape` is the last NovaObject shape seen (None
+    before the first) and `offset` the member's offset in it. `misses`
+    counts lookups that refilled the cache; hits are not counted, so the
+    fast path stays a single identity test.
+    """
+
+    __slots__ = ('member', 'object', 'value', 'shape', 'offset', 'misses')
+
+    def __init__(self, member: str):
+        self.member = member
+        self.object: Any = EMPTY
+        self.value: Any = None
+        self.shape: Optional[Shape] = None
+        self.offset = 0
+        self.misses = 0
+
+    def __repr__(self):
+        if self.shape is not None:
+            state = f"shape ({', '.join(self.shape.keys)}) offset {self.offset}"
+        elif self.object is not EMPTY:
+            state = f"{type(self.object).__name__} at {id(self.object):#x}"
+        else:
+            state = 'empty'
+        return f"<MemberCache .{self.member}, {state}, {self.misses} misses>"
+
+    def load(self, obj: Any) -> Any:
+        """Look up the member on `obj`, cache it and return it."""
+        member = self.member
+        if obj.__class__ is NovaObject:
+            shape = obj.shape
+            if shape is not self.shape:
+                self.fill_shape(shape, self.find_offset(shape))
+            return obj.values[self.offset]
+        if isinstance(obj, SEQUENCE_TYPES):
+            return get_property(obj, member)
+        if not isinstance(obj, dict):
+            raise TypeError(f"Cannot access member '{member}' on non-object type: {type_name(obj)}")
+        if member not in obj:
+            raise AttributeError(f"Object has no member '{member}'")
+        return self.fill(obj, obj[member])
+
+    def load_method(self, obj: Any) -> Any:
+        """Look up the member on `obj` as a method, cache it and return it."""
+        member = self.member
+        if not isinstance(obj, dict):
+            raise TypeError(f"Cannot call method '{member}' on non-object type: {type_name(obj)}")
+        if member not in obj:
+            raise AttributeError(f"Object has no method '{member}'")
+        method = obj[member]
+        if not callable(method):
+            raise TypeError(f"'{member}' is not a method")
+        return self.fill(obj, method)
+
+    def store(self, obj: Any, value: Any) -> None:
+        """Execute `obj.member = value`, caching the object's shape."""
+        member = self.member
+        if obj.__class__ is not NovaObject:
+            if isinstance(obj, dict):
+                raise TypeError(f"Cannot assign member '{member}': modules cannot be modified")
+            raise TypeError(f"Cannot assign member '{member}' on non-object type: {type_name(obj)}")
+        shape = obj.shape
+        if shape is self.shape:
+            obj.values[self.offset] = value
+            return
+        offset = shape.offsets.get(member)
+        if offset is None:
+            # A new property: the object moves to the next shape, which
+            # later objects at this site will not necessarily share
+            obj.shape = shape.add(member)
+            obj.values.append(value)
+            return
+        self.fill_shape(shape, offset)
+        obj.values[offset] = value
+
+    def find_offset(self, shape: Shape) -> int:
+        """Return the member's offset in `shape`, or raise AttributeError."""
+        offset = shape.offsets.get(self.member)
+        if offset is None:
+            raise AttributeError(f"Object has no member '{self.member}'")
+        return offset
+
+    def fill(self, obj: Any, value: Any) -> Any:
+        """Make `obj` the cached object, with `value` its member."""
+        self.object = obj
+        self.value = value
+        self.misses += 1
+        return value
+
+    def fill_shape(self, shape: Shape, offset: int) -> None:
+        """Make `shape` the cached shape, with the member at `offset`."""
+        self.shape = shape
+        self.offset = offset
+        self.misses += 1
+
+    def clear(self) -> None:
+        """Forget the cached object and shape."""
+        self.object = EMPTY
+        self.value = None
+        self.shape = None
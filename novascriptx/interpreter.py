@@ -9,18 +9,43 @@ Features:
 - Functions with return statements
 - Print statements
 - If/else conditionals
-- While and for loops
+- While and for loops, including for-in over range() and other iterables
 - Arithmetic and comparison operators
 - Logical operators (and, or, not)
-- String concatenation with type coercion
+- String concatenation with type coercion; long results are ropes
+- Lists: array literals, indexing, slicing and native bulk methods
+- Objects: object literals with shape-based (hidden class) property layout
 - Recursion support
+- Memoized functions (memo function, --memoize-pure)
 - Module system (require)
 """
 
 import re
 import sys
 import io
-from typing import Any, Dict, List, Optional, Tuple
+from array import array
+from bisect import bisect_right
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from novascriptx.nodes import (
+    BUILTIN_FUNCTIONS, Node, NodeVisitor, dump,
+    VarDecl, FunctionDef, Print, If, While, For, ForIn, Return, Break, Continue,
+    Assignment, ExpressionStatement, Literal, Identifier, BinaryOp, UnaryOp,
+    Call, MemberAccess, MemberCall, ArrayLiteral, ObjectLiteral, Template, Index, Slice,
+)
+from novascriptx.inference import SPECIALISE_LEVEL, infer_types, specialise, type_of
+from novascriptx.inline_cache import MemberCache
+from novascriptx.lists import bind_method, get_item, get_slice, set_item
+from novascriptx.memo import DEFAULT_MEMO_SIZE, MISS, MemoCache, assign_caches, memo_key
+from novascriptx.objects import NovaObject
+from novascriptx.optimizer import DEFAULT_OPT_LEVEL, optimize
+from novascriptx.profiling import Profile, load_profile, save_profile
+from novascriptx.quicken import (
+    MAX_DEOPTS, proven_handlers, quick_class, quick_handlers, quicken_profiled,
+)
+from novascriptx.resolver import UNSET, GlobalScope, resolve
+from novascriptx.ropes import ROPE_THRESHOLD, STRING_TYPES, Rope, type_name
 
 __version__ = "1.0.0"
 
@@ -29,20 +54,123 @@ __version__ = "1.0.0"
 # LEXER: Tokenizes NovaScript source code
 # ============================================================================
 
+# Token kinds are small integers so the parser can compare them cheaply;
+# TOKEN_NAMES maps each kind back to its type name.
+TOKEN_NAMES = (
+    'EOF', 'NUMBER', 'STRING', 'TEMPLATE', 'IDENTIFIER',
+    'VAR', 'FUNCTION', 'PRINT', 'IF', 'ELSE', 'FOR', 'WHILE', 'RETURN',
+    'BREAK', 'CONTINUE', 'IN', 'TRUE', 'FALSE',
+    'PLUS', 'MINUS', 'MULTIPLY', 'DIVIDE', 'MODULO',
+    'ASSIGN', 'EQUAL', 'NOT', 'NOT_EQUAL',
+    'LESS', 'LESS_EQUAL', 'GREATER', 'GREATER_EQUAL',
+    'LPAREN', 'RPAREN', 'LBRACE', 'RBRACE', 'LBRACKET', 'RBRACKET',
+    'COMMA', 'COLON', 'DOT',
+)
+TOKEN_KINDS = {name: kind for kind, name in enumerate(TOKEN_NAMES)}
+
+(TK_EOF, TK_NUMBER, TK_STRING, TK_TEMPLATE, TK_IDENTIFIER,
+ TK_VAR, TK_FUNCTION, TK_PRINT, TK_IF, TK_ELSE, TK_FOR, TK_WHILE, TK_RETURN,
+ TK_BREAK, TK_CONTINUE, TK_IN, TK_TRUE, TK_FALSE,
+ TK_PLUS, TK_MINUS, TK_MULTIPLY, TK_DIVIDE, TK_MODULO,
+ TK_ASSIGN, TK_EQUAL, TK_NOT, TK_NOT_EQUAL,
+ TK_LESS, TK_LESS_EQUAL, TK_GREATER, TK_GREATER_EQUAL,
+ TK_LPAREN, TK_RPAREN, TK_LBRACE, TK_RBRACE, TK_LBRACKET, TK_RBRACKET,
+ TK_COMMA, TK_COLON, TK_DOT) = range(len(TOKEN_NAMES))
+
+
 class Token:
     """Represents a single token in the source code."""
     
-    def __init__(self, token_type: str, value: str, line: int = 0):
-        self.type = token_type
+    __slots__ = ('kind', 'value', 'line')
+    
+    def __init__(self, token_type, value: str, line: int = 0):
+        # Accept either an integer kind or its type name (the class check is
+        # cheaper than isinstance(), and Lexer.scan() makes a Token per token)
+        self.kind = token_type if token_type.__class__ is int else TOKEN_KINDS[token_type]
         self.value = value
         self.line = line
     
+    @property
+    def type(self) -> str:
+        """The token type name, e.g. 'IDENTIFIER'."""
+        return TOKEN_NAMES[self.kind]
+    
     def __repr__(self):
         return f"Token({self.type}, {self.value!r})"
 
 
+class TokenBuffer:
+    """
+    Compact, struct-of-arrays store for a fully lexed token stream.
+    
+    Each token costs 9 bytes: a one-byte kind plus the start and end
+    offsets of its lexeme. Values are sliced from the source and line
+    numbers are looked up from a table of newline offsets only when a
+    token is accessed; indexing or iterating yields ordinary Tokens.
+    """
+    
+    def __init__(self, source: str):
+        self.source = source
+        self.kinds = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+        self._newlines: Optional[array] = None
+    
+    def __len__(self) -> int:
+        return len(self.kinds)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self.kinds)))]
+        if index < 0:
+            index += len(self.kinds)
+        return Token(self.kinds[index], self.value(index), self.line(index))
+    
+    def __iter__(self) -> Iterator[Token]:
+        source = self.source
+        newlines = self.newlines()
+        unescape = Lexer.unescape
+        for kind, start, end in zip(self.kinds, self.starts, self.ends):
+            value = source[start:end]
+            if kind == TK_STRING:
+                value = unescape(value[1:-1])
+            elif kind == TK_TEMPLATE:
+                value = value[1:-1]
+            yield Token(kind, value, bisect_right(newlines, start) + 1)
+    
+    def value(self, index: int) -> str:
+        """Return the value of a token, slicing it from the source."""
+        text = self.source[self.starts[index]:self.ends[index]]
+        if self.kinds[index] == TK_STRING:
+            return Lexer.unescape(text[1:-1])
+        if self.kinds[index] == TK_TEMPLATE:
+            return text[1:-1]
+        return text
+    
+    def line(self, index: int) -> int:
+        """Return the 1-based line on which a token starts."""
+        return bisect_right(self.newlines(), self.starts[index]) + 1
+    
+    def newlines(self) -> array:
+        """Return the offsets of all newlines in the source, built on first use."""
+        if self._newlines is None:
+            self._newlines = array('I', (m.start() for m in re.finditer('\n', self.source)))
+        return self._newlines
+    
+    def nbytes(self) -> int:
+        """Return the number of bytes used by the token arrays."""
+        return sum(len(column) * column.itemsize
+                   for column in (self.kinds, self.starts, self.ends))
+
+
 class Lexer:
-    """Tokenizes NovaScript source code into a stream of tokens."""
+    """Tokenizes NovaScript source code into a stream of tokens.
+
+    Scanning is driven by a single compiled master pattern: each match
+    consumes a whole lexeme (identifier, number, string, run of whitespace
+    or comment) at once, and line numbers are advanced in bulk by counting
+    newlines inside the consumed text.
+    """
     
     # Keywords recognized by NovaScript
     KEYWORDS = {
@@ -54,199 +182,255 @@ class Lexer:
         'for': 'FOR',
         'while': 'WHILE',
         'return': 'RETURN',
+        'break': 'BREAK',
+        'continue': 'CONTINUE',
         'in': 'IN',
         'True': 'TRUE',
         'False': 'FALSE',
     }
     
+    # Operators and punctuation
+    OPERATORS = {
+        '==': 'EQUAL',
+        '!=': 'NOT_EQUAL',
+        '<=': 'LESS_EQUAL',
+        '>=': 'GREATER_EQUAL',
+        '+': 'PLUS',
+        '-': 'MINUS',
+        '*': 'MULTIPLY',
+        '/': 'DIVIDE',
+        '%': 'MODULO',
+        '=': 'ASSIGN',
+        '!': 'NOT',
+        '<': 'LESS',
+        '>': 'GREATER',
+        '(': 'LPAREN',
+        ')': 'RPAREN',
+        '{': 'LBRACE',
+        '}': 'RBRACE',
+        '[': 'LBRACKET',
+        ']': 'RBRACKET',
+        ',': 'COMMA',
+        ':': 'COLON',
+        '.': 'DOT',
+    }
+    
+    # Escape sequences understood inside string literals; any other
+    # escaped character stands for itself.
+    ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '\\': '\\'}
+    
+    # Master pattern: skips blanks, then captures exactly one lexeme.
+    # Newlines are captured as lexemes of their own so that line numbers
+    # can be tracked without knowing match offsets; comments are captured
+    # and dropped. The final catch-all makes stray characters visible.
+    TOKEN_PATTERN = re.compile(r"""
+        [ \t\r]*
+        (
+            \n
+          | \#[^\n]*
+          | "(?:[^"\\]|\\.)*"
+          | '(?:[^'\\]|\\.)*'
+          | `(?:[^`\\]|\\.)*`
+          | \d[\d.]*
+          | [^\W\d]\w*
+          | == | != | <= | >=
+          | [-+*/%=!<>(){}\[\],:.]
+          | [^ \t\r]
+        )
+    """, re.VERBOSE | re.DOTALL)
+    
+    ESCAPE_PATTERN = re.compile(r'\\(.)', re.DOTALL)
+    
+    # Approximate number of characters lexed per chunk by scan()
+    CHUNK_SIZE = 1 << 16
+    
+    # Pseudo-kinds used only inside the lexer
+    _NEWLINE = -1
+    _COMMENT = -2
+    
     def __init__(self, source: str):
         self.source = source
         self.position = 0
         self.line = 1
-        self.tokens: List[Token] = []
+        self.tokens: Optional[TokenBuffer] = None
     
     def error(self, message: str):
         """Raise a lexer error."""
         raise SyntaxError(f"Lexer error at line {self.line}: {message}")
     
-    def peek(self, offset: int = 0) -> Optional[str]:
-        """Look at character without consuming it."""
-        pos = self.position + offset
-        if pos < len(self.source):
-            return self.source[pos]
-        return None
+    @classmethod
+    def unescape(cls, body: str) -> str:
+        """Resolve backslash escapes in the body of a string literal."""
+        if '\\' not in body:
+            return body
+        escapes = cls.ESCAPES
+        return cls.ESCAPE_PATTERN.sub(
+            lambda m: escapes.get(m.group(1), m.group(1)), body)
     
-    def advance(self) -> Optional[str]:
-        """Consume and return the next character."""
-        if self.position < len(self.source):
-            char = self.source[self.position]
-            if char == '\n':
-                self.line += 1
-            self.position += 1
-            return char
+    def classify(self, lexeme: str) -> Optional[int]:
+        """
+        Return the token kind of a lexeme that is not a keyword or
+        operator, or None if the lexeme is not a valid token.
+        """
+        char = lexeme[0]
+        if char == '#':
+            return self._COMMENT
+        if char in '"\'`':
+            if len(lexeme) < 2:
+                return None  # Unterminated string
+            return TK_TEMPLATE if char == '`' else TK_STRING
+        if char.isdigit():
+            return TK_NUMBER
+        if char.isalpha() or char == '_':
+            return TK_IDENTIFIER
         return None
     
-    def skip_whitespace(self):
-        """Skip whitespace characters (but track newlines for line counting)."""
-        while self.peek() and self.peek() in ' \t\n\r':
-            self.advance()
+    def known_kinds(self) -> Dict[str, int]:
+        """
+        Return a lexeme -> kind table seeded with keywords, operators and
+        newlines. Lexemes repeat heavily in real scripts, so callers extend
+        it as a memo of classify().
+        """
+        kinds = {text: TOKEN_KINDS[name] for text, name in self.KEYWORDS.items()}
+        kinds.update((text, TOKEN_KINDS[name]) for text, name in self.OPERATORS.items())
+        kinds['\n'] = self._NEWLINE
+        return kinds
     
-    def skip_comment(self):
-        """Skip comments starting with #."""
-        if self.peek() == '#':
-            while self.peek() and self.peek() != '\n':
-                self.advance()
-            if self.peek() == '\n':
-                self.advance()
+    def tokenize(self) -> TokenBuffer:
+        """Tokenize the entire source code into a compact TokenBuffer."""
+        source = self.source
+        tokens = TokenBuffer(source)
+        add_kind = tokens.kinds.append
+        add_start = tokens.starts.append
+        add_end = tokens.ends.append
+        kinds = self.known_kinds()
+        lookup = kinds.get
+        newline = self._NEWLINE
+        comment = self._COMMENT
+        
+        last_start = 0
+        for match in self.TOKEN_PATTERN.finditer(source):
+            lexeme = match[1]
+            kind = lookup(lexeme)
+            if kind is None:
+                kind = self.classify(lexeme)
+                if kind is None:
+                    self.report_error()
+                if kind == comment:
+                    continue
+                kinds[lexeme] = kind
+            elif kind == newline:
+                continue
+            last_start, end = match.span(1)
+            add_kind(kind)
+            add_start(last_start)
+            add_end(end)
+        
+        # EOF is reported on the line of the last token
+        add_kind(TK_EOF)
+        add_start(last_start)
+        add_end(last_start)
+        self.position = len(source)
+        self.tokens = tokens
+        return tokens
     
-    def read_string(self, quote_char: str) -> str:
-        """Read a string literal."""
-        value = ""
-        self.advance()  # Skip opening quote
-        while self.peek() and self.peek() != quote_char:
-            if self.peek() == '\\':
-                self.advance()
-                next_char = self.advance()
-                if next_char == 'n':
-                    value += '\n'
-                elif next_char == 't':
-                    value += '\t'
-                elif next_char == 'r':
-                    value += '\r'
-                elif next_char == '\\':
-                    value += '\\'
-                else:
-                    value += next_char
-            else:
-                value += self.advance()
+    def scan(self) -> Iterator[Token]:
+        """
+        Lazily yield the tokens of the source code, ending with EOF.
         
-        if self.peek() != quote_char:
-            self.error("Unterminated string")
-        self.advance()  # Skip closing quote
-        return value
-    
-    def read_number(self) -> str:
-        """Read a numeric literal."""
-        value = ""
-        while self.peek() and (self.peek().isdigit() or self.peek() == '.'):
-            value += self.advance()
-        return value
-    
-    def read_identifier(self) -> str:
-        """Read an identifier or keyword."""
-        value = ""
-        while self.peek() and (self.peek().isalnum() or self.peek() == '_'):
-            value += self.advance()
-        return value
-    
-    def tokenize(self) -> List[Token]:
-        """Tokenize the entire source code."""
-        while self.position < len(self.source):
-            self.skip_whitespace()
-            
-            if self.position >= len(self.source):
-                break
-            
-            # Skip comments
-            if self.peek() == '#':
-                self.skip_comment()
-                continue
-            
-            char = self.peek()
-            line = self.line
-            
-            # String literals
-            if char in '"\'':
-                value = self.read_string(char)
-                self.tokens.append(Token('STRING', value, line))
-            
-            # Numbers
-            elif char.isdigit():
-                value = self.read_number()
-                self.tokens.append(Token('NUMBER', value, line))
-            
-            # Identifiers and keywords
-            elif char.isalpha() or char == '_':
-                value = self.read_identifier()
-                token_type = self.KEYWORDS.get(value, 'IDENTIFIER')
-                self.tokens.append(Token(token_type, value, line))
+        The source is lexed one chunk of lines at a time, so only the
+        lexemes of the current chunk are held in memory; the parser can
+        consume tokens as they are produced.
+        
+        Each token is a Token object because the parser keeps the current
+        token and its lookahead and reads kind, value and line from them.
+        A consumed Token is freed at once, so memory stays bounded by one
+        chunk; only a caller that keeps every token should use tokenize(),
+        whose TokenBuffer stores them as arrays instead.
+        """
+        source = self.source
+        length = len(source)
+        findall = self.TOKEN_PATTERN.findall
+        kinds = self.known_kinds()
+        lookup = kinds.get
+        newline = self._NEWLINE
+        comment = self._COMMENT
+        unescape = self.unescape
+        
+        line = 1
+        token_line = 1
+        position = 0
+        while position < length:
+            end = source.find('\n', position + self.CHUNK_SIZE)
+            end = length if end < 0 else end + 1
+            lexemes = findall(source, position, end)
+            if end < length and ('"' in lexemes or "'" in lexemes or '`' in lexemes):
+                lexemes, end = self.split_at_quote(lexemes, position, end)
             
-            # Operators and punctuation
-            elif char == '+':
-                self.advance()
-                self.tokens.append(Token('PLUS', '+', line))
-            elif char == '-':
-                self.advance()
-                self.tokens.append(Token('MINUS', '-', line))
-            elif char == '*':
-                self.advance()
-                self.tokens.append(Token('MULTIPLY', '*', line))
-            elif char == '/':
-                self.advance()
-                self.tokens.append(Token('DIVIDE', '/', line))
-            elif char == '%':
-                self.advance()
-                self.tokens.append(Token('MODULO', '%', line))
-            elif char == '=':
-                self.advance()
-                if self.peek() == '=':
-                    self.advance()
-                    self.tokens.append(Token('EQUAL', '==', line))
-                else:
-                    self.tokens.append(Token('ASSIGN', '=', line))
-            elif char == '!':
-                self.advance()
-                if self.peek() == '=':
-                    self.advance()
-                    self.tokens.append(Token('NOT_EQUAL', '!=', line))
+            for lexeme in lexemes:
+                kind = lookup(lexeme)
+                if kind is None:
+                    kind = self.classify(lexeme)
+                    if kind is None:
+                        self.report_error()
+                    if kind == comment:
+                        continue
+                    kinds[lexeme] = kind
+                elif kind == newline:
+                    line += 1
+                    continue
+                token_line = line
+                if kind == TK_STRING:
+                    yield Token(TK_STRING, unescape(lexeme[1:-1]), line)
+                    # Multi-line strings advance the line counter in bulk
+                    line += lexeme.count('\n')
+                elif kind == TK_TEMPLATE:
+                    # Escapes are resolved by the parser, around each ${...}
+                    yield Token(TK_TEMPLATE, lexeme[1:-1], line)
+                    line += lexeme.count('\n')
                 else:
-                    self.tokens.append(Token('NOT', '!', line))
-            elif char == '<':
-                self.advance()
-                if self.peek() == '=':
-                    self.advance()
-                    self.tokens.append(Token('LESS_EQUAL', '<=', line))
-                else:
-                    self.tokens.append(Token('LESS', '<', line))
-            elif char == '>':
-                self.advance()
-                if self.peek() == '=':
-                    self.advance()
-                    self.tokens.append(Token('GREATER_EQUAL', '>=', line))
-                else:
-                    self.tokens.append(Token('GREATER', '>', line))
-            elif char == '(':
-                self.advance()
-                self.tokens.append(Token('LPAREN', '(', line))
-            elif char == ')':
-                self.advance()
-                self.tokens.append(Token('RPAREN', ')', line))
-            elif char == '{':
-                self.advance()
-                self.tokens.append(Token('LBRACE', '{', line))
-            elif char == '}':
-                self.advance()
-                self.tokens.append(Token('RBRACE', '}', line))
-            elif char == '[':
-                self.advance()
-                self.tokens.append(Token('LBRACKET', '[', line))
-            elif char == ']':
-                self.advance()
-                self.tokens.append(Token('RBRACKET', ']', line))
-            elif char == ',':
-                self.advance()
-                self.tokens.append(Token('COMMA', ',', line))
-            elif char == ':':
-                self.advance()
-                self.tokens.append(Token('COLON', ':', line))
-            elif char == '.':
-                self.advance()
-                self.tokens.append(Token('DOT', '.', line))
-            else:
-                self.error(f"Unexpected character: {char!r}")
+                    yield Token(kind, lexeme, line)
+            
+            position = end
         
-        self.tokens.append(Token('EOF', '', line))
-        return self.tokens
+        self.position = length
+        self.line = line
+        yield Token(TK_EOF, '', token_line)
+    
+    def split_at_quote(self, lexemes: List[str], start: int, end: int) -> Tuple[List[str], int]:
+        """
+        Handle a string literal that runs past the end of a chunk.
+        
+        Inside the chunk such a literal shows up as a lone quote lexeme.
+        The chunk is cut at that quote and the literal is rescanned
+        without the chunk limit; returns the corrected lexemes and the
+        offset where the next chunk starts.
+        """
+        pattern = self.TOKEN_PATTERN
+        index = min(lexemes.index(quote) for quote in '"\'`' if quote in lexemes)
+        for count, match in enumerate(pattern.finditer(self.source, start, end)):
+            if count == index:
+                literal = pattern.match(self.source, match.start(1))
+                return lexemes[:index] + [literal.group(1)], literal.end()
+        return lexemes, end
+    
+    def report_error(self):
+        """Locate the first invalid lexeme and raise a lexer error for it."""
+        source = self.source
+        line = 1
+        for match in self.TOKEN_PATTERN.finditer(source):
+            lexeme = match.group(1)
+            valid = (lexeme == '\n' or lexeme in self.OPERATORS
+                     or self.classify(lexeme) is not None)
+            if not valid:
+                self.position = match.start(1)
+                if lexeme in '"\'`':
+                    # Unterminated strings run to the end of the source
+                    self.line = line + source.count('\n', self.position)
+                    self.error("Unterminated template literal" if lexeme == '`' else "Unterminated string")
+                self.line = line
+                self.error(f"Unexpected character: {lexeme!r}")
+            line += lexeme.count('\n')
 
 
 # ============================================================================
@@ -254,117 +438,168 @@ class Lexer:
 # ============================================================================
 
 class Parser:
-    """Parses tokens into a list of executable statements."""
+    """
+    Parses tokens into a list of executable statements.
     
-    def __init__(self, tokens: List[Token]):
-        self.tokens = tokens
+    Tokens are pulled on demand from any iterable (a TokenBuffer, or the
+    generator returned by Lexer.scan()); only the current token and a
+    small lookahead buffer are held at any time.
+    """
+    
+    # Binding power of each binary operator; higher binds tighter
+    BINARY_PRECEDENCE = {
+        TK_EQUAL: 3, TK_NOT_EQUAL: 3,
+        TK_LESS: 4, TK_GREATER: 4, TK_LESS_EQUAL: 4, TK_GREATER_EQUAL: 4,
+        TK_PLUS: 5, TK_MINUS: 5,
+        TK_MULTIPLY: 6, TK_DIVIDE: 6, TK_MODULO: 6,
+    }
+    
+    # 'and' / 'or' are lexed as identifiers
+    WORD_PRECEDENCE = {'or': 1, 'and': 2}
+    
+    PREFIX_OPERATORS = frozenset((TK_NOT, TK_MINUS))
+    UNARY_PRECEDENCE = 7
+    
+    def __init__(self, tokens: Iterable[Token]):
+        self.tokens = iter(tokens)
+        self.lookahead: deque = deque()
         self.position = 0
+        self.current = self.next_token()
+        # Number of loops enclosing the statement being parsed
+        self.loop_depth = 0
     
     def error(self, message: str):
         """Raise a parser error."""
         token = self.current_token()
         raise SyntaxError(f"Parser error at line {token.line}: {message}")
     
+    def next_token(self) -> Token:
+        """Pull the next token from the stream, synthesising EOF at its end."""
+        token = next(self.tokens, None)
+        if token is None:
+            line = self.current.line if self.position else 0
+            token = Token(TK_EOF, '', line)
+            self.tokens = iter(())
+        return token
+    
     def current_token(self) -> Token:
         """Get the current token."""
-        if self.position < len(self.tokens):
-            return self.tokens[self.position]
-        return self.tokens[-1]  # EOF token
+        return self.current
     
     def peek_token(self, offset: int = 1) -> Token:
         """Look ahead at a token."""
-        pos = self.position + offset
-        if pos < len(self.tokens):
-            return self.tokens[pos]
-        return self.tokens[-1]
+        if offset == 0:
+            return self.current
+        lookahead = self.lookahead
+        while len(lookahead) < offset:
+            token = lookahead[-1] if lookahead else self.current
+            if token.kind == TK_EOF:
+                return token
+            lookahead.append(self.next_token())
+        return lookahead[offset - 1]
     
     def advance(self) -> Token:
         """Consume and return the current token."""
-        token = self.current_token()
-        if token.type != 'EOF':
+        token = self.current
+        if token.kind != TK_EOF:
             self.position += 1
+            if self.lookahead:
+                self.current = self.lookahead.popleft()
+            else:
+                self.current = self.next_token()
         return token
     
-    def expect(self, token_type: str) -> Token:
-        """Consume a token of the expected type or raise an error."""
+    def expect(self, kind: int) -> Token:
+        """Consume a token of the expected kind or raise an error."""
         token = self.current_token()
-        if token.type != token_type:
-            self.error(f"Expected {token_type}, got {token.type}")
+        if token.kind != kind:
+            self.error(f"Expected {TOKEN_NAMES[kind]}, got {token.type}")
         return self.advance()
     
-    def parse(self) -> List[Dict[str, Any]]:
+    def parse(self) -> List[Node]:
         """Parse the token stream into statements."""
         statements = []
-        while self.current_token().type != 'EOF':
+        while self.current_token().kind != TK_EOF:
             stmt = self.parse_statement()
             if stmt:
                 statements.append(stmt)
         return statements
     
-    def parse_statement(self) -> Optional[Dict[str, Any]]:
+    def parse_statement(self) -> Optional[Node]:
         """Parse a single statement."""
-        token_type = self.current_token().type
+        kind = self.current_token().kind
         
-        if token_type == 'VAR':
+        if kind == TK_VAR:
             return self.parse_var_declaration()
-        elif token_type == 'FUNCTION':
+        elif kind == TK_FUNCTION:
             return self.parse_function_declaration()
-        elif token_type == 'PRINT':
+        elif kind == TK_PRINT:
             return self.parse_print()
-        elif token_type == 'IF':
+        elif kind == TK_IF:
             return self.parse_if()
-        elif token_type == 'WHILE':
+        elif kind == TK_WHILE:
             return self.parse_while()
-        elif token_type == 'FOR':
+        elif kind == TK_FOR:
             return self.parse_for()
-        elif token_type == 'RETURN':
+        elif kind == TK_RETURN:
             return self.parse_return()
-        elif token_type == 'IDENTIFIER':
+        elif kind == TK_BREAK or kind == TK_CONTINUE:
+            return self.parse_loop_control()
+        elif kind == TK_IDENTIFIER:
+            # 'memo' is only a keyword in front of 'function'
+            if self.current.value == 'memo' and self.peek_token().kind == TK_FUNCTION:
+                self.advance()
+                return self.parse_function_declaration(memo=True)
             return self.parse_assignment_or_call()
         else:
-            self.error(f"Unexpected token: {token_type}")
+            self.error(f"Unexpected token: {TOKEN_NAMES[kind]}")
     
-    def parse_var_declaration(self) -> Dict[str, Any]:
+    def parse_var_declaration(self) -> Node:
         """Parse: var x = value"""
-        self.expect('VAR')
-        name = self.expect('IDENTIFIER').value
-        self.expect('ASSIGN')
+        self.expect(TK_VAR)
+        name = self.expect(TK_IDENTIFIER).value
+        self.expect(TK_ASSIGN)
         value = self.parse_expression()
-        return {'type': 'var', 'name': name, 'value': value}
+        return VarDecl(name, value)
     
-    def parse_function_declaration(self) -> Dict[str, Any]:
-        """Parse: function name(args): body"""
-        self.expect('FUNCTION')
-        name = self.expect('IDENTIFIER').value
-        self.expect('LPAREN')
+    def parse_function_declaration(self, memo: bool = False) -> Node:
+        """Parse: function name(args): body (after 'memo' if memo is set)"""
+        self.expect(TK_FUNCTION)
+        name = self.expect(TK_IDENTIFIER).value
+        if name in BUILTIN_FUNCTIONS:
+            # Calls to the name always reach the builtin
+            self.error(f"Cannot redefine built-in function '{name}'")
+        self.expect(TK_LPAREN)
         
         # Parse parameters
         params = []
-        while self.current_token().type != 'RPAREN':
-            params.append(self.expect('IDENTIFIER').value)
-            if self.current_token().type == 'COMMA':
+        while self.current_token().kind != TK_RPAREN:
+            params.append(self.expect(TK_IDENTIFIER).value)
+            if self.current_token().kind == TK_COMMA:
                 self.advance()
         
-        self.expect('RPAREN')
-        self.expect('COLON')
+        self.expect(TK_RPAREN)
+        self.expect(TK_COLON)
         
-        # Parse function body
+        # Parse function body (loops around the definition do not count)
+        loop_depth, self.loop_depth = self.loop_depth, 0
         body = self.parse_block()
+        self.loop_depth = loop_depth
         
-        return {'type': 'function', 'name': name, 'params': params, 'body': body}
+        return FunctionDef(name, params, body, memo)
     
-    def parse_block(self) -> List[Dict[str, Any]]:
+    def parse_block(self) -> List[Node]:
         """Parse a block of statements (indented or in braces)."""
         statements = []
         
         # Handle brace-based blocks
-        if self.current_token().type == 'LBRACE':
+        if self.current_token().kind == TK_LBRACE:
             self.advance()
-            while self.current_token().type != 'RBRACE':
+            while self.current_token().kind != TK_RBRACE:
                 stmt = self.parse_statement()
                 if stmt:
                     statements.append(stmt)
-            self.expect('RBRACE')
+            self.expect(TK_RBRACE)
         else:
             # Handle single statement or indented block
             stmt = self.parse_statement()
@@ -373,249 +608,369 @@ class Parser:
         
         return statements
     
-    def parse_print(self) -> Dict[str, Any]:
+    def parse_print(self) -> Node:
         """Parse: print(expression)"""
-        self.expect('PRINT')
-        self.expect('LPAREN')
+        self.expect(TK_PRINT)
+        self.expect(TK_LPAREN)
         value = self.parse_expression()
-        self.expect('RPAREN')
-        return {'type': 'print', 'value': value}
+        self.expect(TK_RPAREN)
+        return Print(value)
     
-    def parse_if(self) -> Dict[str, Any]:
+    def parse_if(self) -> Node:
         """Parse: if (condition): body else: body"""
-        self.expect('IF')
-        self.expect('LPAREN')
+        self.expect(TK_IF)
+        self.expect(TK_LPAREN)
         condition = self.parse_expression()
-        self.expect('RPAREN')
-        self.expect('COLON')
+        self.expect(TK_RPAREN)
+        self.expect(TK_COLON)
         
         then_body = self.parse_block()
         
         else_body = []
-        if self.current_token().type == 'ELSE':
+        if self.current_token().kind == TK_ELSE:
             self.advance()
-            self.expect('COLON')
+            self.expect(TK_COLON)
             else_body = self.parse_block()
         
-        return {'type': 'if', 'condition': condition, 'then': then_body, 'else': else_body}
+        return If(condition, then_body, else_body)
     
-    def parse_while(self) -> Dict[str, Any]:
+    def parse_while(self) -> Node:
         """Parse: while (condition): body"""
-        self.expect('WHILE')
-        self.expect('LPAREN')
+        self.expect(TK_WHILE)
+        self.expect(TK_LPAREN)
         condition = self.parse_expression()
-        self.expect('RPAREN')
-        self.expect('COLON')
+        self.expect(TK_RPAREN)
+        self.expect(TK_COLON)
         
-        body = self.parse_block()
+        body = self.parse_loop_body()
         
-        return {'type': 'while', 'condition': condition, 'body': body}
+        return While(condition, body)
     
-    def parse_for(self) -> Dict[str, Any]:
-        """Parse: for (var i = 0 : i < 10 : i = i + 1): body"""
-        self.expect('FOR')
-        self.expect('LPAREN')
+    def parse_for(self) -> Node:
+        """Parse: for (var i = 0 : i < 10 : i = i + 1): body, or for (x in items): body"""
+        self.expect(TK_FOR)
+        self.expect(TK_LPAREN)
+        
+        # for ([var] name in iterable)
+        offset = 1 if self.current_token().kind == TK_VAR else 0
+        if (self.peek_token(offset).kind == TK_IDENTIFIER
+                and self.peek_token(offset + 1).kind == TK_IN):
+            return self.parse_for_in()
         
         # Initialize
         init = None
-        if self.current_token().type == 'VAR':
+        if self.current_token().kind == TK_VAR:
             init = self.parse_var_declaration()
         
-        self.expect('COLON')
+        self.expect(TK_COLON)
         
         # Condition
         condition = self.parse_expression()
         
-        self.expect('COLON')
+        self.expect(TK_COLON)
         
         # Update
         update = self.parse_assignment_or_call()
         
-        self.expect('RPAREN')
-        self.expect('COLON')
+        self.expect(TK_RPAREN)
+        self.expect(TK_COLON)
         
-        body = self.parse_block()
+        body = self.parse_loop_body()
+        
+        return For(init, condition, update, body)
+    
+    def parse_for_in(self) -> Node:
+        """Parse the rest of: for ([var] x in iterable): body"""
+        if self.current_token().kind == TK_VAR:
+            self.advance()
+        name = self.expect(TK_IDENTIFIER).value
+        self.expect(TK_IN)
+        iterable = self.parse_expression()
+        self.expect(TK_RPAREN)
+        self.expect(TK_COLON)
         
-        return {
-            'type': 'for',
-            'init': init,
-            'condition': condition,
-            'update': update,
-            'body': body
-        }
+        body = self.parse_loop_body()
+        
+        return ForIn(name, iterable, body)
+    
+    def parse_loop_body(self) -> List[Node]:
+        """Parse the block of a loop, where break and continue are allowed."""
+        self.loop_depth += 1
+        body = self.parse_block()
+        self.loop_depth -= 1
+        return body
+    
+    def parse_loop_control(self) -> Node:
+        """Parse: break / continue"""
+        token = self.current_token()
+        if not self.loop_depth:
+            self.error(f"'{token.value}' outside loop")
+        self.advance()
+        return Break() if token.kind == TK_BREAK else Continue()
     
-    def parse_return(self) -> Dict[str, Any]:
+    def parse_return(self) -> Node:
         """Parse: return value"""
-        self.expect('RETURN')
+        self.expect(TK_RETURN)
         
         # Handle optional return value
         value = None
-        if self.current_token().type not in ['EOF', 'RBRACE']:
+        if self.current_token().kind not in (TK_EOF, TK_RBRACE):
             value = self.parse_expression()
         
-        return {'type': 'return', 'value': value}
+        return Return(value)
     
-    def parse_assignment_or_call(self) -> Dict[str, Any]:
+    def parse_assignment_or_call(self) -> Node:
         """Parse assignment or function call."""
         expr = self.parse_expression()
         
-        if self.current_token().type == 'ASSIGN':
+        if self.current_token().kind == TK_ASSIGN:
             self.advance()
             value = self.parse_expression()
-            return {'type': 'assignment', 'target': expr, 'value': value}
-        
-        return {'type': 'expression', 'value': expr}
-    
-    def parse_expression(self) -> Dict[str, Any]:
-        """Parse expressions with operator precedence."""
-        return self.parse_or()
-    
-    def parse_or(self) -> Dict[str, Any]:
-        """Parse logical OR."""
-        left = self.parse_and()
-        
-        while self.current_token().type == 'IDENTIFIER' and self.current_token().value == 'or':
-            self.advance()
-            right = self.parse_and()
-            left = {'type': 'binary_op', 'op': 'or', 'left': left, 'right': right}
-        
-        return left
-    
-    def parse_and(self) -> Dict[str, Any]:
-        """Parse logical AND."""
-        left = self.parse_equality()
-        
-        while self.current_token().type == 'IDENTIFIER' and self.current_token().value == 'and':
-            self.advance()
-            right = self.parse_equality()
-            left = {'type': 'binary_op', 'op': 'and', 'left': left, 'right': right}
-        
-        return left
-    
-    def parse_equality(self) -> Dict[str, Any]:
-        """Parse equality operators."""
-        left = self.parse_comparison()
-        
-        while self.current_token().type in ['EQUAL', 'NOT_EQUAL']:
-            op = self.advance().value
-            right = self.parse_comparison()
-            left = {'type': 'binary_op', 'op': op, 'left': left, 'right': right}
-        
-        return left
-    
-    def parse_comparison(self) -> Dict[str, Any]:
-        """Parse comparison operators."""
-        left = self.parse_additive()
-        
-        while self.current_token().type in ['LESS', 'GREATER', 'LESS_EQUAL', 'GREATER_EQUAL']:
-            op = self.advance().value
-            right = self.parse_additive()
-            left = {'type': 'binary_op', 'op': op, 'left': left, 'right': right}
+            return Assignment(expr, value)
         
-        return left
+        return ExpressionStatement(expr)
     
-    def parse_additive(self) -> Dict[str, Any]:
-        """Parse addition and subtraction."""
-        left = self.parse_multiplicative()
-        
-        while self.current_token().type in ['PLUS', 'MINUS']:
-            op = self.advance().value
-            right = self.parse_multiplicative()
-            left = {'type': 'binary_op', 'op': op, 'left': left, 'right': right}
+    def parse_expression(self) -> Node:
+        """
+        Parse an expression by precedence climbing over BINARY_PRECEDENCE.
         
-        return left
+        Operators and open parentheses wait on an explicit stack instead of
+        the Python call stack, so nesting depth is not bounded by the
+        recursion limit (only call arguments recurse). Binary operators are
+        left-associative; prefix operators bind tighter than any of them.
+        """
+        operands: List[Node] = []
+        operators: List[Tuple[int, Optional[str]]] = []
+        prefix_operators = self.PREFIX_OPERATORS
+        binary_precedence = self.BINARY_PRECEDENCE
+        word_precedence = self.WORD_PRECEDENCE
+        unary_precedence = self.UNARY_PRECEDENCE
+        
+        while True:
+            # Prefix position: unary operators and open parentheses
+            token = self.current
+            while token.kind in prefix_operators or token.kind == TK_LPAREN:
+                if token.kind == TK_LPAREN:
+                    operators.append((0, None))
+                else:
+                    operators.append((unary_precedence, token.value))
+                self.advance()
+                token = self.current
+            operands.append(self.parse_primary())
+            
+            # Infix position: close parentheses until a binary operator follows
+            while True:
+                token = self.current
+                precedence = binary_precedence.get(token.kind)
+                if precedence is None and token.kind == TK_IDENTIFIER:
+                    precedence = word_precedence.get(token.value)
+                
+                # Build nodes for every pending operator that binds at least
+                # as tightly; at the end of a group that is all of them, down
+                # to the nearest open parenthesis.
+                bound = precedence or 1
+                while operators and operators[-1][0] >= bound:
+                    op_precedence, op = operators.pop()
+                    if op_precedence == unary_precedence:
+                        operands[-1] = UnaryOp(op, operands[-1])
+                    else:
+                        right = operands.pop()
+                        operands[-1] = BinaryOp(op, operands[-1], right)
+                
+                if precedence is not None:
+                    operators.append((precedence, token.value))
+                    self.advance()
+                    break
+                if not operators:
+                    return operands[0]
+                # Only an open parenthesis can be left on the stack
+                self.expect(TK_RPAREN)
+                operators.pop()
     
-    def parse_multiplicative(self) -> Dict[str, Any]:
-        """Parse multiplication, division, modulo."""
-        left = self.parse_unary()
-        
-        while self.current_token().type in ['MULTIPLY', 'DIVIDE', 'MODULO']:
-            op = self.advance().value
-            right = self.parse_unary()
-            left = {'type': 'binary_op', 'op': op, 'left': left, 'right': right}
-        
-        return left
+    def parse_arguments(self) -> List[Node]:
+        """Parse a parenthesised, comma-separated argument list."""
+        self.expect(TK_LPAREN)
+        args = []
+        while self.current_token().kind != TK_RPAREN:
+            args.append(self.parse_expression())
+            if self.current_token().kind == TK_COMMA:
+                self.advance()
+        self.expect(TK_RPAREN)
+        return args
     
-    def parse_unary(self) -> Dict[str, Any]:
-        """Parse unary operators."""
-        if self.current_token().type == 'NOT':
-            self.advance()
-            expr = self.parse_unary()
-            return {'type': 'unary_op', 'op': '!', 'expr': expr}
-        elif self.current_token().type == 'MINUS':
-            self.advance()
-            expr = self.parse_unary()
-            return {'type': 'unary_op', 'op': '-', 'expr': expr}
+    def parse_primary(self) -> Node:
+        """Parse primary expressions (literals, identifiers, function calls,
+        array, object and template literals) and any member accesses, method calls,
+        indexes and slices after them.
         
-        return self.parse_primary()
-    
-    def parse_primary(self) -> Dict[str, Any]:
-        """Parse primary expressions (literals, identifiers, function calls, parenthesized expressions)."""
+        Parenthesized expressions are handled by parse_expression().
+        """
         token = self.current_token()
         
-        if token.type == 'NUMBER':
+        if token.kind == TK_NUMBER:
             self.advance()
             value = float(token.value) if '.' in token.value else int(token.value)
-            return {'type': 'literal', 'value': value}
+            expr: Node = Literal(value)
         
-        elif token.type == 'STRING':
+        elif token.kind == TK_STRING:
             self.advance()
-            return {'type': 'literal', 'value': token.value}
+            expr = Literal(token.value)
         
-        elif token.type == 'TRUE':
+        elif token.kind == TK_TEMPLATE:
+            expr = self.parse_template(token)
             self.advance()
-            return {'type': 'literal', 'value': True}
         
-        elif token.type == 'FALSE':
+        elif token.kind == TK_TRUE:
             self.advance()
-            return {'type': 'literal', 'value': False}
+            expr = Literal(True)
         
-        elif token.type == 'IDENTIFIER':
+        elif token.kind == TK_FALSE:
+            self.advance()
+            expr = Literal(False)
+        
+        elif token.kind == TK_IDENTIFIER:
             name = self.advance().value
             
-            # Handle member access (e.g., object.property or object.method())
-            while self.current_token().type == 'DOT':
+            # Check if the identifier is a function call
+            if self.current_token().kind == TK_LPAREN:
+                expr = Call(name, self.parse_arguments())
+            else:
+                expr = Identifier(name)
+        
+        elif token.kind == TK_LBRACKET:
+            expr = ArrayLiteral(self.parse_elements())
+        
+        elif token.kind == TK_LBRACE:
+            expr = self.parse_object()
+        
+        else:
+            self.error(f"Unexpected token in expression: {token.type}")
+        
+        # Handle member access (e.g., object.property or object.method())
+        # and indexing (items[i], items[start:stop])
+        while True:
+            kind = self.current_token().kind
+            if kind == TK_DOT:
                 self.advance()  # consume DOT
-                member_name = self.expect('IDENTIFIER').value
+                member_name = self.expect(TK_IDENTIFIER).value
                 
                 # Check if it's a method call
-                if self.current_token().type == 'LPAREN':
-                    self.advance()
-                    args = []
-                    while self.current_token().type != 'RPAREN':
-                        args.append(self.parse_expression())
-                        if self.current_token().type == 'COMMA':
-                            self.advance()
-                    
-                    self.expect('RPAREN')
-                    # Create a member call node
-                    name = {'type': 'member_call', 'object': name, 'member': member_name, 'args': args}
+                if self.current_token().kind == TK_LPAREN:
+                    expr = MemberCall(expr, member_name, self.parse_arguments())
                 else:
-                    # Create a member access node
-                    name = {'type': 'member_access', 'object': name, 'member': member_name}
-            
-            # Check if the final identifier (or member expression) is a function call
-            if isinstance(name, str) and self.current_token().type == 'LPAREN':
-                self.advance()
-                args = []
-                while self.current_token().type != 'RPAREN':
-                    args.append(self.parse_expression())
-                    if self.current_token().type == 'COMMA':
-                        self.advance()
-                
-                self.expect('RPAREN')
-                return {'type': 'call', 'name': name, 'args': args}
+                    expr = MemberAccess(expr, member_name)
+            elif kind == TK_LBRACKET:
+                expr = self.parse_subscript(expr)
             else:
-                return name if isinstance(name, dict) else {'type': 'identifier', 'name': name}
-        
-        elif token.type == 'LPAREN':
-            self.advance()
-            expr = self.parse_expression()
-            self.expect('RPAREN')
-            return expr
+                return expr
+    
+    def parse_elements(self) -> List[Node]:
+        """Parse a bracketed, comma-separated element list."""
+        self.expect(TK_LBRACKET)
+        elements = []
+        while self.current_token().kind != TK_RBRACKET:
+            elements.append(self.parse_expression())
+            if self.current_token().kind == TK_COMMA:
+                self.advance()
+            elif self.current_token().kind != TK_RBRACKET:
+                self.error(f"Expected ',' or ']' in array literal, got {self.current.type}")
+        self.expect(TK_RBRACKET)
+        return elements
+    
+    def parse_object(self) -> Node:
+        """Parse {key: value, ...}; keys are identifiers or strings."""
+        self.expect(TK_LBRACE)
+        keys: List[str] = []
+        values: List[Node] = []
+        while self.current_token().kind != TK_RBRACE:
+            token = self.current
+            if token.kind != TK_IDENTIFIER and token.kind != TK_STRING:
+                self.error(f"Expected a property name in object literal, got {token.type}")
+            if token.value in keys:
+                self.error(f"Duplicate property '{token.value}' in object literal")
+            keys.append(self.advance().value)
+            self.expect(TK_COLON)
+            values.append(self.parse_expression())
+            if self.current_token().kind == TK_COMMA:
+                self.advance()
+            elif self.current_token().kind != TK_RBRACE:
+                self.error(f"Expected ',' or '}}' in object literal, got {self.current.type}")
+        self.expect(TK_RBRACE)
+        return ObjectLiteral(keys, values)
+    
+    def parse_template(self, token: Token) -> Node:
+        """
+        Parse the body of a `text ${expr} text` literal.
         
-        else:
-            self.error(f"Unexpected token in expression: {token.type}")
+        Each ${...} holds one expression, parsed on its own; a backslash
+        escapes the next character, so \\${ stays literal text. A literal
+        without any ${...} is a plain string Literal.
+        """
+        body = token.value
+        strings: List[str] = []
+        values: List[Node] = []
+        start = index = 0
+        while index < len(body):
+            char = body[index]
+            if char == '\\':
+                index += 2
+            elif char == '$' and body.startswith('{', index + 1):
+                strings.append(Lexer.unescape(body[start:index]))
+                end = self.template_expression_end(body, index + 2)
+                line = token.line + body.count('\n', 0, index)
+                values.append(self.parse_template_expression(body[index + 2:end], line))
+                start = index = end + 1
+            else:
+                index += 1
+        strings.append(Lexer.unescape(body[start:]))
+        return Template(strings, values) if values else Literal(strings[0])
+    
+    def template_expression_end(self, body: str, start: int) -> int:
+        """Return the offset of the '}' closing the ${ expression at start."""
+        depth = 0
+        index = start
+        while index < len(body):
+            char = body[index]
+            if char in '"\'':
+                # Skip a string literal, braces and all
+                match = Lexer.TOKEN_PATTERN.match(body, index)
+                index = match.end(1) if match else len(body)
+                continue
+            if char == '{':
+                depth += 1
+            elif char == '}':
+                if depth == 0:
+                    return index
+                depth -= 1
+            index += 1
+        self.error("Unterminated ${ in template literal")
+    
+    def parse_template_expression(self, source: str, line: int) -> Node:
+        """Parse the expression of one ${...}, which starts on `line`."""
+        # Leading newlines make the inner lexer count lines from `line`
+        parser = Parser(Lexer('\n' * (line - 1) + source).scan())
+        if parser.current.kind == TK_EOF:
+            self.error("Empty ${} in template literal")
+        expr = parser.parse_expression()
+        if parser.current.kind != TK_EOF:
+            parser.error(f"Unexpected {parser.current.type} in template expression")
+        return expr
+    
+    def parse_subscript(self, expr: Node) -> Node:
+        """Parse [index] or [start:stop] (either bound optional) after expr."""
+        self.expect(TK_LBRACKET)
+        start = None
+        if self.current_token().kind != TK_COLON:
+            start = self.parse_expression()
+            if self.current_token().kind == TK_RBRACKET:
+                self.advance()
+                return Index(expr, start)
+        self.expect(TK_COLON)
+        stop = None
+        if self.current_token().kind != TK_RBRACKET:
+            stop = self.parse_expression()
+        self.expect(TK_RBRACKET)
+        return Slice(expr, start, stop)
 
 
 # ============================================================================
@@ -623,172 +978,523 @@ class Parser:
 # ============================================================================
 
 class ReturnException(Exception):
-    """Used to implement return statements."""
+    """Raised when a return statement runs outside any function."""
     def __init__(self, value):
         self.value = value
 
 
-class Executor:
-    """Executes parsed NovaScript statements."""
+# Completion signals: statement handlers return None when they complete
+# normally, or one of these to unwind to the enclosing loop or call
+RETURN = 'return'
+BREAK = 'break'
+CONTINUE = 'continue'
+
+# RecursionError message of the engines whose calls nest on the Python stack
+# (tree, closure, py); only the VM keeps its own frame stack
+STACK_DEPTH_MESSAGE = ("maximum recursion depth exceeded (NovaScript calls that are not tail "
+                       "calls run on the Python stack; --engine vm runs them on its own)")
+
+# Node classes whose handlers return a value (a profile records its type)
+EXPRESSION_CLASSES = (Literal, Identifier, BinaryOp, UnaryOp, Call, MemberAccess, MemberCall,
+                      ArrayLiteral, ObjectLiteral, Template, Index, Slice)
+
+
+class Executor(NodeVisitor):
+    """
+    Executes parsed NovaScript statements.
+    
+    Statements and expressions are dispatched through the NodeVisitor
+    table keyed on node class, so each node visit is one dict lookup.
+    
+    Variables are resolved before execution (see resolver.py): globals
+    live in the cells of a GlobalScope, and a function call runs in a
+    frame, a list with one slot per local.
+    
+    Control flow uses completion signals instead of exceptions: statement
+    handlers return None, or RETURN, BREAK or CONTINUE, and blocks stop
+    at the first signal. A returned value waits in `return_value`.
+    
+    `return f(...)` inside a function is a tail call: instead of calling f
+    it leaves f and its frame in `tail_call`, and the visit_Call below
+    runs f in place of the returning function. Tail recursion therefore
+    runs in constant Python stack at any depth.
+    
+    Functions with a memo cache (see memo.py) are called through
+    call_memoized(). Set `memoize_pure` to memoize every function the
+    purity analysis accepts, and `memo_size` to bound each cache.
+    
+    Programs are rewritten by the passes of optimizer.optimize() before
+    they run, at `opt_level` (0 runs the tree as parsed). From -O2 on,
+    the binary operations whose operand types inference.py proves are
+    then specialised ahead of time; set `whole_program` when execute()
+    gets all the code that will run, so inference may assume it sees
+    every call. Each change is kept in `optimizations` and, with `debug`
+    on, printed to stderr. A `profile` of an earlier run (see
+    profiling.py) guides the passes, and the quickening of the nodes it
+    saw with one operand type; record_profile() records one.
+    
+    Binary operations quicken (see quicken.py): after an evaluation with
+    two int, float or str operands the node becomes a specialised variant
+    with its own handler, and goes back to generic on a type miss. Set
+    `quicken` to False to keep every node generic.
+    """
     
     def __init__(self, stdout=None):
         """Initialize executor with optional custom stdout for testing."""
-        self.global_scope: Dict[str, Any] = {}
+        super().__init__()
+        self.global_scope = self.create_global_scope()
+        # Slots of the running function; None at top level
+        self.frame: Optional[List[Any]] = None
+        # Value of the return statement that last signalled RETURN
+        self.return_value: Any = None
+        # (function, frame) of a pending tail call, or None
+        self.tail_call: Optional[Tuple[FunctionDef, List[Any]]] = None
+        # Local variables of the dict-scoped engines (closure, vm)
         self.local_scope: Optional[Dict[str, Any]] = None
         self.stdout = stdout or io.StringIO()
         self.debug = False
+        # Memoization settings and the cache of each memoized function
+        self.memoize_pure = False
+        self.memo_size: Optional[int] = DEFAULT_MEMO_SIZE
+        self.memo_caches: Dict[FunctionDef, MemoCache] = {}
+        # Optimisation level of optimizer.optimize(), and what it changed
+        self.opt_level = DEFAULT_OPT_LEVEL
+        self.optimizations: List[Tuple[str, str]] = []
+        # Whether execute() gets the whole program (run_code, run_file), not
+        # one REPL line whose functions later lines may call
+        self.whole_program = False
+        # Profile of a training run guiding the optimisations, if any
+        self.profile: Optional[Profile] = None
+        # Quickening switch, and the nodes it has specialised (in order)
+        self.quicken = True
+        self.quickened: Dict[BinaryOp, None] = {}
+        self.dispatch.update(quick_handlers(self))
+        self.dispatch.update(proven_handlers(self))
+    
+    def create_global_scope(self) -> Dict[str, Any]:
+        """Create the mapping that holds global variables."""
+        return GlobalScope()
     
     def get_scope(self) -> Dict[str, Any]:
-        """Get the current scope (local or global)."""
+        """Get the current dict scope (local or global) of the dict-scoped engines."""
         return self.local_scope if self.local_scope is not None else self.global_scope
     
-    def execute(self, statements: List[Dict[str, Any]]) -> Any:
-        """Execute a list of statements."""
-        result = None
-        for stmt in statements:
-            result = self.execute_statement(stmt)
-        return result
-    
-    def execute_statement(self, stmt: Dict[str, Any]) -> Any:
-        """Execute a single statement."""
-        stmt_type = stmt['type']
-        
-        if stmt_type == 'var':
-            scope = self.get_scope()
-            scope[stmt['name']] = self.evaluate_expression(stmt['value'])
-        
-        elif stmt_type == 'function':
-            scope = self.get_scope()
-            scope[stmt['name']] = stmt  # Store function definition
-        
-        elif stmt_type == 'print':
-            value = self.evaluate_expression(stmt['value'])
-            print(self.to_string(value), file=self.stdout)
-        
-        elif stmt_type == 'if':
-            condition = self.evaluate_expression(stmt['condition'])
-            if self.is_truthy(condition):
-                self.execute(stmt['then'])
-            elif stmt['else']:
-                self.execute(stmt['else'])
-        
-        elif stmt_type == 'while':
-            while self.is_truthy(self.evaluate_expression(stmt['condition'])):
-                try:
-                    self.execute(stmt['body'])
-                except ReturnException as e:
-                    raise e
-        
-        elif stmt_type == 'for':
-            # Initialize
-            if stmt['init']:
-                self.execute_statement(stmt['init'])
-            
-            # Loop
-            while self.is_truthy(self.evaluate_expression(stmt['condition'])):
-                try:
-                    self.execute(stmt['body'])
-                except ReturnException as e:
-                    raise e
-                
-                # Update
-                self.execute_statement(stmt['update'])
-        
-        elif stmt_type == 'return':
-            value = self.evaluate_expression(stmt['value']) if stmt['value'] else None
-            raise ReturnException(value)
+    def global_values(self) -> Dict[str, Any]:
+        """Return the global variables and their values."""
+        return dict(self.global_scope)
+    
+    def optimize_program(self, statements: List[Node]) -> None:
+        """
+        Run the optimisation passes of `opt_level` over a program before it
+        runs, then specialise the operations whose types are proven.
+        """
+        changes = optimize(statements, self.opt_level, self.profile)
+        if self.opt_level >= SPECIALISE_LEVEL:
+            types = infer_types(statements, self.global_values(), self.whole_program)
+            changes += [('specialise-types', change) for change in specialise(statements, types)]
+        self.note_optimizations(changes)
+    
+    def note_optimizations(self, changes: List[Tuple[str, str]]) -> None:
+        """Keep (pass name, description) changes in `optimizations`, printing them with `debug`."""
+        self.optimizations.extend(changes)
+        if self.debug:
+            for name, change in changes:
+                print(f"optimize {name}: {change}", file=sys.stderr)
+    
+    def record_profile(self) -> Profile:
+        """
+        Record a Profile of everything this executor runs from now on; return it.
         
-        elif stmt_type == 'assignment':
-            if stmt['target']['type'] == 'identifier':
-                name = stmt['target']['name']
-                value = self.evaluate_expression(stmt['value'])
-                
-                # Look up through scope chain
-                if self.local_scope is not None and name in self.local_scope:
-                    self.local_scope[name] = value
-                elif name in self.global_scope:
-                    self.global_scope[name] = value
-                else:
-                    scope = self.get_scope()
-                    scope[name] = value
+        Every handler of the dispatch table is wrapped to count its node,
+        those of expressions to record the type of each value too, and
+        those of calls (tail calls included) to record the function
+        called. Optimisation and quickening are turned off, so the
+        program runs as parsed and every operand goes through the table.
+        """
+        profile = Profile()
+        counts, types, targets = profile.counts, profile.types, profile.targets
+        self.opt_level = 0
+        self.quicken = False
+        
+        def counted(handler):
+            def run(node):
+                counts[node] += 1
+                return handler(node)
+            return run
+        
+        def typed(handler):
+            def run(node):
+                counts[node] += 1
+                value = handler(node)
+                types[node].add(type_of(value))
+                return value
+            return run
+        
+        def called(handler):
+            def run(node):
+                function = None if node.cell is None else node.cell.value
+                if function.__class__ is FunctionDef:
+                    targets[node].add(function)
+                return handler(node)
+            return run
+        
+        for cls, handler in list(self.dispatch.items()):
+            if issubclass(cls, EXPRESSION_CLASSES):
+                handler = typed(handler)
+                if issubclass(cls, Call):
+                    handler = called(handler)
+                self.dispatch[cls] = handler
             else:
-                raise RuntimeError("Invalid assignment target")
+                self.dispatch[cls] = counted(handler)
         
-        elif stmt_type == 'expression':
-            return self.evaluate_expression(stmt['value'])
+        prepare_call = self.prepare_call
         
-        return None
-    
-    def evaluate_expression(self, expr: Dict[str, Any]) -> Any:
-        """Evaluate an expression."""
-        expr_type = expr['type']
+        def prepare_tail_call(expr: Call) -> Tuple[FunctionDef, List[Any]]:
+            counts[expr] += 1
+            function, frame = prepare_call(expr)
+            targets[expr].add(function)
+            return function, frame
         
-        if expr_type == 'literal':
-            return expr['value']
+        self.prepare_call = prepare_tail_call
+        return profile
+    
+    def prepare_memo(self, statements: List[Node]) -> None:
+        """Give the functions of a program their memo caches before it runs."""
+        assign_caches(statements, self.memo_caches, self.memoize_pure,
+                      self.memo_size, self.global_scope.keys())
+    
+    def memo_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return the counters of each memo cache, keyed by function name."""
+        return {cache.name: cache.stats() for cache in self.memo_caches.values()}
+    
+    def quickening_stats(self) -> List[Dict[str, Any]]:
+        """
+        Return the counters of every node quickening has specialised.
         
-        elif expr_type == 'identifier':
-            name = expr['name']
-            # Look up in local scope first, then global
-            if self.local_scope is not None and name in self.local_scope:
-                return self.local_scope[name]
-            elif name in self.global_scope:
-                return self.global_scope[name]
+        For each node: its operator, its current specialisation (the
+        variant's class name, or 'generic'), and how many evaluations ran
+        specialised (`hits`), ran generic (`generic`) and deoptimised
+        (`deopts`).
+        """
+        return [{
+            'op': expr.op,
+            'state': 'generic' if expr.__class__ is BinaryOp else expr.__class__.__name__,
+            'hits': expr.quick_hits,
+            'generic': expr.generic_runs,
+            'deopts': expr.deopts,
+        } for expr in self.quickened]
+    
+    def execute(self, statements: List[Node]) -> Any:
+        """Resolve and execute a list of statements."""
+        self.optimize_program(statements)
+        if self.profile is not None and self.quicken:
+            self.note_optimizations([('profile-quicken', change) for change in
+                                     quicken_profiled(statements, self.profile, self.quickened)])
+        resolve(statements, self.global_scope)
+        self.prepare_memo(statements)
+        # Return the value of a trailing expression
+        tail = None
+        if statements and isinstance(statements[-1], ExpressionStatement):
+            statements, tail = statements[:-1], statements[-1].value
+        try:
+            if self.execute_block(statements) is not None:
+                raise ReturnException(self.return_value)
+            if tail is not None:
+                return self.dispatch[tail.__class__](tail)
+        except RecursionError:
+            raise RecursionError(STACK_DEPTH_MESSAGE) from None
+        return None
+    
+    def execute_block(self, statements: List[Node]) -> Optional[str]:
+        """Execute resolved statements; return the completion signal."""
+        dispatch = self.dispatch
+        for stmt in statements:
+            signal = dispatch[stmt.__class__](stmt)
+            if signal is not None:
+                return signal
+        return None
+    
+    def execute_statement(self, stmt: Node) -> Any:
+        """Resolve and execute a single statement."""
+        return self.execute([stmt])
+    
+    def evaluate_expression(self, expr: Node) -> Any:
+        """Resolve and evaluate an expression."""
+        resolve([expr], self.global_scope)
+        return self.dispatch[expr.__class__](expr)
+    
+    def generic_visit(self, node: Node) -> Any:
+        raise RuntimeError(f"Unknown node type: {node.type}")
+    
+    # ------------------------------------------------------------------
+    # Statements
+    # ------------------------------------------------------------------
+    
+    def visit_VarDecl(self, stmt: VarDecl) -> None:
+        value = self.dispatch[stmt.value.__class__](stmt.value)
+        if stmt.slot is None:
+            stmt.cell.value = value
+        else:
+            self.frame[stmt.slot] = value
+    
+    def visit_FunctionDef(self, stmt: FunctionDef) -> None:
+        # Store the function definition itself
+        if stmt.slot is None:
+            stmt.cell.value = stmt
+        else:
+            self.frame[stmt.slot] = stmt
+    
+    def visit_Print(self, stmt: Print) -> None:
+        value = self.dispatch[stmt.value.__class__](stmt.value)
+        print(self.to_string(value), file=self.stdout)
+    
+    def visit_If(self, stmt: If) -> Optional[str]:
+        condition = self.dispatch[stmt.condition.__class__](stmt.condition)
+        # Comparisons give bools; other values go through is_truthy()
+        if condition is True or (condition is not False and self.is_truthy(condition)):
+            return self.execute_block(stmt.then)
+        elif stmt.else_:
+            return self.execute_block(stmt.else_)
+        return None
+    
+    def visit_While(self, stmt: While) -> Optional[str]:
+        dispatch = self.dispatch
+        is_truthy = self.is_truthy
+        condition = stmt.condition
+        body = stmt.body
+        while True:
+            value = dispatch[condition.__class__](condition)
+            if value is not True and (value is False or not is_truthy(value)):
+                break
+            # The body runs inline; a signal stops it like execute_block()
+            for item in body:
+                signal = dispatch[item.__class__](item)
+                if signal is not None:
+                    break
             else:
-                raise NameError(f"Undefined variable: {name}")
-        
-        elif expr_type == 'member_access':
-            obj = self.evaluate_expression({'type': 'identifier', 'name': expr['object']} if isinstance(expr['object'], str) else expr['object'])
-            member = expr['member']
-            
-            if not isinstance(obj, dict):
-                raise TypeError(f"Cannot access member '{member}' on non-object type: {type(obj).__name__}")
-            
-            if member not in obj:
-                raise AttributeError(f"Object has no member '{member}'")
-            
-            return obj[member]
+                continue
+            if signal is BREAK:
+                break
+            if signal is RETURN:
+                return signal
+        return None
+    
+    def visit_For(self, stmt: For) -> Optional[str]:
+        # Initialize
+        if stmt.init:
+            self.dispatch[stmt.init.__class__](stmt.init)
+        
+        # Loop; continue still runs the update. Handlers are looked up on
+        # every pass because quickening can change a node's class.
+        dispatch = self.dispatch
+        is_truthy = self.is_truthy
+        condition = stmt.condition
+        body = stmt.body
+        update = stmt.update
+        while True:
+            value = dispatch[condition.__class__](condition)
+            if value is not True and (value is False or not is_truthy(value)):
+                break
+            for item in body:
+                signal = dispatch[item.__class__](item)
+                if signal is not None:
+                    break
+            else:
+                dispatch[update.__class__](update)
+                continue
+            if signal is BREAK:
+                break
+            if signal is RETURN:
+                return signal
+            dispatch[update.__class__](update)
+        return None
+    
+    def visit_ForIn(self, stmt: ForIn) -> Optional[str]:
+        iterator = self.iterate(self.dispatch[stmt.iterable.__class__](stmt.iterable))
+        
+        # Python drives the loop and the variable is stored directly; the
+        # frame cannot change while the body runs, since calls restore it
+        dispatch = self.dispatch
+        body = stmt.body
+        slot = stmt.slot
+        frame = self.frame
+        cell = stmt.cell
+        for value in iterator:
+            if slot is None:
+                cell.value = value
+            else:
+                frame[slot] = value
+            for item in body:
+                signal = dispatch[item.__class__](item)
+                if signal is not None:
+                    break
+            else:
+                continue
+            if signal is BREAK:
+                break
+            if signal is RETURN:
+                return signal
+        return None
+    
+    def visit_Return(self, stmt: Return) -> str:
+        value = stmt.value
+        if value is None:
+            self.return_value = None
+        elif (value.__class__ is Call and self.frame is not None
+              and value.name not in BUILTIN_FUNCTIONS):
+            # Tail call: the caller's visit_Call runs it in this frame's place
+            self.tail_call = self.prepare_call(value)
+        else:
+            self.return_value = self.dispatch[value.__class__](value)
+        return RETURN
+    
+    def visit_Break(self, stmt: Break) -> str:
+        return BREAK
+    
+    def visit_Continue(self, stmt: Continue) -> str:
+        return CONTINUE
+    
+    def visit_Assignment(self, stmt: Assignment) -> None:
+        target = stmt.target
+        if target.__class__ is not Identifier:
+            dispatch = self.dispatch
+            if target.__class__ is MemberAccess:
+                obj = dispatch[target.object.__class__](target.object)
+                value = dispatch[stmt.value.__class__](stmt.value)
+                cache = target.cache
+                if obj.__class__ is NovaObject and obj.shape is cache.shape:
+                    obj.values[cache.offset] = value
+                else:
+                    cache.store(obj, value)
+                return
+            if target.__class__ is not Index:
+                raise RuntimeError("Invalid assignment target")
+            obj = dispatch[target.object.__class__](target.object)
+            index = dispatch[target.index.__class__](target.index)
+            set_item(obj, index, dispatch[stmt.value.__class__](stmt.value))
+            return
         
-        elif expr_type == 'member_call':
-            obj = self.evaluate_expression({'type': 'identifier', 'name': expr['object']} if isinstance(expr['object'], str) else expr['object'])
-            member = expr['member']
-            args = [self.evaluate_expression(arg) for arg in expr['args']]
-            
-            if not isinstance(obj, dict):
-                raise TypeError(f"Cannot call method '{member}' on non-object type: {type(obj).__name__}")
-            
-            if member not in obj:
-                raise AttributeError(f"Object has no method '{member}'")
-            
-            method = obj[member]
-            
-            # Check if it's callable
-            if not callable(method):
-                raise TypeError(f"'{member}' is not a method")
-            
-            # Call the method
-            return method(*args)
+        value = self.dispatch[stmt.value.__class__](stmt.value)
         
-        elif expr_type == 'binary_op':
-            return self.evaluate_binary_op(expr)
+        # A bound local wins, then an existing global, then a new local
+        slot = target.slot
+        if slot is not None and (self.frame[slot] is not UNSET or target.cell.value is UNSET):
+            self.frame[slot] = value
+        else:
+            target.cell.value = value
+    
+    def visit_ExpressionStatement(self, stmt: ExpressionStatement) -> None:
+        self.dispatch[stmt.value.__class__](stmt.value)
+    
+    # ------------------------------------------------------------------
+    # Expressions
+    # ------------------------------------------------------------------
+    
+    def visit_Literal(self, expr: Literal) -> Any:
+        return expr.value
+    
+    def visit_Identifier(self, expr: Identifier) -> Any:
+        # Look up in the local slot first, then the global cell
+        slot = expr.slot
+        if slot is not None:
+            value = self.frame[slot]
+            if value is not UNSET:
+                return value
+        value = expr.cell.value
+        if value is UNSET:
+            raise NameError(f"Undefined variable: {expr.name}")
+        return value
+    
+    def visit_MemberAccess(self, expr: MemberAccess) -> Any:
+        obj = self.dispatch[expr.object.__class__](expr.object)
+        
+        # Same module as last time: its member is already known; an
+        # object of the cached shape keeps it at the cached offset
+        cache = expr.cache
+        if obj is cache.object:
+            return cache.value
+        if obj.__class__ is NovaObject and obj.shape is cache.shape:
+            return obj.values[cache.offset]
+        return cache.load(obj)
+    
+    def visit_MemberCall(self, expr: MemberCall) -> Any:
+        dispatch = self.dispatch
+        obj = dispatch[expr.object.__class__](expr.object)
+        args = [dispatch[arg.__class__](arg) for arg in expr.args]
+        
+        # The inline cache checks the object and the method on a miss
+        cache = expr.cache
+        if obj is cache.object:
+            return cache.value(*args)
+        return self.load_method(cache, obj)(*args)
+    
+    def visit_ArrayLiteral(self, expr: ArrayLiteral) -> List[Any]:
+        dispatch = self.dispatch
+        return [dispatch[element.__class__](element) for element in expr.elements]
+    
+    def visit_ObjectLiteral(self, expr: ObjectLiteral) -> NovaObject:
+        dispatch = self.dispatch
+        return NovaObject(expr.shape, [dispatch[value.__class__](value) for value in expr.values])
+    
+    def visit_Template(self, expr: Template) -> str:
+        dispatch = self.dispatch
+        to_string = self.to_string
+        # One format call builds the string, whatever the number of values
+        return expr.pattern.format(*[to_string(dispatch[value.__class__](value))
+                                     for value in expr.values])
+    
+    def visit_Index(self, expr: Index) -> Any:
+        dispatch = self.dispatch
+        obj = dispatch[expr.object.__class__](expr.object)
+        index = dispatch[expr.index.__class__](expr.index)
+        # Lists with an in-range int index skip the checks in get_item()
+        if obj.__class__ is list and index.__class__ is int and -len(obj) <= index < len(obj):
+            return obj[index]
+        return get_item(obj, index)
+    
+    def visit_Slice(self, expr: Slice) -> Any:
+        dispatch = self.dispatch
+        obj = dispatch[expr.object.__class__](expr.object)
+        start = None if expr.start is None else dispatch[expr.start.__class__](expr.start)
+        stop = None if expr.stop is None else dispatch[expr.stop.__class__](expr.stop)
+        return get_slice(obj, start, stop)
+    
+    def visit_BinaryOp(self, expr: BinaryOp) -> Any:
+        """Evaluate binary operations; 'and' and 'or' short-circuit."""
+        op = expr.op
+        dispatch = self.dispatch
+        left = dispatch[expr.left.__class__](expr.left)
+        
+        # The right operand of 'and' / 'or' only runs when it decides the result
+        if op == 'and':
+            return self.is_truthy(left) and self.is_truthy(dispatch[expr.right.__class__](expr.right))
+        elif op == 'or':
+            return left if self.is_truthy(left) else dispatch[expr.right.__class__](expr.right)
         
-        elif expr_type == 'unary_op':
-            return self.evaluate_unary_op(expr)
+        right = dispatch[expr.right.__class__](expr.right)
         
-        elif expr_type == 'call':
-            return self.evaluate_call(expr)
+        # Two operands of one type: specialise the node for them
+        expr.generic_runs += 1
+        if left.__class__ is right.__class__ and self.quicken and expr.deopts < MAX_DEOPTS:
+            quick = quick_class(expr, left, right)
+            if quick is not None:
+                expr.__class__ = quick
+                self.quickened[expr] = None
         
-        else:
-            raise RuntimeError(f"Unknown expression type: {expr_type}")
+        return self.binary_operation(op, left, right)
     
-    def evaluate_binary_op(self, expr: Dict[str, Any]) -> Any:
-        """Evaluate binary operations."""
-        op = expr['op']
-        left = self.evaluate_expression(expr['left'])
-        right = self.evaluate_expression(expr['right'])
-        
+    def deoptimize(self, expr: BinaryOp, left: Any, right: Any) -> Any:
+        """Return a quickened node to generic after a type miss and finish it."""
+        expr.__class__ = BinaryOp
+        expr.deopts += 1
+        expr.generic_runs += 1
+        return self.binary_operation(expr.op, left, right)
+    
+    def binary_operation(self, op: str, left: Any, right: Any) -> Any:
+        """Apply a binary operator other than 'and' / 'or' to evaluated operands."""
         if op == '+':
-            if isinstance(left, str) or isinstance(right, str):
-                return self.to_string(left) + self.to_string(right)
+            if isinstance(left, STRING_TYPES) or isinstance(right, STRING_TYPES):
+                return self.concat(left, right)
             return left + right
         elif op == '-':
             return left - right
@@ -812,17 +1518,13 @@ class Executor:
             return left <= right
         elif op == '>=':
             return left >= right
-        elif op == 'and':
-            return self.is_truthy(left) and self.is_truthy(right)
-        elif op == 'or':
-            return left if self.is_truthy(left) else right
         else:
             raise RuntimeError(f"Unknown operator: {op}")
     
-    def evaluate_unary_op(self, expr: Dict[str, Any]) -> Any:
+    def visit_UnaryOp(self, expr: UnaryOp) -> Any:
         """Evaluate unary operations."""
-        op = expr['op']
-        operand = self.evaluate_expression(expr['expr'])
+        op = expr.op
+        operand = self.dispatch[expr.expr.__class__](expr.expr)
         
         if op == '-':
             return -operand
@@ -831,49 +1533,200 @@ class Executor:
         else:
             raise RuntimeError(f"Unknown unary operator: {op}")
     
-    def evaluate_call(self, expr: Dict[str, Any]) -> Any:
+    def visit_Call(self, expr: Call) -> Any:
         """Evaluate function calls."""
-        name = expr['name']
-        args = [self.evaluate_expression(arg) for arg in expr['args']]
+        name = expr.name
+        dispatch = self.dispatch
+        args = [dispatch[arg.__class__](arg) for arg in expr.args]
         
-        # Handle built-in require() function
-        if name == 'require':
-            return self.builtin_require(args)
+        # Handle the built-in require() and range() functions
+        if name in BUILTIN_FUNCTIONS:
+            return self.call_builtin(name, args)
         
-        # Look up function
-        if name not in self.global_scope:
+        # Look up function (calls only see globals)
+        func_def = expr.cell.value
+        if func_def is UNSET:
             raise NameError(f"Undefined function: {name}")
         
-        func_def = self.global_scope[name]
-        
-        if not isinstance(func_def, dict) or func_def['type'] != 'function':
+        if not isinstance(func_def, FunctionDef):
             raise TypeError(f"{name} is not a function")
         
         # Check parameter count
-        if len(args) != len(func_def['params']):
+        count = len(args)
+        if count != len(func_def.params):
             raise TypeError(
-                f"{name}() takes {len(func_def['params'])} arguments "
-                f"({len(args)} given)"
+                f"{name}() takes {len(func_def.params)} arguments "
+                f"({count} given)"
             )
         
-        # Create local scope
-        prev_local = self.local_scope
-        self.local_scope = {}
+        # The arguments fill the first slots of the new frame
+        if func_def.frame_size > count:
+            args += [UNSET] * (func_def.frame_size - count)
+        if func_def.cache is not None:
+            return self.call_memoized(func_def, args)
+        prev_frame = self.frame
+        self.frame = args
         
-        # Bind parameters
-        for param, arg in zip(func_def['params'], args):
-            self.local_scope[param] = arg
+        # Execute function body, then any tail calls it hands back
+        try:
+            while self.execute_block(func_def.body) is not None:
+                tail_call = self.tail_call
+                if tail_call is None:
+                    return self.return_value
+                self.tail_call = None
+                func_def, self.frame = tail_call
+                if func_def.cache is not None:
+                    return self.call_memoized(func_def, self.frame)
+            return None
+        finally:
+            self.frame = prev_frame
+    
+    def call_memoized(self, func_def: FunctionDef, frame: List[Any]) -> Any:
+        """
+        Run a call to a memoized function in a new frame.
         
-        # Execute function body
-        result = None
+        The result comes from the function's cache if it has one for the
+        arguments. Otherwise the body runs like in visit_Call, tail calls
+        included, and the final result is cached for every memoized
+        function the tail calls passed through.
+        """
+        pending: List[Tuple[MemoCache, tuple]] = []
+        prev_frame = self.frame
         try:
-            self.execute(func_def['body'])
-        except ReturnException as e:
-            result = e.value
+            while True:
+                cache = func_def.cache
+                if cache is not None:
+                    key = memo_key(frame[:len(func_def.params)])
+                    value = cache.get(key)
+                    if value is not MISS:
+                        break
+                    pending.append((cache, key))
+                self.frame = frame
+                if self.execute_block(func_def.body) is None:
+                    value = None
+                    break
+                tail_call = self.tail_call
+                if tail_call is None:
+                    value = self.return_value
+                    break
+                self.tail_call = None
+                func_def, frame = tail_call
         finally:
-            self.local_scope = prev_local
+            self.frame = prev_frame
+        for cache, key in pending:
+            cache.put(key, value)
+        return value
+    
+    def call_function(self, function: Any, args: List[Any]) -> Any:
+        """
+        Call a function value from Python, e.g. the callback of a list method.
+        
+        `function` is a NovaScript function or a module function.
+        """
+        if not isinstance(function, FunctionDef):
+            if not callable(function):
+                raise TypeError(f"{self.to_string(function)} is not a function")
+            return function(*args)
+        self.check_arguments(function, len(args))
+        frame = list(args)
+        if function.frame_size > len(frame):
+            frame += [UNSET] * (function.frame_size - len(frame))
+        # Runs the body with or without a cache, tail calls included
+        return self.call_memoized(function, frame)
+    
+    def check_arguments(self, func_def: FunctionDef, count: int) -> None:
+        """Raise TypeError unless a function takes `count` arguments."""
+        if count != len(func_def.params):
+            raise TypeError(
+                f"{func_def.name}() takes {len(func_def.params)} arguments "
+                f"({count} given)"
+            )
+    
+    def load_method(self, cache: MemberCache, obj: Any) -> Any:
+        """
+        Look up the method of a member call site whose cache missed.
+        
+        A list's methods are bound to this executor and the list, and are
+        not cached. An object's method is a function stored in one of its
+        properties, found through the site's shape cache; modules go
+        through the site's MemberCache.
+        """
+        if isinstance(obj, list):
+            return bind_method(self, obj, cache.member)
+        if obj.__class__ is NovaObject:
+            function = cache.load(obj)
+            if not (isinstance(function, FunctionDef) or callable(function)):
+                raise TypeError(f"'{cache.member}' is not a method")
+            return lambda *args: self.call_function(function, list(args))
+        return cache.load_method(obj)
+    
+    def prepare_call(self, expr: Call) -> Tuple[FunctionDef, List[Any]]:
+        """
+        Evaluate a call's arguments and check its callee; return (function, frame).
+        
+        Used for tail calls; visit_Call inlines the same steps.
+        """
+        name = expr.name
+        dispatch = self.dispatch
+        args = [dispatch[arg.__class__](arg) for arg in expr.args]
+        
+        # Look up function (calls only see globals)
+        func_def = expr.cell.value
+        if func_def is UNSET:
+            raise NameError(f"Undefined function: {name}")
+        
+        if not isinstance(func_def, FunctionDef):
+            raise TypeError(f"{name} is not a function")
+        
+        # Check parameter count
+        count = len(args)
+        if count != len(func_def.params):
+            raise TypeError(
+                f"{name}() takes {len(func_def.params)} arguments "
+                f"({count} given)"
+            )
         
-        return result
+        # The arguments fill the first slots of the new frame
+        if func_def.frame_size > count:
+            args += [UNSET] * (func_def.frame_size - count)
+        return func_def, args
+    
+    # Names kept from the dict-based executor
+    evaluate_binary_op = visit_BinaryOp
+    evaluate_unary_op = visit_UnaryOp
+    evaluate_call = visit_Call
+    
+    def call_builtin(self, name: str, args: List[Any]) -> Any:
+        """Call the builtin function `name` (one of BUILTIN_FUNCTIONS)."""
+        return getattr(self, 'builtin_' + name)(args)
+    
+    def builtin_range(self, args: List[Any]) -> range:
+        """
+        Built-in range() function: a lazy sequence of integers.
+        
+        Usage:
+            for (i in range(10)): ...          # 0 .. 9
+            for (i in range(2, 10)): ...       # 2 .. 9
+            for (i in range(10, 0, -2)): ...   # 10, 8, 6, 4, 2
+        
+        Returns a Python range, so iterating it allocates nothing per
+        element however long it is.
+        """
+        if not 1 <= len(args) <= 3:
+            raise TypeError(f"range() takes 1 to 3 arguments ({len(args)} given)")
+        for arg in args:
+            if arg.__class__ is not int:
+                raise TypeError(f"range() arguments must be integers, not {type_name(arg)}")
+        if len(args) == 3 and args[2] == 0:
+            raise RuntimeError("range() step must not be zero")
+        return range(*args)
+    
+    def iterate(self, value: Any) -> Iterator[Any]:
+        """Return an iterator over the value a for-in loop walks."""
+        try:
+            return iter(value)
+        except TypeError:
+            raise TypeError(f"Cannot iterate over {type_name(value)}") from None
     
     def builtin_require(self, args: List[Any]) -> Dict[str, Any]:
         """
@@ -898,8 +1751,9 @@ class Executor:
         
         module_name = args[0]
         
-        if not isinstance(module_name, str):
-            raise TypeError(f"Module name must be a string, not {type(module_name).__name__}")
+        if not isinstance(module_name, STRING_TYPES):
+            raise TypeError(f"Module name must be a string, not {type_name(module_name)}")
+        module_name = str(module_name)
         
         # Load module from stdlib
         try:
@@ -944,53 +1798,154 @@ class Executor:
     
     def to_string(self, value: Any) -> str:
         """Convert a value to a string for printing."""
+        if value.__class__ is str:
+            return value
         if isinstance(value, bool):
             return "true" if value else "false"
         elif value is None:
             return "null"
+        elif isinstance(value, list):
+            return '[' + ', '.join([self.to_item_string(item) for item in value]) + ']'
+        elif value.__class__ is NovaObject:
+            return '{' + ', '.join([(key if key.isidentifier() else '"' + key + '"') + ': '
+                                    + self.to_item_string(item)
+                                    for key, item in zip(value.shape.keys, value.values)]) + '}'
         return str(value)
+    
+    def to_item_string(self, value: Any) -> str:
+        """Convert a list element or property value for printing; strings are quoted."""
+        return '"' + str(value) + '"' if isinstance(value, STRING_TYPES) else self.to_string(value)
+    
+    def concat(self, left: Any, right: Any) -> Any:
+        """
+        Evaluate `left + right` when either operand is a string.
+        
+        The other operand is converted with to_string(). Long results are
+        ropes (see ropes.py), so appending to them in a loop stays linear.
+        """
+        if right.__class__ is not str:
+            right = str(right) if right.__class__ is Rope else self.to_string(right)
+        if left.__class__ is not str:
+            if left.__class__ is Rope:
+                return left.append(right)
+            left = self.to_string(left)
+        # Inlined ropes.concat() for the common case of two short strings
+        length = len(left) + len(right)
+        if length < ROPE_THRESHOLD:
+            return left + right
+        return Rope([left, right], 2, length)
+
 
+# Names accepted by run_code(engine=...) and `novax --engine`
+ENGINES = ('tree', 'closure', 'vm', 'py')
 
-def run_code(source: str, debug: bool = False) -> str:
+
+def get_executor_class(engine: str) -> type:
+    """
+    Return the executor class implementing an execution engine.
+    
+    Args:
+        engine: 'tree' (walk the AST), 'closure' (compile to closures),
+            'vm' (compile to bytecode for the stack VM) or 'py' (transpile
+            to Python and run it with exec())
+    """
+    if engine == 'tree':
+        return Executor
+    elif engine == 'closure':
+        from novascriptx.closures import ClosureExecutor
+        return ClosureExecutor
+    elif engine == 'vm':
+        from novascriptx.vm import VMExecutor
+        return VMExecutor
+    elif engine == 'py':
+        from novascriptx.transpiler import PythonExecutor
+        return PythonExecutor
+    raise ValueError(f"Unknown engine '{engine}'. Available engines: {', '.join(ENGINES)}")
+
+
+def run_code(source: str, debug: bool = False, engine: str = 'tree',
+             memoize_pure: bool = False, memo_size: Optional[int] = DEFAULT_MEMO_SIZE,
+             opt_level: int = DEFAULT_OPT_LEVEL, profile_in: Optional[str] = None,
+             profile_out: Optional[str] = None) -> str:
     """
     Execute NovaScript source code and return output.
     
     Args:
         source: NovaScript source code as string
-        debug: If True, enable debug output
+        debug: If True, enable debug output (the parse tree, the changes
+            of the optimisation passes, the memo cache counters and the
+            quickening counters go to stderr)
+        engine: Execution engine, one of ENGINES
+        memoize_pure: If True, memoize every function proven pure
+        memo_size: Entries kept per memoized function (None for no bound)
+        opt_level: Optimisation level, one of optimizer.LEVELS
+        profile_in: Profile file of a training run to guide the optimisations
+        profile_out: File to save a profile of this run to; the run then
+            uses the tree-walking engine without optimisation
         
     Returns:
         Captured stdout output from execution
     """
+    if profile_in is not None and profile_out is not None:
+        raise ValueError("profile_in and profile_out cannot be combined")
+    executor_class = Executor if profile_out is not None else get_executor_class(engine)
     try:
         output = io.StringIO()
         
-        # Lexical analysis
-        lexer = Lexer(source)
-        tokens = lexer.tokenize()
-        
-        # Parsing
-        parser = Parser(tokens)
+        # Lexing and parsing (tokens are streamed into the parser)
+        parser = Parser(Lexer(source).scan())
         statements = parser.parse()
+        if debug:
+            print(dump(statements), file=sys.stderr)
         
         # Execution
-        executor = Executor(stdout=output)
+        executor = executor_class(stdout=output)
         executor.debug = debug
+        executor.memoize_pure = memoize_pure
+        executor.memo_size = memo_size
+        executor.opt_level = opt_level
+        executor.whole_program = True
+        if profile_in is not None:
+            try:
+                executor.profile = load_profile(profile_in, statements)
+            except FileNotFoundError:
+                raise RuntimeError(f"Profile '{profile_in}' not found") from None
+            except ValueError as e:
+                raise RuntimeError(str(e)) from None
+        recording = executor.record_profile() if profile_out is not None else None
         executor.execute(statements)
+        if recording is not None:
+            save_profile(recording, profile_out, statements)
+        if debug:
+            for name, stats in executor.memo_stats().items():
+                print(f"memo {name}: {stats['hits']} hits, {stats['misses']} misses, "
+                      f"{stats['evictions']} evictions, {stats['size']} entries", file=sys.stderr)
+            for stats in executor.quickening_stats():
+                print(f"quicken '{stats['op']}' ({stats['state']}): {stats['hits']} specialised, "
+                      f"{stats['generic']} generic, {stats['deopts']} deopts", file=sys.stderr)
         
         return output.getvalue()
     
-    except (SyntaxError, NameError, TypeError, RuntimeError) as e:
+    except (SyntaxError, NameError, TypeError, IndexError, RuntimeError) as e:
         raise RuntimeError(str(e))
 
 
-def run_file(filename: str, debug: bool = False) -> str:
+def run_file(filename: str, debug: bool = False, engine: str = 'tree',
+             memoize_pure: bool = False, memo_size: Optional[int] = DEFAULT_MEMO_SIZE,
+             opt_level: int = DEFAULT_OPT_LEVEL, profile_in: Optional[str] = None,
+             profile_out: Optional[str] = None) -> str:
     """
     Read and execute a NovaScript file.
     
     Args:
         filename: Path to .nova file
         debug: If True, enable debug output
+        engine: Execution engine, one of ENGINES
+        memoize_pure: If True, memoize every function proven pure
+        memo_size: Entries kept per memoized function (None for no bound)
+        opt_level: Optimisation level, one of optimizer.LEVELS
+        profile_in: Profile file of a training run to guide the optimisations
+        profile_out: File to save a profile of this run to
         
     Returns:
         Captured stdout output from execution
@@ -998,14 +1953,20 @@ def run_file(filename: str, debug: bool = False) -> str:
     try:
         with open(filename, 'r') as f:
             source = f.read()
-        return run_code(source, debug=debug)
+        return run_code(source, debug=debug, engine=engine,
+                        memoize_pure=memoize_pure, memo_size=memo_size, opt_level=opt_level,
+                        profile_in=profile_in, profile_out=profile_out)
     except FileNotFoundError:
         raise FileNotFoundError(f"File '{filename}' not found")
 
 
-def run_repl():
+def run_repl(engine: str = 'tree', memoize_pure: bool = False,
+             memo_size: Optional[int] = DEFAULT_MEMO_SIZE, opt_level: int = DEFAULT_OPT_LEVEL):
     """Interactive Read-Eval-Print Loop for NovaScript."""
-    executor = Executor()
+    executor = get_executor_class(engine)()
+    executor.memoize_pure = memoize_pure
+    executor.memo_size = memo_size
+    executor.opt_level = opt_level
     print("NovaScript Interpreter v" + __version__)
     print("Type 'exit' to quit\n")
     
@@ -1019,18 +1980,14 @@ def run_repl():
             if not source.strip():
                 continue
             
-            # Lexical analysis
-            lexer = Lexer(source)
-            tokens = lexer.tokenize()
-            
-            # Parsing
-            parser = Parser(tokens)
+            # Lexing and parsing (tokens are streamed into the parser)
+            parser = Parser(Lexer(source).scan())
             statements = parser.parse()
             
             # Execution
             executor.execute(statements)
         
-        except (SyntaxError, NameError, TypeError, RuntimeError) as e:
+        except (SyntaxError, NameError, TypeError, IndexError, RuntimeError) as e:
             print(f"Error: {e}")
         except KeyboardInterrupt:
             print("\nInterrupted")
@@ -0,0 +1,186 @@
+"""
+The NovaScript list type.
+
+A NovaScript list is a plain Python list. Array literals (`[1, 2, 3]`)
+build one, `items[i]` and `items[i] = value` read and replace an element,
+`items[start:stop]` copies a slice, and `items.length` is its length.
+Indexing, slicing and `length` work on strings too; negative indices
+count from the end, as in Python.
+
+The bulk methods run as Python loops over the list; only the functions
+passed to them (map, filter, reduce and sort callbacks) run as
+NovaScript, through Executor.call_function():
+
+    items.map(f)          new list of f(item)
+    items.filter(f)       new list of the items where f(item) is truthy
+    items.reduce(f[, a])  f(f(a, items[0]), items[1]) ... (a defaults to items[0])
+    items.sort([f])       sorts in place, by f(a, b) < 0 if given; returns items
+    items.join([sep])     the items as strings, separated by sep (default ",")
+    items.sum()           sum of the items (0 when empty)
+    items.indexOf(value)  index of the first item equal to value, or -1
+    items.push(value...)  appends the values; returns the new length
+    items.pop()           removes and returns the last item
+
+A list's methods are bound to the executor that calls them, so unlike
+module members they are never kept in a site's inline cache.
+"""
+
+from functools import cmp_to_key, reduce
+from typing import Any, Callable, Dict, List, Optional
+
+from novascriptx.ropes import STRING_TYPES, Rope, type_name
+
+# Types that can be indexed and sliced
+SEQUENCE_TYPES = (list, str, Rope)
+
+
+def check_index(obj: Any, index: Any) -> None:
+    """Raise TypeError unless obj[index] is a valid NovaScript access."""
+    if not isinstance(obj, SEQUENCE_TYPES):
+        raise TypeError(f"Cannot index {type_name(obj)}")
+    if index.__class__ is not int:
+        raise TypeError(f"Index must be an integer, not {type_name(index)}")
+
+
+def get_item(obj: Any, index: Any) -> Any:
+    """Evaluate obj[index]."""
+    check_index(obj, index)
+    try:
+        return obj[index]
+    except IndexError:
+        raise IndexError(f"Index {index} out of range for length {len(obj)}") from None
+
+
+def set_item(obj: Any, index: Any, value: Any) -> None:
+    """Execute obj[index] = value."""
+    if obj.__class__ is str or obj.__class__ is Rope:
+        raise TypeError("Strings cannot be modified")
+    check_index(obj, index)
+    try:
+        obj[index] = value
+    except IndexError:
+        raise IndexError(f"Index {index} out of range for length {len(obj)}") from None
+
+
+def get_slice(obj: Any, start: Any, stop: Any) -> Any:
+    """Evaluate obj[start:stop]; None stands for an omitted bound."""
+    if not isinstance(obj, SEQUENCE_TYPES):
+        raise TypeError(f"Cannot slice {type_name(obj)}")
+    for bound in (start, stop):
+        if bound is not None and bound.__class__ is not int:
+            raise TypeError(f"Slice bounds must be integers, not {type_name(bound)}")
+    return obj[start:stop]
+
+
+def get_property(obj: Any, member: str) -> Any:
+    """Evaluate obj.member for a list or string."""
+    if member == 'length':
+        return len(obj)
+    if obj.__class__ is list and member in LIST_METHODS:
+        raise TypeError(f"List method '{member}' must be called")
+    kind = 'List' if obj.__class__ is list else 'String'
+    raise AttributeError(f"{kind} has no member '{member}'")
+
+
+def bind_method(executor, items: List[Any], member: str) -> Callable[..., Any]:
+    """Return the list method `member` bound to an executor and a list."""
+    method = LIST_METHODS.get(member)
+    if method is None:
+        raise AttributeError(f"List has no method '{member}'")
+    return lambda *args: method(executor, items, args)
+
+
+def expect_args(name: str, args: tuple, minimum: int, maximum: Optional[int] = None) -> None:
+    """Raise TypeError unless a method got between minimum and maximum arguments."""
+    maximum = minimum if maximum is None else maximum
+    if not minimum <= len(args) <= maximum:
+        expected = str(minimum) if minimum == maximum else f"{minimum} to {maximum}"
+        raise TypeError(f"{name}() takes {expected} arguments ({len(args)} given)")
+
+
+# ----------------------------------------------------------------------------
+# Methods: each takes (executor, list, argument tuple)
+# ----------------------------------------------------------------------------
+
+def list_map(executor, items: List[Any], args: tuple) -> List[Any]:
+    expect_args('map', args, 1)
+    call = executor.call_function
+    function = args[0]
+    return [call(function, [item]) for item in items]
+
+
+def list_filter(executor, items: List[Any], args: tuple) -> List[Any]:
+    expect_args('filter', args, 1)
+    call = executor.call_function
+    is_truthy = executor.is_truthy
+    function = args[0]
+    return [item for item in items if is_truthy(call(function, [item]))]
+
+
+def list_reduce(executor, items: List[Any], args: tuple) -> Any:
+    expect_args('reduce', args, 1, 2)
+    call = executor.call_function
+    function = args[0]
+    if len(args) == 1 and not items:
+        raise TypeError("reduce() of an empty list needs an initial value")
+    combine = lambda total, item: call(function, [total, item])
+    return reduce(combine, items, args[1]) if len(args) == 2 else reduce(combine, items)
+
+
+def list_sort(executor, items: List[Any], args: tuple) -> List[Any]:
+    expect_args('sort', args, 0, 1)
+    if args:
+        call = executor.call_function
+        function = args[0]
+        items.sort(key=cmp_to_key(lambda a, b: call(function, [a, b])))
+    else:
+        items.sort()
+    return items
+
+
+def list_join(executor, items: List[Any], args: tuple) -> str:
+    expect_args('join', args, 0, 1)
+    separator = args[0] if args else ','
+    if not isinstance(separator, STRING_TYPES):
+        raise TypeError(f"join() separator must be a string, not {type_name(separator)}")
+    separator = str(separator)
+    to_string = executor.to_string
+    return separator.join([item if item.__class__ is str else to_string(item) for item in items])
+
+
+def list_sum(executor, items: List[Any], args: tuple) -> Any:
+    expect_args('sum', args, 0)
+    return sum(items)
+
+
+def list_index_of(executor, items: List[Any], args: tuple) -> int:
+    expect_args('indexOf', args, 1)
+    try:
+        return items.index(args[0])
+    except ValueError:
+        return -1
+
+
+def list_push(executor, items: List[Any], args: tuple) -> int:
+    items.extend(args)
+    return len(items)
+
+
+def list_pop(executor, items: List[Any], args: tuple) -> Any:
+    expect_args('pop', args, 0)
+    if not items:
+        raise IndexError("pop() from an empty list")
+    return items.pop()
+
+
+LIST_METHODS: Dict[str, Callable[[Any, List[Any], tuple], Any]] = {
+    'map': list_map,
+    'filter': list_filter,
+    'reduce': list_reduce,
+    'sort': list_sort,
+    'join': list_join,
+    'sum': list_sum,
+    'indexOf': list_index_of,
+    'push': list_push,
+    'pop': list_pop,
+}
@@ -0,0 +1,262 @@
+"""
+Memoization of NovaScript functions.
+
+A function is memoized when it is declared with `memo function`, or when
+the executor runs with `memoize_pure` (`novax --memoize-pure`) and
+pure_functions() proves it pure. Each memoized function gets its own
+MemoCache: a bounded LRU table from argument tuples to return values,
+with hit, miss and eviction counters.
+
+assign_caches() runs before a program executes and stores each
+function's cache in its FunctionDef (`node.cache`, None when the
+function is not memoized); every engine checks that attribute when it
+calls a function.
+
+`memo function` is a promise by the programmer: the function is cached
+even if it prints or reads globals, so its side effects happen only on a
+miss. Only functions defined outside any function body are memoized;
+calls never reach the others.
+"""
+
+from collections import OrderedDict
+from math import copysign
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from novascriptx.nodes import (
+    BUILTIN_FUNCTIONS, Node, iter_child_nodes,
+    VarDecl, FunctionDef, Print, If, While, For, ForIn, Assignment, Identifier,
+    Call, MemberAccess, MemberCall, ArrayLiteral, ObjectLiteral, Slice,
+)
+from novascriptx.resolver import function_slots
+
+# Entries kept per function unless configured otherwise
+DEFAULT_MEMO_SIZE = 1024
+
+
+class _Miss:
+    """Type of MISS, returned by MemoCache.get() when there is no entry."""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'MISS'
+
+
+MISS = _Miss()
+
+
+def memo_key(args: Iterable[Any]) -> tuple:
+    """Return the cache key for a list of arguments."""
+    args = tuple(args)
+    # The types are part of the key, so 1, 1.0 and True stay distinct
+    types = tuple(map(type, args))
+    if float in types:
+        # So are the signs of floats: 0.0 == -0.0, with the same hash
+        types += tuple(copysign(1.0, arg) for arg in args if arg.__class__ is float)
+    return args + types
+
+
+class MemoCache:
+    """
+    Least-recently-used cache of one function's results.
+
+    maxsize bounds the number of entries (None for no bound); once it is
+    reached, storing a new result evicts the entry used longest ago.
+    Keys come from memo_key(); a key that cannot be hashed (it holds a
+    module object) always misses and is never stored.
+    """
+
+    __slots__ = ('name', 'maxsize', 'entries', 'hits', 'misses', 'evictions')
+
+    def __init__(self, name: str, maxsize: Optional[int] = DEFAULT_MEMO_SIZE):
+        if maxsize is not None and maxsize < 1:
+            raise ValueError(f"memo cache size must be at least 1, not {maxsize}")
+        self.name = name
+        self.maxsize = maxsize
+        self.entries: 'OrderedDict[tuple, Any]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __repr__(self):
+        return f"<MemoCache {self.name}, {len(self.entries)}/{self.maxsize} entries>"
+
+    def get(self, key: tuple) -> Any:
+        """Return the result cached under `key`, or MISS."""
+        entries = self.entries
+        try:
+            value = entries.get(key, MISS)
+        except TypeError:
+            value = MISS
+        if value is MISS:
+            self.misses += 1
+        else:
+            entries.move_to_end(key)
+            self.hits += 1
+        return value
+
+    def put(self, key: tuple, value: Any) -> None:
+        """Cache a result under `key`, evicting the oldest entry if full."""
+        entries = self.entries
+        try:
+            entries[key] = value
+        except TypeError:
+            return
+        if self.maxsize is not None and len(entries) > self.maxsize:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        self.entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the counters and current size as a dict."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self.entries),
+            'maxsize': self.maxsize,
+        }
+
+
+def top_level_statements(statements: List[Node]) -> Iterator[Node]:
+    """Yield the statements outside any function body, in source order."""
+    pending = list(reversed(statements))
+    while pending:
+        stmt = pending.pop()
+        yield stmt
+        if isinstance(stmt, If):
+            pending.extend(reversed(stmt.then + stmt.else_))
+        elif isinstance(stmt, (While, ForIn)):
+            pending.extend(reversed(stmt.body))
+        elif isinstance(stmt, For):
+            pending.extend(reversed([node for node in (stmt.init, stmt.update) if node]
+                                    + stmt.body))
+
+
+def top_level_functions(statements: List[Node]) -> List[FunctionDef]:
+    """Return the function definitions outside any function body, in order."""
+    return [stmt for stmt in top_level_statements(statements) if isinstance(stmt, FunctionDef)]
+
+
+def pure_functions(statements: List[Node], global_names: Iterable[str] = ()) -> Set[FunctionDef]:
+    """
+    Return the functions of a program whose results depend only on their
+    arguments.
+
+    A pure function does not print, require modules, touch objects
+    (member access and method calls) or build or modify lists or
+    objects, and every name it reads or assigns is a parameter or a local
+    that no global shares (an unbound local would fall back to the
+    global). The functions it calls must be pure, defined exactly once
+    in this program and bound by nothing else;
+    recursion is allowed. `global_names` lists globals bound before the
+    program runs, such as earlier REPL inputs.
+    """
+    global_names = set(global_names)
+    functions: List[FunctionDef] = []
+    # Names bound by top-level statements, and how many times
+    bindings: Dict[str, int] = {}
+    for stmt in top_level_statements(statements):
+        if isinstance(stmt, FunctionDef):
+            functions.append(stmt)
+        if isinstance(stmt, (VarDecl, FunctionDef, ForIn)):
+            name = stmt.name
+        elif isinstance(stmt, Assignment) and isinstance(stmt.target, Identifier):
+            name = stmt.target.name
+        else:
+            continue
+        bindings[name] = bindings.get(name, 0) + 1
+    globals_ = global_names | bindings.keys()
+
+    # Calls to these names always reach the one definition in this program
+    definitions = {func.name: func for func in functions
+                   if bindings[func.name] == 1 and func.name not in global_names}
+
+    # Local checks first; calls are settled by the fixed point below
+    callees: Dict[FunctionDef, Set[str]] = {}
+    for func in functions:
+        names = callee_names(func, globals_)
+        if names is not None and names <= definitions.keys():
+            callees[func] = names
+
+    # Drop functions calling an impure function until nothing changes
+    pure = set(callees)
+    changed = True
+    while changed:
+        changed = False
+        for func in list(pure):
+            if any(definitions[name] not in pure for name in callees[func]):
+                pure.discard(func)
+                changed = True
+    return pure
+
+
+def callee_names(func: FunctionDef, global_names: Set[str]) -> Optional[Set[str]]:
+    """
+    Return the names a function calls, or None if its body has an effect
+    or reads state other than its arguments.
+    """
+    slots = function_slots(func)
+    params = set(func.params)
+    locals_ = {name for name in slots if name in params or name not in global_names}
+    names: Set[str] = set()
+
+    stack: List[Node] = list(func.body)
+    while stack:
+        node = stack.pop()
+        cls = node.__class__
+        # Lists and objects are mutable, so a cached one could change
+        # under later callers
+        if (cls is Print or cls is MemberAccess or cls is MemberCall
+                or cls is ArrayLiteral or cls is ObjectLiteral or cls is Slice):
+            return None
+        if cls is Identifier or cls is VarDecl or cls is ForIn:
+            if node.name not in locals_:
+                return None
+        elif cls is Assignment:
+            if node.target.__class__ is not Identifier or node.target.name not in locals_:
+                return None
+        elif cls is Call:
+            if node.name == 'require':
+                return None
+            # range() is a builtin without side effects
+            if node.name not in BUILTIN_FUNCTIONS:
+                names.add(node.name)
+        elif cls is FunctionDef:
+            # Binds a local; calls cannot reach the nested function
+            if node.name not in locals_:
+                return None
+            continue
+        stack.extend(iter_child_nodes(node))
+    return names
+
+
+def assign_caches(statements: List[Node], caches: Dict[FunctionDef, MemoCache],
+                  memoize_pure: bool = False, maxsize: Optional[int] = DEFAULT_MEMO_SIZE,
+                  global_names: Iterable[str] = ()) -> None:
+    """
+    Set `cache` on the top-level functions of a program.
+
+    Functions declared with `memo`, and the pure ones when memoize_pure is
+    set, get the cache recorded for them in `caches` (one is created on
+    first use); every other function gets None.
+    """
+    functions = top_level_functions(statements)
+    memoized = {func for func in functions if func.memo}
+    if memoize_pure:
+        memoized |= pure_functions(statements, global_names)
+    for func in functions:
+        if func in memoized:
+            cache = caches.get(func)
+            if cache is None:
+                cache = caches[func] = MemoCache(func.name, maxsize)
+            func.cache = cache
+        else:
+            func.cache = None
@@ -0,0 +1,471 @@
+"""
+NovaScript AST node classes.
+
+Every node is a small __slots__ class with a fixed list of fields. The
+parser builds these nodes, the executor dispatches on their class, and
+tooling can walk them with NodeVisitor / walk() or print them with dump().
+
+Nodes still answer dict-style lookups (node['type'], node['name']) with
+the keys of the old dict-based AST, and to_dict() converts a tree back
+to that form, so older tooling keeps working.
+
+Nodes that name a variable also carry `slot` and `cell` attributes. They
+are not fields: resolver.resolve() fills them in before the tree-walking
+Executor runs the program. Likewise memo.assign_caches() sets the `cache`
+of each FunctionDef before any engine runs it. MemberAccess and MemberCall
+nodes own the inline cache (inline_cache.MemberCache) of their site,
+ObjectLiteral nodes the shape (objects.Shape) of the objects they build,
+and Template nodes the format pattern of their text.
+The tree-walking Executor may rewrite a BinaryOp into one of the
+specialised subclasses in quicken.py, and inference.specialise() into one
+of its proven variants; they behave as BinaryOp everywhere else.
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type
+
+from novascriptx.inline_cache import MemberCache
+from novascriptx.objects import shape_of
+
+
+# All concrete node classes, in definition order
+NODE_CLASSES: List[Type['Node']] = []
+
+
+class Node:
+    """Base class of all AST nodes."""
+
+    __slots__ = ()
+
+    # Tag used by the dict-based AST (e.g. 'binary_op')
+    type = 'node'
+
+    # Names of the child/value fields, in constructor order
+    _fields: Tuple[str, ...] = ()
+
+    # Dict keys that differ from the attribute name
+    _aliases: Dict[str, str] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if 'type' in cls.__dict__:
+            NODE_CLASSES.append(cls)
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'type':
+            return self.type
+        try:
+            return getattr(self, self._aliases.get(key, key))
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict-style get() for compatibility with the old AST."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{type(self).__name__}({fields})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert this subtree to the old dict-based representation."""
+        keys = {attr: key for key, attr in self._aliases.items()}
+        result = {'type': self.type}
+        for name in self._fields:
+            result[keys.get(name, name)] = _to_plain(getattr(self, name))
+        return result
+
+
+def _to_plain(value: Any) -> Any:
+    """Convert node fields (nodes, lists of nodes) to plain data."""
+    if isinstance(value, Node):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [_to_plain(item) for item in value]
+    return value
+
+
+# ----------------------------------------------------------------------------
+# Statements
+# ----------------------------------------------------------------------------
+
+class VarDecl(Node):
+    """var name = value"""
+    __slots__ = ('name', 'value', 'slot', 'cell')
+    type = 'var'
+    _fields = ('name', 'value')
+
+    def __init__(self, name: str, value: Node):
+        self.name = name
+        self.value = value
+        self.slot = None
+        self.cell = None
+
+
+class FunctionDef(Node):
+    """[memo] function name(params): body"""
+    __slots__ = ('name', 'params', 'body', 'memo', 'slot', 'cell', 'frame_size', 'cache')
+    type = 'function'
+    _fields = ('name', 'params', 'body', 'memo')
+
+    def __init__(self, name: str, params: List[str], body: List[Node], memo: bool = False):
+        self.name = name
+        self.params = params
+        self.body = body
+        self.memo = memo
+        self.slot = None
+        self.cell = None
+        self.frame_size = len(params)
+        self.cache = None
+
+
+class Print(Node):
+    """print(value)"""
+    __slots__ = ('value',)
+    type = 'print'
+    _fields = ('value',)
+
+    def __init__(self, value: Node):
+        self.value = value
+
+
+class If(Node):
+    """if (condition): then else: else_"""
+    __slots__ = ('condition', 'then', 'else_')
+    type = 'if'
+    _fields = ('condition', 'then', 'else_')
+    _aliases = {'else': 'else_'}
+
+    def __init__(self, condition: Node, then: List[Node], else_: List[Node]):
+        self.condition = condition
+        self.then = then
+        self.else_ = else_
+
+
+class While(Node):
+    """while (condition): body"""
+    __slots__ = ('condition', 'body')
+    type = 'while'
+    _fields = ('condition', 'body')
+
+    def __init__(self, condition: Node, body: List[Node]):
+        self.condition = condition
+        self.body = body
+
+
+class For(Node):
+    """for (init : condition : update): body"""
+    __slots__ = ('init', 'condition', 'update', 'body')
+    type = 'for'
+    _fields = ('init', 'condition', 'update', 'body')
+
+    def __init__(self, init: Optional[Node], condition: Node, update: Node, body: List[Node]):
+        self.init = init
+        self.condition = condition
+        self.update = update
+        self.body = body
+
+
+class ForIn(Node):
+    """for (name in iterable): body"""
+    __slots__ = ('name', 'iterable', 'body', 'slot', 'cell')
+    type = 'for_in'
+    _fields = ('name', 'iterable', 'body')
+
+    def __init__(self, name: str, iterable: Node, body: List[Node]):
+        self.name = name
+        self.iterable = iterable
+        self.body = body
+        self.slot = None
+        self.cell = None
+
+
+class Return(Node):
+    """return [value]"""
+    __slots__ = ('value',)
+    type = 'return'
+    _fields = ('value',)
+
+    def __init__(self, value: Optional[Node]):
+        self.value = value
+
+
+class Break(Node):
+    """break -- leave the innermost loop."""
+    __slots__ = ()
+    type = 'break'
+
+
+class Continue(Node):
+    """continue -- start the next iteration of the innermost loop."""
+    __slots__ = ()
+    type = 'continue'
+
+
+class Assignment(Node):
+    """target = value, where target is an Identifier, an Index or a MemberAccess"""
+    __slots__ = ('target', 'value')
+    type = 'assignment'
+    _fields = ('target', 'value')
+
+    def __init__(self, target: Node, value: Node):
+        self.target = target
+        self.value = value
+
+
+class ExpressionStatement(Node):
+    """An expression evaluated for its side effects."""
+    __slots__ = ('value',)
+    type = 'expression'
+    _fields = ('value',)
+
+    def __init__(self, value: Node):
+        self.value = value
+
+
+# ----------------------------------------------------------------------------
+# Expressions
+# ----------------------------------------------------------------------------
+
+class Literal(Node):
+    """A number, string or boolean constant."""
+    __slots__ = ('value',)
+    type = 'literal'
+    _fields = ('value',)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+class Identifier(Node):
+    """A variable reference."""
+    __slots__ = ('name', 'slot', 'cell')
+    type = 'identifier'
+    _fields = ('name',)
+
+    def __init__(self, name: str):
+        self.name = name
+        self.slot = None
+        self.cell = None
+
+
+class BinaryOp(Node):
+    """left op right"""
+    __slots__ = ('op', 'left', 'right', 'quick_hits', 'generic_runs', 'deopts')
+    type = 'binary_op'
+    _fields = ('op', 'left', 'right')
+
+    def __init__(self, op: str, left: Node, right: Node):
+        self.op = op
+        self.left = left
+        self.right = right
+        # Quickening counters of the tree-walking Executor (see quicken.py)
+        self.quick_hits = 0
+        self.generic_runs = 0
+        self.deopts = 0
+
+
+class UnaryOp(Node):
+    """op expr, where op is '!' or '-'"""
+    __slots__ = ('op', 'expr')
+    type = 'unary_op'
+    _fields = ('op', 'expr')
+
+    def __init__(self, op: str, expr: Node):
+        self.op = op
+        self.expr = expr
+
+
+# Call names that always reach a builtin function, never a NovaScript one
+BUILTIN_FUNCTIONS = frozenset({'require', 'range'})
+
+
+class Call(Node):
+    """name(args) -- a call to a NovaScript function or builtin."""
+    __slots__ = ('name', 'args', 'cell')
+    type = 'call'
+    _fields = ('name', 'args')
+
+    def __init__(self, name: str, args: List[Node]):
+        self.name = name
+        self.args = args
+        self.cell = None
+
+
+class MemberAccess(Node):
+    """object.member"""
+    __slots__ = ('object', 'member', 'cache')
+    type = 'member_access'
+    _fields = ('object', 'member')
+
+    def __init__(self, object: Node, member: str):
+        self.object = object
+        self.member = member
+        self.cache = MemberCache(member)
+
+
+class MemberCall(Node):
+    """object.member(args)"""
+    __slots__ = ('object', 'member', 'args', 'cache')
+    type = 'member_call'
+    _fields = ('object', 'member', 'args')
+
+    def __init__(self, object: Node, member: str, args: List[Node]):
+        self.object = object
+        self.member = member
+        self.args = args
+        self.cache = MemberCache(member)
+
+
+class ArrayLiteral(Node):
+    """[elements]"""
+    __slots__ = ('elements',)
+    type = 'array'
+    _fields = ('elements',)
+
+    def __init__(self, elements: List[Node]):
+        self.elements = elements
+
+
+class ObjectLiteral(Node):
+    """{key: value, ...}"""
+    __slots__ = ('keys', 'values', 'shape')
+    type = 'object'
+    _fields = ('keys', 'values')
+
+    def __init__(self, keys: List[str], values: List[Node]):
+        self.keys = keys
+        self.values = values
+        self.shape = shape_of(keys)
+
+
+class Template(Node):
+    """
+    `text ${value} text` -- a template literal.
+
+    `strings` holds the constant text around the values: strings[i]
+    comes before values[i], and the last string ends the literal.
+    """
+    __slots__ = ('strings', 'values', 'pattern')
+    type = 'template'
+    _fields = ('strings', 'values')
+
+    def __init__(self, strings: List[str], values: List[Node]):
+        self.strings = strings
+        self.values = values
+        # str.format() pattern of the whole literal, one {} per value
+        self.pattern = '{}'.join(text.replace('{', '{{').replace('}', '}}') for text in strings)
+
+
+class Index(Node):
+    """object[index]"""
+    __slots__ = ('object', 'index')
+    type = 'index'
+    _fields = ('object', 'index')
+
+    def __init__(self, object: Node, index: Node):
+        self.object = object
+        self.index = index
+
+
+class Slice(Node):
+    """object[start:stop], where either bound may be omitted (None)"""
+    __slots__ = ('object', 'start', 'stop')
+    type = 'slice'
+    _fields = ('object', 'start', 'stop')
+
+    def __init__(self, object: Node, start: Optional[Node], stop: Optional[Node]):
+        self.object = object
+        self.start = start
+        self.stop = stop
+
+
+# ----------------------------------------------------------------------------
+# Traversal
+# ----------------------------------------------------------------------------
+
+def iter_child_nodes(node: Node) -> Iterator[Node]:
+    """Yield the direct child nodes of a node, in field order."""
+    for name in node._fields:
+        value = getattr(node, name)
+        if isinstance(value, Node):
+            yield value
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, Node):
+                    yield item
+
+
+def walk(nodes) -> Iterator[Node]:
+    """Yield every node in a tree (or list of trees), parents first."""
+    stack = list(reversed(nodes)) if isinstance(nodes, list) else [nodes]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(list(iter_child_nodes(node))))
+
+
+def dump(nodes, indent: str = '  ') -> str:
+    """Return an indented, human-readable listing of a tree."""
+    lines: List[str] = []
+
+    def is_subtree(value: Any) -> bool:
+        return isinstance(value, Node) or (
+            isinstance(value, list) and any(isinstance(item, Node) for item in value))
+
+    def emit(node: Node, depth: int, label: str = ''):
+        scalars = ', '.join(f"{name}={getattr(node, name)!r}" for name in node._fields
+                            if not is_subtree(getattr(node, name)))
+        lines.append(f"{indent * depth}{label}{type(node).__name__}({scalars})")
+        for name in node._fields:
+            value = getattr(node, name)
+            if isinstance(value, Node):
+                emit(value, depth + 1, f"{name}: ")
+            elif is_subtree(value):
+                lines.append(f"{indent * (depth + 1)}{name}:")
+                for item in value:
+                    emit(item, depth + 2)
+
+    for node in (nodes if isinstance(nodes, list) else [nodes]):
+        emit(node, 0)
+    return '\n'.join(lines)
+
+
+class NodeVisitor:
+    """
+    Walks an AST through a dispatch table keyed on node class.
+
+    Handlers are methods named visit_<ClassName>. The table is filled for
+    every known node class when the visitor is created, so dispatch is a
+    single dict lookup; subclasses of node classes fall back to the
+    handler of their nearest base class. Nodes without a handler go to
+    generic_visit(), which visits their children.
+    """
+
+    def __init__(self):
+        self.dispatch: Dict[type, Callable[[Node], Any]] = {
+            cls: self.lookup_handler(cls) for cls in NODE_CLASSES
+        }
+
+    def lookup_handler(self, cls: type) -> Callable[[Node], Any]:
+        """Find the handler for a node class, walking its MRO."""
+        for klass in cls.__mro__:
+            handler = getattr(self, 'visit_' + klass.__name__, None)
+            if handler is not None:
+                return handler
+        return self.generic_visit
+
+    def visit(self, node: Node) -> Any:
+        """Visit a node and return the handler's result."""
+        try:
+            handler = self.dispatch[node.__class__]
+        except KeyError:
+            handler = self.dispatch[node.__class__] = self.lookup_handler(node.__class__)
+        return handler(node)
+
+    def generic_visit(self, node: Node) -> None:
+        """Visit all children of a node."""
+        for child in iter_child_nodes(node):
+            self.visit(child)
@@ -8,6 +8,8 @@ Usage:
     novax --repl
     novax --serve server.nova
     novax --watch program.nova
+    novax --types program.nova
+    novax --profile-out prof.json program.nova
 
 This module provides the entry point for the 'novax' command when installed via pip.
 """
@@ -19,16 +21,28 @@ import time
 from pathlib import Path
 from typing import Optional
 
-from novascriptx.interpreter import run_code, run_file, run_repl, __version__
+from novascriptx.inference import SPECIALISE_LEVEL, format_types, infer_types, specialise
+from novascriptx.interpreter import ENGINES, run_code, run_file, run_repl, __version__
+from novascriptx.memo import DEFAULT_MEMO_SIZE
+from novascriptx.optimizer import DEFAULT_OPT_LEVEL, LEVELS, optimize
 
 
-def watch_file(filename: str, debug: bool = False) -> None:
+def watch_file(filename: str, debug: bool = False, engine: str = 'tree',
+               memoize_pure: bool = False, memo_size: Optional[int] = DEFAULT_MEMO_SIZE,
+               opt_level: int = DEFAULT_OPT_LEVEL, profile_in: Optional[str] = None,
+               profile_out: Optional[str] = None) -> None:
     """
     Watch a file for changes and re-run on modification (watch mode).
     
     Args:
         filename: Path to .nova file to watch
         debug: Enable debug output
+        engine: Execution engine
+        memoize_pure: Memoize every function proven pure
+        memo_size: Entries kept per memoized function (None for no bound)
+        opt_level: Optimisation level (0, 1 or 2)
+        profile_in: Profile file guiding the optimisations
+        profile_out: File to save a profile of each run to
     """
     filepath = Path(filename)
     
@@ -47,7 +61,8 @@ def watch_file(filename: str, debug: bool = False) -> None:
                 
                 if current_mtime != initial_mtime:
                     print(f"\n[{time.strftime('%H:%M:%S')}] File changed, re-running...\n")
-                    execute_file(filename, debug)
+                    execute_file(filename, debug, engine, memoize_pure, memo_size, opt_level,
+                                 profile_in, profile_out)
                     initial_mtime = current_mtime
                 
                 time.sleep(0.5)
@@ -64,16 +79,27 @@ def watch_file(filename: str, debug: bool = False) -> None:
         sys.exit(0)
 
 
-def execute_file(filename: str, debug: bool = False) -> None:
+def execute_file(filename: str, debug: bool = False, engine: str = 'tree',
+                 memoize_pure: bool = False, memo_size: Optional[int] = DEFAULT_MEMO_SIZE,
+                 opt_level: int = DEFAULT_OPT_LEVEL, profile_in: Optional[str] = None,
+                 profile_out: Optional[str] = None) -> None:
     """
     Execute a NovaScript file.
     
     Args:
         filename: Path to .nova file
         debug: Enable debug output
+        engine: Execution engine
+        memoize_pure: Memoize every function proven pure
+        memo_size: Entries kept per memoized function (None for no bound)
+        opt_level: Optimisation level (0, 1 or 2)
+        profile_in: Profile file guiding the optimisations
+        profile_out: File to save a profile of the run to
     """
     try:
-        output = run_file(filename, debug=debug)
+        output = run_file(filename, debug=debug, engine=engine,
+                          memoize_pure=memoize_pure, memo_size=memo_size, opt_level=opt_level,
+                          profile_in=profile_in, profile_out=profile_out)
         if output:
             print(output, end='')
     except FileNotFoundError as e:
@@ -84,16 +110,27 @@ def execute_file(filename: str, debug: bool = False) -> None:
         sys.exit(1)
 
 
-def execute_code(code: str, debug: bool = False) -> None:
+def execute_code(code: str, debug: bool = False, engine: str = 'tree',
+                 memoize_pure: bool = False, memo_size: Optional[int] = DEFAULT_MEMO_SIZE,
+                 opt_level: int = DEFAULT_OPT_LEVEL, profile_in: Optional[str] = None,
+                 profile_out: Optional[str] = None) -> None:
     """
     Execute NovaScript code from string.
     
     Args:
         code: NovaScript source code
         debug: Enable debug output
+        engine: Execution engine
+        memoize_pure: Memoize every function proven pure
+        memo_size: Entries kept per memoized function (None for no bound)
+        opt_level: Optimisation level (0, 1 or 2)
+        profile_in: Profile file guiding the optimisations
+        profile_out: File to save a profile of the run to
     """
     try:
-        output = run_code(code, debug=debug)
+        output = run_code(code, debug=debug, engine=engine,
+                          memoize_pure=memoize_pure, memo_size=memo_size, opt_level=opt_level,
+                          profile_in=profile_in, profile_out=profile_out)
         if output:
             print(output, end='')
     except RuntimeError as e:
@@ -101,6 +138,66 @@ def execute_code(code: str, debug: bool = False) -> None:
         sys.exit(1)
 
 
+def disassemble_file(filename: str, opt_level: int = DEFAULT_OPT_LEVEL) -> None:
+    """
+    Print the bytecode the VM engine would run for a NovaScript file.
+    
+    Args:
+        filename: Path to .nova file
+        opt_level: Optimisation level (0, 1 or 2)
+    """
+    from novascriptx.interpreter import Lexer, Parser
+    from novascriptx.vm import BytecodeCompiler, disassemble
+    
+    try:
+        with open(filename, 'r') as f:
+            source = f.read()
+        statements = Parser(Lexer(source).scan()).parse()
+        optimize(statements, opt_level)
+        if opt_level >= SPECIALISE_LEVEL:
+            specialise(statements, infer_types(statements))
+        compiler = BytecodeCompiler()
+        code = compiler.compile_program(statements)
+        print(disassemble(code, compiler.functions))
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found", file=sys.stderr)
+        sys.exit(1)
+    except SyntaxError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def show_types(filename: str, opt_level: int = DEFAULT_OPT_LEVEL) -> None:
+    """
+    Print the inferred types of a NovaScript file's variables and functions,
+    and the operations specialised at opt_level.
+    
+    Args:
+        filename: Path to .nova file
+        opt_level: Optimisation level (0, 1 or 2)
+    """
+    from novascriptx.interpreter import Lexer, Parser
+    
+    try:
+        with open(filename, 'r') as f:
+            source = f.read()
+        statements = Parser(Lexer(source).scan()).parse()
+        optimize(statements, opt_level)
+        types = infer_types(statements)
+        print(format_types(types))
+        if opt_level >= SPECIALISE_LEVEL:
+            changes = specialise(statements, types)
+            print(f"specialised ({len(changes)})")
+            for change in changes:
+                print(f"  {change}")
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found", file=sys.stderr)
+        sys.exit(1)
+    except SyntaxError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
 def main(argv: Optional[list] = None) -> int:
     """
     Main CLI entry point.
@@ -118,7 +215,14 @@ def main(argv: Optional[list] = None) -> int:
                '  novax script.nova              # Run a script\n'
                '  novax                          # Interactive REPL\n'
                '  novax -w script.nova           # Watch mode\n'
-               '  novax --debug script.nova      # Debug mode',
+               '  novax --debug script.nova      # Debug mode\n'
+               '  novax --engine closure x.nova  # Compile to closures before running\n'
+               '  novax --memoize-pure x.nova    # Cache results of pure functions\n'
+               '  novax -O2 script.nova          # Also inline, drop dead code, hoist invariants\n'
+               '  novax --dis script.nova        # Show VM bytecode\n'
+               '  novax --types script.nova      # Show inferred types\n'
+               '  novax --profile-out p.json x.nova      # Record a training run\n'
+               '  novax -O2 --profile-in p.json x.nova   # Optimise with its profile',
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
     
@@ -157,6 +261,72 @@ def main(argv: Optional[list] = None) -> int:
         help='Enable debug output'
     )
     
+    # Execution engine
+    parser.add_argument(
+        '--engine',
+        choices=ENGINES,
+        default='tree',
+        help='Execution engine (default: tree)'
+    )
+    
+    # Memoization
+    parser.add_argument(
+        '--memoize-pure',
+        action='store_true',
+        help='Memoize every function proven pure (no print, require or global state)'
+    )
+    
+    parser.add_argument(
+        '--memo-size',
+        type=int,
+        default=DEFAULT_MEMO_SIZE,
+        metavar='N',
+        help=f'Results cached per memoized function, 0 for no limit (default: {DEFAULT_MEMO_SIZE})'
+    )
+    
+    # Optimisation
+    parser.add_argument(
+        '-O',
+        dest='opt_level',
+        type=int,
+        choices=sorted(LEVELS),
+        default=DEFAULT_OPT_LEVEL,
+        metavar='LEVEL',
+        help='Optimisation level: 0 runs the program as parsed, 1 folds constants and '
+             'string chains, 2 also inlines small functions, removes dead branches '
+             'and unreachable code, computes loop-invariant and repeated '
+             'expressions once, and specialises operations on proven types '
+             f'(default: {DEFAULT_OPT_LEVEL})'
+    )
+    
+    # Disassemble
+    parser.add_argument(
+        '--dis',
+        action='store_true',
+        help='Print the VM bytecode for FILE instead of running it'
+    )
+    
+    # Type inference
+    parser.add_argument(
+        '--types',
+        action='store_true',
+        help='Print the inferred types of FILE\'s variables and functions instead of running it'
+    )
+    
+    # Profile-guided optimisation
+    parser.add_argument(
+        '--profile-out',
+        metavar='PROFILE',
+        help='Run on the tree engine without optimisation and save a profile of the run '
+             '(execution counts, operand types, call targets) to PROFILE'
+    )
+    
+    parser.add_argument(
+        '--profile-in',
+        metavar='PROFILE',
+        help='Guide inlining, loop hoisting and quickening with a profile saved by --profile-out'
+    )
+    
     # Execute code directly
     parser.add_argument(
         '-c',
@@ -175,11 +345,18 @@ def main(argv: Optional[list] = None) -> int:
     
     # Parse arguments
     args = parser.parse_args(argv)
+    if args.memo_size < 0:
+        parser.error('--memo-size must not be negative')
+    if args.profile_in and args.profile_out:
+        parser.error('--profile-in and --profile-out cannot be combined')
+    options = dict(memoize_pure=args.memoize_pure, memo_size=args.memo_size or None,
+                   opt_level=args.opt_level)
+    profiles = dict(profile_in=args.profile_in, profile_out=args.profile_out)
     
     # Determine what to do based on arguments
     if args.code:
         # Execute code from -c option
-        execute_code(args.code, debug=args.debug)
+        execute_code(args.code, debug=args.debug, engine=args.engine, **options, **profiles)
         return 0
     
     elif args.serve_file:
@@ -188,24 +365,34 @@ def main(argv: Optional[list] = None) -> int:
         print(f"Use: novax {args.serve_file} to run as regular script", file=sys.stderr)
         return 1
     
+    elif args.dis and args.file:
+        # Show bytecode
+        disassemble_file(args.file, args.opt_level)
+        return 0
+    
+    elif args.types and args.file:
+        # Show inferred types
+        show_types(args.file, args.opt_level)
+        return 0
+    
     elif args.watch and args.file:
         # Watch mode
-        watch_file(args.file, debug=args.debug)
+        watch_file(args.file, debug=args.debug, engine=args.engine, **options, **profiles)
         return 0
     
     elif args.repl or (not args.file and not args.code):
         # Interactive REPL mode
-        run_repl()
+        run_repl(engine=args.engine, **options)
         return 0
     
     elif args.file:
         # Execute file
-        execute_file(args.file, debug=args.debug)
+        execute_file(args.file, debug=args.debug, engine=args.engine, **options, **profiles)
         return 0
     
     else:
         # Default to REPL
-        run_repl()
+        run_repl(engine=args.engine, **options)
         return 0
 
 
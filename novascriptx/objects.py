@@ -0,0 +1,82 @@
+"""
+The NovaScript object type.
+
+Object literals (`{x: 1, y: 2}`) build NovaObjects. Instead of a dict per
+object, an object holds its values in a list and points to a Shape (a
+hidden class) that maps each property name to its offset in that list.
+Objects built by the same literal, or given the same properties in the
+same order, share one Shape, so the names and offsets are stored once
+per shape rather than once per object.
+
+Shapes form a tree of transitions from EMPTY_SHAPE: adding the property
+`z` to an object of shape (x, y) moves it to the shape (x, y, z), which
+is created the first time and reused by every object that takes the
+same step. Assigning an existing property only replaces its value.
+
+Because a shape never changes, `offset = shape.offsets[name]` holds for
+every object of that shape; member sites cache (shape, offset) and read
+`obj.values[offset]` after a single identity test (see inline_cache.py).
+
+Objects compare by identity and, being mutable, cannot be hashed, so
+memoized functions never cache results for them.
+"""
+
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+class Shape:
+    """
+    Hidden class of NovaObjects: their property names, in order.
+
+    `offsets` maps each name to the index of its value, and `transitions`
+    the shapes reached by adding one more property.
+    """
+
+    __slots__ = ('keys', 'offsets', 'transitions')
+
+    def __init__(self, keys: Tuple[str, ...] = ()):
+        self.keys = keys
+        self.offsets: Dict[str, int] = {key: offset for offset, key in enumerate(keys)}
+        self.transitions: Dict[str, 'Shape'] = {}
+
+    def __repr__(self):
+        return f"<Shape ({', '.join(self.keys)})>"
+
+    def add(self, key: str) -> 'Shape':
+        """Return the shape of an object of this shape given the property `key`."""
+        shape = self.transitions.get(key)
+        if shape is None:
+            shape = self.transitions[key] = Shape(self.keys + (key,))
+        return shape
+
+
+# Root of the transition tree: the shape of `{}`
+EMPTY_SHAPE = Shape()
+
+
+def shape_of(keys: Iterable[str]) -> Shape:
+    """Return the shared shape of objects with these properties, in this order."""
+    shape = EMPTY_SHAPE
+    for key in keys:
+        shape = shape.add(key)
+    return shape
+
+
+class NovaObject:
+    """A NovaScript object: a shape and the values of its properties."""
+
+    __slots__ = ('shape', 'values')
+
+    # Mutable, so never a memo key
+    __hash__ = None
+
+    def __init__(self, shape: Shape, values: List[Any]):
+        self.shape = shape
+        self.values = values
+
+    def __repr__(self):
+        return f"NovaObject({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the properties as a dict, in order."""
+        return dict(zip(self.shape.keys, self.values))
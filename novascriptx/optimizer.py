@@ -0,0 +1,1380 @@
+"""
+AST optimisation passes, run between the parser and the executor.
+
+optimize() runs the passes of an optimisation level over a parsed
+program, rewriting it in place, and returns what each pass changed as
+(pass name, description) pairs; `novax --debug` prints them. Every
+engine optimises a program before running it, at the executor's
+`opt_level` (`novax -O0`, `-O1` or `-O2`; DEFAULT_OPT_LEVEL otherwise):
+
+    -O0  no passes: the tree runs as parsed
+    -O1  fold-constants, string-chains
+    -O2  inline-functions, fold-constants, dead-branches, unreachable-code,
+         hoist-invariants, common-subexpressions, string-chains
+
+At -O2 the executors then specialise the operations whose operand types
+inference.py proves; that runs after optimize(), not as one of its passes.
+
+Given a profile of a training run (see profiling.py), the passes in
+PROFILED_PASSES use it: inline-functions only inlines calls that ran,
+and at hot call sites functions of up to PROFILE_INLINE_BUDGET nodes;
+hoist-invariants only rewrites loops whose body ran more often than the
+loop was reached.
+
+fold-constants evaluates the operators whose operands are literals, so
+`60 * 60 * 24` runs as 86400 and `-1` and `!True` are literals. It uses
+the executor's rules: `+` converts the other operand when one is a
+string, and `/` floor-divides two integers. `False and x` and `True or x`
+fold too, since x would never run. Operations that fail (`1 / 0`,
+`-"a"`) are left for the runtime to report, and so are strings longer
+than MAX_FOLDED_STRING.
+
+dead-branches replaces an `if` whose condition is a literal with the
+statements of the branch that runs, and removes `while` loops whose
+condition is a falsy literal. Blocks have no scope of their own, so the
+statements of a branch can join the enclosing block.
+
+unreachable-code drops the statements that follow a `return`, `break`
+or `continue` in the same block.
+
+inline-functions replaces calls to small leaf functions with their
+body. A function qualifies when it is defined once, at top level, and
+its body is a single `return` of an expression with no calls and at most
+INLINE_BUDGET nodes (calls to functions inlined into it no longer
+count). `add(i, 1)` then runs as `i + 1`, without the arity check, the
+frame and the return. Only calls that can run after the definition are
+rewritten: top-level code that follows it and the bodies of functions
+defined after it. The arguments replace the parameters, so the inlined
+body has no locals to rename; a call whose function reads a global that
+the calling function has a local of the same name is left alone, as is
+any call with the wrong number of arguments. Literals and variables
+certainly assigned where the call runs are substituted wherever their
+parameter is used, as long as no variable is dropped. Any other
+argument may fail or have an effect (reading a variable that may be
+unassigned fails), so it must keep its place: a call is only inlined
+when the parameters of such arguments are read in order, once each and
+unconditionally, before the body does anything else, as in
+`add(f(), i * 2)`; `p and q` keeps the call `both(x, l[5])`, which
+evaluates l[5] whatever x is. The pass
+assumes the program is complete: a function redefined by a later REPL
+line keeps the old body where it was inlined.
+
+hoist-invariants computes the expressions of a loop whose variables the
+loop never assigns, like `n * 2` or `math.pi * r`, once before the loop
+into a temporary (a variable whose name starts with a digit, so no
+source can use it). The Facts of the program decide what may move: the
+variables each loop assigns, including the globals assigned by the
+functions it calls (a function's own locals are safe from them); the
+kind of every variable, from everything ever assigned to it (a number
+for a name only ever assigned numbers); and the purity model of the
+stdlib, PURE_FUNCTIONS in the modules that have pure functions. A
+hoisted expression runs even when the loop does not, so it must be
+unable to fail: operands of known kinds, variables certainly assigned
+before the loop, division only by a non-zero literal, and of the module
+functions only those that never fail on numbers (math.abs, min and max,
+not sqrt).
+
+common-subexpressions computes a pure expression evaluated more than
+once by a run of straight-line statements once, into a temporary before
+the first statement using it, as long as nothing in between may assign
+its variables. Pure means reading only variables that hold numbers,
+strings, booleans or modules and calling only pure module functions; an
+expression that may fail is shared only when the first statement using
+it evaluates it before anything that could have an effect.
+
+string-chains: `"Count: " + count + " of " + total` parses as a chain of
+left-nested BinaryOps, and run as written every `+` converts one operand
+and copies the string built so far. Once an operand of a chain is a
+string literal, every later `+` in it is a string concatenation, so from
+that literal on the chain is rewritten into a Template, the node of the
+template literal `Count: ${count} of ${total}`. The Template converts
+its values and formats them into the constant text in one step, and
+literal operands are folded into that text at compile time. Literal
+values of template literals (`${7}`) are folded the same way.
+Operands before the first string literal keep their own arithmetic
+(`a + b + " total"` still adds a and b first) and are joined to the
+template with a single `+`. That `+` appends to its left operand when it
+is a rope (see ropes.py), so `s = s + "line " + i` stays linear. Chains
+with fewer than MIN_CHAIN_OPERANDS operands from the literal on are left
+alone: one concatenation is as cheap as a format.
+"""
+
+import inspect
+import itertools
+import operator
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
+
+from novascriptx.nodes import (
+    BUILTIN_FUNCTIONS, Node, iter_child_nodes, walk,
+    VarDecl, FunctionDef, Print, If, While, For, ForIn, Return, Break, Continue, Assignment,
+    ExpressionStatement,
+    Literal, Identifier, BinaryOp, UnaryOp, Call, MemberAccess, MemberCall, Template,
+)
+from novascriptx.profiling import PROFILE_INLINE_BUDGET, Profile
+from novascriptx.resolver import collect_bindings, function_slots
+
+# Optimisation level used when none is given (novax -O1)
+DEFAULT_OPT_LEVEL = 1
+
+# Longest string fold-constants builds at compile time
+MAX_FOLDED_STRING = 4096
+
+# Most nodes in the returned expression of a function that is inlined
+INLINE_BUDGET = 16
+
+# Operands a chain needs, from its first string literal on, to become a Template
+MIN_CHAIN_OPERANDS = 3
+
+# Binding power of each binary operator, as in Parser.BINARY_PRECEDENCE
+PRECEDENCE = {
+    'or': 1, 'and': 2, '==': 3, '!=': 3, '<': 4, '>': 4, '<=': 4, '>=': 4,
+    '+': 5, '-': 5, '*': 6, '/': 6, '%': 6,
+}
+
+# Operators folded with Python's own (see evaluate() for '+' and '/')
+OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    '-': operator.sub, '*': operator.mul, '%': operator.mod,
+    '==': operator.eq, '!=': operator.ne, '<': operator.lt, '>': operator.gt,
+    '<=': operator.le, '>=': operator.ge,
+}
+
+# Statement lists of each node class that holds blocks
+BLOCK_FIELDS: Dict[type, Tuple[str, ...]] = {
+    FunctionDef: ('body',), If: ('then', 'else_'), While: ('body',),
+    For: ('body',), ForIn: ('body',),
+}
+
+# Statements after which nothing in the same block runs
+EXITS = (Return, Break, Continue)
+
+
+def optimize(statements: List[Node], level: int = DEFAULT_OPT_LEVEL,
+             profile: Optional[Profile] = None) -> List[Tuple[str, str]]:
+    """
+    Run the passes of an optimisation level over a program, in place.
+
+    profile, a run of the program recorded before any pass (see
+    profiling.py), guides the passes in PROFILED_PASSES.
+
+    Returns (pass name, description) for every change, in order.
+    """
+    if level not in LEVELS:
+        raise ValueError(f"optimisation level must be one of {sorted(LEVELS)}, not {level}")
+    changes: List[Tuple[str, str]] = []
+    for name in LEVELS[level]:
+        if name in PROFILED_PASSES:
+            found = PASSES[name](statements, profile)
+        else:
+            found = PASSES[name](statements)
+        changes.extend((name, change) for change in found)
+    return changes
+
+
+def replace_children(node: Node, replace: Callable[[Node], Node]) -> None:
+    """Replace each child of a node with replace(child)."""
+    for name in node._fields:
+        value = getattr(node, name)
+        if isinstance(value, Node):
+            setattr(node, name, replace(value))
+        elif isinstance(value, list):
+            for index, item in enumerate(value):
+                if isinstance(item, Node):
+                    value[index] = replace(item)
+
+
+def blocks(statements: List[Node]) -> Iterator[List[Node]]:
+    """
+    Yield every statement list of a program, outermost first.
+
+    A block changed in place before the next one is requested is walked
+    as changed.
+    """
+    yield statements
+    for node in walk(statements):
+        for name in BLOCK_FIELDS.get(node.__class__, ()):
+            yield getattr(node, name)
+
+
+# ----------------------------------------------------------------------------
+# fold-constants
+# ----------------------------------------------------------------------------
+
+def fold_constants(statements: List[Node]) -> List[str]:
+    """Replace operations on literals with their result."""
+    # Literal made by folding -> (source it replaced, precedence of that source)
+    folded: Dict[Literal, Tuple[str, int]] = {}
+
+    def source(node: Node) -> Tuple[str, int]:
+        return folded.pop(node) if node in folded else (describe(node), 7)
+
+    def fold(expr: Node) -> Node:
+        if isinstance(expr, BinaryOp):
+            left, right, op = expr.left, expr.right, expr.op
+            if left.__class__ is not Literal:
+                return expr
+            if op == 'and' and not truthy(left.value):
+                value: Any = False
+            elif op == 'or' and truthy(left.value):
+                value = left.value
+            elif right.__class__ is not Literal:
+                return expr
+            elif op == 'and':
+                value = truthy(right.value)
+            elif op == 'or':
+                value = right.value
+            elif op == '*' and repeats_too_long(left.value, right.value):
+                return expr
+            else:
+                try:
+                    value = evaluate(op, left.value, right.value)
+                except (ArithmeticError, TypeError, ValueError):
+                    return expr
+                if isinstance(value, str) and len(value) > MAX_FOLDED_STRING:
+                    return expr
+            precedence = PRECEDENCE[op]
+            (left_text, left_precedence), (right_text, right_precedence) = source(left), source(right)
+            if left_precedence < precedence:
+                left_text = f"({left_text})"
+            if right_precedence <= precedence:
+                right_text = f"({right_text})"
+            text = f"{left_text} {op} {right_text}"
+        elif expr.__class__ is UnaryOp and expr.expr.__class__ is Literal:
+            operand = expr.expr.value
+            if expr.op == '!':
+                value = not truthy(operand)
+            else:
+                try:
+                    value = -operand
+                except TypeError:
+                    return expr
+            operand_text, _ = source(expr.expr)
+            text, precedence = expr.op + operand_text, 7
+        else:
+            return expr
+        result = Literal(value)
+        folded[result] = (text, precedence)
+        return result
+
+    # Children before parents, so operands are folded before their operation
+    for node in reversed(list(walk(statements))):
+        replace_children(node, fold)
+    # Folds were recorded last statement first
+    return [f"{text} -> {describe(literal)}" for literal, (text, _) in reversed(list(folded.items()))]
+
+
+def evaluate(op: str, left: Any, right: Any) -> Any:
+    """Apply a binary operator to two literal values, as Executor.binary_operation()."""
+    if op == '+':
+        if isinstance(left, str) or isinstance(right, str):
+            return literal_text(left) + literal_text(right)
+        return left + right
+    if op == '/':
+        if isinstance(left, int) and isinstance(right, int):
+            return left // right
+        return left / right
+    return OPERATORS[op](left, right)
+
+
+def repeats_too_long(left: Any, right: Any) -> bool:
+    """Return whether left * right repeats a string past MAX_FOLDED_STRING."""
+    if isinstance(right, str):
+        left, right = right, left
+    return isinstance(left, str) and isinstance(right, int) and len(left) * right > MAX_FOLDED_STRING
+
+
+def truthy(value: Any) -> bool:
+    """Return whether a literal value is truthy (Executor.is_truthy)."""
+    return not (value is None or value is False or value == 0 or value == "")
+
+
+def literal_text(value: Any) -> str:
+    """Return a literal's value as `+` converts it (Executor.to_string)."""
+    if value is True or value is False:
+        return 'true' if value else 'false'
+    return str(value)
+
+
+# ----------------------------------------------------------------------------
+# dead-branches and unreachable-code
+# ----------------------------------------------------------------------------
+
+def remove_dead_branches(statements: List[Node]) -> List[str]:
+    """Inline `if`s on literal conditions and drop `while`s that never run."""
+    changes: List[str] = []
+    for block in blocks(statements):
+        if not any(stmt.__class__ in (If, While) and stmt.condition.__class__ is Literal
+                   for stmt in block):
+            continue
+        live: List[Node] = []
+        pending = list(reversed(block))
+        while pending:
+            stmt = pending.pop()
+            condition = getattr(stmt, 'condition', None)
+            if condition.__class__ is not Literal:
+                live.append(stmt)
+            elif stmt.__class__ is If:
+                kept, dead = (stmt.then, stmt.else_) if truthy(condition.value) else (stmt.else_, stmt.then)
+                changes.append(f"if ({describe(condition)}): kept {count(kept)}, removed {count(dead)}")
+                pending.extend(reversed(kept))
+            elif stmt.__class__ is While and not truthy(condition.value):
+                changes.append(f"while ({describe(condition)}): removed the loop and {count(stmt.body)}")
+            else:
+                live.append(stmt)
+        block[:] = live
+    return changes
+
+
+def remove_unreachable(statements: List[Node]) -> List[str]:
+    """Drop the statements after a return, break or continue."""
+    changes: List[str] = []
+    for block in blocks(statements):
+        for index, stmt in enumerate(block):
+            if isinstance(stmt, EXITS):
+                dead = block[index + 1:]
+                if dead:
+                    changes.append(f"removed {count(dead)} after {stmt.type}")
+                    del block[index + 1:]
+                break
+    return changes
+
+
+def count(statements: List[Node]) -> str:
+    """Return '1 statement' / 'N statements'."""
+    return f"{len(statements)} statement{'' if len(statements) == 1 else 's'}"
+
+
+# ----------------------------------------------------------------------------
+# inline-functions
+# ----------------------------------------------------------------------------
+
+class Inlinable:
+    """A function whose calls inline-functions can replace with its body."""
+
+    __slots__ = ('function', 'body', 'free_names', 'size')
+
+    def __init__(self, function: FunctionDef):
+        self.function = function
+        # The expression the function returns
+        self.body: Node = function.body[0].value
+        # Globals the body reads
+        self.free_names = {node.name for node in walk(self.body)
+                           if node.__class__ is Identifier and node.name not in function.params}
+        # Nodes in the body
+        self.size = sum(1 for _ in walk(self.body))
+
+
+def inline_functions(statements: List[Node], profile: Optional[Profile] = None) -> List[str]:
+    """
+    Replace calls to small leaf functions with their returned expression.
+
+    With a profile, only calls that ran are replaced, and hot ones may
+    replace functions of up to PROFILE_INLINE_BUDGET nodes.
+    """
+    changes: List[str] = []
+    bindings: Dict[str, int] = {}
+    for node in walk(statements):
+        name = binding_name(node)
+        if name is not None:
+            bindings[name] = bindings.get(name, 0) + 1
+    # Functions whose calls can be inlined so far, by name
+    inlinable: Dict[str, Inlinable] = {}
+    # The names certainly bound when each statement starts
+    bound_at: Dict[Node, Set[str]] = {}
+
+    def note_bound(block: List[Node], bound: Set[str], function: Optional[FunctionDef]) -> None:
+        bound = set(bound)
+        for stmt in block:
+            bound_at[stmt] = set(bound)
+            bound |= bindings_of(stmt)
+
+    each_block(statements, note_bound)
+
+    def rewrite(node: Node, local_names: Optional[Set[str]], bound: Set[str]) -> None:
+        if node.__class__ is FunctionDef:
+            local_names = set(function_slots(node))
+        bound = bound_at.get(node, bound)
+
+        def replace(child: Node) -> Node:
+            rewrite(child, local_names, bound)
+            if (child.__class__ is Call and child.name in inlinable
+                    and worth_inlining(child, inlinable[child.name], profile)):
+                result = inline_call(child, inlinable[child.name], local_names, bound)
+                if result is not child:
+                    changes.append(f"{describe(child)} -> {describe(result)}")
+                return result
+            return child
+
+        replace_children(node, replace)
+
+    # Top-level statements run in order, so a function can be inlined into
+    # the statements after its definition, its own body first
+    for stmt in statements:
+        rewrite(stmt, None, set())
+        budget = INLINE_BUDGET if profile is None else PROFILE_INLINE_BUDGET
+        if (stmt.__class__ is FunctionDef and bindings[stmt.name] == 1
+                and is_leaf_function(stmt, budget)):
+            inlinable[stmt.name] = Inlinable(stmt)
+    return changes
+
+
+def worth_inlining(call: Call, callee: Inlinable, profile: Optional[Profile]) -> bool:
+    """Return whether a call should be inlined, given the profile of a run (if any)."""
+    if profile is None:
+        return True
+    if callee.size > INLINE_BUDGET:
+        return profile.is_hot_call(call, callee.function)
+    return profile.count(call) > 0
+
+
+def binding_name(node: Node) -> Optional[str]:
+    """Return the name a statement binds, if any (parameters aside)."""
+    cls = node.__class__
+    if cls is VarDecl or cls is FunctionDef or cls is ForIn:
+        return node.name
+    if cls is Assignment and node.target.__class__ is Identifier:
+        return node.target.name
+    return None
+
+
+def is_leaf_function(function: FunctionDef, budget: int = INLINE_BUDGET) -> bool:
+    """Return whether a function's calls can be replaced with its body of at most budget nodes."""
+    body = function.body
+    if (function.memo or function.name in BUILTIN_FUNCTIONS
+            or len(set(function.params)) != len(function.params)
+            or len(body) != 1 or body[0].__class__ is not Return or body[0].value is None):
+        return False
+    size = 0
+    for node in walk(body[0].value):
+        if node.__class__ is Call or node.__class__ is MemberCall:
+            return False
+        size += 1
+    return size <= budget
+
+
+def inline_call(call: Call, callee: Inlinable, local_names: Optional[Set[str]],
+                bound: Set[str]) -> Node:
+    """
+    Return the body of callee with call's arguments substituted (or call itself).
+
+    bound holds the names certainly assigned where the call runs.
+    """
+    params = callee.function.params
+    if len(call.args) != len(params):
+        return call
+    if local_names and not callee.free_names.isdisjoint(local_names):
+        return call
+    arguments = dict(zip(params, call.args))
+    # Arguments that do work, which may fail, change something or both; a
+    # variable that may be unassigned fails to read
+    ordered = [name for name, arg in arguments.items()
+               if arg.__class__ is not Literal
+               and (arg.__class__ is not Identifier or arg.name not in bound)]
+    # (parameter, conditional) per parameter read, None for every other evaluation
+    events = evaluation_order(callee.body, {name for name, arg in arguments.items()
+                                            if arg.__class__ is not Literal})
+    for name, arg in arguments.items():
+        if arg.__class__ is Identifier and all(event[0] != name for event in events):
+            return call
+    # Each must run as the call runs it: once, unconditionally and in order,
+    # before the body does anything else (reading a bound variable does nothing)
+    expected = [(name, False) for name in ordered]
+    work = [event for event in events if event[0] is None or event[0] in ordered]
+    if [event for event in work if event[0] is not None] != expected or work[:len(expected)] != expected:
+        return call
+    return substitute(callee.body, arguments)
+
+
+def evaluation_order(expr: Node, params: Set[str]) -> List[Tuple[Optional[str], bool]]:
+    """
+    Return the evaluations of an expression in the order they run.
+
+    Each read of one of params is (name, conditional), every other node
+    that does work is (None, conditional); conditional is True under the
+    right operand of `and` / `or`. Literals are left out.
+    """
+    events: List[Tuple[Optional[str], bool]] = []
+
+    def visit(node: Node, conditional: bool) -> None:
+        if node.__class__ is Literal:
+            return
+        if node.__class__ is Identifier and node.name in params:
+            events.append((node.name, conditional))
+            return
+        if isinstance(node, BinaryOp) and node.op in ('and', 'or'):
+            visit(node.left, conditional)
+            visit(node.right, True)
+        else:
+            for child in iter_child_nodes(node):
+                visit(child, conditional)
+        events.append((None, conditional))
+
+    visit(expr, False)
+    return events
+
+
+def substitute(expr: Node, arguments: Dict[str, Node]) -> Node:
+    """Return a copy of expr with each parameter read replaced by a copy of its argument."""
+    if expr.__class__ is Identifier and expr.name in arguments:
+        return clone(arguments[expr.name])
+    return expr.__class__(*[copy_field(getattr(expr, name), arguments) for name in expr._fields])
+
+
+def clone(expr: Node) -> Node:
+    """Return a fresh copy of a subtree, with its own caches."""
+    return expr.__class__(*[copy_field(getattr(expr, name), None) for name in expr._fields])
+
+
+def copy_field(value: Any, arguments: Optional[Dict[str, Node]]) -> Any:
+    if isinstance(value, Node):
+        return substitute(value, arguments) if arguments else clone(value)
+    if isinstance(value, list):
+        return [copy_field(item, arguments) for item in value]
+    return value
+
+
+# ----------------------------------------------------------------------------
+# hoist-invariants and common-subexpressions
+# ----------------------------------------------------------------------------
+
+# Kinds of value the analysis tells apart: NUMBER is an INT or a FLOAT
+INT, FLOAT, NUMBER, STRING, BOOL, MODULE = 'int', 'float', 'number', 'string', 'bool', 'module'
+NUMERIC = (INT, FLOAT, NUMBER, BOOL)
+
+# Operations worth computing once
+MOVABLE = (BinaryOp, UnaryOp, Template, MemberAccess, MemberCall)
+
+# Statements that cannot branch: the runs of them common-subexpressions works on
+SIMPLE_STATEMENTS = (VarDecl, Assignment, Print, ExpressionStatement, Return)
+
+# Numbers temporaries across every program this process optimises, so REPL
+# lines never reuse one
+TEMPORARIES = itertools.count()
+
+
+class Facts:
+    """
+    What a whole program tells about its names, for moving expressions.
+
+    kinds maps a name to the kind of every value assigned to it anywhere,
+    when they agree. A name whose only binding is `var m = require("math")`
+    is a MODULE: modules holds the members it will have and purity the
+    module's PURE_FUNCTIONS (none without). writes maps each function
+    defined once to the globals calling it may assign, or None when that
+    is unknown (it calls something unknown or a method, which may call
+    back).
+    """
+
+    def __init__(self, statements: List[Node]):
+        from novascriptx.stdlib import MODULES
+
+        declared, assigned = collect_bindings(statements)
+        # Names top-level statements bind: the globals
+        self.globals = declared | assigned
+        # Everything assigned to each name: expressions, kinds, or None for unknown
+        values: Dict[str, List[Any]] = {}
+        functions: List[FunctionDef] = []
+        for node in walk(statements):
+            cls = node.__class__
+            if cls is FunctionDef:
+                functions.append(node)
+                values.setdefault(node.name, []).append(None)
+                for param in node.params:
+                    values.setdefault(param, []).append(None)
+            elif cls is ForIn:
+                ranged = node.iterable.__class__ is Call and node.iterable.name == 'range'
+                values.setdefault(node.name, []).append(INT if ranged else None)
+            else:
+                name = binding_name(node)
+                if name is not None:
+                    values.setdefault(name, []).append(node.value)
+
+        self.modules: Dict[str, Dict[str, Any]] = {}
+        self.purity: Dict[str, Dict[str, Optional[int]]] = {}
+        for name, assigned_values in values.items():
+            value = assigned_values[0]
+            if (len(assigned_values) == 1 and value.__class__ is Call and value.name == 'require'
+                    and len(value.args) == 1 and value.args[0].__class__ is Literal
+                    and value.args[0].value in MODULES):
+                module = MODULES[value.args[0].value]
+                self.modules[name] = module.create_module()
+                self.purity[name] = getattr(module, 'PURE_FUNCTIONS', {})
+
+        # Optimistic fixpoint: a name counts as having every kind ('') until
+        # one of its values says otherwise
+        self.kinds: Dict[str, str] = {name: MODULE for name in self.modules}
+        self.pending = set(values) - set(self.modules)
+        changed = True
+        while changed:
+            changed = False
+            for name in list(self.pending):
+                kind = join(value if value is None or value.__class__ is str else self.kind(value)
+                            for value in values[name])
+                if kind is None:
+                    self.pending.discard(name)
+                    self.kinds.pop(name, None)
+                    changed = True
+                elif kind and self.kinds.get(name) != kind:
+                    self.kinds[name] = kind
+                    changed = True
+        # Names still without a kind are only ever assigned from each other
+        self.pending = set()
+
+        self.writes: Dict[str, Optional[Set[str]]] = {}
+        callees: Dict[str, Set[str]] = {}
+        for function in functions:
+            if len(values[function.name]) != 1:
+                continue
+            written: Optional[Set[str]] = set()
+            called: Set[str] = set()
+            for node in walk_code(function.body):
+                cls = node.__class__
+                if cls is Assignment and node.target.__class__ is Identifier:
+                    written.add(node.target.name)
+                elif cls is Call and node.name not in BUILTIN_FUNCTIONS:
+                    called.add(node.name)
+                elif cls is MemberCall and not self.is_module(node.object):
+                    written = None
+                    break
+            if written is not None:
+                written -= self.local_names(function)
+            self.writes[function.name] = written
+            callees[function.name] = called
+        changed = True
+        while changed:
+            changed = False
+            for name, called in callees.items():
+                written = self.writes[name]
+                if written is None:
+                    continue
+                for callee in called:
+                    more = self.writes.get(callee)
+                    if more is None:
+                        self.writes[name] = None
+                        changed = True
+                        break
+                    if not more <= written:
+                        written |= more
+                        changed = True
+
+    def kind(self, expr: Node, bound: Optional[Set[str]] = None,
+             known: Optional[Dict[Node, Optional[str]]] = None) -> Optional[str]:
+        """
+        Return the kind of value an expression has, or None if unknown.
+
+        With bound, the names certainly assigned where the expression would
+        run, only a pure expression that cannot fail there has a kind.
+        known, if given, holds the kinds already found with the same bound
+        and receives the new ones, so each subexpression is looked at once.
+        """
+        if known is None:
+            return self.node_kind(expr, bound, None)
+        if expr not in known:
+            known[expr] = self.node_kind(expr, bound, known)
+        return known[expr]
+
+    def node_kind(self, expr: Node, bound: Optional[Set[str]],
+                  known: Optional[Dict[Node, Optional[str]]]) -> Optional[str]:
+        cls = expr.__class__
+        if cls is Literal:
+            return value_kind(expr.value)
+        if cls is Identifier:
+            if bound is not None and expr.name not in bound:
+                return None
+            if expr.name in self.kinds:
+                return self.kinds[expr.name]
+            return '' if expr.name in self.pending else None
+        if isinstance(expr, BinaryOp):
+            return self.binary_kind(expr, bound, known)
+        if cls is UnaryOp:
+            operand = self.kind(expr.expr, bound, known)
+            if bound is not None and not operand:
+                return None
+            if expr.op == '!':
+                return BOOL
+            if operand == '':
+                return ''
+            return (INT if operand in (INT, BOOL) else operand) if operand in NUMERIC else None
+        if cls is Template:
+            if bound is not None and not all(self.kind(value, bound, known) for value in expr.values):
+                return None
+            return STRING
+        if cls is MemberAccess and self.is_module(expr.object, bound):
+            members = self.modules[expr.object.name]
+            return value_kind(members[expr.member]) if expr.member in members else None
+        if cls is MemberCall and self.is_module(expr.object, bound):
+            return self.call_kind(expr, bound, known)
+        return None
+
+    def binary_kind(self, expr: BinaryOp, bound: Optional[Set[str]],
+                    known: Optional[Dict[Node, Optional[str]]]) -> Optional[str]:
+        op = expr.op
+        left, right = self.kind(expr.left, bound, known), self.kind(expr.right, bound, known)
+        if bound is not None and not (left and right):
+            return None
+        if op in ('and', '==', '!='):
+            return BOOL
+        if op == 'or':
+            return join((left, right))
+        if op in ('<', '>', '<=', '>='):
+            if bound is None or (left in NUMERIC and right in NUMERIC) or left == right == STRING:
+                return BOOL
+            return None
+        if op == '+' and STRING in (left, right):
+            return STRING
+        if left == '' or right == '':
+            return ''
+        if left not in NUMERIC or right not in NUMERIC:
+            return None
+        if bound is not None:
+            # Mixing a large int with a float overflows, and / and % fail on zero
+            if not (is_int_like(left) and is_int_like(right)
+                    or is_float_like(expr.left, left) and is_float_like(expr.right, right)):
+                return None
+            if op in ('/', '%') and not (expr.right.__class__ is Literal and expr.right.value
+                                         and expr.right.value.__class__ in (int, float)):
+                return None
+        if is_int_like(left) and is_int_like(right):
+            return INT
+        if FLOAT in (left, right) and NUMBER not in (left, right):
+            return FLOAT
+        return NUMBER
+
+    def call_kind(self, expr: MemberCall, bound: Optional[Set[str]],
+                  known: Optional[Dict[Node, Optional[str]]]) -> Optional[str]:
+        purity = self.purity[expr.object.name]
+        function = self.modules[expr.object.name].get(expr.member)
+        if expr.member not in purity or not callable(function):
+            return None
+        signature = inspect.signature(function)
+        if bound is not None:
+            # Calls that cannot fail: numbers for a total function, enough of them
+            fewest = purity[expr.member]
+            if fewest is None or len(expr.args) < fewest:
+                return None
+            if not all(self.kind(arg, bound, known) in NUMERIC for arg in expr.args):
+                return None
+            try:
+                signature.bind(*expr.args)
+            except TypeError:
+                return None
+        return annotation_kind(signature.return_annotation)
+
+    def is_module(self, expr: Node, bound: Optional[Set[str]] = None) -> bool:
+        """Return whether an expression reads a variable holding a stdlib module."""
+        return (expr.__class__ is Identifier and expr.name in self.modules
+                and (bound is None or expr.name in bound))
+
+    def is_pure_operation(self, node: Node) -> bool:
+        """
+        Return whether a node keeps an expression pure, its operands aside.
+
+        A pure expression has the same value wherever the variables it
+        reads do: it may call only pure module functions and read only
+        variables that hold numbers, strings, booleans or modules (so never
+        a list whose contents can change); it may still fail.
+        """
+        cls = node.__class__
+        if cls is MemberAccess or cls is MemberCall:
+            return self.is_module(node.object) and (
+                cls is MemberAccess or node.member in self.purity[node.object.name])
+        if cls is Identifier:
+            return node.name in self.kinds
+        return cls is Literal or cls is UnaryOp or cls is Template or isinstance(node, BinaryOp)
+
+    def call_writes(self, nodes: List[Node]) -> Optional[Set[str]]:
+        """Return the globals the calls among nodes may assign (None: any)."""
+        written: Set[str] = set()
+        for node in walk_code(nodes):
+            if node.__class__ is Call:
+                if node.name in BUILTIN_FUNCTIONS:
+                    continue
+                more = self.writes.get(node.name)
+                if more is None:
+                    return None
+                written |= more
+            elif node.__class__ is MemberCall and not self.is_module(node.object):
+                return None
+        return written
+
+    def local_names(self, function: Optional[FunctionDef]) -> Set[str]:
+        """Return the names only a function itself can assign (none at top level)."""
+        if function is None:
+            return set()
+        declared, _ = collect_bindings(function.body)
+        return set(function.params) | (declared - self.globals)
+
+
+def value_kind(value: Any) -> Optional[str]:
+    """Return the kind of a Python value, if it has one."""
+    cls = value.__class__
+    if cls is bool:
+        return BOOL
+    if cls is int:
+        return INT
+    if cls is float:
+        return FLOAT
+    if cls is str:
+        return STRING
+    return None
+
+
+def annotation_kind(annotation: Any) -> Optional[str]:
+    """Return the kind a stdlib function's return annotation promises."""
+    types = set(getattr(annotation, '__args__', None) or (annotation,))
+    if types == {int, float}:
+        return NUMBER
+    if len(types) == 1:
+        return {int: INT, float: FLOAT, str: STRING, bool: BOOL}.get(types.pop())
+    return None
+
+
+def join(kinds: Iterator[Optional[str]]) -> Optional[str]:
+    """Return the kind values of all the given kinds have ('' for none yet, None for unknown)."""
+    result = ''
+    for kind in kinds:
+        if kind is None:
+            return None
+        if not kind or kind == result:
+            continue
+        if not result:
+            result = kind
+        elif result in NUMERIC and kind in NUMERIC:
+            result = NUMBER
+        else:
+            return None
+    return result
+
+
+def is_int_like(kind: Optional[str]) -> bool:
+    return kind == INT or kind == BOOL
+
+
+def is_float_like(expr: Node, kind: Optional[str]) -> bool:
+    """Return whether an operand mixes with floats without overflowing."""
+    return kind == FLOAT or (expr.__class__ is Literal and expr.value.__class__ in (int, bool)
+                             and abs(expr.value) <= 2 ** 53)
+
+
+def walk_code(nodes: List[Node]) -> Iterator[Node]:
+    """Like walk(), without going into the bodies of function definitions."""
+    pending = list(reversed(nodes))
+    while pending:
+        node = pending.pop()
+        yield node
+        if node.__class__ is not FunctionDef:
+            pending.extend(reversed(list(iter_child_nodes(node))))
+
+
+def bindings_of(stmt: Optional[Node]) -> Set[str]:
+    """Return the names a statement has certainly bound once it completes."""
+    if stmt is None or stmt.__class__ is ForIn:
+        return set()
+    if stmt.__class__ is For:
+        return bindings_of(stmt.init)
+    name = binding_name(stmt)
+    return set() if name is None else {name}
+
+
+def each_block(statements: List[Node],
+               visit: Callable[[List[Node], Set[str], Optional[FunctionDef]], None]) -> None:
+    """
+    Call visit(block, bound, function) for every statement list, outermost first.
+
+    bound holds the names certainly assigned when the block starts, and
+    function is the function around it (None at top level). visit may
+    change its block; the blocks nested in it are visited as changed.
+    """
+    def walk_block(block: List[Node], bound: Set[str], function: Optional[FunctionDef]) -> None:
+        visit(block, bound, function)
+        bound = set(bound)
+        for stmt in block:
+            cls = stmt.__class__
+            if cls is FunctionDef:
+                # Globals assigned before the definition are there when it runs,
+                # unless the function has a local of the same name
+                declared, _ = collect_bindings(stmt.body)
+                outer = bound - declared if function is None else set()
+                walk_block(stmt.body, outer | set(stmt.params), stmt)
+            elif cls is If:
+                walk_block(stmt.then, bound, function)
+                walk_block(stmt.else_, bound, function)
+            elif cls is While:
+                walk_block(stmt.body, bound, function)
+            elif cls is For:
+                walk_block(stmt.body, bound | bindings_of(stmt.init), function)
+            elif cls is ForIn:
+                walk_block(stmt.body, bound | {stmt.name}, function)
+            bound |= bindings_of(stmt)
+
+    walk_block(statements, set(), None)
+
+
+def structure(node: Node) -> Any:
+    """Return a value equal for structurally identical expressions."""
+    fields: List[Any] = [node.__class__]
+    for name in node._fields:
+        value = getattr(node, name)
+        if isinstance(value, Node):
+            value = structure(value)
+        elif isinstance(value, list):
+            value = tuple(structure(item) if isinstance(item, Node) else item for item in value)
+        elif node.__class__ is Literal:
+            # repr() tells 1 from True and 0.0 from -0.0
+            value = (value.__class__, repr(value))
+        fields.append(value)
+    return tuple(fields)
+
+
+def temporary() -> str:
+    """Return a new variable name; it starts with a digit, so no source can use it."""
+    return f"{next(TEMPORARIES)}tmp"
+
+
+def hoist_invariants(statements: List[Node], profile: Optional[Profile] = None) -> List[str]:
+    """
+    Compute the invariant expressions of each loop once, before the loop.
+
+    With a profile, only loops whose body ran more often than the loop
+    was reached are rewritten.
+    """
+    facts = Facts(statements)
+    changes: List[str] = []
+
+    def visit(block: List[Node], bound: Set[str], function: Optional[FunctionDef]) -> None:
+        bound = set(bound)
+        index = 0
+        while index < len(block):
+            stmt = block[index]
+            if stmt.__class__ in (While, For, ForIn) and (profile is None or profile.is_hot_loop(stmt)):
+                hoisted = hoist_loop(stmt, facts, bound, function, changes)
+                block[index:index] = hoisted
+                index += len(hoisted)
+                bound.update(decl.name for decl in hoisted)
+            bound |= bindings_of(stmt)
+            index += 1
+
+    each_block(statements, visit)
+    return changes
+
+
+def hoist_loop(loop: Node, facts: Facts, bound: Set[str], function: Optional[FunctionDef],
+               changes: List[str]) -> List[VarDecl]:
+    """Replace the invariant expressions of a loop with temporaries; return their declarations."""
+    # What runs on every iteration; a for loop's init runs once, where the
+    # temporaries would, and a for-in loop's iterable too
+    parts: List[Node] = list(loop.body)
+    if loop.__class__ is not ForIn:
+        parts.append(loop.condition)
+    if loop.__class__ is For:
+        parts.append(loop.update)
+    written = {binding_name(node) for node in walk_code(parts)} - {None}
+    if loop.__class__ is ForIn:
+        written.add(loop.name)
+    called = facts.call_writes(parts)
+    local_names = facts.local_names(function)
+
+    def invariant(node: Node) -> bool:
+        for child in walk(node):
+            if child.__class__ is Identifier:
+                name = child.name
+                if name in written:
+                    return False
+                if name in local_names or name in facts.modules:
+                    continue
+                if called is None or name in called:
+                    return False
+        return True
+
+    hoisted: Dict[Any, VarDecl] = {}
+
+    def replace(node: Node) -> Node:
+        if isinstance(node, MOVABLE) and facts.kind(node, bound) and invariant(node):
+            key = structure(node)
+            if key not in hoisted:
+                hoisted[key] = VarDecl(temporary(), node)
+                keyword = 'while' if loop.__class__ is While else 'for'
+                changes.append(f"{describe(node)} -> {hoisted[key].name}, before the {keyword} loop")
+            return Identifier(hoisted[key].name)
+        if node.__class__ is not FunctionDef:
+            replace_children(node, replace)
+        return node
+
+    loop.body[:] = [replace(stmt) for stmt in loop.body]
+    if loop.__class__ is not ForIn:
+        loop.condition = replace(loop.condition)
+    if loop.__class__ is For:
+        loop.update = replace(loop.update)
+    for decl in hoisted.values():
+        facts.kinds[decl.name] = facts.kind(decl.value, bound)
+    return list(hoisted.values())
+
+
+def share_common_subexpressions(statements: List[Node]) -> List[str]:
+    """Compute pure expressions repeated in a run of simple statements once."""
+    facts = Facts(statements)
+    changes: List[str] = []
+
+    def visit(block: List[Node], bound: Set[str], function: Optional[FunctionDef]) -> None:
+        bound = set(bound)
+        local_names = facts.local_names(function)
+        rebuilt: List[Node] = []
+        run: List[Tuple[Node, Set[str]]] = []
+        for stmt in block:
+            if stmt.__class__ in SIMPLE_STATEMENTS:
+                run.append((stmt, set(bound)))
+            else:
+                rebuilt.extend(share_in_run(run, facts, local_names, changes))
+                run = []
+                rebuilt.append(stmt)
+            bound |= bindings_of(stmt)
+        rebuilt.extend(share_in_run(run, facts, local_names, changes))
+        block[:] = rebuilt
+
+    each_block(statements, visit)
+    return changes
+
+
+def share_in_run(run: List[Tuple[Node, Set[str]]], facts: Facts, local_names: Set[str],
+                 changes: List[str]) -> List[Node]:
+    """
+    Return a run of simple statements (each with the names bound before it)
+    with its repeated pure expressions computed into temporaries.
+
+    The repeated expressions are all found in one pass and shared largest
+    first. Sharing one moves the expressions inside its first occurrence
+    to the temporary's declaration, and removes those inside the others.
+    """
+    run = list(run)
+    expressions = Expressions(run, facts)
+    for group in repeated_expressions(run, expressions, facts, local_names):
+        # Occurrences a larger expression removed are gone, and those it
+        # moved are evaluated by its declaration, before the statements
+        positions = {id(entry): position for position, entry in enumerate(run)}
+        nodes = sorted((node for node in group if node in expressions.entries),
+                       key=lambda node: (positions[id(expressions.entries[node])],
+                                         expressions.ranks[node]))
+        if len(nodes) < 2:
+            continue
+        entry = expressions.entries[nodes[0]]
+        if not computes_first(entry, nodes, facts):
+            continue
+        decl = VarDecl(temporary(), nodes[0])
+        changes.append(f"{describe(nodes[0])} -> {decl.name}, computed once for {len(nodes)} uses")
+        for node in nodes:
+            expressions.replace(node, Identifier(decl.name))
+        facts.kinds[decl.name] = expressions.kinds[nodes[0]]
+        first = positions[id(entry)]
+        run.insert(first, (decl, set(entry[1])))
+        for _, bound in run[first + 1:]:
+            bound.add(decl.name)
+        expressions.move(nodes[0], run[first])
+        for node in nodes[1:]:
+            expressions.remove(node)
+    return [stmt for stmt, _ in run]
+
+
+class Expressions:
+    """
+    The expressions a run of simple statements evaluates, each analysed once.
+
+    A node's key (equal for structurally identical expressions, like
+    structure()), purity, kind, size and names are computed from its
+    operands', so the run is analysed in one pass however deep its
+    expressions nest. occurrences maps the key of each pure expression
+    with a kind to where it occurs, as (statement position, node) pairs;
+    entries maps the occurrences still in the run to the entry of the
+    statement evaluating them.
+    """
+
+    def __init__(self, run: List[Tuple[Node, Set[str]]], facts: Facts):
+        self.kinds: Dict[Node, Optional[str]] = {}
+        self.sizes: Dict[Node, int] = {}
+        self.names: Dict[Node, FrozenSet[str]] = {}
+        self.occurrences: Dict[int, List[Tuple[int, Node]]] = {}
+        self.entries: Dict[Node, Tuple[Node, Set[str]]] = {}
+        # Order of the occurrences in the statements
+        self.ranks: Dict[Node, int] = {}
+        # Where each node is held: (parent, field, index in a list field or None)
+        self.parents: Dict[Node, Tuple[Node, str, Optional[int]]] = {}
+        keys: Dict[Node, int] = {}
+        shapes: Dict[Any, int] = {}
+        pure: Dict[Node, bool] = {}
+        for position, entry in enumerate(run):
+            for parent in walk(entry[0]):
+                for name in parent._fields:
+                    value = getattr(parent, name)
+                    if isinstance(value, Node):
+                        self.parents[value] = (parent, name, None)
+                    elif isinstance(value, list):
+                        for index, item in enumerate(value):
+                            if isinstance(item, Node):
+                                self.parents[item] = (parent, name, index)
+            for root in statement_operands(entry[0]):
+                nodes = list(walk(root))
+                # Operands before the operations using them
+                for node in reversed(nodes):
+                    operands = list(iter_child_nodes(node))
+                    fields: List[Any] = [node.__class__]
+                    for name in node._fields:
+                        value = getattr(node, name)
+                        if isinstance(value, Node):
+                            value = keys[value]
+                        elif isinstance(value, list):
+                            value = tuple(keys[item] if isinstance(item, Node) else item for item in value)
+                        elif node.__class__ is Literal:
+                            # repr() tells 1 from True and 0.0 from -0.0
+                            value = (value.__class__, repr(value))
+                        fields.append(value)
+                    keys[node] = shapes.setdefault(tuple(fields), len(shapes))
+                    pure[node] = facts.is_pure_operation(node) and all(pure[operand] for operand in operands)
+                    self.sizes[node] = 1 + sum(self.sizes[operand] for operand in operands)
+                    self.names[node] = frozenset().union(
+                        {node.name} if node.__class__ is Identifier else (),
+                        *(self.names[operand] for operand in operands))
+                    facts.kind(node, None, self.kinds)
+                for node in nodes:
+                    if isinstance(node, MOVABLE) and pure[node] and self.kinds[node]:
+                        self.occurrences.setdefault(keys[node], []).append((position, node))
+                        self.entries[node] = entry
+                        self.ranks[node] = len(self.ranks)
+
+    def replace(self, node: Node, new: Node) -> None:
+        """Put new where node is held."""
+        parent, name, index = self.parents[node]
+        if index is None:
+            setattr(parent, name, new)
+        else:
+            getattr(parent, name)[index] = new
+
+    def move(self, node: Node, entry: Tuple[Node, Set[str]]) -> None:
+        """Record that the declaration of entry now evaluates node."""
+        self.parents[node] = (entry[0], 'value', None)
+        for child in walk(node):
+            if child in self.entries:
+                self.entries[child] = entry
+
+    def remove(self, node: Node) -> None:
+        """Record that node is no longer evaluated."""
+        for child in walk(node):
+            self.entries.pop(child, None)
+
+
+def repeated_expressions(run: List[Tuple[Node, Set[str]]], expressions: Expressions, facts: Facts,
+                         local_names: Set[str]) -> List[List[Node]]:
+    """
+    Return the occurrences of each pure expression a run evaluates more
+    than once with the same variables, in groups, largest expression first.
+    """
+    # Names each statement assigns once it has run, and the globals its
+    # calls may assign while it runs (None: any)
+    assigns = [bindings_of(stmt) for stmt, _ in run]
+    clobbers = [facts.call_writes([stmt]) for stmt, _ in run]
+
+    found_groups: List[List[Node]] = []
+    for found in expressions.occurrences.values():
+        if len(found) < 2:
+            continue
+        names = expressions.names[found[0][1]]
+        exposed = names - local_names
+
+        def clobbered(position: int) -> bool:
+            written = clobbers[position]
+            return bool(exposed) and (written is None or not exposed.isdisjoint(written))
+
+        # Split the occurrences where a statement may change the variables
+        groups: List[List[Tuple[int, Node]]] = [[]]
+        for position, node in found:
+            group = groups[-1]
+            if group and any(assigns[between] & names or clobbered(between + 1)
+                             for between in range(group[-1][0], position)):
+                group = []
+                groups.append(group)
+            if not clobbered(position):
+                group.append((position, node))
+        found_groups.extend([node for _, node in group] for group in groups if len(group) >= 2)
+    found_groups.sort(key=lambda nodes: expressions.sizes[nodes[0]], reverse=True)
+    return found_groups
+
+
+def statement_operands(stmt: Node) -> List[Node]:
+    """Return the expressions a simple statement evaluates, in order."""
+    if stmt.__class__ is Assignment:
+        target = stmt.target
+        if target.__class__ is Identifier:
+            return [stmt.value]
+        return [node for node in iter_child_nodes(target)] + [stmt.value]
+    return [stmt.value] if stmt.value is not None else []
+
+
+def computes_first(entry: Tuple[Node, Set[str]], nodes: List[Node], facts: Facts) -> bool:
+    """
+    Return whether an expression can be computed just before the statement
+    that first evaluates it (one of nodes).
+
+    One that cannot fail always can. Otherwise the statement must evaluate
+    it unconditionally, and only expressions that cannot fail before it, so
+    a failure still happens before anything else.
+    """
+    stmt, bound = entry
+    # Kinds where the statement runs, operands first so each is found once
+    known: Dict[Node, Optional[str]] = {}
+    for node in reversed(list(walk(nodes[0]))):
+        facts.kind(node, bound, known)
+    if known[nodes[0]]:
+        return True
+    targets = set(nodes)
+    # The statement's nodes in evaluation order: (node, conditional, operands done)
+    stack = [(root, False, False) for root in reversed(statement_operands(stmt))]
+    while stack:
+        node, conditional, done = stack.pop()
+        if done:
+            if node.__class__ is not Literal and not facts.kind(node, bound, known):
+                return False
+        elif node in targets:
+            return not conditional
+        else:
+            stack.append((node, conditional, True))
+            logical = isinstance(node, BinaryOp) and node.op in ('and', 'or')
+            children = list(iter_child_nodes(node))
+            for index in reversed(range(len(children))):
+                stack.append((children[index], conditional or (logical and index == 1), False))
+    return False
+
+
+# ----------------------------------------------------------------------------
+# string-chains
+# ----------------------------------------------------------------------------
+
+def fold_string_chains(statements: List[Node]) -> List[str]:
+    """Rewrite `+` chains with string literals (and template literals) as Templates."""
+    changes: List[str] = []
+    # Spine nodes of chains already looked at; their inner nodes are the
+    # prefixes of the same chain and need no second look
+    seen: Set[BinaryOp] = set()
+
+    def fold(expr: Node) -> Node:
+        if isinstance(expr, BinaryOp):
+            result = fold_chain(expr, seen)
+        elif expr.__class__ is Template:
+            result = fold_template(expr)
+        else:
+            return expr
+        if result is not expr:
+            changes.append(f"{describe(expr)} -> {describe(result)}")
+        return result
+
+    for node in walk(statements):
+        replace_children(node, fold)
+    return changes
+
+
+def fold_chain(expr: BinaryOp, seen: Set[BinaryOp]) -> Node:
+    """Return a `+` chain with its string part as a Template (or expr itself)."""
+    if expr.op != '+' or expr in seen:
+        return expr
+    # chain[j] is the node adding operands[j + 1] to the ones before it
+    chain: List[BinaryOp] = []
+    node: Node = expr
+    while isinstance(node, BinaryOp) and node.op == '+':
+        seen.add(node)
+        chain.append(node)
+        node = node.left
+    chain.reverse()
+    operands = [node] + [link.right for link in chain]
+
+    for first, operand in enumerate(operands):
+        if operand.__class__ is Literal and isinstance(operand.value, str):
+            break
+    else:
+        return expr
+    if len(operands) - first < MIN_CHAIN_OPERANDS:
+        return expr
+
+    text = join_parts(operands[first:])
+    if first == 0:
+        return text
+    prefix = chain[first - 2] if first > 1 else operands[0]
+    return BinaryOp('+', prefix, text)
+
+
+def fold_template(expr: Template) -> Node:
+    """Return a template literal with its literal values folded into the text."""
+    if not any(value.__class__ is Literal for value in expr.values):
+        return expr
+    parts: List[Node] = [Literal(expr.strings[0])]
+    for value, text in zip(expr.values, expr.strings[1:]):
+        parts += [value, Literal(text)]
+    return join_parts(parts)
+
+
+def join_parts(parts: List[Node]) -> Node:
+    """Return the Template (or string Literal) joining parts as strings."""
+    strings = ['']
+    values: List[Node] = []
+    for part in parts:
+        if part.__class__ is Literal:
+            strings[-1] += literal_text(part.value)
+        else:
+            values.append(part)
+            strings.append('')
+    return Template(strings, values) if values else Literal(strings[0])
+
+
+# ----------------------------------------------------------------------------
+# Reports
+# ----------------------------------------------------------------------------
+
+def describe(node: Node) -> str:
+    """Return NovaScript source for an expression, for change reports."""
+    cls = node.__class__
+    if cls is Literal:
+        value = node.value
+        if isinstance(value, str):
+            return '"' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        return str(value)
+    if cls is Identifier:
+        return node.name
+    if isinstance(node, BinaryOp):
+        precedence = PRECEDENCE[node.op]
+        left, right = describe(node.left), describe(node.right)
+        if isinstance(node.left, BinaryOp) and PRECEDENCE[node.left.op] < precedence:
+            left = f"({left})"
+        if isinstance(node.right, BinaryOp) and PRECEDENCE[node.right.op] <= precedence:
+            right = f"({right})"
+        return f"{left} {node.op} {right}"
+    if cls is UnaryOp:
+        operand = describe(node.expr)
+        return node.op + (f"({operand})" if isinstance(node.expr, BinaryOp) else operand)
+    if cls is Template:
+        text = ''.join(string.replace('`', '\\`') + '${' + describe(value) + '}'
+                       for string, value in zip(node.strings, node.values))
+        return '`' + text + node.strings[-1].replace('`', '\\`') + '`'
+    if cls is Call:
+        return f"{node.name}({', '.join(describe(arg) for arg in node.args)})"
+    if cls is MemberAccess:
+        return f"{describe(node.object)}.{node.member}"
+    if cls is MemberCall:
+        return f"{describe(node.object)}.{node.member}({', '.join(describe(arg) for arg in node.args)})"
+    return f"<{node.type}>"
+
+
+# Every pass by name, and the passes of each level in the order they run.
+# Those in PROFILED_PASSES also take the profile given to optimize().
+PASSES: Dict[str, Callable[..., List[str]]] = {
+    'inline-functions': inline_functions,
+    'fold-constants': fold_constants,
+    'dead-branches': remove_dead_branches,
+    'unreachable-code': remove_unreachable,
+    'hoist-invariants': hoist_invariants,
+    'common-subexpressions': share_common_subexpressions,
+    'string-chains': fold_string_chains,
+}
+
+PROFILED_PASSES = frozenset(('inline-functions', 'hoist-invariants'))
+
+LEVELS: Dict[int, Tuple[str, ...]] = {
+    0: (),
+    1: ('fold-constants', 'string-chains'),
+    2: ('inline-functions', 'fold-constants', 'dead-branches', 'unreachable-code',
+        'hoist-invariants', 'common-subexpressions', 'string-chains'),
+}
@@ -0,0 +1,153 @@
+"""
+Runtime profiles, for profile-guided optimisation.
+
+`novax --profile-out prof.json script.nova` runs a script on the
+tree-walking Executor with Executor.record_profile() on, and saves a
+Profile of the run:
+
+- counts: how often each statement and expression ran
+- types: the types (inference.type_of()) each expression evaluated to
+- targets: the functions each call site called
+
+The training run executes the program as parsed, without optimisation
+or quickening, so every node of the source runs through the dispatch
+table and the profile describes the source. In the file, nodes are
+named by their position in walk() order, and a hash of the program's
+dump() ties the profile to the program it was recorded from:
+load_profile() refuses a profile recorded for any other.
+
+`novax --profile-in prof.json script.nova` hands the profile to the
+executor (`Executor.profile`), and the optimisations consult it:
+
+- inline-functions (-O2) leaves alone the calls the training run never
+  made, and at a call site that ran HOT_COUNT times or more, always with
+  the function being inlined, accepts bodies of up to
+  PROFILE_INLINE_BUDGET nodes instead of INLINE_BUDGET.
+- hoist-invariants (-O2) only moves expressions out of loops whose body
+  ran more often than the loop was reached. A loop that runs once or
+  never pays for the temporaries without gaining from them.
+- The tree-walking Executor quickens (see quicken.py) the BinaryOps the
+  profile saw with one operand type before they first run, and keeps
+  generic those it saw with several, which would only quicken and
+  deoptimise in turn.
+
+None of them relies on the profile being right: inlining and hoisting
+keep every rule of the passes without one, and quickened nodes keep
+their type checks. A run that differs from the training run may be
+slower, never wrong.
+"""
+
+import hashlib
+import json
+from collections import defaultdict
+from typing import Any, Dict, List, Set
+
+from novascriptx.nodes import FunctionDef, Node, dump, walk
+
+# Format of profile files; others are refused
+PROFILE_VERSION = 1
+
+# Runs from which a call site is hot
+HOT_COUNT = 100
+
+# Most nodes in the returned expression of a function inlined at a hot site
+PROFILE_INLINE_BUDGET = 32
+
+
+class Profile:
+    """
+    What a run of a program did, keyed by the program's nodes.
+
+    counts maps each node that ran to its number of runs, types each
+    expression to the types of its values, and targets each call site to
+    the FunctionDefs it called.
+    """
+
+    def __init__(self):
+        self.counts: Dict[Node, int] = defaultdict(int)
+        self.types: Dict[Node, Set[str]] = defaultdict(set)
+        self.targets: Dict[Node, Set[FunctionDef]] = defaultdict(set)
+
+    def count(self, node: Node) -> int:
+        """Return how often a node ran."""
+        return self.counts.get(node, 0)
+
+    def types_of(self, node: Node) -> Set[str]:
+        """Return the types a node's values had (empty if it never completed)."""
+        return self.types.get(node, set())
+
+    def is_hot_call(self, call: Node, function: FunctionDef) -> bool:
+        """Return whether a call site ran HOT_COUNT times or more, only ever calling function."""
+        return self.count(call) >= HOT_COUNT and self.targets.get(call) == {function}
+
+    def is_hot_loop(self, loop: Node) -> bool:
+        """Return whether a loop's body ran more often than the loop was reached."""
+        return bool(loop.body) and self.count(loop.body[0]) > self.count(loop)
+
+    def to_json(self, statements: List[Node]) -> Dict[str, Any]:
+        """Return the profile as JSON data, naming the nodes of statements by position."""
+        positions = {node: str(position) for position, node in enumerate(walk(statements))}
+        return {
+            'version': PROFILE_VERSION,
+            'program': fingerprint(statements),
+            'counts': {positions[node]: count for node, count in self.counts.items()
+                       if node in positions},
+            'types': {positions[node]: sorted(types) for node, types in self.types.items()
+                      if node in positions},
+            'targets': {positions[node]: sorted(int(positions[target]) for target in targets
+                                                if target in positions)
+                        for node, targets in self.targets.items() if node in positions},
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any], statements: List[Node]) -> 'Profile':
+        """
+        Read a profile from JSON data for the program statements.
+
+        Raises ValueError if the data is not a profile of that program.
+        """
+        if not isinstance(data, dict) or data.get('version') != PROFILE_VERSION:
+            raise ValueError(f"not a version {PROFILE_VERSION} profile")
+        if data.get('program') != fingerprint(statements):
+            raise ValueError("the profile was recorded for a different program")
+        nodes = list(walk(statements))
+        profile = cls()
+        try:
+            for position, count in data['counts'].items():
+                profile.counts[nodes[int(position)]] = count
+            for position, types in data['types'].items():
+                profile.types[nodes[int(position)]] = set(types)
+            for position, targets in data['targets'].items():
+                profile.targets[nodes[int(position)]] = {nodes[target] for target in targets}
+        except (AttributeError, KeyError, IndexError, TypeError, ValueError):
+            raise ValueError("malformed profile") from None
+        return profile
+
+
+def fingerprint(statements: List[Node]) -> str:
+    """Return a hash of a program's structure, names and literals."""
+    return hashlib.sha256(dump(statements).encode('utf-8')).hexdigest()
+
+
+def save_profile(profile: Profile, filename: str, statements: List[Node]) -> None:
+    """Write a profile of the program statements to a JSON file."""
+    with open(filename, 'w') as f:
+        json.dump(profile.to_json(statements), f, indent=1, sort_keys=True)
+
+
+def load_profile(filename: str, statements: List[Node]) -> Profile:
+    """
+    Read a profile of the program statements from a JSON file.
+
+    Raises ValueError if the file holds no profile of that program.
+    """
+    with open(filename, 'r') as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{filename}: not a profile ({e})") from None
+    try:
+        return Profile.from_json(data, statements)
+    except ValueError as e:
+        raise ValueError(f"{filename}: {e}") from None
+
@@ -0,0 +1,398 @@
+"""
+Quickening of binary operations in the tree-walking Executor.
+
+The generic BinaryOp handler picks the operator out of a chain of
+comparisons and checks for strings on every '+'. Once a BinaryOp node
+has been evaluated with both operands of the same type, int, float or
+(for '+') str, the Executor rewrites it in place into a specialised
+subclass by assigning its __class__. The dispatch table sends each
+subclass to a handler that applies one operator function after one
+type check.
+
+The subclass also fixes how the operands are fetched. A variable
+(Identifier) operand is read inline, a Literal right operand is used
+without dispatching to it, and anything else is evaluated through the
+dispatch table, so `i < 100` is IntLtNameConst and `x * 0.5 + 1.5` is
+FloatAddExprConst.
+
+A handler whose operands are not of its type deoptimises the node: the
+node goes back to BinaryOp and the generic code computes the result
+from the operands already evaluated. A node that has deoptimised
+MAX_DEOPTS times stays generic.
+
+The subclasses keep BinaryOp's tag and fields and add no slots, so every
+other engine and tool treats a quickened node as a BinaryOp. Each node
+counts its evaluations on a specialised path (`quick_hits`), its generic
+evaluations (`generic_runs`) and its deoptimisations (`deopts`);
+Executor.quickening_stats() reports them.
+
+The proven variants (ProvenBinaryOp) are for nodes whose operand types
+inference.py has proven before the program runs: specialise() rewrites
+them ahead of time, and their handlers apply the operator without any
+type check, so they never deoptimise. Their operand types are 'int',
+'float', 'number' (ints and floats mixed) and 'string'.
+
+With a runtime profile (see profiling.py), quicken_profiled() specialises
+the nodes the training run saw with one operand type before they first
+run, so they skip their generic first evaluation, and keeps generic the
+nodes it saw with several types, which would quicken and deoptimise in
+turn. Those nodes keep their type checks and deoptimise as usual.
+"""
+
+import operator
+from typing import Any, Callable, Dict, List, Tuple
+
+from novascriptx.nodes import BinaryOp, Identifier, Literal, Node, walk
+from novascriptx.optimizer import describe
+from novascriptx.profiling import Profile
+from novascriptx.resolver import UNSET
+from novascriptx.ropes import concat
+
+# Deoptimisations after which a node is never specialised again
+MAX_DEOPTS = 4
+
+# Operators specialised for two operands of each type. '/' floor-divides
+# two integers and '+' on strings may build a rope, like the generic path.
+SPECIALISED_OPERATORS: Dict[type, Dict[str, Callable[[Any, Any], Any]]] = {
+    int: {
+        '+': operator.add, '-': operator.sub, '*': operator.mul,
+        '/': operator.floordiv, '%': operator.mod,
+        '==': operator.eq, '!=': operator.ne, '<': operator.lt,
+        '>': operator.gt, '<=': operator.le, '>=': operator.ge,
+    },
+    float: {
+        '+': operator.add, '-': operator.sub, '*': operator.mul,
+        '/': operator.truediv, '%': operator.mod,
+        '==': operator.eq, '!=': operator.ne, '<': operator.lt,
+        '>': operator.gt, '<=': operator.le, '>=': operator.ge,
+    },
+    str: {
+        '+': concat,
+    },
+}
+
+# Operators of the proven variants, by proven operand type. Number
+# operands mix ints and floats, so '/' (which floor-divides two ints and
+# true-divides anything else) has no number variant.
+PROVEN_OPERATORS: Dict[str, Dict[str, Callable[[Any, Any], Any]]] = {
+    'int': SPECIALISED_OPERATORS[int],
+    'float': SPECIALISED_OPERATORS[float],
+    'number': {op: function for op, function in SPECIALISED_OPERATORS[float].items() if op != '/'},
+    'string': SPECIALISED_OPERATORS[str],
+}
+
+# Specialised operand type of each type a profile records
+PROFILE_TYPES = {'int': int, 'float': float, 'string': str}
+
+OPERATOR_NAMES = {
+    '+': 'Add', '-': 'Sub', '*': 'Mul', '/': 'Div', '%': 'Mod',
+    '==': 'Eq', '!=': 'Ne', '<': 'Lt', '>': 'Gt', '<=': 'Le', '>=': 'Ge',
+}
+
+# (left, right) ways of fetching the operands that have a handler
+SHAPES = (('Expr', 'Expr'), ('Expr', 'Const'), ('Name', 'Expr'),
+          ('Name', 'Const'), ('Name', 'Name'))
+
+
+class QuickBinaryOp(BinaryOp):
+    """Base class of the specialised BinaryOp variants."""
+
+    __slots__ = ()
+
+    # Type both operands must have, and the operator applied to them
+    operand_type: type = object
+    function: Callable[[Any, Any], Any] = staticmethod(operator.add)
+    # How the left and right operands are fetched
+    shape: Tuple[str, str] = ('Expr', 'Expr')
+
+
+def make_quick_class(operand_type: type, op: str, shape: Tuple[str, str]) -> type:
+    """Create the BinaryOp variant for one type, operator and shape."""
+    name = operand_type.__name__.capitalize() + OPERATOR_NAMES[op] + ''.join(shape)
+    return type(name, (QuickBinaryOp,), {
+        '__slots__': (),
+        '__doc__': f"BinaryOp '{op}' on {operand_type.__name__} operands, fetched as {shape}.",
+        # Registers the class with the NodeVisitor dispatch tables
+        'type': 'binary_op',
+        'operand_type': operand_type,
+        'function': staticmethod(SPECIALISED_OPERATORS[operand_type][op]),
+        'shape': shape,
+    })
+
+
+# (operand type, operator, shape) -> specialised class
+QUICK_CLASSES: Dict[Tuple[type, str, Tuple[str, str]], type] = {
+    (operand_type, op, shape): make_quick_class(operand_type, op, shape)
+    for operand_type, operators in SPECIALISED_OPERATORS.items()
+    for op in operators
+    for shape in SHAPES
+}
+
+
+class ProvenBinaryOp(BinaryOp):
+    """Base class of the BinaryOp variants whose operand types are proven."""
+
+    __slots__ = ()
+
+    # Proven type of both operands, and the operator applied to them
+    operand_type: str = 'int'
+    function: Callable[[Any, Any], Any] = staticmethod(operator.add)
+    # How the left and right operands are fetched
+    shape: Tuple[str, str] = ('Expr', 'Expr')
+
+
+def make_proven_class(operand_type: str, op: str, shape: Tuple[str, str]) -> type:
+    """Create the proven BinaryOp variant for one operand type, operator and shape."""
+    name = 'Proven' + operand_type.capitalize() + OPERATOR_NAMES[op] + ''.join(shape)
+    return type(name, (ProvenBinaryOp,), {
+        '__slots__': (),
+        '__doc__': f"BinaryOp '{op}' on operands proven {operand_type}, fetched as {shape}.",
+        'type': 'binary_op',
+        'operand_type': operand_type,
+        'function': staticmethod(PROVEN_OPERATORS[operand_type][op]),
+        'shape': shape,
+    })
+
+
+# (proven operand type, operator, shape) -> proven class
+PROVEN_CLASSES: Dict[Tuple[str, str, Tuple[str, str]], type] = {
+    (operand_type, op, shape): make_proven_class(operand_type, op, shape)
+    for operand_type, operators in PROVEN_OPERATORS.items()
+    for op in operators
+    for shape in SHAPES
+}
+
+
+def operand_shape(expr: BinaryOp) -> Tuple[str, str]:
+    """Return the shape of a node's operands, as keyed in QUICK_CLASSES."""
+    left = 'Name' if expr.left.__class__ is Identifier else 'Expr'
+    right_class = expr.right.__class__
+    if right_class is Literal:
+        return left, 'Const'
+    if right_class is Identifier and left == 'Name':
+        return left, 'Name'
+    return left, 'Expr'
+
+
+def quick_class(expr: BinaryOp, left: Any, right: Any) -> type:
+    """Return the variant for a node's evaluated operands, or None."""
+    if left.__class__ is not right.__class__:
+        return None
+    return QUICK_CLASSES.get((left.__class__, expr.op, operand_shape(expr)))
+
+
+def quicken_profiled(statements: List[Node], profile: Profile,
+                     quickened: Dict[BinaryOp, None]) -> List[str]:
+    """
+    Specialise the BinaryOps a profile saw with one operand type before they run.
+
+    A node whose operands the profile saw with several types is kept
+    generic (its deopts set to MAX_DEOPTS) instead. Changed nodes are
+    added to quickened; returns a description of each.
+    """
+    changes: List[str] = []
+    for expr in walk(statements):
+        if expr.__class__ is not BinaryOp or expr.op not in OPERATOR_NAMES:
+            continue
+        left = profile.types_of(expr.left)
+        right = profile.types_of(expr.right)
+        if not left or not right:
+            continue
+        if len(left) == 1 and left == right:
+            operand_type = PROFILE_TYPES.get(next(iter(left)))
+            quick = QUICK_CLASSES.get((operand_type, expr.op, operand_shape(expr)))
+            # A literal operand is not checked when the node runs
+            if quick is not None and (expr.right.__class__ is not Literal
+                                      or expr.right.value.__class__ is operand_type):
+                expr.__class__ = quick
+                quickened[expr] = None
+                changes.append(f"{describe(expr)} -> {quick.__name__}")
+        elif len(left) > 1 or len(right) > 1:
+            expr.deopts = MAX_DEOPTS
+            quickened[expr] = None
+            changes.append(f"{describe(expr)} kept generic ({', '.join(sorted(left | right))} operands)")
+    return changes
+
+
+def quick_handlers(executor) -> Dict[type, Callable[[Node], Any]]:
+    """Build the handler of every specialised class for one Executor."""
+    factories = {
+        ('Expr', 'Expr'): expr_expr_handler,
+        ('Expr', 'Const'): expr_const_handler,
+        ('Name', 'Expr'): name_expr_handler,
+        ('Name', 'Const'): name_const_handler,
+        ('Name', 'Name'): name_name_handler,
+    }
+    return {cls: factories[cls.shape](executor, cls.operand_type, cls.function)
+            for cls in QUICK_CLASSES.values()}
+
+
+# Each handler reads an Identifier operand the way Executor.visit_Identifier
+# does: the local slot if it is bound, else the global cell.
+
+def expr_expr_handler(executor, operand_type, function):
+    dispatch = executor.dispatch
+    deoptimize = executor.deoptimize
+
+    def quick_expr_expr(expr):
+        left = dispatch[expr.left.__class__](expr.left)
+        right = dispatch[expr.right.__class__](expr.right)
+        if left.__class__ is operand_type and right.__class__ is operand_type:
+            expr.quick_hits += 1
+            return function(left, right)
+        return deoptimize(expr, left, right)
+    return quick_expr_expr
+
+
+def expr_const_handler(executor, operand_type, function):
+    dispatch = executor.dispatch
+    deoptimize = executor.deoptimize
+
+    # The literal's type was checked when the node was specialised
+    def quick_expr_const(expr):
+        left = dispatch[expr.left.__class__](expr.left)
+        if left.__class__ is operand_type:
+            expr.quick_hits += 1
+            return function(left, expr.right.value)
+        return deoptimize(expr, left, expr.right.value)
+    return quick_expr_const
+
+
+def name_expr_handler(executor, operand_type, function):
+    dispatch = executor.dispatch
+    deoptimize = executor.deoptimize
+
+    def quick_name_expr(expr):
+        name = expr.left
+        slot = name.slot
+        left = UNSET if slot is None else executor.frame[slot]
+        if left is UNSET:
+            left = name.cell.value
+            if left is UNSET:
+                raise NameError(f"Undefined variable: {name.name}")
+        right = dispatch[expr.right.__class__](expr.right)
+        if left.__class__ is operand_type and right.__class__ is operand_type:
+            expr.quick_hits += 1
+            return function(left, right)
+        return deoptimize(expr, left, right)
+    return quick_name_expr
+
+
+def name_const_handler(executor, operand_type, function):
+    deoptimize = executor.deoptimize
+
+    def quick_name_const(expr):
+        name = expr.left
+        slot = name.slot
+        left = UNSET if slot is None else executor.frame[slot]
+        if left is UNSET:
+            left = name.cell.value
+            if left is UNSET:
+                raise NameError(f"Undefined variable: {name.name}")
+        if left.__class__ is operand_type:
+            expr.quick_hits += 1
+            return function(left, expr.right.value)
+        return deoptimize(expr, left, expr.right.value)
+    return quick_name_const
+
+
+def name_name_handler(executor, operand_type, function):
+    deoptimize = executor.deoptimize
+
+    def quick_name_name(expr):
+        name = expr.left
+        slot = name.slot
+        left = UNSET if slot is None else executor.frame[slot]
+        if left is UNSET:
+            left = name.cell.value
+            if left is UNSET:
+                raise NameError(f"Undefined variable: {name.name}")
+        name = expr.right
+        slot = name.slot
+        right = UNSET if slot is None else executor.frame[slot]
+        if right is UNSET:
+            right = name.cell.value
+            if right is UNSET:
+                raise NameError(f"Undefined variable: {name.name}")
+        if left.__class__ is operand_type and right.__class__ is operand_type:
+            expr.quick_hits += 1
+            return function(left, right)
+        return deoptimize(expr, left, right)
+    return quick_name_name
+
+
+def proven_handlers(executor) -> Dict[type, Callable[[Node], Any]]:
+    """Build the handler of every proven class for one Executor; none checks types."""
+    factories = {
+        ('Expr', 'Expr'): proven_expr_expr_handler,
+        ('Expr', 'Const'): proven_expr_const_handler,
+        ('Name', 'Expr'): proven_name_expr_handler,
+        ('Name', 'Const'): proven_name_const_handler,
+        ('Name', 'Name'): proven_name_name_handler,
+    }
+    return {cls: factories[cls.shape](executor, cls.function) for cls in PROVEN_CLASSES.values()}
+
+
+def proven_expr_expr_handler(executor, function):
+    dispatch = executor.dispatch
+
+    def proven_expr_expr(expr):
+        return function(dispatch[expr.left.__class__](expr.left),
+                        dispatch[expr.right.__class__](expr.right))
+    return proven_expr_expr
+
+
+def proven_expr_const_handler(executor, function):
+    dispatch = executor.dispatch
+
+    def proven_expr_const(expr):
+        return function(dispatch[expr.left.__class__](expr.left), expr.right.value)
+    return proven_expr_const
+
+
+def proven_name_expr_handler(executor, function):
+    dispatch = executor.dispatch
+
+    def proven_name_expr(expr):
+        name = expr.left
+        slot = name.slot
+        left = UNSET if slot is None else executor.frame[slot]
+        if left is UNSET:
+            left = name.cell.value
+            if left is UNSET:
+                raise NameError(f"Undefined variable: {name.name}")
+        return function(left, dispatch[expr.right.__class__](expr.right))
+    return proven_name_expr
+
+
+def proven_name_const_handler(executor, function):
+    def proven_name_const(expr):
+        name = expr.left
+        slot = name.slot
+        left = UNSET if slot is None else executor.frame[slot]
+        if left is UNSET:
+            left = name.cell.value
+            if left is UNSET:
+                raise NameError(f"Undefined variable: {name.name}")
+        return function(left, expr.right.value)
+    return proven_name_const
+
+
+def proven_name_name_handler(executor, function):
+    def proven_name_name(expr):
+        name = expr.left
+        slot = name.slot
+        left = UNSET if slot is None else executor.frame[slot]
+        if left is UNSET:
+            left = name.cell.value
+            if left is UNSET:
+                raise NameError(f"Undefined variable: {name.name}")
+        name = expr.right
+        slot = name.slot
+        right = UNSET if slot is None else executor.frame[slot]
+        if right is UNSET:
+            right = name.cell.value
+            if right is UNSET:
+                raise NameError(f"Undefined variable: {name.name}")
+        return function(left, right)
+    return proven_name_name
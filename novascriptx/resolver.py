@@ -0,0 +1,166 @@
+"""
+Static scope resolution for the tree-walking Executor.
+
+resolve() runs once over a program before it executes:
+
+- Every name a function can bind locally (its parameters, var and
+  function declarations, for-in loop variables and assignment targets)
+  gets a fixed slot index. Identifier, VarDecl, FunctionDef and ForIn
+  nodes inside the function record that index in `node.slot`, and the
+  FunctionDef records `frame_size`. A call then runs in a preallocated
+  list instead of a fresh dict.
+- Every name, at any level, is bound to the Cell holding its global in
+  the executor's GlobalScope (`node.cell`). Calls only look at globals,
+  so Call nodes get a cell too.
+
+An unbound slot holds UNSET. Reads and assignments fall back to the
+global cell until the slot is bound, which keeps the dict executor's
+"local if bound, else global" rule.
+
+Cells belong to one GlobalScope. A tree that is executed by a second
+executor is resolved again for that executor.
+"""
+
+from typing import Any, Dict, Iterator, List, MutableMapping, Optional, Set, Tuple
+
+from novascriptx.nodes import (
+    Node, iter_child_nodes,
+    VarDecl, FunctionDef, If, While, For, ForIn, Assignment, Identifier, Call,
+)
+
+
+class _Unset:
+    """Type of UNSET, the value of an unbound slot or cell."""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'UNSET'
+
+
+UNSET = _Unset()
+
+
+class Cell:
+    """Holds the value of one global variable."""
+
+    __slots__ = ('name', 'value')
+
+    def __init__(self, name: str, value: Any = UNSET):
+        self.name = name
+        self.value = value
+
+    def __repr__(self):
+        return f"Cell({self.name!r}, {self.value!r})"
+
+
+class GlobalScope(MutableMapping):
+    """
+    Global variables stored in cells.
+
+    Behaves like a dict of the bound globals. Cells are created on first
+    reference and never removed, so resolved nodes stay valid when a
+    global is deleted and bound again.
+    """
+
+    def __init__(self):
+        self.cells: Dict[str, Cell] = {}
+
+    def cell(self, name: str) -> Cell:
+        """Return the cell for a name, creating an unbound one if needed."""
+        cell = self.cells.get(name)
+        if cell is None:
+            cell = self.cells[name] = Cell(name)
+        return cell
+
+    def __getitem__(self, name: str) -> Any:
+        cell = self.cells.get(name)
+        if cell is None or cell.value is UNSET:
+            raise KeyError(name)
+        return cell.value
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        self.cell(name).value = value
+
+    def __delitem__(self, name: str) -> None:
+        cell = self.cells.get(name)
+        if cell is None or cell.value is UNSET:
+            raise KeyError(name)
+        cell.value = UNSET
+
+    def __contains__(self, name: object) -> bool:
+        cell = self.cells.get(name)
+        return cell is not None and cell.value is not UNSET
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name, cell in self.cells.items() if cell.value is not UNSET)
+
+    def __len__(self) -> int:
+        return sum(1 for cell in self.cells.values() if cell.value is not UNSET)
+
+    def __repr__(self):
+        return f"GlobalScope({dict(self)!r})"
+
+
+def collect_bindings(statements: List[Node]) -> Tuple[Set[str], Set[str]]:
+    """
+    Return (declared, assigned) names bound by a statement list.
+
+    Declared names come from var and function definitions and for-in loop
+    variables, assigned names from plain assignments. Nested blocks are included; function bodies
+    are not.
+    """
+    declared: Set[str] = set()
+    assigned: Set[str] = set()
+    pending = list(statements)
+    while pending:
+        stmt = pending.pop()
+        if isinstance(stmt, (VarDecl, FunctionDef)):
+            declared.add(stmt.name)
+        elif isinstance(stmt, ForIn):
+            declared.add(stmt.name)
+            pending.extend(stmt.body)
+        elif isinstance(stmt, Assignment) and isinstance(stmt.target, Identifier):
+            assigned.add(stmt.target.name)
+        elif isinstance(stmt, If):
+            pending.extend(stmt.then)
+            pending.extend(stmt.else_)
+        elif isinstance(stmt, While):
+            pending.extend(stmt.body)
+        elif isinstance(stmt, For):
+            pending.extend(stmt.body)
+            pending.extend(node for node in (stmt.init, stmt.update) if node)
+    return declared, assigned
+
+
+def function_slots(func: FunctionDef) -> Dict[str, int]:
+    """Assign slot indices to a function's locals, parameters first."""
+    slots = {param: index for index, param in enumerate(func.params)}
+    declared, assigned = collect_bindings(func.body)
+    for name in sorted((declared | assigned) - slots.keys()):
+        slots[name] = len(slots)
+    return slots
+
+
+def resolve(nodes: List[Node], global_scope: GlobalScope) -> None:
+    """Annotate a program (or any list of nodes) with slots and cells."""
+    cell = global_scope.cell
+    # (nodes, slots of the enclosing function or None at top level)
+    pending: List[Tuple[List[Node], Optional[Dict[str, int]]]] = [(nodes, None)]
+    while pending:
+        roots, slots = pending.pop()
+        stack = list(roots)
+        while stack:
+            node = stack.pop()
+            cls = node.__class__
+            if cls is Identifier or cls is VarDecl or cls is FunctionDef or cls is ForIn:
+                node.slot = slots.get(node.name) if slots is not None else None
+                node.cell = cell(node.name)
+                if cls is FunctionDef:
+                    body_slots = function_slots(node)
+                    node.frame_size = len(body_slots)
+                    pending.append((node.body, body_slots))
+                    continue
+            elif cls is Call:
+                node.cell = cell(node.name)
+            stack.extend(iter_child_nodes(node))
@@ -0,0 +1,156 @@
+"""
+Rope strings: lazy results of repeated string concatenation.
+
+`s = s + line` copies all of `s` when both sides are Python strings, so
+building a string in a loop is quadratic. Once a concatenation result
+reaches ROPE_THRESHOLD characters, concat() returns a Rope instead: the
+pieces in a list, joined only when the string is read. Appending to a
+Rope appends to its list, so the loop becomes linear.
+
+Ropes are immutable values like strings. A Rope owns the first `count`
+pieces of its list; appending to a rope whose list already holds more
+(another rope was built from it) copies those pieces first, so both
+results stay correct and the common chain s -> s + a -> s + a + b keeps
+sharing one list.
+
+A rope is flattened (joined once, then cached) when it is printed or
+converted with str(), compared, hashed, indexed, sliced or iterated;
+`length` needs no flattening. Every other operator (`*`, `%`, `-`, ...)
+applies to the flattened string, so a rope repeats and formats as a
+string does and fails as one does, with the same error. Standard library
+functions convert their string arguments with str(), which flattens a
+rope, and error messages name a rope's type with type_name(): a string.
+"""
+
+from typing import Any, Iterator, List, Union
+
+# Concatenations shorter than this produce plain strings
+ROPE_THRESHOLD = 256
+
+
+class Rope:
+    """A string held as a list of pieces until it is read."""
+
+    __slots__ = ('parts', 'count', 'length', 'flat')
+
+    def __init__(self, parts: List[str], count: int, length: int):
+        self.parts = parts
+        self.count = count
+        self.length = length
+        self.flat = None
+
+    def __repr__(self):
+        return f"Rope({str(self)!r})"
+
+    def append(self, text: str) -> 'Rope':
+        """Return the rope for self + text."""
+        parts = self.parts
+        if len(parts) != self.count:
+            # A longer rope shares the list: copy this rope's pieces
+            parts = parts[:self.count]
+        parts.append(text)
+        return Rope(parts, self.count + 1, self.length + len(text))
+
+    def __str__(self) -> str:
+        flat = self.flat
+        if flat is None:
+            parts = self.parts
+            flat = self.flat = ''.join(parts if len(parts) == self.count else parts[:self.count])
+            # Later appends start from the joined string, not every piece
+            self.parts = [flat]
+            self.count = 1
+        return flat
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is Rope:
+            return self.length == other.length and str(self) == str(other)
+        if other.__class__ is str:
+            return self.length == len(other) and str(self) == other
+        return NotImplemented
+
+    def __ne__(self, other: Any) -> bool:
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __lt__(self, other: Any) -> bool:
+        return str(self) < flatten(other)
+
+    def __le__(self, other: Any) -> bool:
+        return str(self) <= flatten(other)
+
+    def __gt__(self, other: Any) -> bool:
+        return str(self) > flatten(other)
+
+    def __ge__(self, other: Any) -> bool:
+        return str(self) >= flatten(other)
+
+    def __getitem__(self, index: Any) -> str:
+        return str(self)[index]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(str(self))
+
+    def __mul__(self, other: Any) -> Any:
+        return str(self) * flatten(other)
+
+    def __rmul__(self, other: Any) -> Any:
+        return other * str(self)
+
+    def __mod__(self, other: Any) -> Any:
+        return str(self) % flatten(other)
+
+    def __rmod__(self, other: Any) -> Any:
+        return other % str(self)
+
+    def __sub__(self, other: Any) -> Any:
+        return str(self) - flatten(other)
+
+    def __rsub__(self, other: Any) -> Any:
+        return other - str(self)
+
+    def __truediv__(self, other: Any) -> Any:
+        return str(self) / flatten(other)
+
+    def __rtruediv__(self, other: Any) -> Any:
+        return other / str(self)
+
+    def __floordiv__(self, other: Any) -> Any:
+        return str(self) // flatten(other)
+
+    def __rfloordiv__(self, other: Any) -> Any:
+        return other // str(self)
+
+    def __neg__(self) -> Any:
+        return -str(self)
+
+
+# Types of NovaScript string values
+STRING_TYPES = (str, Rope)
+
+
+def flatten(value: Any) -> Any:
+    """Return a rope as a string; other values unchanged."""
+    return str(value) if value.__class__ is Rope else value
+
+
+def type_name(value: Any) -> str:
+    """Return the name of a value's type for error messages; a rope's is str."""
+    return 'str' if value.__class__ is Rope else type(value).__name__
+
+
+def concat(left: Union[str, Rope], right: Union[str, Rope]) -> Union[str, Rope]:
+    """Return left + right for two strings or ropes."""
+    if right.__class__ is Rope:
+        right = str(right)
+    if left.__class__ is Rope:
+        return left.append(right)
+    length = len(left) + len(right)
+    if length < ROPE_THRESHOLD:
+        return left + right
+    return Rope([left, right], 2, length)
@@ -17,4 +17,7 @@ Usage:
 
 from novascriptx.stdlib import fs, console, math, random, date, http
 
-__all__ = ['fs', 'console', 'math', 'random', 'date', 'http']
+__all__ = ['fs', 'console', 'math', 'random', 'date', 'http', 'MODULES']
+
+# Every module by the name require() loads it under
+MODULES = {'fs': fs, 'console': console, 'math': math, 'random': random, 'date': date, 'http': http}
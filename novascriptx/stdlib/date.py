@@ -48,7 +48,7 @@ class DateModule:
         Returns:
             Formatted current datetime
         """
-        return datetime.now().strftime(pattern)
+        return datetime.now().strftime(str(pattern))
     
     @staticmethod
     def getYear() -> int:
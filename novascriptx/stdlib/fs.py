@@ -32,7 +32,7 @@ class FileSystemModule:
             FileNotFoundError: If file doesn't exist
         """
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
+            with open(str(filename), 'r', encoding='utf-8') as f:
                 return f.read()
         except FileNotFoundError:
             raise FileNotFoundError(f"File not found: {filename}")
@@ -47,6 +47,7 @@ class FileSystemModule:
             content: Content to write
         """
         # Create directory if needed
+        filename = str(filename)
         dirname = os.path.dirname(filename)
         if dirname and not os.path.exists(dirname):
             os.makedirs(dirname, exist_ok=True)
@@ -63,7 +64,7 @@ class FileSystemModule:
             filename: Path to file
             content: Content to append
         """
-        with open(filename, 'a', encoding='utf-8') as f:
+        with open(str(filename), 'a', encoding='utf-8') as f:
             f.write(str(content))
     
     @staticmethod
@@ -77,7 +78,7 @@ class FileSystemModule:
         Returns:
             True if file exists, False otherwise
         """
-        return os.path.isfile(filename)
+        return os.path.isfile(str(filename))
     
     @staticmethod
     def delete_file(filename: str) -> None:
@@ -87,6 +88,7 @@ class FileSystemModule:
         Args:
             filename: Path to file to delete
         """
+        filename = str(filename)
         if os.path.isfile(filename):
             os.remove(filename)
     
@@ -102,7 +104,7 @@ class FileSystemModule:
             List of file names in directory
         """
         try:
-            return os.listdir(directory)
+            return os.listdir(str(directory))
         except FileNotFoundError:
             raise FileNotFoundError(f"Directory not found: {directory}")
 
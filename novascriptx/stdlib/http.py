@@ -31,7 +31,7 @@ class HTTPModule:
             Response body as string
         """
         try:
-            req = urllib.request.Request(url)
+            req = urllib.request.Request(str(url))
             if headers:
                 for key, value in headers.items():
                     req.add_header(key, value)
@@ -56,10 +56,10 @@ class HTTPModule:
         try:
             if isinstance(data, dict):
                 data = _json.dumps(data).encode('utf-8')
-            elif isinstance(data, str):
-                data = data.encode('utf-8')
+            elif data is not None:
+                data = str(data).encode('utf-8')
             
-            req = urllib.request.Request(url, data=data)
+            req = urllib.request.Request(str(url), data=data)
             req.add_header('Content-Type', 'application/json')
             
             if headers:
@@ -87,10 +87,10 @@ class HTTPModule:
         try:
             if isinstance(data, dict):
                 data = _json.dumps(data).encode('utf-8')
-            elif isinstance(data, str):
-                data = data.encode('utf-8')
+            elif data is not None:
+                data = str(data).encode('utf-8')
             
-            req = urllib.request.Request(url, data=data, method='PUT')
+            req = urllib.request.Request(str(url), data=data, method='PUT')
             req.add_header('Content-Type', 'application/json')
             
             if headers:
@@ -115,7 +115,7 @@ class HTTPModule:
             Response body as string
         """
         try:
-            req = urllib.request.Request(url, method='DELETE')
+            req = urllib.request.Request(str(url), method='DELETE')
             
             if headers:
                 for key, value in headers.items():
@@ -12,7 +12,7 @@ Usage:
 """
 
 import math as _math
-from typing import Any, Dict, Union
+from typing import Any, Dict, Optional, Union
 
 
 class MathModule:
@@ -90,6 +90,17 @@ class MathModule:
         return _math.exp(x)
 
 
+# Purity model, for the optimizer: every function without side effects
+# whose result depends only on its arguments, mapped to the fewest number
+# arguments with which it returns a number for any numbers it is given, or
+# None when some numbers make it fail (sqrt(-1), exp(1000), floor(inf))
+PURE_FUNCTIONS: Dict[str, Optional[int]] = {
+    'abs': 1, 'min': 2, 'max': 2,
+    'sqrt': None, 'pow': None, 'floor': None, 'ceil': None, 'round': None,
+    'sin': None, 'cos': None, 'tan': None, 'log': None, 'exp': None,
+}
+
+
 def create_module() -> Dict[str, Any]:
     """Create math module with callable functions and constants."""
     return {
@@ -14,6 +14,8 @@ Usage:
 import random as _random
 from typing import Any, Dict, Union, List
 
+from novascriptx.ropes import STRING_TYPES
+
 
 class RandomModule:
     """Provides random number generation."""
@@ -77,10 +79,10 @@ class RandomModule:
         Returns:
             Random element from sequence
         """
-        if isinstance(seq, str):
-            return _random.choice(seq)
-        elif isinstance(seq, (list, tuple)):
+        if isinstance(seq, (list, tuple)):
             return _random.choice(seq)
+        elif isinstance(seq, STRING_TYPES):
+            return _random.choice(str(seq))
         else:
             raise TypeError(f"Cannot choose from {type(seq)}")
     
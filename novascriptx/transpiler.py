@@ -0,0 +1,712 @@
+"""
+Python backend for NovaScript.
+
+PythonTranspiler lowers the NovaScript AST into a Python `ast.Module`;
+PythonExecutor compiles it with compile() and runs it with exec(), so
+NovaScript functions become real Python functions and CPython's own
+interpreter does the work.
+
+Operators keep the tree walker's semantics through small runtime helpers:
+'+' coerces to string when either side is a string, '/' floor-divides
+two integers, and conditions, '!', 'and' and 'or' use is_truthy(). 'and'
+and 'or' lower to Python's short-circuiting operators: `a or b` becomes
+`(_box(a) or (b,))[0]`, where _box() wraps a truthy value in a 1-tuple,
+so the result is `a` itself exactly when NovaScript considers it truthy.
+A '+' or '/' whose operand types inference.py has proven needs no
+helper: numbers add and divide natively, and strings go straight to
+`_concat`.
+NovaScript names are prefixed with 'v_' so they cannot collide with the
+helpers or with Python builtins.
+
+Scoping is resolved statically, which matches the tree walker for
+ordinary programs. The differences:
+
+- Inside a function, assigning a name that some top-level statement
+  binds always writes the global, even if that statement has not run
+  yet; any other assigned name is local to the function.
+- Reading a function's local before it is assigned raises NameError
+  instead of falling back to a global of the same name.
+- Function values are Python functions, so any callable can be called
+  and wrong argument counts report Python's own TypeError message.
+
+Member access and method calls go through the site's inline cache (see
+inline_cache.py), bound in the namespace as `_member_N`; when the object
+is a plain name the identity check is inlined:
+`(_member_0.value if v_math is _member_0.object else _load_member(_member_0, v_math))`.
+Lists are Python lists; indexing and slicing go through the checks in
+lists.py (`_index`, `_slice`, `_set_index`). An object literal becomes
+`_object(_shape_N, [values])` with its shape bound in the namespace, and
+`obj.member = value` becomes `_set_member(_member_N, obj, value)`.
+A template literal becomes an f-string whose values go through `_str`
+(Executor.to_string).
+
+A memoized function (see memo.py) is replaced by a wrapper that consults
+its cache; self tail calls inside it loop without going through the
+cache, so only the outermost call's result is stored.
+
+Select the engine with run_code(source, engine='py') or `novax --engine py`.
+"""
+
+import ast
+import re
+from typing import Any, Dict, List, Optional, Set
+
+from novascriptx.inline_cache import MemberCache
+from novascriptx.interpreter import STACK_DEPTH_MESSAGE, Executor, ReturnException
+from novascriptx.lists import get_item, get_slice, set_item
+from novascriptx.memo import MISS, MemoCache, assign_caches, memo_key
+from novascriptx.objects import NovaObject, Shape
+from novascriptx.inference import SPECIALISE_LEVEL, infer_types, specialise
+from novascriptx.optimizer import DEFAULT_OPT_LEVEL, optimize
+from novascriptx.quicken import ProvenBinaryOp
+from novascriptx.resolver import collect_bindings
+from novascriptx.ropes import STRING_TYPES
+from novascriptx.nodes import (
+    BUILTIN_FUNCTIONS, Node, NodeVisitor,
+    VarDecl, FunctionDef, Print, If, While, For, ForIn, Return, Break, Continue,
+    Assignment, ExpressionStatement, Literal, Identifier, BinaryOp, UnaryOp,
+    Call, MemberAccess, MemberCall, ArrayLiteral, ObjectLiteral, Template, Index, Slice,
+)
+
+# Prefix of every NovaScript name in the generated Python code
+NAME_PREFIX = 'v_'
+
+# Variable holding the value of a trailing expression statement
+RESULT_NAME = '__result__'
+
+COMPARISON_OPERATORS = {
+    '==': ast.Eq, '!=': ast.NotEq, '<': ast.Lt, '>': ast.Gt,
+    '<=': ast.LtE, '>=': ast.GtE,
+}
+
+ARITHMETIC_OPERATORS = {'-': ast.Sub, '*': ast.Mult, '%': ast.Mod}
+
+# Operators whose NovaScript semantics differ from Python's
+HELPER_OPERATORS = {'+': '_add', '/': '_div'}
+
+
+def mangle(name: str) -> str:
+    """Python name of a NovaScript variable or function."""
+    return NAME_PREFIX + name
+
+
+def unmangle_message(message: str) -> str:
+    """Strip the name prefix from identifiers in a Python error message."""
+    return re.sub(r"\b" + NAME_PREFIX + r"(\w+)", r"\1", message)
+
+
+def has_continue(statements: List[Node]) -> bool:
+    """True if a continue in `statements` belongs to the enclosing loop."""
+    pending = list(statements)
+    while pending:
+        stmt = pending.pop()
+        if isinstance(stmt, Continue):
+            return True
+        if isinstance(stmt, If):
+            pending.extend(stmt.then)
+            pending.extend(stmt.else_)
+    return False
+
+
+def load(name: str) -> ast.Name:
+    return ast.Name(id=name, ctx=ast.Load())
+
+
+def store(name: str) -> ast.Name:
+    return ast.Name(id=name, ctx=ast.Store())
+
+
+def call(function: str, *args: ast.expr) -> ast.Call:
+    return ast.Call(func=load(function), args=list(args), keywords=[])
+
+
+def index(value: int) -> ast.expr:
+    """Build a subscript index portably (3.9+ takes the expression itself)."""
+    if hasattr(ast, 'Index') and not hasattr(ast, 'unparse'):
+        return ast.Index(value=ast.Constant(value=value))
+    return ast.Constant(value=value)
+
+
+def make_arguments(params: List[str]) -> ast.arguments:
+    """Build ast.arguments portably (posonlyargs only exists on 3.8+)."""
+    fields: Dict[str, Any] = dict(
+        args=[ast.arg(arg=mangle(param), annotation=None) for param in params],
+        vararg=None, kwonlyargs=[], kw_defaults=[], kwarg=None, defaults=[],
+    )
+    if 'posonlyargs' in ast.arguments._fields:
+        fields['posonlyargs'] = []
+    return ast.arguments(**fields)
+
+
+class PythonTranspiler(NodeVisitor):
+    """
+    Lowers NovaScript statements to a Python module.
+
+    Statement handlers return lists of Python statements, expression
+    handlers return one Python expression. One transpiler can lower
+    several programs into the same namespace (as the REPL does): the
+    top-level names and the counters behind generated names carry over.
+    """
+
+    def __init__(self, module_names: Optional[Set[str]] = None):
+        super().__init__()
+        # Names any top-level statement binds (the only possible globals)
+        self.module_names: Set[str] = set(module_names or ())
+        # Python locals of the function being transpiled; None at top level
+        self.local_names: Optional[Set[str]] = None
+        # Locals that shadow a global and may be read before they are bound
+        self.shadowing_names: Set[str] = set()
+        # Locals definitely bound at the current point of the function
+        self.bound_names: Set[str] = set()
+        # Nested functions of the current program, hoisted to module level
+        # so they see only globals
+        self.hoisted: List[ast.stmt] = []
+        # Loops that needed a first-iteration flag, for unique flag names
+        self.loop_count = 0
+        # Functions seen so far, for unique marker names
+        self.function_count = 0
+        # Function being transpiled, and the name that will hold it
+        self.function: Optional[FunctionDef] = None
+        self.function_marker = ''
+        # Loops around the current statement, within the current function
+        self.loop_depth = 0
+        # Whether the current function turned a self tail call into a loop
+        self.tail_looped = False
+        # Memo caches the generated code refers to, by variable name
+        self.memo_caches: Dict[str, MemoCache] = {}
+        # Inline caches of member sites, by variable name
+        self.member_caches: Dict[str, MemberCache] = {}
+        # Shapes of object literals, by variable name
+        self.shapes: Dict[str, Shape] = {}
+
+    def generic_visit(self, node: Node) -> Any:
+        raise RuntimeError(f"Unknown node type: {node.type}")
+
+    def transpile(self, statements: List[Node]) -> ast.Module:
+        """Lower a program; a trailing expression's value is kept in RESULT_NAME."""
+        declared, assigned = collect_bindings(statements)
+        self.module_names |= declared | assigned
+        self.hoisted = []
+
+        body: List[ast.stmt] = []
+        for index, stmt in enumerate(statements):
+            if index == len(statements) - 1 and isinstance(stmt, ExpressionStatement):
+                body.append(ast.Assign(targets=[store(RESULT_NAME)], value=self.visit(stmt.value)))
+            else:
+                body.extend(self.visit(stmt))
+
+        module = ast.Module(body=self.hoisted + body, type_ignores=[])
+        return ast.fix_missing_locations(module)
+
+    def block(self, statements: List[Node]) -> List[ast.stmt]:
+        body: List[ast.stmt] = []
+        for stmt in statements:
+            body.extend(self.visit(stmt))
+        return body or [ast.Pass()]
+
+    def condition(self, expr: Node) -> ast.expr:
+        """Lower an expression used as a condition to a Python truth value."""
+        if isinstance(expr, BinaryOp) and expr.op in COMPARISON_OPERATORS:
+            return self.visit(expr)
+        if isinstance(expr, BinaryOp) and expr.op in ('and', 'or'):
+            # Only the truth value is used, so both sides can be conditions
+            op = ast.And() if expr.op == 'and' else ast.Or()
+            return ast.BoolOp(op=op, values=[self.condition(expr.left), self.condition(expr.right)])
+        if isinstance(expr, UnaryOp) and expr.op == '!':
+            return ast.UnaryOp(op=ast.Not(), operand=self.condition(expr.expr))
+        return call('_truthy', self.visit(expr))
+
+    # ------------------------------------------------------------------
+    # Statements
+    # ------------------------------------------------------------------
+
+    def bind(self, name: str) -> None:
+        if self.local_names is not None:
+            self.bound_names.add(name)
+
+    def visit_VarDecl(self, stmt: VarDecl) -> List[ast.stmt]:
+        value = self.visit(stmt.value)
+        self.bind(stmt.name)
+        return [ast.Assign(targets=[store(mangle(stmt.name))], value=value)]
+
+    def visit_FunctionDef(self, stmt: FunctionDef) -> List[ast.stmt]:
+        declared, assigned = collect_bindings(stmt.body)
+        local_names = set(stmt.params) | declared | (assigned - self.module_names)
+        global_names = sorted(assigned - local_names)
+
+        marker = f"_function_{self.function_count}"
+        self.function_count += 1
+        outer = (self.local_names, self.shadowing_names, self.bound_names,
+                 self.function, self.function_marker, self.loop_depth, self.tail_looped)
+        self.local_names = local_names
+        self.shadowing_names = (declared & self.module_names) - set(stmt.params)
+        self.bound_names = set(stmt.params)
+        self.function, self.function_marker = stmt, marker
+        self.loop_depth = 0
+        self.tail_looped = False
+        try:
+            body = self.block(stmt.body)
+            if self.tail_looped:
+                # Self tail calls jump back here with new arguments
+                body = [ast.While(test=ast.Constant(value=True),
+                                  body=body + [ast.Return(value=ast.Constant(value=None))],
+                                  orelse=[])]
+        finally:
+            (self.local_names, self.shadowing_names, self.bound_names,
+             self.function, self.function_marker, self.loop_depth, self.tail_looped) = outer
+        if global_names:
+            body.insert(0, ast.Global(names=[mangle(name) for name in global_names]))
+
+        if self.local_names is None:
+            definition: List[ast.stmt] = [
+                ast.FunctionDef(name=mangle(stmt.name), args=make_arguments(stmt.params),
+                                body=body, decorator_list=[], returns=None)]
+            if stmt.cache is not None:
+                cache_name = f"_cache{marker[len('_function'):]}"
+                self.memo_caches[cache_name] = stmt.cache
+                definition.append(ast.Assign(
+                    targets=[store(mangle(stmt.name))],
+                    value=call('_memoize', load(mangle(stmt.name)), load(cache_name))))
+            definition.append(ast.Assign(targets=[store(marker)], value=load(mangle(stmt.name))))
+            return definition
+
+        # A function defined inside a function is a local variable holding a
+        # function that, like every NovaScript function, sees only globals
+        hoisted_name = f"_nested{marker[len('_function'):]}_{stmt.name}"
+        self.hoisted.append(ast.FunctionDef(name=hoisted_name, args=make_arguments(stmt.params),
+                                            body=body, decorator_list=[], returns=None))
+        self.hoisted.append(ast.Assign(targets=[store(marker)], value=load(hoisted_name)))
+        self.bind(stmt.name)
+        return [ast.Assign(targets=[store(mangle(stmt.name))], value=load(hoisted_name))]
+
+    def visit_Print(self, stmt: Print) -> List[ast.stmt]:
+        return [ast.Expr(value=call('_print', self.visit(stmt.value)))]
+
+    def visit_If(self, stmt: If) -> List[ast.stmt]:
+        test = self.condition(stmt.condition)
+        before = set(self.bound_names)
+        body = self.block(stmt.then)
+        after_then, self.bound_names = self.bound_names, before
+        orelse = self.block(stmt.else_) if stmt.else_ else []
+        # Only names bound on both branches are bound afterwards
+        self.bound_names &= after_then
+        return [ast.If(test=test, body=body, orelse=orelse)]
+
+    def loop_body(self, statements: List[Node]) -> List[ast.stmt]:
+        self.loop_depth += 1
+        try:
+            return self.block(statements)
+        finally:
+            self.loop_depth -= 1
+
+    def visit_While(self, stmt: While) -> List[ast.stmt]:
+        test = self.condition(stmt.condition)
+        before = set(self.bound_names)
+        body = self.loop_body(stmt.body)
+        self.bound_names = before
+        return [ast.While(test=test, body=body, orelse=[])]
+
+    def visit_For(self, stmt: For) -> List[ast.stmt]:
+        init = self.visit(stmt.init) if stmt.init else []
+        test = self.condition(stmt.condition)
+        before = set(self.bound_names)
+        body = self.loop_body(stmt.body)
+        update = self.visit(stmt.update)
+        self.bound_names = before
+        if not has_continue(stmt.body):
+            return init + [ast.While(test=test, body=body + update, orelse=[])]
+
+        # A Python continue would skip an update at the end of the body, so
+        # the update moves to the top of the loop, skipped on the first pass
+        first = f"_first_{self.loop_count}"
+        self.loop_count += 1
+        return init + [
+            ast.Assign(targets=[store(first)], value=ast.Constant(value=True)),
+            ast.While(test=ast.Constant(value=True), body=[
+                ast.If(test=load(first),
+                       body=[ast.Assign(targets=[store(first)], value=ast.Constant(value=False))],
+                       orelse=update),
+                ast.If(test=ast.UnaryOp(op=ast.Not(), operand=test), body=[ast.Break()], orelse=[]),
+            ] + body, orelse=[]),
+        ]
+
+    def visit_ForIn(self, stmt: ForIn) -> List[ast.stmt]:
+        iterable = self.visit(stmt.iterable)
+        before = set(self.bound_names)
+        self.bind(stmt.name)
+        body = self.loop_body(stmt.body)
+        self.bound_names = before
+        return [ast.For(target=store(mangle(stmt.name)), iter=call('_iter', iterable),
+                        body=body, orelse=[])]
+
+    def visit_Return(self, stmt: Return) -> List[ast.stmt]:
+        if self.is_self_tail_call(stmt.value):
+            return self.self_tail_call(stmt.value)
+        value = self.visit(stmt.value) if stmt.value else ast.Constant(value=None)
+        if self.local_names is None:
+            return [ast.Expr(value=call('_return', value))]
+        return [ast.Return(value=value)]
+
+    def is_self_tail_call(self, value: Optional[Node]) -> bool:
+        """True for `return f(...)` in f's own body that can become a loop."""
+        function = self.function
+        return (function is not None and self.loop_depth == 0
+                and isinstance(value, Call) and value.name == function.name
+                and len(value.args) == len(function.params)
+                and value.name not in self.local_names)
+
+    def self_tail_call(self, value: Call) -> List[ast.stmt]:
+        """
+        Lower `return f(...)` inside f to a jump back to the top of f.
+
+        The arguments are evaluated first, as for any call. If the global f
+        is still this function, they become the new parameters, every
+        other local is unbound again, and the loop around the body
+        restarts; otherwise f is called normally.
+        """
+        self.tail_looped = True
+        function = self.function
+        params = [mangle(param) for param in function.params]
+        others = sorted(mangle(name) for name in self.local_names - set(function.params))
+        args = ast.Tuple(elts=[self.visit(arg) for arg in value.args], ctx=ast.Load())
+
+        rebind: List[ast.stmt] = []
+        if params:
+            rebind.append(ast.Assign(
+                targets=[ast.Tuple(elts=[store(param) for param in params], ctx=ast.Store())],
+                value=load('_args')))
+        for name in others:
+            rebind.append(ast.Try(
+                body=[ast.Delete(targets=[ast.Name(id=name, ctx=ast.Del())])],
+                handlers=[ast.ExceptHandler(type=load('NameError'), name=None, body=[ast.Pass()])],
+                orelse=[], finalbody=[]))
+        rebind.append(ast.Continue())
+
+        callee = load(mangle(value.name))
+        return [
+            ast.Assign(targets=[store('_args')], value=args),
+            ast.If(test=ast.Compare(left=callee, ops=[ast.Is()],
+                                    comparators=[load(self.function_marker)]),
+                   body=rebind, orelse=[]),
+            ast.Return(value=ast.Call(func=load(mangle(value.name)),
+                                      args=[ast.Starred(value=load('_args'), ctx=ast.Load())],
+                                      keywords=[])),
+        ]
+
+    def visit_Break(self, stmt: Break) -> List[ast.stmt]:
+        return [ast.Break()]
+
+    def visit_Continue(self, stmt: Continue) -> List[ast.stmt]:
+        return [ast.Continue()]
+
+    def visit_Assignment(self, stmt: Assignment) -> List[ast.stmt]:
+        if isinstance(stmt.target, Index):
+            target = stmt.target
+            return [ast.Expr(value=call('_set_index', self.visit(target.object),
+                                        self.visit(target.index), self.visit(stmt.value)))]
+        if isinstance(stmt.target, MemberAccess):
+            target = stmt.target
+            return [ast.Expr(value=call('_set_member', load(self.member_cache(target)),
+                                        self.visit(target.object), self.visit(stmt.value)))]
+        if not isinstance(stmt.target, Identifier):
+            return [ast.Expr(value=call('_fail', ast.Constant(value="Invalid assignment target")))]
+        name = stmt.target.name
+        value = self.visit(stmt.value)
+        if name in self.shadowing_names and name not in self.bound_names:
+            # Until the local is bound, assignment updates the global instead
+            return [
+                ast.Assign(targets=[store('_value')], value=value),
+                ast.If(
+                    test=ast.BoolOp(op=ast.Or(), values=[
+                        ast.Compare(left=ast.Constant(value=mangle(name)), ops=[ast.In()],
+                                    comparators=[call('locals')]),
+                        ast.UnaryOp(op=ast.Not(), operand=call('_has', ast.Constant(value=name))),
+                    ]),
+                    body=[ast.Assign(targets=[store(mangle(name))], value=load('_value'))],
+                    orelse=[ast.Expr(value=call('_store', ast.Constant(value=name), load('_value')))],
+                ),
+            ]
+        self.bind(name)
+        return [ast.Assign(targets=[store(mangle(name))], value=value)]
+
+    def visit_ExpressionStatement(self, stmt: ExpressionStatement) -> List[ast.stmt]:
+        return [ast.Expr(value=self.visit(stmt.value))]
+
+    # ------------------------------------------------------------------
+    # Expressions
+    # ------------------------------------------------------------------
+
+    def visit_Literal(self, expr: Literal) -> ast.expr:
+        return ast.Constant(value=expr.value)
+
+    def visit_Identifier(self, expr: Identifier) -> ast.expr:
+        if expr.name in self.shadowing_names and expr.name not in self.bound_names:
+            # Until the local is bound, reads fall back to the global
+            return call('_load', call('locals'), ast.Constant(value=expr.name))
+        return load(mangle(expr.name))
+
+    def member_cache(self, expr: Node) -> str:
+        """Bind the inline cache of a member site; return its variable name."""
+        name = f"_member_{len(self.member_caches)}"
+        self.member_caches[name] = expr.cache
+        return name
+
+    def cached_member(self, expr: Node, helper: str, miss: str) -> ast.expr:
+        """
+        Look a member up through its site's inline cache; `helper` does the
+        whole lookup, `miss` the lookup after the identity check failed.
+        """
+        cache = self.member_cache(expr)
+        obj = self.visit(expr.object)
+        if not isinstance(obj, ast.Name):
+            return call(helper, load(cache), obj)
+        # A name can be read twice, so the identity check is inlined
+        return ast.IfExp(
+            test=ast.Compare(left=obj, ops=[ast.Is()],
+                             comparators=[ast.Attribute(value=load(cache), attr='object', ctx=ast.Load())]),
+            body=ast.Attribute(value=load(cache), attr='value', ctx=ast.Load()),
+            orelse=call(miss, load(cache), load(obj.id)))
+
+    def visit_MemberAccess(self, expr: MemberAccess) -> ast.expr:
+        return self.cached_member(expr, '_member', '_load_member')
+
+    def visit_MemberCall(self, expr: MemberCall) -> ast.expr:
+        return ast.Call(func=self.cached_member(expr, '_method', '_load_method'),
+                        args=[self.visit(arg) for arg in expr.args], keywords=[])
+
+    def visit_ArrayLiteral(self, expr: ArrayLiteral) -> ast.expr:
+        return ast.List(elts=[self.visit(element) for element in expr.elements], ctx=ast.Load())
+
+    def visit_ObjectLiteral(self, expr: ObjectLiteral) -> ast.expr:
+        shape = f"_shape_{len(self.shapes)}"
+        self.shapes[shape] = expr.shape
+        return call('_object', load(shape),
+                    ast.List(elts=[self.visit(value) for value in expr.values], ctx=ast.Load()))
+
+    def visit_Template(self, expr: Template) -> ast.expr:
+        # An f-string: Python formats the text and the converted values at once
+        parts: List[ast.expr] = []
+        for text, value in zip(expr.strings, expr.values + [None]):
+            if text:
+                parts.append(ast.Constant(value=text))
+            if value is not None:
+                parts.append(ast.FormattedValue(value=call('_str', self.visit(value)),
+                                                conversion=-1, format_spec=None))
+        return ast.JoinedStr(values=parts)
+
+    def visit_Index(self, expr: Index) -> ast.expr:
+        return call('_index', self.visit(expr.object), self.visit(expr.index))
+
+    def visit_Slice(self, expr: Slice) -> ast.expr:
+        bounds = [ast.Constant(value=None) if bound is None else self.visit(bound)
+                  for bound in (expr.start, expr.stop)]
+        return call('_slice', self.visit(expr.object), *bounds)
+
+    def visit_BinaryOp(self, expr: BinaryOp) -> ast.expr:
+        op = expr.op
+        if op == 'and':
+            return ast.BoolOp(op=ast.And(), values=[self.condition(expr.left),
+                                                    self.condition(expr.right)])
+        if op == 'or':
+            right = ast.Tuple(elts=[self.visit(expr.right)], ctx=ast.Load())
+            boxed = ast.BoolOp(op=ast.Or(), values=[call('_box', self.visit(expr.left)), right])
+            return ast.Subscript(value=boxed, slice=index(0), ctx=ast.Load())
+        left = self.visit(expr.left)
+        right = self.visit(expr.right)
+        if op in COMPARISON_OPERATORS:
+            return ast.Compare(left=left, ops=[COMPARISON_OPERATORS[op]()], comparators=[right])
+        if op in ARITHMETIC_OPERATORS:
+            return ast.BinOp(left=left, op=ARITHMETIC_OPERATORS[op](), right=right)
+        if isinstance(expr, ProvenBinaryOp) and op in HELPER_OPERATORS:
+            # Operand types proven by inference.py: no helper needs to check them
+            if expr.operand_type == 'string':
+                return call('_concat', left, right)
+            if op == '/':
+                divide = ast.FloorDiv() if expr.operand_type == 'int' else ast.Div()
+                return ast.BinOp(left=left, op=divide, right=right)
+            return ast.BinOp(left=left, op=ast.Add(), right=right)
+        if op in HELPER_OPERATORS:
+            return call(HELPER_OPERATORS[op], left, right)
+        return call('_fail', ast.Constant(value=f"Unknown operator: {op}"))
+
+    def visit_UnaryOp(self, expr: UnaryOp) -> ast.expr:
+        operand = self.visit(expr.expr)
+        if expr.op == '-':
+            return ast.UnaryOp(op=ast.USub(), operand=operand)
+        if expr.op == '!':
+            return ast.UnaryOp(op=ast.Not(), operand=call('_truthy', operand))
+        return call('_fail', ast.Constant(value=f"Unknown unary operator: {expr.op}"))
+
+    def visit_Call(self, expr: Call) -> ast.expr:
+        args = [self.visit(arg) for arg in expr.args]
+        if expr.name in BUILTIN_FUNCTIONS:
+            return call('_' + expr.name, *args)
+        if self.local_names is not None and expr.name in self.local_names:
+            # Calls only look at globals, even when a local has the same name
+            callee: ast.expr = call('_function', ast.Constant(value=expr.name))
+        else:
+            callee = load(mangle(expr.name))
+        return ast.Call(func=callee, args=args, keywords=[])
+
+
+class PythonExecutor(Executor):
+    """
+    Executes NovaScript by transpiling it to Python and running exec().
+
+    All statements executed by one PythonExecutor share a single Python
+    namespace, so definitions persist between execute() calls (as in the
+    REPL).
+    """
+
+    def __init__(self, stdout=None):
+        super().__init__(stdout=stdout)
+        self.namespace: Dict[str, Any] = self.runtime_namespace()
+        self.transpiler = PythonTranspiler()
+
+    def runtime_namespace(self) -> Dict[str, Any]:
+        """Build the globals dict holding the runtime helpers."""
+        is_truthy = self.is_truthy
+        to_string = self.to_string
+        namespace: Dict[str, Any] = {}
+
+        concat = self.concat
+
+        def _add(left, right):
+            if isinstance(left, STRING_TYPES) or isinstance(right, STRING_TYPES):
+                return concat(left, right)
+            return left + right
+
+        def _div(left, right):
+            if isinstance(left, int) and isinstance(right, int):
+                return left // right
+            return left / right
+
+        def _box(value):
+            return (value,) if is_truthy(value) else ()
+
+        def _print(value):
+            print(to_string(value), file=self.stdout)
+
+        def _member(cache, obj):
+            if obj is cache.object:
+                return cache.value
+            if obj.__class__ is NovaObject and obj.shape is cache.shape:
+                return obj.values[cache.offset]
+            return cache.load(obj)
+
+        load_method = self.load_method
+
+        def _method(cache, obj):
+            return cache.value if obj is cache.object else load_method(cache, obj)
+
+        def _require(*args):
+            return self.builtin_require(list(args))
+
+        def _range(*args):
+            return self.builtin_range(list(args))
+
+        def _load(scope, name):
+            key = mangle(name)
+            if key in scope:
+                return scope[key]
+            if key in namespace:
+                return namespace[key]
+            raise NameError(f"Undefined variable: {name}")
+
+        def _has(name):
+            return mangle(name) in namespace
+
+        def _store(name, value):
+            namespace[mangle(name)] = value
+
+        def _function(name):
+            if mangle(name) not in namespace:
+                raise NameError(f"Undefined function: {name}")
+            return namespace[mangle(name)]
+
+        def _return(value):
+            raise ReturnException(value)
+
+        def _fail(message):
+            raise RuntimeError(message)
+
+        def _memoize(function, cache):
+            def memoized(*args):
+                key = memo_key(args)
+                value = cache.get(key)
+                if value is MISS:
+                    value = function(*args)
+                    cache.put(key, value)
+                return value
+            return memoized
+
+        namespace.update(
+            _add=_add, _div=_div, _concat=concat, _box=_box, _truthy=is_truthy, _str=to_string,
+            _print=_print, _member=_member, _method=_method,
+            _load_member=MemberCache.load, _load_method=load_method,
+            _index=get_item, _set_index=set_item, _slice=get_slice,
+            _object=NovaObject, _set_member=MemberCache.store,
+            _require=_require, _range=_range, _iter=self.iterate,
+            _load=_load, _has=_has, _store=_store,
+            _function=_function, _return=_return, _fail=_fail, _memoize=_memoize,
+        )
+        return namespace
+
+    def global_values(self) -> Dict[str, Any]:
+        return {name[len(NAME_PREFIX):]: value for name, value in self.namespace.items()
+                if name.startswith(NAME_PREFIX)}
+
+    def prepare_memo(self, statements: List[Node]) -> None:
+        # Globals live in the namespace; the transpiler knows their names
+        assign_caches(statements, self.memo_caches, self.memoize_pure,
+                      self.memo_size, self.transpiler.module_names)
+
+    def transpile(self, statements: List[Node]) -> ast.Module:
+        """Lower statements to a Python module for this executor's namespace."""
+        return self.transpiler.transpile(statements)
+
+    def execute(self, statements: List[Node]) -> Any:
+        """Transpile, compile and run a list of statements."""
+        self.optimize_program(statements)
+        self.prepare_memo(statements)
+        module = self.transpile(statements)
+        self.namespace.update(self.transpiler.memo_caches)
+        self.namespace.update(self.transpiler.member_caches)
+        self.namespace.update(self.transpiler.shapes)
+        if self.debug and hasattr(ast, 'unparse'):
+            import sys
+            print(ast.unparse(module), file=sys.stderr)
+
+        code = compile(module, '<novascript>', 'exec')
+        self.namespace.pop(RESULT_NAME, None)
+        try:
+            exec(code, self.namespace)
+        except NameError as e:
+            # Python's message names the mangled variable
+            match = re.search(r"'" + NAME_PREFIX + r"(\w+)'", str(e))
+            if match is None:
+                raise
+            raise NameError(f"Undefined variable: {match.group(1)}") from None
+        except TypeError as e:
+            # Report NovaScript names, not their Python spellings
+            raise TypeError(unmangle_message(str(e))) from None
+        except RecursionError:
+            raise RecursionError(STACK_DEPTH_MESSAGE) from None
+        return self.namespace.pop(RESULT_NAME, None)
+
+    def execute_statement(self, stmt: Node) -> Any:
+        """Transpile and run a single statement."""
+        return self.execute([stmt])
+
+    def evaluate_expression(self, expr: Node) -> Any:
+        """Transpile and evaluate an expression."""
+        return self.execute([ExpressionStatement(expr)])
+
+
+def to_python_source(statements: List[Node], opt_level: int = DEFAULT_OPT_LEVEL) -> str:
+    """Return the Python source the py engine runs for `statements` (3.9+)."""
+    optimize(statements, opt_level)
+    if opt_level >= SPECIALISE_LEVEL:
+        specialise(statements, infer_types(statements))
+    assign_caches(statements, {})
+    return ast.unparse(PythonTranspiler().transpile(statements))
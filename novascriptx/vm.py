@@ -0,0 +1,925 @@
+"""
+Bytecode compiler and stack-based virtual machine for NovaScript.
+
+BytecodeCompiler lowers the AST into CodeObjects: flat lists of
+(opcode, operand) instructions plus constant and name tables. VMExecutor
+runs them in a single loop with one value stack and a heap-allocated
+frame stack, so neither nested expressions nor NovaScript calls recurse
+in Python. Recursion depth is bounded by VMExecutor.max_depth instead of
+sys.getrecursionlimit(), and `return f(...)` inside a function compiles
+to TAIL_CALL, which reuses the current frame, so tail recursion runs in
+constant space at any depth. A call to a memoized function (see memo.py)
+that misses its cache records the cache in the caller's saved frame, and
+RETURN_VALUE stores the result there.
+
+A BinaryOp specialised by inference.specialise() compiles '+' and '/' to
+the opcodes of its proven types (BINARY_ADD_NUMBERS, BINARY_CONCAT,
+BINARY_FLOOR_DIVIDE, BINARY_TRUE_DIVIDE), which apply the operator
+without the checks of BINARY_ADD and BINARY_DIVIDE.
+
+disassemble() renders a CodeObject (and the functions it defines) as
+text; `novax --dis file.nova` prints it for a script.
+
+Select the engine with run_code(source, engine='vm').
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from novascriptx.interpreter import Executor, ReturnException
+from novascriptx.lists import get_item, get_slice, set_item
+from novascriptx.memo import MISS, MemoCache, memo_key
+from novascriptx.nodes import (
+    BUILTIN_FUNCTIONS, Node, NodeVisitor,
+    VarDecl, FunctionDef, Print, If, While, For, ForIn, Return, Break, Continue,
+    Assignment, ExpressionStatement, Literal, Identifier, BinaryOp, UnaryOp,
+    Call, MemberAccess, MemberCall, ArrayLiteral, ObjectLiteral, Template, Index, Slice,
+)
+from novascriptx.objects import NovaObject
+from novascriptx.quicken import ProvenBinaryOp
+from novascriptx.ropes import STRING_TYPES
+
+OPCODE_NAMES = (
+    'LOAD_CONST',       # push constants[arg]
+    'LOAD_NAME',        # push variable names[arg] (local, then global)
+    'STORE_VAR',        # pop into names[arg] in the current scope (var)
+    'STORE_NAME',       # pop into names[arg] by the assignment rules
+    'POP_TOP',          # discard the top of the stack
+    'BINARY_ADD',
+    'BINARY_SUBTRACT',
+    'BINARY_MULTIPLY',
+    'BINARY_DIVIDE',
+    'BINARY_MODULO',
+    'BINARY_ADD_NUMBERS',   # '+' on operands proven to be numbers (see inference.py)
+    'BINARY_CONCAT',        # '+' on operands proven to be strings
+    'BINARY_FLOOR_DIVIDE',  # '/' on operands proven to be ints
+    'BINARY_TRUE_DIVIDE',   # '/' on numbers, one of them proven to be a float
+    'COMPARE_EQ',
+    'COMPARE_NE',
+    'COMPARE_LT',
+    'COMPARE_GT',
+    'COMPARE_LE',
+    'COMPARE_GE',
+    'TO_BOOL',          # replace the top of the stack with its truthiness
+    'BUILD_LIST',       # replace the top arg values with a list of them
+    'BINARY_SUBSCR',    # object, index -> object[index]
+    'STORE_SUBSCR',     # object, index, value -> object[index] = value
+    'SLICE',            # object, start, stop -> object[start:stop] (None: omitted)
+    'BUILD_OBJECT',     # arg = shape; replace the top values with an object of that shape
+    'BUILD_STRING',     # arg = (count, pattern); replace the top count values with pattern.format()
+    'UNARY_NEGATIVE',
+    'UNARY_NOT',
+    'JUMP',             # continue at instruction arg
+    'JUMP_IF_FALSE',    # pop; continue at arg if the value is not truthy
+    'JUMP_IF_TRUE_OR_POP',  # continue at arg if the top is truthy, else pop it
+    'PRINT',            # pop and print
+    'LOAD_MEMBER',      # arg = (name index, cache); replace an object with its member
+    'STORE_MEMBER',     # arg = (name index, cache); object, value -> object.member = value
+    'CALL_METHOD',      # arg = (name index, argc, cache); object and args on the stack
+    'CALL_FUNCTION',    # arg = (name index, argc); args on the stack
+    'TAIL_CALL',        # like CALL_FUNCTION, but the callee replaces the current frame
+    'CALL_BUILTIN',     # arg = (name index, argc); calls require() or range()
+    'GET_ITER',         # replace the top of the stack with an iterator over it
+    'FOR_ITER',         # push the iterator's next value, or pop it and continue at arg
+    'RETURN_VALUE',     # pop the result and return to the calling frame
+    'RAISE_ERROR',      # raise RuntimeError(constants[arg])
+    'HALT',             # end of the program; pop its result
+)
+
+OPCODES: Dict[str, int] = {name: index for index, name in enumerate(OPCODE_NAMES)}
+
+(LOAD_CONST, LOAD_NAME, STORE_VAR, STORE_NAME, POP_TOP,
+ BINARY_ADD, BINARY_SUBTRACT, BINARY_MULTIPLY, BINARY_DIVIDE, BINARY_MODULO,
+ BINARY_ADD_NUMBERS, BINARY_CONCAT, BINARY_FLOOR_DIVIDE, BINARY_TRUE_DIVIDE,
+ COMPARE_EQ, COMPARE_NE, COMPARE_LT, COMPARE_GT, COMPARE_LE, COMPARE_GE,
+ TO_BOOL, BUILD_LIST, BINARY_SUBSCR, STORE_SUBSCR, SLICE, BUILD_OBJECT, BUILD_STRING,
+ UNARY_NEGATIVE, UNARY_NOT, JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE_OR_POP, PRINT,
+ LOAD_MEMBER, STORE_MEMBER, CALL_METHOD, CALL_FUNCTION, TAIL_CALL, CALL_BUILTIN,
+ GET_ITER, FOR_ITER, RETURN_VALUE, RAISE_ERROR, HALT) = range(len(OPCODE_NAMES))
+
+BINARY_OPCODES = {
+    '+': BINARY_ADD, '-': BINARY_SUBTRACT, '*': BINARY_MULTIPLY,
+    '/': BINARY_DIVIDE, '%': BINARY_MODULO,
+    '==': COMPARE_EQ, '!=': COMPARE_NE, '<': COMPARE_LT, '>': COMPARE_GT,
+    '<=': COMPARE_LE, '>=': COMPARE_GE,
+}
+
+# Instructions for '+' and '/' on operands of proven types, by proven type
+PROVEN_OPCODES = {
+    ('int', '+'): BINARY_ADD_NUMBERS, ('float', '+'): BINARY_ADD_NUMBERS,
+    ('number', '+'): BINARY_ADD_NUMBERS, ('string', '+'): BINARY_CONCAT,
+    ('int', '/'): BINARY_FLOOR_DIVIDE, ('float', '/'): BINARY_TRUE_DIVIDE,
+}
+
+# Instructions whose operand is a jump target
+JUMP_OPCODES = frozenset((JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE_OR_POP, FOR_ITER))
+
+UNARY_OPCODES = {'-': UNARY_NEGATIVE, '!': UNARY_NOT}
+
+# Operands that index the name table (the rest index constants or code)
+NAME_OPCODES = frozenset((LOAD_NAME, STORE_VAR, STORE_NAME))
+
+# Returned by next() in FOR_ITER when the iterator has no more values
+EXHAUSTED = object()
+
+# NovaScript frames the VM allows before raising RecursionError
+DEFAULT_MAX_DEPTH = 100000
+
+Instruction = Tuple[int, Any]
+
+# Saved (instructions, constants, names, pc, locals) of a caller, plus the
+# (cache, key) pairs awaiting the callee's result
+Frame = Tuple[List[Instruction], List[Any], List[str], int, Optional[Dict[str, Any]],
+              Optional[List[Tuple[MemoCache, tuple]]]]
+
+# Run in place of a function body to return the value on top of the stack
+RETURN_INSTRUCTIONS: List[Instruction] = [(RETURN_VALUE, 0)]
+
+# Caller of a function that Python calls into (VMExecutor.call_function):
+# the function's result is left on the stack and returned
+HALT_INSTRUCTIONS: List[Instruction] = [(HALT, 0)]
+
+
+class CodeObject:
+    """A compiled function body or program."""
+
+    __slots__ = ('name', 'instructions', 'constants', 'names')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.instructions: List[Instruction] = []
+        self.constants: List[Any] = []
+        self.names: List[str] = []
+
+    def __repr__(self):
+        return f"<code {self.name}, {len(self.instructions)} instructions>"
+
+
+class BytecodeCompiler(NodeVisitor):
+    """
+    Compiles statements into a CodeObject.
+
+    Function definitions are compiled by a nested compiler and recorded in
+    `functions` (FunctionDef -> CodeObject); the FunctionDef itself is the
+    runtime value bound to the function's name, as in the tree walker.
+    """
+
+    def __init__(self, name: str = '<module>',
+                 functions: Optional[Dict[FunctionDef, CodeObject]] = None):
+        super().__init__()
+        self.code = CodeObject(name)
+        self.functions: Dict[FunctionDef, CodeObject] = {} if functions is None else functions
+        self.constant_index: Dict[Tuple[type, Any], int] = {}
+        self.name_index: Dict[str, int] = {}
+        # Pending (break, continue) jumps of each enclosing loop
+        self.loops: List[Tuple[List[int], List[int]]] = []
+        # Iterators the enclosing for-in loops keep on the stack
+        self.iterators = 0
+        # Whether a return can hand its frame to a tail call
+        self.in_function = False
+
+    def generic_visit(self, node: Node) -> None:
+        raise RuntimeError(f"Unknown node type: {node.type}")
+
+    # ------------------------------------------------------------------
+    # Emitting
+    # ------------------------------------------------------------------
+
+    def emit(self, opcode: int, operand: Any = 0) -> int:
+        """Append an instruction and return its index."""
+        self.code.instructions.append((opcode, operand))
+        return len(self.code.instructions) - 1
+
+    def patch(self, index: int, target: int) -> None:
+        """Point the jump at `index` to instruction `target`."""
+        opcode, _ = self.code.instructions[index]
+        self.code.instructions[index] = (opcode, target)
+
+    def here(self) -> int:
+        """Index of the next instruction to be emitted."""
+        return len(self.code.instructions)
+
+    def constant(self, value: Any) -> int:
+        """Index of `value` in the constant table, adding it if needed."""
+        # Keyed on type too, so 1, 1.0 and True stay distinct
+        key = (type(value), value if not isinstance(value, Node) else id(value))
+        if key not in self.constant_index:
+            self.constant_index[key] = len(self.code.constants)
+            self.code.constants.append(value)
+        return self.constant_index[key]
+
+    def name(self, name: str) -> int:
+        """Index of `name` in the name table, adding it if needed."""
+        if name not in self.name_index:
+            self.name_index[name] = len(self.code.names)
+            self.code.names.append(name)
+        return self.name_index[name]
+
+    # ------------------------------------------------------------------
+    # Entry points
+    # ------------------------------------------------------------------
+
+    def compile_program(self, statements: List[Node]) -> CodeObject:
+        """Compile top-level statements; HALT returns a trailing expression's value."""
+        if statements and isinstance(statements[-1], ExpressionStatement):
+            self.compile_block(statements[:-1])
+            self.visit(statements[-1].value)
+        else:
+            self.compile_block(statements)
+            self.emit(LOAD_CONST, self.constant(None))
+        self.emit(HALT)
+        return self.code
+
+    def compile_function(self, func_def: FunctionDef) -> CodeObject:
+        """Compile a function body; falling off the end returns null."""
+        self.in_function = True
+        self.compile_block(func_def.body)
+        self.emit(LOAD_CONST, self.constant(None))
+        self.emit(RETURN_VALUE)
+        return self.code
+
+    def compile_block(self, statements: List[Node]) -> None:
+        for stmt in statements:
+            self.visit(stmt)
+
+    # ------------------------------------------------------------------
+    # Statements
+    # ------------------------------------------------------------------
+
+    def visit_VarDecl(self, stmt: VarDecl) -> None:
+        self.visit(stmt.value)
+        self.emit(STORE_VAR, self.name(stmt.name))
+
+    def visit_FunctionDef(self, stmt: FunctionDef) -> None:
+        if stmt not in self.functions:
+            compiler = BytecodeCompiler(stmt.name, self.functions)
+            self.functions[stmt] = compiler.compile_function(stmt)
+        self.emit(LOAD_CONST, self.constant(stmt))
+        self.emit(STORE_VAR, self.name(stmt.name))
+
+    def visit_Print(self, stmt: Print) -> None:
+        self.visit(stmt.value)
+        self.emit(PRINT)
+
+    def visit_If(self, stmt: If) -> None:
+        self.visit(stmt.condition)
+        jump_to_else = self.emit(JUMP_IF_FALSE)
+        self.compile_block(stmt.then)
+        if stmt.else_:
+            jump_to_end = self.emit(JUMP)
+            self.patch(jump_to_else, self.here())
+            self.compile_block(stmt.else_)
+            self.patch(jump_to_end, self.here())
+        else:
+            self.patch(jump_to_else, self.here())
+
+    def compile_loop_body(self, statements: List[Node]) -> Tuple[List[int], List[int]]:
+        """Compile a loop body; return its unpatched break and continue jumps."""
+        jumps: Tuple[List[int], List[int]] = ([], [])
+        self.loops.append(jumps)
+        self.compile_block(statements)
+        self.loops.pop()
+        return jumps
+
+    def visit_While(self, stmt: While) -> None:
+        start = self.here()
+        self.visit(stmt.condition)
+        jump_to_end = self.emit(JUMP_IF_FALSE)
+        breaks, continues = self.compile_loop_body(stmt.body)
+        self.emit(JUMP, start)
+        for jump in continues:
+            self.patch(jump, start)
+        for jump in breaks + [jump_to_end]:
+            self.patch(jump, self.here())
+
+    def visit_For(self, stmt: For) -> None:
+        if stmt.init:
+            self.visit(stmt.init)
+        start = self.here()
+        self.visit(stmt.condition)
+        jump_to_end = self.emit(JUMP_IF_FALSE)
+        breaks, continues = self.compile_loop_body(stmt.body)
+        # continue jumps to the update, not back to the condition
+        for jump in continues:
+            self.patch(jump, self.here())
+        self.visit(stmt.update)
+        self.emit(JUMP, start)
+        for jump in breaks + [jump_to_end]:
+            self.patch(jump, self.here())
+
+    def visit_ForIn(self, stmt: ForIn) -> None:
+        # The iterator stays on the stack while the loop runs
+        self.visit(stmt.iterable)
+        self.emit(GET_ITER)
+        start = self.emit(FOR_ITER)
+        self.emit(STORE_VAR, self.name(stmt.name))
+        self.iterators += 1
+        breaks, continues = self.compile_loop_body(stmt.body)
+        self.iterators -= 1
+        self.emit(JUMP, start)
+        for jump in continues:
+            self.patch(jump, start)
+        # break leaves the iterator behind; FOR_ITER has popped it already
+        if breaks:
+            for jump in breaks:
+                self.patch(jump, self.here())
+            self.emit(POP_TOP)
+        self.patch(start, self.here())
+
+    def visit_Break(self, stmt: Break) -> None:
+        self.loops[-1][0].append(self.emit(JUMP))
+
+    def visit_Continue(self, stmt: Continue) -> None:
+        self.loops[-1][1].append(self.emit(JUMP))
+
+    def visit_Return(self, stmt: Return) -> None:
+        # The stack is shared with the caller, so drop the iterators of the
+        # for-in loops being left
+        for _ in range(self.iterators):
+            self.emit(POP_TOP)
+        value = stmt.value
+        if self.in_function and value.__class__ is Call and value.name not in BUILTIN_FUNCTIONS:
+            # return f(...) reuses this frame instead of growing the stack
+            for arg in value.args:
+                self.visit(arg)
+            self.emit(TAIL_CALL, (self.name(value.name), len(value.args)))
+            return
+        if stmt.value:
+            self.visit(stmt.value)
+        else:
+            self.emit(LOAD_CONST, self.constant(None))
+        self.emit(RETURN_VALUE)
+
+    def visit_Assignment(self, stmt: Assignment) -> None:
+        if stmt.target.__class__ is Index:
+            self.visit(stmt.target.object)
+            self.visit(stmt.target.index)
+            self.visit(stmt.value)
+            self.emit(STORE_SUBSCR)
+            return
+        if stmt.target.__class__ is MemberAccess:
+            self.visit(stmt.target.object)
+            self.visit(stmt.value)
+            self.emit(STORE_MEMBER, (self.name(stmt.target.member), stmt.target.cache))
+            return
+        if stmt.target.__class__ is not Identifier:
+            self.emit(RAISE_ERROR, self.constant("Invalid assignment target"))
+            return
+        self.visit(stmt.value)
+        self.emit(STORE_NAME, self.name(stmt.target.name))
+
+    def visit_ExpressionStatement(self, stmt: ExpressionStatement) -> None:
+        self.visit(stmt.value)
+        self.emit(POP_TOP)
+
+    # ------------------------------------------------------------------
+    # Expressions
+    # ------------------------------------------------------------------
+
+    def visit_Literal(self, expr: Literal) -> None:
+        self.emit(LOAD_CONST, self.constant(expr.value))
+
+    def visit_Identifier(self, expr: Identifier) -> None:
+        self.emit(LOAD_NAME, self.name(expr.name))
+
+    def visit_MemberAccess(self, expr: MemberAccess) -> None:
+        self.visit(expr.object)
+        self.emit(LOAD_MEMBER, (self.name(expr.member), expr.cache))
+
+    def visit_MemberCall(self, expr: MemberCall) -> None:
+        self.visit(expr.object)
+        for arg in expr.args:
+            self.visit(arg)
+        self.emit(CALL_METHOD, (self.name(expr.member), len(expr.args), expr.cache))
+
+    def visit_ArrayLiteral(self, expr: ArrayLiteral) -> None:
+        for element in expr.elements:
+            self.visit(element)
+        self.emit(BUILD_LIST, len(expr.elements))
+
+    def visit_ObjectLiteral(self, expr: ObjectLiteral) -> None:
+        for value in expr.values:
+            self.visit(value)
+        self.emit(BUILD_OBJECT, expr.shape)
+
+    def visit_Template(self, expr: Template) -> None:
+        for value in expr.values:
+            self.visit(value)
+        self.emit(BUILD_STRING, (len(expr.values), expr.pattern))
+
+    def visit_Index(self, expr: Index) -> None:
+        self.visit(expr.object)
+        self.visit(expr.index)
+        self.emit(BINARY_SUBSCR)
+
+    def visit_Slice(self, expr: Slice) -> None:
+        self.visit(expr.object)
+        for bound in (expr.start, expr.stop):
+            if bound is None:
+                self.emit(LOAD_CONST, self.constant(None))
+            else:
+                self.visit(bound)
+        self.emit(SLICE)
+
+    def visit_BinaryOp(self, expr: BinaryOp) -> None:
+        if expr.op == 'and':
+            # left and right: False unless both are truthy; right only
+            # runs when left is truthy
+            self.visit(expr.left)
+            jump_to_false = self.emit(JUMP_IF_FALSE)
+            self.visit(expr.right)
+            self.emit(TO_BOOL)
+            jump_to_end = self.emit(JUMP)
+            self.patch(jump_to_false, self.here())
+            self.emit(LOAD_CONST, self.constant(False))
+            self.patch(jump_to_end, self.here())
+            return
+        if expr.op == 'or':
+            # left or right: left if it is truthy, without running right
+            self.visit(expr.left)
+            jump_to_end = self.emit(JUMP_IF_TRUE_OR_POP)
+            self.visit(expr.right)
+            self.patch(jump_to_end, self.here())
+            return
+        self.visit(expr.left)
+        self.visit(expr.right)
+        opcode = BINARY_OPCODES.get(expr.op)
+        if isinstance(expr, ProvenBinaryOp):
+            opcode = PROVEN_OPCODES.get((expr.operand_type, expr.op), opcode)
+        if opcode is None:
+            self.emit(RAISE_ERROR, self.constant(f"Unknown operator: {expr.op}"))
+        else:
+            self.emit(opcode)
+
+    def visit_UnaryOp(self, expr: UnaryOp) -> None:
+        self.visit(expr.expr)
+        opcode = UNARY_OPCODES.get(expr.op)
+        if opcode is None:
+            self.emit(RAISE_ERROR, self.constant(f"Unknown unary operator: {expr.op}"))
+        else:
+            self.emit(opcode)
+
+    def visit_Call(self, expr: Call) -> None:
+        for arg in expr.args:
+            self.visit(arg)
+        if expr.name in BUILTIN_FUNCTIONS:
+            self.emit(CALL_BUILTIN, (self.name(expr.name), len(expr.args)))
+        else:
+            self.emit(CALL_FUNCTION, (self.name(expr.name), len(expr.args)))
+
+
+def format_operand(code: CodeObject, opcode: int, operand: Any) -> str:
+    """Render an instruction operand with what it refers to."""
+    if opcode in (LOAD_CONST, RAISE_ERROR):
+        value = code.constants[operand]
+        shown = f"<function {value.name}>" if isinstance(value, FunctionDef) else repr(value)
+        return f"{operand} ({shown})"
+    if opcode in NAME_OPCODES:
+        return f"{operand} ({code.names[operand]})"
+    if opcode in (LOAD_MEMBER, STORE_MEMBER):
+        return f"{operand[0]} ({code.names[operand[0]]})"
+    if opcode == BUILD_OBJECT:
+        return f"{len(operand.keys)} ({', '.join(operand.keys)})"
+    if opcode == BUILD_STRING:
+        return f"{operand[0]} ({operand[1]!r})"
+    if opcode in (CALL_FUNCTION, TAIL_CALL, CALL_METHOD, CALL_BUILTIN):
+        name_index, argc = operand[:2]
+        return f"{argc} ({code.names[name_index]})"
+    if opcode in JUMP_OPCODES:
+        return f"-> {operand}"
+    return ''
+
+
+def disassemble(code: CodeObject,
+                functions: Optional[Dict[FunctionDef, CodeObject]] = None) -> str:
+    """Return a listing of a CodeObject and of every function it defines."""
+    functions = functions or {}
+    jump_targets = {operand for opcode, operand in code.instructions
+                    if opcode in JUMP_OPCODES}
+    lines = [f"Disassembly of {code.name}:"]
+    for index, (opcode, operand) in enumerate(code.instructions):
+        marker = '>>' if index in jump_targets else '  '
+        operand_text = format_operand(code, opcode, operand)
+        text = f"{marker} {index:4d} {OPCODE_NAMES[opcode]:<16}{operand_text}"
+        lines.append(text.rstrip())
+
+    for value in code.constants:
+        if isinstance(value, FunctionDef) and value in functions:
+            lines.append('')
+            lines.append(disassemble(functions[value], functions))
+    return '\n'.join(lines)
+
+
+class VMExecutor(Executor):
+    """
+    Executes NovaScript by compiling to bytecode and running the VM loop.
+
+    Behaves like Executor (same scopes, builtins and error messages); the
+    difference is that NovaScript calls push heap frames instead of
+    recursing in Python, so call depth is limited by max_depth.
+    """
+
+    def __init__(self, stdout=None, max_depth: int = DEFAULT_MAX_DEPTH):
+        super().__init__(stdout=stdout)
+        self.max_depth = max_depth
+        # Compiled bodies of the function definitions seen so far
+        self.functions: Dict[FunctionDef, CodeObject] = {}
+
+    def create_global_scope(self) -> Dict[str, Any]:
+        # Globals are looked up by name at run time, so a plain dict is fastest
+        return {}
+
+    def compile(self, statements: List[Node]) -> CodeObject:
+        """Compile top-level statements into a CodeObject."""
+        return BytecodeCompiler('<module>', self.functions).compile_program(statements)
+
+    def function_code(self, func_def: FunctionDef) -> CodeObject:
+        """Return the compiled body of a function definition."""
+        code = self.functions.get(func_def)
+        if code is None:
+            compiler = BytecodeCompiler(func_def.name, self.functions)
+            code = self.functions[func_def] = compiler.compile_function(func_def)
+        return code
+
+    def execute(self, statements: List[Node]) -> Any:
+        """Compile and run a list of statements."""
+        self.optimize_program(statements)
+        self.prepare_memo(statements)
+        return self.run(self.compile(statements))
+
+    def execute_statement(self, stmt: Node) -> Any:
+        """Compile and run a single statement."""
+        return self.execute([stmt])
+
+    def evaluate_expression(self, expr: Node) -> Any:
+        """Compile and evaluate an expression."""
+        return self.execute([ExpressionStatement(expr)])
+
+    def call_function(self, function: Any, args: List[Any]) -> Any:
+        if not isinstance(function, FunctionDef):
+            return super().call_function(function, args)
+        self.check_arguments(function, len(args))
+        cache = function.cache
+        memo = None
+        if cache is not None:
+            key = memo_key(args)
+            value = cache.get(key)
+            if value is not MISS:
+                return value
+            memo = [(cache, key)]
+        # A nested run whose bottom frame halts with the function's result
+        frames: List[Frame] = [(HALT_INSTRUCTIONS, [], [], 0, None, memo)]
+        return self.run(self.function_code(function), dict(zip(function.params, args)), frames)
+
+    def run(self, code: CodeObject, local: Optional[Dict[str, Any]] = None,
+            frames: Optional[List[Frame]] = None) -> Any:
+        """
+        Run a CodeObject until HALT and return its result.
+        
+        A program runs with no locals and no caller frames; call_function()
+        passes a function's locals and a frame to return to.
+        """
+        global_scope = self.global_scope
+        is_truthy = self.is_truthy
+        to_string = self.to_string
+        concat = self.concat
+        max_depth = self.max_depth
+
+        stack: List[Any] = []
+        push = stack.append
+        pop = stack.pop
+        # The callers' saved frames
+        if frames is None:
+            frames = []
+
+        instructions = code.instructions
+        constants = code.constants
+        names = code.names
+        pc = 0
+
+        while True:
+            opcode, operand = instructions[pc]
+            pc += 1
+
+            if opcode == LOAD_NAME:
+                name = names[operand]
+                # Look up in local scope first, then global
+                if local is not None and name in local:
+                    push(local[name])
+                elif name in global_scope:
+                    push(global_scope[name])
+                else:
+                    raise NameError(f"Undefined variable: {name}")
+
+            elif opcode == LOAD_CONST:
+                push(constants[operand])
+
+            elif opcode == JUMP_IF_FALSE:
+                value = pop()
+                if value is False or (value is not True and not is_truthy(value)):
+                    pc = operand
+
+            elif opcode == STORE_NAME:
+                name = names[operand]
+                # Look up through scope chain
+                if local is None or (name not in local and name in global_scope):
+                    global_scope[name] = pop()
+                else:
+                    local[name] = pop()
+
+            elif opcode == JUMP:
+                pc = operand
+
+            elif opcode == BINARY_ADD:
+                right = pop()
+                left = pop()
+                if isinstance(left, STRING_TYPES) or isinstance(right, STRING_TYPES):
+                    push(concat(left, right))
+                else:
+                    push(left + right)
+
+            elif opcode == BINARY_SUBTRACT:
+                right = pop()
+                push(pop() - right)
+
+            elif opcode == BINARY_ADD_NUMBERS:
+                right = pop()
+                push(pop() + right)
+
+            elif opcode == BINARY_CONCAT:
+                right = pop()
+                push(concat(pop(), right))
+
+            elif opcode == COMPARE_LT:
+                right = pop()
+                push(pop() < right)
+
+            elif opcode == CALL_FUNCTION:
+                name_index, argc = operand
+                name = names[name_index]
+                if argc:
+                    args = stack[-argc:]
+                    del stack[-argc:]
+                else:
+                    args = []
+
+                # Look up function
+                if name not in global_scope:
+                    raise NameError(f"Undefined function: {name}")
+                func_def = global_scope[name]
+                if not isinstance(func_def, FunctionDef):
+                    raise TypeError(f"{name} is not a function")
+                params = func_def.params
+                if argc != len(params):
+                    raise TypeError(
+                        f"{name}() takes {len(params)} arguments "
+                        f"({argc} given)"
+                    )
+                cache = func_def.cache
+                if cache is None:
+                    memo = None
+                else:
+                    key = memo_key(args)
+                    value = cache.get(key)
+                    if value is not MISS:
+                        push(value)
+                        continue
+                    memo = [(cache, key)]
+                if len(frames) >= max_depth:
+                    raise RecursionError(
+                        f"maximum recursion depth exceeded ({max_depth} NovaScript calls)")
+
+                frames.append((instructions, constants, names, pc, local, memo))
+                callee = self.functions.get(func_def) or self.function_code(func_def)
+                instructions = callee.instructions
+                constants = callee.constants
+                names = callee.names
+                local = dict(zip(params, args))
+                pc = 0
+
+            elif opcode == RETURN_VALUE:
+                if not frames:
+                    raise ReturnException(pop())
+                # The return value stays on top of the shared stack
+                instructions, constants, names, pc, local, memo = frames.pop()
+                if memo is not None:
+                    value = stack[-1]
+                    for cache, key in memo:
+                        cache.put(key, value)
+
+            elif opcode == TAIL_CALL:
+                name_index, argc = operand
+                name = names[name_index]
+                if argc:
+                    args = stack[-argc:]
+                    del stack[-argc:]
+                else:
+                    args = []
+
+                # Same checks as CALL_FUNCTION, but no frame is saved: the
+                # callee returns straight to this function's caller
+                if name not in global_scope:
+                    raise NameError(f"Undefined function: {name}")
+                func_def = global_scope[name]
+                if not isinstance(func_def, FunctionDef):
+                    raise TypeError(f"{name} is not a function")
+                params = func_def.params
+                if argc != len(params):
+                    raise TypeError(
+                        f"{name}() takes {len(params)} arguments "
+                        f"({argc} given)"
+                    )
+
+                cache = func_def.cache
+                if cache is not None:
+                    key = memo_key(args)
+                    value = cache.get(key)
+                    if value is not MISS:
+                        push(value)
+                        instructions, pc = RETURN_INSTRUCTIONS, 0
+                        continue
+                    # The caller's frame receives the result for this cache too
+                    caller = frames[-1]
+                    if caller[5] is None:
+                        frames[-1] = caller[:5] + ([(cache, key)],)
+                    else:
+                        caller[5].append((cache, key))
+
+                callee = self.functions.get(func_def) or self.function_code(func_def)
+                instructions = callee.instructions
+                constants = callee.constants
+                names = callee.names
+                local = dict(zip(params, args))
+                pc = 0
+
+            elif opcode == FOR_ITER:
+                value = next(stack[-1], EXHAUSTED)
+                if value is EXHAUSTED:
+                    pop()
+                    pc = operand
+                else:
+                    push(value)
+
+            elif opcode == POP_TOP:
+                pop()
+
+            elif opcode == STORE_VAR:
+                (global_scope if local is None else local)[names[operand]] = pop()
+
+            elif opcode == BINARY_MULTIPLY:
+                right = pop()
+                push(pop() * right)
+
+            elif opcode == BINARY_DIVIDE:
+                right = pop()
+                left = pop()
+                if isinstance(left, int) and isinstance(right, int):
+                    push(left // right)
+                else:
+                    push(left / right)
+
+            elif opcode == BINARY_MODULO:
+                right = pop()
+                push(pop() % right)
+
+            elif opcode == BINARY_FLOOR_DIVIDE:
+                right = pop()
+                push(pop() // right)
+
+            elif opcode == BINARY_TRUE_DIVIDE:
+                right = pop()
+                push(pop() / right)
+
+            elif opcode == COMPARE_EQ:
+                right = pop()
+                push(pop() == right)
+
+            elif opcode == COMPARE_NE:
+                right = pop()
+                push(pop() != right)
+
+            elif opcode == COMPARE_GT:
+                right = pop()
+                push(pop() > right)
+
+            elif opcode == COMPARE_LE:
+                right = pop()
+                push(pop() <= right)
+
+            elif opcode == COMPARE_GE:
+                right = pop()
+                push(pop() >= right)
+
+            elif opcode == TO_BOOL:
+                value = stack[-1]
+                if value is not True and value is not False:
+                    stack[-1] = is_truthy(value)
+
+            elif opcode == JUMP_IF_TRUE_OR_POP:
+                value = stack[-1]
+                if value is True or (value is not False and is_truthy(value)):
+                    pc = operand
+                else:
+                    pop()
+
+            elif opcode == BUILD_LIST:
+                if operand:
+                    items = stack[-operand:]
+                    del stack[-operand:]
+                else:
+                    items = []
+                push(items)
+
+            elif opcode == BINARY_SUBSCR:
+                index = pop()
+                obj = stack[-1]
+                # Lists with an in-range int index skip the checks in get_item()
+                if (obj.__class__ is list and index.__class__ is int
+                        and -len(obj) <= index < len(obj)):
+                    stack[-1] = obj[index]
+                else:
+                    stack[-1] = get_item(obj, index)
+
+            elif opcode == STORE_SUBSCR:
+                value = pop()
+                index = pop()
+                set_item(pop(), index, value)
+
+            elif opcode == SLICE:
+                stop = pop()
+                start = pop()
+                stack[-1] = get_slice(stack[-1], start, stop)
+
+            elif opcode == BUILD_OBJECT:
+                count = len(operand.keys)
+                if count:
+                    values = stack[-count:]
+                    del stack[-count:]
+                else:
+                    values = []
+                push(NovaObject(operand, values))
+
+            elif opcode == BUILD_STRING:
+                count, pattern = operand
+                values = stack[-count:]
+                del stack[-count:]
+                push(pattern.format(*[to_string(value) for value in values]))
+
+            elif opcode == UNARY_NEGATIVE:
+                push(-pop())
+
+            elif opcode == UNARY_NOT:
+                push(not is_truthy(pop()))
+
+            elif opcode == PRINT:
+                print(to_string(pop()), file=self.stdout)
+
+            elif opcode == LOAD_MEMBER:
+                cache = operand[1]
+                obj = stack[-1]
+                if obj is cache.object:
+                    stack[-1] = cache.value
+                elif obj.__class__ is NovaObject and obj.shape is cache.shape:
+                    stack[-1] = obj.values[cache.offset]
+                else:
+                    stack[-1] = cache.load(obj)
+
+            elif opcode == STORE_MEMBER:
+                cache = operand[1]
+                value = pop()
+                obj = pop()
+                if obj.__class__ is NovaObject and obj.shape is cache.shape:
+                    obj.values[cache.offset] = value
+                else:
+                    cache.store(obj, value)
+
+            elif opcode == CALL_METHOD:
+                _, argc, cache = operand
+                if argc:
+                    args = stack[-argc:]
+                    del stack[-argc:]
+                else:
+                    args = []
+                obj = pop()
+                method = cache.value if obj is cache.object else self.load_method(cache, obj)
+                push(method(*args))
+
+            elif opcode == CALL_BUILTIN:
+                name_index, argc = operand
+                if argc:
+                    args = stack[-argc:]
+                    del stack[-argc:]
+                else:
+                    args = []
+                push(self.call_builtin(names[name_index], args))
+
+            elif opcode == GET_ITER:
+                stack[-1] = self.iterate(stack[-1])
+
+            elif opcode == HALT:
+                return pop()
+
+            elif opcode == RAISE_ERROR:
+                raise RuntimeError(constants[operand])
+
+            else:
+                raise RuntimeError(f"Unknown opcode: {opcode}")
@@ -9,16 +9,36 @@ Tests cover:
 - Error handling
 """
 
+import contextlib
 import io
+import re
 import sys
+import tempfile
 import unittest
 from pathlib import Path
 
 # Import the interpreter components
 from novascriptx.interpreter import (
-    Lexer, Parser, Executor, Token,
+    Lexer, Parser, Executor, Token, TokenBuffer, TOKEN_KINDS,
     run_code, run_file, run_repl
 )
+from novascriptx.closures import ClosureExecutor
+from novascriptx.inference import ANY, FLOAT, INT, STRING, format_types, infer_types, specialise
+from novascriptx.memo import MISS, MemoCache, memo_key, pure_functions
+from novascriptx.nodes import (
+    BinaryOp, Call, If, Literal, MemberAccess, MemberCall, NodeVisitor, Template, dump, walk,
+)
+from novascriptx.objects import EMPTY_SHAPE, NovaObject, shape_of
+from novascriptx.optimizer import (
+    DEFAULT_OPT_LEVEL, INLINE_BUDGET, LEVELS, MIN_CHAIN_OPERANDS, describe, optimize,
+)
+from novascriptx.profiling import HOT_COUNT, Profile, load_profile, save_profile
+from novascriptx.novascriptx_cli import main
+from novascriptx.quicken import MAX_DEOPTS, ProvenBinaryOp
+from novascriptx.resolver import UNSET, GlobalScope, resolve
+from novascriptx.ropes import ROPE_THRESHOLD, Rope, concat
+from novascriptx.transpiler import PythonExecutor
+from novascriptx.vm import BytecodeCompiler, VMExecutor, disassemble
 
 
 class TestLexer(unittest.TestCase):
@@ -52,6 +72,17 @@ class TestLexer(unittest.TestCase):
         strings = [t.value for t in tokens if t.type == 'STRING']
         self.assertEqual(strings, ["hello", "world"])
     
+    def test_templates(self):
+        """Test that template literals keep their raw body for the parser."""
+        tokens = Lexer('`a ${x} \\n` `two\nlines` x').tokenize()
+        
+        self.assertEqual([(t.type, t.value, t.line) for t in tokens][:3],
+                         [('TEMPLATE', 'a ${x} \\n', 1), ('TEMPLATE', 'two\nlines', 1),
+                          ('IDENTIFIER', 'x', 2)])
+        self.assertEqual([t.value for t in Lexer('`a ${x} \\n`').scan()][0], 'a ${x} \\n')
+        with self.assertRaises(SyntaxError):
+            Lexer('print(`open)').tokenize()
+    
     def test_operators(self):
         """Test operator tokenization."""
         lexer = Lexer("+ - * / == !=")
@@ -70,6 +101,70 @@ class TestLexer(unittest.TestCase):
         # No comments should appear in tokens
         self.assertFalse(any(t.type == 'COMMENT' for t in tokens))
 
+    def test_token_stream_and_lines(self):
+        """Test types, values and line numbers across a multi-line source."""
+        source = 'var s = "a\\tb" # note\nif (s != \'x\'): {\n  print(s)\n}'
+        tokens = Lexer(source).tokenize()
+
+        self.assertEqual(
+            [(t.type, t.value, t.line) for t in tokens],
+            [('VAR', 'var', 1), ('IDENTIFIER', 's', 1), ('ASSIGN', '=', 1),
+             ('STRING', 'a\tb', 1), ('IF', 'if', 2), ('LPAREN', '(', 2),
+             ('IDENTIFIER', 's', 2), ('NOT_EQUAL', '!=', 2), ('STRING', 'x', 2),
+             ('RPAREN', ')', 2), ('COLON', ':', 2), ('LBRACE', '{', 2),
+             ('PRINT', 'print', 3), ('LPAREN', '(', 3), ('IDENTIFIER', 's', 3),
+             ('RPAREN', ')', 3), ('RBRACE', '}', 4), ('EOF', '', 4)]
+        )
+
+    def test_multiline_string(self):
+        """Test that strings spanning lines advance the line counter."""
+        tokens = Lexer('"one\ntwo"\nx').tokenize()
+
+        self.assertEqual(tokens[0].value, "one\ntwo")
+        self.assertEqual(tokens[1].line, 3)
+
+    def test_lexer_errors(self):
+        """Test error reporting for bad characters and unterminated strings."""
+        with self.assertRaisesRegex(SyntaxError, "line 2: Unexpected character: '\\$'"):
+            Lexer("var x = 1\nvar $y = 2").tokenize()
+        with self.assertRaisesRegex(SyntaxError, "line 3: Unterminated string"):
+            Lexer('var x = 1\nprint("abc\n)').tokenize()
+
+    def test_scan_is_lazy(self):
+        """Test that scan() yields tokens before lexing the whole source."""
+        tokens = Lexer("var x = 1\n" * 3 + "var $bad = 2").scan()
+
+        self.assertEqual(next(tokens).type, 'VAR')
+        with self.assertRaises(SyntaxError):
+            list(tokens)
+
+    def test_scan_matches_tokenize(self):
+        """Test that streamed and materialised token streams agree."""
+        source = 'print("a\nb" + \'c\\\'d\')\n# done\nvar n = 3.5'
+        streamed = [(t.type, t.value, t.line) for t in Lexer(source).scan()]
+        listed = [(t.type, t.value, t.line) for t in Lexer(source).tokenize()]
+
+        self.assertEqual(streamed, listed)
+
+    def test_token_kinds(self):
+        """Test integer token kinds and the type-name view of them."""
+        token = Token('IDENTIFIER', 'x', 1)
+
+        self.assertEqual(token.kind, TOKEN_KINDS['IDENTIFIER'])
+        self.assertEqual(token.type, 'IDENTIFIER')
+        self.assertFalse(hasattr(token, '__dict__'))
+
+    def test_token_buffer(self):
+        """Test the compact token store returned by tokenize()."""
+        tokens = Lexer('var s = "a\\nb"\n\nprint(s)').tokenize()
+
+        self.assertIsInstance(tokens, TokenBuffer)
+        self.assertEqual(len(tokens), 9)
+        self.assertEqual(tokens.nbytes(), 9 * 9)
+        self.assertEqual(tokens.value(3), "a\nb")
+        self.assertEqual((tokens[4].type, tokens[4].line), ('PRINT', 3))
+        self.assertEqual((tokens[-1].type, tokens[-1].line), ('EOF', 3))
+
 
 class TestParser(unittest.TestCase):
     """Test the parser (AST generation)."""
@@ -103,6 +198,17 @@ class TestParser(unittest.TestCase):
         self.assertEqual(statements[0]['type'], 'function')
         self.assertEqual(statements[0]['name'], 'add')
         self.assertEqual(statements[0]['params'], ['a', 'b'])
+        self.assertFalse(statements[0].memo)
+    
+    def test_memo_function(self):
+        """Test that 'memo' marks a function only when 'function' follows it."""
+        source = "memo function f(n): { return n }\nvar memo = 1\nmemo = memo(2)"
+        statements = Parser(Lexer(source).scan()).parse()
+        
+        self.assertEqual(statements[0]['type'], 'function')
+        self.assertTrue(statements[0].memo)
+        self.assertEqual(statements[1]['name'], 'memo')
+        self.assertEqual(statements[2].value['name'], 'memo')
     
     def test_if_statement(self):
         """Test parsing if statements."""
@@ -132,14 +238,1011 @@ class TestParser(unittest.TestCase):
         # Should parse as 2 + (3 * 4), not (2 + 3) * 4
         self.assertEqual(statements[0]['type'], 'var')
 
+    def test_expression_grouping(self):
+        """Test associativity, unary binding and word operators."""
+        def parse(expression):
+            return Parser(Lexer("var r = " + expression).scan()).parse()[0].value.to_dict()
+
+        def binary(op, left, right):
+            return {'type': 'binary_op', 'op': op, 'left': left, 'right': right}
+
+        a, b, c = ({'type': 'identifier', 'name': name} for name in 'abc')
+        self.assertEqual(parse("a - b - c"), binary('-', binary('-', a, b), c))
+        self.assertEqual(parse("a - (b - c)"), binary('-', a, binary('-', b, c)))
+        self.assertEqual(parse("-a * b"), binary('*', {'type': 'unary_op', 'op': '-', 'expr': a}, b))
+        self.assertEqual(parse("a or b and c"), binary('or', a, binary('and', b, c)))
+        self.assertEqual(parse("a == b < c"), binary('==', a, binary('<', b, c)))
+
+    def test_deep_nesting(self):
+        """Test that nesting depth is not bounded by the recursion limit."""
+        depth = sys.getrecursionlimit() * 2
+        source = "var x = " + "(" * depth + "-1" + ")" * depth
+        statements = Parser(Lexer(source).scan()).parse()
+        self.assertEqual(statements[0].value['op'], '-')
+
+        with self.assertRaises(SyntaxError):
+            Parser(Lexer("var x = ((1 + 2)").scan()).parse()
+
+    def test_streamed_tokens(self):
+        """Test parsing directly from the lexer's token generator."""
+        parser = Parser(Lexer("var x = 1\nprint(x)").scan())
+
+        self.assertEqual(parser.peek_token(1).type, 'IDENTIFIER')
+        self.assertEqual(parser.peek_token(3).type, 'NUMBER')
+        statements = parser.parse()
+
+        self.assertEqual([s['type'] for s in statements], ['var', 'print'])
+        self.assertEqual(parser.peek_token(5).type, 'EOF')
+
+    def test_ast_nodes(self):
+        """Test slotted AST nodes and their dict-style compatibility."""
+        statements = Parser(Lexer("if (x > 1): { print(1) } else: { print(2) }").scan()).parse()
+        node = statements[0]
+
+        self.assertIsInstance(node, If)
+        self.assertFalse(hasattr(node, '__dict__'))
+        self.assertEqual(node['type'], 'if')
+        self.assertIs(node['else'], node.else_)
+        self.assertIsNone(node.get('missing'))
+        self.assertEqual(node.to_dict()['condition'], {
+            'type': 'binary_op', 'op': '>',
+            'left': {'type': 'identifier', 'name': 'x'},
+            'right': {'type': 'literal', 'value': 1},
+        })
+
+    def test_node_visitor(self):
+        """Test NodeVisitor dispatch and dump()."""
+        statements = Parser(Lexer("var x = 1 + 2 * 3").scan()).parse()
+
+        class Counter(NodeVisitor):
+            def __init__(self):
+                super().__init__()
+                self.literals = 0
+
+            def visit_Literal(self, node):
+                self.literals += 1
+
+        counter = Counter()
+        for statement in statements:
+            counter.visit(statement)
+        self.assertEqual(counter.literals, 3)
+
+        listing = dump(statements)
+        self.assertTrue(listing.startswith("VarDecl(name='x')"))
+        self.assertIn("BinaryOp(op='*')", listing)
+
+    def test_loop_control(self):
+        """Test parsing break/continue, which are only allowed inside loops."""
+        statements = Parser(Lexer("while (True): { if (x): { break }\ncontinue }").scan()).parse()
+        body = statements[0].body
+        self.assertEqual(body[0].then[0]['type'], 'break')
+        self.assertEqual(body[1]['type'], 'continue')
+
+        for source in ("break", "if (x): { continue }",
+                       "while (x): { function f(): { break } }"):
+            with self.assertRaises(SyntaxError):
+                Parser(Lexer(source).scan()).parse()
+
+    def test_for_in(self):
+        """Test parsing for-in loops next to C-style for loops."""
+        source = "for (x in range(0, 3)): print(x)\nfor (var c in s): { break }\nfor (var i = 0 : i < 3 : i = i + 1): print(i)"
+        statements = Parser(Lexer(source).scan()).parse()
+
+        self.assertEqual([stmt['type'] for stmt in statements], ['for_in', 'for_in', 'for'])
+        self.assertEqual(statements[0].name, 'x')
+        self.assertEqual(statements[0].iterable['name'], 'range')
+        self.assertEqual(statements[1].name, 'c')
+        self.assertEqual(statements[1].body[0]['type'], 'break')
+
+        function = Parser(Lexer("function f(n): { for (k in n): { print(k) } }").scan()).parse()[0]
+        resolve([function], GlobalScope())
+        self.assertEqual(function.frame_size, 2)
+        self.assertEqual(function.body[0].slot, 1)
+
+    def test_arrays(self):
+        """Test parsing array literals, indexes, slices and postfix chains."""
+        source = "var a = [1, [2, 3], f(4)]\na[0] = a[1][0]\nprint(a[1:] + a[:2] + a[:])\nprint(m.b[0].c(1))"
+        statements = Parser(Lexer(source).scan()).parse()
+
+        array = statements[0].value
+        self.assertEqual(array['type'], 'array')
+        self.assertEqual([element['type'] for element in array.elements], ['literal', 'array', 'call'])
+        self.assertEqual(statements[1].target['type'], 'index')
+        self.assertEqual(statements[1].value.object['type'], 'index')
+        slices = [statements[2].value.left.left, statements[2].value.left.right, statements[2].value.right]
+        self.assertEqual([(s.start is None, s.stop is None) for s in slices],
+                         [(False, True), (True, False), (True, True)])
+        chain = statements[3].value
+        self.assertEqual([chain['type'], chain.object['type'], chain.object.object['type']],
+                         ['member_call', 'index', 'member_access'])
+
+        for source in ("var a = [1 2]", "print(a[1:2:3])", "print(a[])"):
+            with self.assertRaises(SyntaxError):
+                Parser(Lexer(source).scan()).parse()
+
+    def test_objects(self):
+        """Test parsing object literals and member assignment."""
+        source = 'var a = {x: 1, "b c": [2], d: {}}\nvar b = {x: 3, "b c": 4, d: 5}\na.d.e = a.x'
+        statements = Parser(Lexer(source).scan()).parse()
+
+        first, second = statements[0].value, statements[1].value
+        self.assertEqual(first['type'], 'object')
+        self.assertEqual(first.keys, ['x', 'b c', 'd'])
+        self.assertEqual([value['type'] for value in first.values], ['literal', 'array', 'object'])
+        # Literals with the same keys in the same order share one shape
+        self.assertIs(first.shape, second.shape)
+        self.assertIs(first.values[2].shape, EMPTY_SHAPE)
+        self.assertEqual(statements[2].target['type'], 'member_access')
+
+        for source in ("print({x: 1 y: 2})", "print({x: 1, x: 2})", "print({1: 2})", "print({x})"):
+            with self.assertRaises(SyntaxError):
+                Parser(Lexer(source).scan()).parse()
+
+    def test_templates(self):
+        """Test parsing template literals into text and value expressions."""
+        source = 'print(`n=${n + 1}, o=${ {k: "}"}.k } \\${x} {}`)\nprint(`plain\\t`)'
+        first, second = [stmt.value for stmt in Parser(Lexer(source).scan()).parse()]
+        
+        self.assertEqual(first['type'], 'template')
+        self.assertEqual(first.strings, ['n=', ', o=', ' ${x} {}'])
+        self.assertEqual([value['type'] for value in first.values], ['binary_op', 'member_access'])
+        self.assertEqual(first.pattern, 'n={}, o={} ${{x}} {{}}')
+        # Without ${...} a template is a plain string
+        self.assertEqual((second['type'], second.value), ('literal', 'plain\t'))
+        
+        for source in ('print(`${`)', 'print(`${ }`)', 'print(`${1 2}`)', 'print(`${)}`)'):
+            with self.assertRaises(SyntaxError):
+                Parser(Lexer(source).scan()).parse()
+        with self.assertRaisesRegex(SyntaxError, 'line 3'):
+            Parser(Lexer('print(`one\ntwo\n${ ) }`)').scan()).parse()
+    
+    def test_resolve_slots(self):
+        """Test that function locals get slots and every name gets a global cell."""
+        source = "var g = 1\nfunction f(a, b): { var c = a + g\nd = c }"
+        statements = Parser(Lexer(source).scan()).parse()
+        scope = GlobalScope()
+        resolve(statements, scope)
+        function = statements[1]
+
+        self.assertIsNone(statements[0].slot)
+        self.assertIs(statements[0].cell, scope.cell('g'))
+        self.assertEqual(function.frame_size, 4)
+        self.assertEqual([function.body[0].slot, function.body[1].target.slot], [2, 3])
+        addition = function.body[0].value
+        self.assertEqual(addition.left.slot, 0)
+        self.assertIsNone(addition.right.slot)
+        self.assertIs(addition.right.cell, statements[0].cell)
+
+        scope['g'] = 2
+        self.assertEqual(dict(scope), {'g': 2})
+        del scope['g']
+        self.assertNotIn('g', scope)
+        self.assertIs(statements[0].cell.value, UNSET)
+
+
+class TestMemo(unittest.TestCase):
+    """Test memo caches and the purity analysis."""
+    
+    def test_lru_cache(self):
+        """Test hits, misses and least-recently-used eviction."""
+        cache = MemoCache('f', maxsize=2)
+        cache.put(memo_key([1]), 'one')
+        cache.put(memo_key([2]), 'two')
+        self.assertEqual(cache.get(memo_key([1])), 'one')
+        cache.put(memo_key([3]), 'three')
+        
+        self.assertIs(cache.get(memo_key([2])), MISS)
+        self.assertEqual(cache.get(memo_key([3])), 'three')
+        self.assertEqual(cache.stats(), {
+            'hits': 2, 'misses': 1, 'evictions': 1, 'size': 2, 'maxsize': 2,
+        })
+        
+        with self.assertRaises(ValueError):
+            MemoCache('f', maxsize=0)
+    
+    def test_keys(self):
+        """Test that equal values of different types and unhashable values are kept apart."""
+        cache = MemoCache('f')
+        cache.put(memo_key([1]), 'int')
+        self.assertIs(cache.get(memo_key([1.0])), MISS)
+        self.assertIs(cache.get(memo_key([True])), MISS)
+        # 0.0 == -0.0, but they print differently
+        cache.put(memo_key([0.0, 1]), 'zero')
+        self.assertIs(cache.get(memo_key([-0.0, 1])), MISS)
+        self.assertEqual(cache.get(memo_key([0.0, 1])), 'zero')
+        self.assertEqual(run_code('memo function v(x): return "v" + x\nprint(v(0.0))\nprint(v(-0.0))'),
+                         'v0.0\nv-0.0\n')
+        
+        module = memo_key([{'pi': 3.14}])
+        cache.put(module, 'module')
+        self.assertIs(cache.get(module), MISS)
+        obj = memo_key([NovaObject(shape_of(['x']), [1])])
+        cache.put(obj, 'object')
+        self.assertIs(cache.get(obj), MISS)
+        self.assertEqual(len(cache), 2)
+    
+    def test_pure_functions(self):
+        """Test which functions the purity analysis accepts."""
+        source = """
+        var total = 0
+        function fib(n): { if (n < 2): { return n }
+            return fib(n - 1) + fib(n - 2) }
+        function square(x): { var y = x * x
+            return y }
+        function twice(x): { return square(x) + square(x) }
+        function shout(x): { print(x) }
+        function readsGlobal(x): { return x + total }
+        function writesGlobal(x): { total = x }
+        function shadows(x): { var total = x
+            return total }
+        function callsShout(x): { return shout(x) }
+        function usesModule(x): { var m = require("math")
+            return m.sqrt(x) }
+        function rebound(x): { return x }
+        rebound = 5
+        function callsRebound(x): { return rebound(x) }
+        function sumTo(n): { var s = 0
+            for (i in range(n)): { s = s + i }
+            return s }
+        function loopsGlobal(n): { for (total in range(n)): { n = n + 1 } }
+        function makesList(n): { return [n] }
+        function first(items): { return items[0] }
+        function makesObject(n): { return {n: n} }
+        """
+        statements = Parser(Lexer(source).scan()).parse()
+        pure = {func.name for func in pure_functions(statements)}
+        # rebound itself is pure, but a call to the name may not reach it
+        self.assertEqual(pure, {'fib', 'square', 'twice', 'rebound', 'sumTo', 'first'})
+        
+        # Globals bound by earlier programs count too
+        pure = {func.name for func in pure_functions(statements, ['y'])}
+        self.assertEqual(pure, {'fib', 'rebound', 'sumTo', 'first'})
+
+
+class TestQuickening(unittest.TestCase):
+    """Test type-specialised binary operations in the tree-walking Executor."""
+    
+    def run_program(self, source, quicken=True):
+        output = io.StringIO()
+        executor = Executor(stdout=output)
+        executor.quicken = quicken
+        statements = Parser(Lexer(source).scan()).parse()
+        executor.execute(statements)
+        return executor, statements, output.getvalue().split()
+    
+    def test_specialisation(self):
+        """Test that nodes specialise on their operand types and shapes."""
+        source = """
+        var i = 0
+        var x = 0.5
+        var s = ""
+        while (i < 10): {
+            x = x * 2.0 + x
+            s = s + "ab"
+            i = i + 1
+        }
+        print(i)
+        print((i - 3) / 2)
+        print(7.0 / 2.0)
+        print(s == "")
+        """
+        executor, statements, output = self.run_program(source)
+        
+        self.assertEqual(output, ['10', '3', '3.5', 'false'])
+        states = {(stats['op'], stats['state']): stats for stats in executor.quickening_stats()}
+        self.assertEqual(states['<', 'IntLtNameConst']['hits'], 10)
+        self.assertEqual(states['<', 'IntLtNameConst']['generic'], 1)
+        self.assertIn(('+', 'FloatAddExprExpr'), states)
+        self.assertIn(('*', 'FloatMulNameConst'), states)
+        self.assertIn(('+', 'StrAddNameConst'), states)
+        self.assertIn(('/', 'IntDivExprConst'), states)
+        self.assertIsInstance(statements[3].condition, BinaryOp)
+        self.assertEqual(self.run_program(source, quicken=False)[2], output)
+        self.assertEqual(self.run_program(source, quicken=False)[0].quickening_stats(), [])
+    
+    def test_deoptimisation(self):
+        """Test that a type miss goes back to the generic path."""
+        source = """
+        function add(a, b): { return a + b }
+        print(add(1, 2))
+        print(add(3, 4))
+        print(add("a", 1))
+        print(add(1.5, 1.0))
+        print(add(True, True))
+        """
+        executor, statements, output = self.run_program(source)
+        
+        self.assertEqual(output, ['3', '7', 'a1', '2.5', '2'])
+        [stats] = executor.quickening_stats()
+        self.assertEqual(stats, {'op': '+', 'state': 'generic', 'hits': 1,
+                                 'generic': 4, 'deopts': 2})
+    
+    def test_deopt_limit(self):
+        """Test that a node stops specialising after MAX_DEOPTS type misses."""
+        source = """
+        function add(a, b): { return a + b }
+        var i = 0
+        while (i < 20): {
+            if (i % 2 == 0): { add(i, i) } else: { add(0.5, 0.5) }
+            i = i + 1
+        }
+        """
+        executor, statements, output = self.run_program(source)
+        
+        add = [stats for stats in executor.quickening_stats() if stats['op'] == '+'][0]
+        self.assertEqual(add['state'], 'generic')
+        self.assertEqual(add['deopts'], MAX_DEOPTS)
+        self.assertEqual(add['hits'] + add['generic'], 20)
+    
+    def test_other_engines_after_quickening(self):
+        """Test that a quickened tree still runs on the other engines."""
+        source = """
+        var total = 0
+        for (var i = 0 : i < 5 : i = i + 1): { total = total + i * 2 }
+        print(total)
+        """
+        executor, statements, output = self.run_program(source)
+        self.assertEqual(output, ['20'])
+        
+        for executor_class in (ClosureExecutor, VMExecutor, PythonExecutor):
+            result = io.StringIO()
+            executor_class(stdout=result).execute(statements)
+            self.assertEqual(result.getvalue().split(), ['20'], executor_class.__name__)
+
+
+class TestRopes(unittest.TestCase):
+    """Test the rope representation of long concatenations."""
+    
+    def test_threshold(self):
+        """Test that short results stay strings and long ones become ropes."""
+        short = 'a' * (ROPE_THRESHOLD - 2)
+        self.assertIs(type(concat(short, 'b')), str)
+        rope = concat(short, 'bc')
+        self.assertIs(type(rope), Rope)
+        self.assertEqual(len(rope), ROPE_THRESHOLD)
+        self.assertEqual(str(concat(rope, 'd')), short + 'bcd')
+        # A rope on the right is flattened, not nested
+        self.assertEqual(str(concat('x', rope)), 'x' + short + 'bc')
+    
+    def test_shared_pieces(self):
+        """Test that appending twice to one rope gives two independent results."""
+        base = concat('a' * ROPE_THRESHOLD, 'b')
+        first = concat(base, 'c')
+        second = concat(base, 'd')
+        self.assertIs(first.parts, base.parts)
+        self.assertEqual(str(second)[-2:], 'bd')
+        self.assertEqual(str(first)[-2:], 'bc')
+        self.assertEqual(str(base)[-1], 'b')
+        self.assertEqual(str(concat(first, 'e'))[-3:], 'bce')
+    
+    def test_string_behaviour(self):
+        """Test that ropes compare, hash and index like the strings they hold."""
+        text = 'x' * ROPE_THRESHOLD + 'y'
+        rope = concat('x' * ROPE_THRESHOLD, 'y')
+        self.assertEqual(rope, text)
+        self.assertEqual(text, rope)
+        self.assertNotEqual(rope, text + 'z')
+        self.assertNotEqual(rope, 1)
+        self.assertEqual(hash(rope), hash(text))
+        self.assertEqual({text: 1}[rope], 1)
+        self.assertTrue(rope < 'y' and 'y' > rope and rope >= text)
+        self.assertEqual((rope[-1], rope[:2], list(rope)[-1]), ('y', 'xx', 'y'))
+
+    def test_operators(self):
+        """Test that other operators apply to ropes as to strings, failing with the same errors."""
+        text = 'x' * ROPE_THRESHOLD + '%d'
+        rope = concat('x' * ROPE_THRESHOLD, '%d')
+        self.assertEqual((rope * 2, 2 * rope, rope % 5), (text * 2, 2 * text, text % 5))
+        for source in ('print(s - 1)', 'print(1 - s)', 'print(-s)', 'print(s * s)', 'print(s / 2)',
+                       'print([1][s])', 'print(range(s))', 's.x = 1'):
+            for engine in ('tree', 'closure', 'vm', 'py'):
+                errors = []
+                for length in (3, ROPE_THRESHOLD):
+                    with self.assertRaises(RuntimeError) as raised:
+                        run_code(f'var s = ""\nfor (i in range({length})): s = s + "a"\n{source}',
+                                 engine=engine)
+                    errors.append(str(raised.exception))
+                self.assertEqual(errors[0], errors[1], (source, engine))
+        output = run_code(f'var s = ""\nfor (i in range({ROPE_THRESHOLD})): s = s + "a"\n'
+                          'var t = s * 2\nprint(t.length)\nprint(3 * "ab")')
+        self.assertEqual(output.split(), [str(2 * ROPE_THRESHOLD), 'ababab'])
+
+
+class TestOptimizer(unittest.TestCase):
+    """Test the AST rewrites of optimizer.py."""
+    
+    def optimized(self, source, level=DEFAULT_OPT_LEVEL):
+        statements = Parser(Lexer(source).scan()).parse()
+        optimize(statements, level)
+        return statements
+    
+    def test_constant_folding(self):
+        """Test that operations on literals are evaluated at compile time."""
+        values = [stmt.value for stmt in self.optimized(
+            'print(60 * 60 * 24)\n'
+            'print(7 / 2 + 7.0 / 2)\n'
+            'print(-(2 - 5) + 1)\n'
+            'print(!False and 3 > 2)\n'
+            'print(False and f())\n'
+            'print(0 or "x")\n'
+            'print("n" + 1 + True)'
+        )]
+        self.assertTrue(all(isinstance(value, Literal) for value in values))
+        self.assertEqual([value.value for value in values], [86400, 6.5, 4, True, False, 'x', 'n1true'])
+        
+        # Operands that are not literals, and operations that fail, are kept
+        kept = [stmt.value for stmt in self.optimized(
+            'print(x * 60 * 60)\nprint(1 / 0)\nprint(-"a")\nprint(True and f())\nprint("ab" * 5000)')]
+        self.assertTrue(all(not isinstance(value, Literal) for value in kept))
+        # x * 60 is evaluated first, so only the inner operands are literals
+        self.assertEqual(kept[0].left.op, '*')
+        self.assertEqual(self.optimized('print(1 + 2)', level=0)[0].value.op, '+')
+    
+    def test_dead_code(self):
+        """Test that -O2 removes dead branches and unreachable statements."""
+        source = """
+        if (False): print("a") else: {
+            print("b")
+            if (1 > 0): print("c")
+        }
+        while (0): print("d")
+        function f(x): {
+            return x
+            print("e")
+        }
+        while (True): {
+            break
+            print("f")
+        }
+        """
+        statements = self.optimized(source, level=2)
+        self.assertEqual([stmt.type for stmt in statements], ['print', 'print', 'function', 'while'])
+        self.assertEqual([stmt.value.value for stmt in statements[:2]], ['b', 'c'])
+        self.assertEqual(len(statements[2].body), 1)
+        self.assertEqual(len(statements[3].body), 1)
+        # -O1 folds the conditions but keeps every statement
+        statements = self.optimized(source, level=1)
+        self.assertEqual(len(statements), 4)
+        self.assertEqual(statements[0].else_[1].condition.value, True)
+        self.assertEqual(len(statements[2].body), 2)
+    
+    def test_inlining(self):
+        """Test that -O2 replaces calls to small leaf functions with their body."""
+        source = """
+        var k = 3
+        function add(a, b): return a + b
+        function sq(x): return x * x
+        function twice(a): return add(a, a)
+        function scale(k): return sq(k) * add(k, 1)
+        function fact(n): return n * fact(n - 1)
+        function late(): return early(1)
+        function early(x): return x
+        var i = 2
+        print(add(i, 1) + sq(i) + twice(i))
+        print(sq(i + 2))
+        print(add(f(), g()))
+        print(add(1))
+        """
+        statements = self.optimized(source, level=2)
+        adds, square, calls, arity = [stmt.value for stmt in statements[-4:]]
+        self.assertEqual(describe(adds), 'i + 1 + i * i + (i + i)')
+        self.assertEqual(describe(statements[4].body[0].value), 'k * k * (k + 1)')
+        # Recursive, not yet defined, repeated complex argument, wrong arity
+        self.assertEqual(describe(statements[5].body[0].value), 'n * fact(n - 1)')
+        self.assertEqual(describe(statements[6].body[0].value), 'early(1)')
+        self.assertEqual(describe(square), 'sq(i + 2)')
+        self.assertEqual(describe(calls), 'f() + g()')
+        self.assertIsInstance(arity, Call)
+        
+        # Capture: scale's local k would hide the global k of uses_k
+        statements = self.optimized(
+            'function uses_k(x): return x * k\nfunction scale(k): return uses_k(k)', level=2)
+        self.assertIsInstance(statements[1].body[0].value, Call)
+        # Redefined functions and arguments that would run out of order are kept
+        for source in ('function f(a): return a\nf = 1\nprint(f(2))',
+                       'function f(a, b): return b - a\nprint(f(g(), h()))',
+                       'function f(a): return k + a\nprint(f(g()))',
+                       'function f(a, b): return b\nprint(f(g(), 2))',
+                       'function f(a, b): return a and b\nprint(f(x, 1 % 0))',
+                       'function f(a, b): return b - a\nprint(f(1 % 0, l[9]))',
+                       'function f(a): return k + a\nprint(f(1 / z))',
+                       'function f(a): return a * a\nprint(f(nope))'):
+            self.assertIsInstance(self.optimized(source, level=2)[-1].value, Call, source)
+    
+    def test_inlining_output(self):
+        """Test that inlined calls print the same on every engine."""
+        source = """
+        var n = 0
+        function bump(): {
+            n = n + 1
+            print("bump " + n)
+            return n
+        }
+        function add(a, b): return a + b
+        function pick(a, b, c): return a * 10 + c
+        function first(a, b): return a
+        print(add(bump(), bump()))
+        print(pick(bump(), 7, n))
+        print(first(bump(), 0) + n)
+        var total = 0
+        for (i in range(5)): total = add(total, pick(i, i, 2))
+        print(total)
+        """
+        for engine in ('tree', 'closure', 'vm', 'py'):
+            self.assertEqual(run_code(source, engine=engine, opt_level=2),
+                             run_code(source, engine=engine, opt_level=0), engine)
+
+    def test_inlining_errors(self):
+        """Test that inlined calls fail where the calls do, with the same error."""
+        def outcome(source, engine, level):
+            try:
+                return run_code(source, engine=engine, opt_level=level)
+            except Exception as e:
+                return f"{type(e).__name__}: {e}"
+
+        prelude = ('var l = [1]\nvar o = {x: 1}\nvar z = 0\n'
+                   'function both(p, q): { return p and q }\n'
+                   'function sub(a, b): { return b - a }\n'
+                   'function h(a): { return missing + a }\n')
+        for call in ('both(0, 1 % 0)', 'both(False, l[5])', 'both(False, o.y)',
+                     'sub(1 % 0, l[9])', 'h(1 / z)', 'sub(l[0], o.x)',
+                     # An unassigned variable fails to read, in its turn
+                     'both(0, nope)', 'sub(nope, l[9])', 'sub(nope, 1 / 0)'):
+            for engine in ('tree', 'closure', 'vm', 'py'):
+                source = prelude + f'print({call})'
+                self.assertEqual(outcome(source, engine, 2), outcome(source, engine, 0), (call, engine))
+
+    def test_loop_invariants(self):
+        """Test that -O2 computes invariant expressions once, before their loop."""
+        source = """
+        var math = require("math")
+        var n = 10
+        var r = 2.5
+        var i = 0
+        while (i < n * 2): {
+            print(math.pi * r + i)
+            i = i + 1
+        }
+        """
+        statements = self.optimized(source, level=2)
+        self.assertEqual([stmt.type for stmt in statements],
+                         ['var', 'var', 'var', 'var', 'var', 'var', 'while'])
+        area, limit, loop = statements[4], statements[5], statements[6]
+        self.assertEqual((describe(area.value), describe(limit.value)), ('math.pi * r', 'n * 2'))
+        self.assertEqual(describe(loop.condition), f"i < {limit.name}")
+        self.assertEqual(describe(loop.body[0].value), f"{area.name} + i")
+
+        # Kept: written in the loop, may be written by a call, may fail
+        # (unknown kinds, division by a variable, partial functions), not yet assigned
+        for body in ('n = n + 1\nprint(n * 2)',
+                     'bump()\nprint(n * 2)',
+                     'print(p * 2)',
+                     'print(r / n)',
+                     'print(math.sqrt(r))',
+                     'print(later * 2)'):
+            statements = self.optimized(
+                'var math = require("math")\nvar n = 1\nvar r = 2.5\n'
+                'function bump(): n = n + 1\nfunction f(p): {\nvar i = 0\n'
+                f'while (i < 5): {{\n{body}\ni = i + 1\n}}\n}}\nvar later = 1', level=2)
+            self.assertEqual(statements[4].body[1].type, 'while', body)
+        # Locals of a function cannot be assigned by the functions it calls
+        statements = self.optimized(
+            'function bump(): k = 1\n'
+            'function f(): {\nvar n = 3\nfor (i in range(4)): {\nbump()\nprint(n * 2 + i)\n}\n}', level=2)
+        self.assertEqual([stmt.type for stmt in statements[1].body], ['var', 'var', 'for_in'])
+
+    def test_common_subexpressions(self):
+        """Test that -O2 computes a pure expression repeated in straight-line code once."""
+        statements = self.optimized(
+            'var a = 3\nvar b = 4\nprint((a + b) * (a + b))\nprint(a + b)\n'
+            'a = 1\nprint(a + b)', level=2)
+        self.assertEqual([stmt.type for stmt in statements],
+                         ['var', 'var', 'var', 'print', 'print', 'assignment', 'print'])
+        shared = statements[2]
+        self.assertEqual(describe(shared.value), 'a + b')
+        self.assertEqual(describe(statements[3].value), f"{shared.name} * {shared.name}")
+        self.assertEqual(describe(statements[4].value), shared.name)
+        # a changed, so the last a + b is computed again
+        self.assertEqual(describe(statements[6].value), 'a + b')
+
+        # An expression inside a shared one is shared from the declaration,
+        # which evaluates it before the statement does
+        statements = self.optimized(
+            'var a = 3\nvar b = 4\nvar c = 5\nprint(a + b + (a + b) * c)\nprint((a + b) * c)', level=2)
+        inner, outer = statements[3:5]
+        self.assertEqual((describe(inner.value), describe(outer.value)), ('a + b', f"{inner.name} * c"))
+        self.assertEqual([describe(stmt.value) for stmt in statements[5:]],
+                         [f"{inner.name} + {outer.name}", outer.name])
+
+        # Kept: a call in between may change the operands, and an operand of
+        # unknown kind may be a list
+        for source in ('var a = 1\nfunction f(): a = 2\nprint(a * 2)\nf()\nprint(a * 2)',
+                       'function f(a): {\nprint(a * 2)\nprint(a * 2)\n}'):
+            statements = self.optimized(source, level=2)
+            self.assertEqual(sum(node.type == 'var' for node in walk(statements)), source.count('var '), source)
+
+    def test_moved_expressions_output(self):
+        """Test that hoisted and shared expressions print the same on every engine."""
+        source = """
+        var math = require("math")
+        var n = 3
+        var s = "k"
+        var big = 1000000000000000000000000000000000000000
+        function bump(): n = n + 1
+        function f(p): {
+            var total = 0
+            for (i in range(n)): total = total + p * 2 + n * 3 + math.max(n, 2)
+            return total
+        }
+        var i = 0
+        while (i < n * 2): {
+            print(s + n + ":" + i)
+            if (i == 2): bump()
+            i = i + 1
+        }
+        while (i < 0): print(big * 0.5 + u)
+        print(f(2) + f(2.5))
+        print((n - 1) * (n - 1) + math.abs(n - 1))
+        print(`${s + n}${s + n}`)
+        """
+        for engine in ('tree', 'closure', 'vm', 'py'):
+            self.assertEqual(run_code(source, engine=engine, opt_level=2),
+                             run_code(source, engine=engine, opt_level=0), engine)
+
+    def test_changes_reported(self):
+        """Test that optimize() reports what each pass changed."""
+        statements = Parser(Lexer(
+            'var d = 60 * 60 * 24\n'
+            'if (!True): print("x")\n'
+            'print("d=" + d + "s")'
+        ).scan()).parse()
+        self.assertEqual(optimize(statements, 2), [
+            ('fold-constants', '60 * 60 * 24 -> 86400'),
+            ('fold-constants', '!True -> False'),
+            ('dead-branches', 'if (False): kept 0 statements, removed 1 statement'),
+            ('string-chains', '"d=" + d + "s" -> `d=${d}s`'),
+        ])
+        self.assertEqual(optimize(statements, 2), [])
+        self.assertEqual(LEVELS[0], ())
+        with self.assertRaises(ValueError):
+            optimize(statements, 3)
+    
+    def test_string_chains(self):
+        """Test that `+` chains become Templates from their first string literal on."""
+        first, second, third = [stmt.value for stmt in self.optimized(
+            'print("n=" + n + ", " + 1.5 + " " + True)\n'
+            'print(a + b + " total: " + c + ".")\n'
+            'print(f("x " + a + "y"))'
+        )]
+        
+        self.assertIsInstance(first, Template)
+        self.assertEqual(first.strings, ['n=', ', 1.5 true'])
+        # a + b still adds first; the template is appended to its result
+        self.assertEqual((second.op, second.left.op), ('+', '+'))
+        self.assertEqual(second.right.strings, [' total: ', '.'])
+        self.assertIsInstance(third.args[0], Template)
+        
+        # Literal values of template literals are folded into the text
+        template = self.optimized('print(`${7} of ${n} ${True}`)')[0].value
+        self.assertEqual((template.strings, template.pattern), (['7 of ', ' true'], '7 of {} true'))
+    
+    def test_short_chains_kept(self):
+        """Test that short chains and chains without string literals stay as parsed."""
+        statements = self.optimized('print("a" + b)\nprint(a + b + c + d)\nprint(a + "b")')
+        self.assertTrue(all(isinstance(stmt.value, BinaryOp) for stmt in statements))
+        self.assertEqual(MIN_CHAIN_OPERANDS, 3)
+        # Only literals: folded into one string
+        constant = self.optimized('print("a" + 1 + "b")')[0].value
+        self.assertIsInstance(constant, Literal)
+        self.assertEqual(constant.value, 'a1b')
+    
+    def test_same_output(self):
+        """Test that optimized programs print what the unoptimized ones do."""
+        source = """
+        var n = 2
+        var s = ""
+        for (i in range(300)): s = s + "line " + i + "\\n"
+        print(n + 1 + " of " + n * 2 + "!" + [n, "x"] + {k: True})
+        var t = s + "end" + n
+        print(s.length + " " + t.length)
+        """
+        outputs = []
+        for level in sorted(LEVELS):
+            output = io.StringIO()
+            executor = Executor(stdout=output)
+            executor.opt_level = level
+            executor.execute(Parser(Lexer(source).scan()).parse())
+            outputs.append(output.getvalue())
+            self.assertEqual(bool(executor.optimizations), level > 0)
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(outputs[0], outputs[2])
+        self.assertEqual(outputs[1].splitlines()[0], '3 of 4![2, "x"]{k: true}')
+
+
+class TestTypeInference(unittest.TestCase):
+    """Test the type inference and specialisation of inference.py."""
+    
+    def infer(self, source, whole_program=True):
+        statements = Parser(Lexer(source).scan()).parse()
+        return statements, infer_types(statements, whole_program=whole_program)
+    
+    def test_flow_sensitive(self):
+        """Test that top-level variables have the types of their latest assignment."""
+        statements, types = self.infer(
+            'var x = 1\n'
+            'print(x + 1)\n'
+            'x = "a"\n'
+            'print(x + "b")\n'
+            'if (x == "a"): { x = 2.5 }\n'
+            'print(x)'
+        )
+        self.assertEqual(types.of(statements[1].value), {INT})
+        self.assertEqual(types.of(statements[3].value), {STRING})
+        self.assertEqual(types.of(statements[5].value), {STRING, FLOAT})
+        self.assertEqual(types.variables[None]['x'], {INT, STRING, FLOAT})
+    
+    def test_function_params(self):
+        """Test that parameters take the types of every call, unless the function escapes."""
+        statements, types = self.infer(
+            'function scale(v, k): { return v * k }\n'
+            'function twice(n): { return n + n }\n'
+            'print(twice(4))\n'
+            'print(twice(True))\n'
+            'print(scale(2, 0.5))\n'
+            'var table = [scale]'
+        )
+        self.assertEqual(format_types(types).splitlines(), [
+            'top level',
+            '  scale: function',
+            '  table: other',
+            '  twice: function',
+            'function scale(v: any, k: any) -> any',
+            'function twice(n: int | bool) -> int',
+        ])
+        # The REPL may call twice() with anything later
+        statements, types = self.infer(
+            'function twice(n): { return n + n }\nprint(twice(4))', whole_program=False)
+        self.assertEqual(types.params[statements[0]], [ANY])
+    
+    def test_specialise(self):
+        """Test that only operations with proven operand types are specialised."""
+        statements, types = self.infer(
+            'var i = 0\n'
+            'var s = ""\n'
+            'var x = 0.5\n'
+            'while (i < 10): {\n'
+            '    s = s + "ab"\n'
+            '    x = x / 2 + i\n'
+            '    i = i + 1\n'
+            '}\n'
+            'var n = 1\n'
+            'n = n + 1.5\n'
+            'print(s + i)\n'
+            'print(n + m)'
+        )
+        changes = specialise(statements, types)
+        self.assertEqual(changes, [
+            'i < 10 on int operands',
+            's + "ab" on string operands',
+            'x / 2 + i on float operands',
+            'x / 2 on float operands',
+            'i + 1 on int operands',
+            'n + 1.5 on float operands',
+        ])
+        proven = [node for node in walk(statements) if isinstance(node, ProvenBinaryOp)]
+        self.assertEqual([node.operand_type for node in proven],
+                         ['int', 'string', 'float', 'float', 'int', 'float'])
+        # s + i may convert i; m is never assigned
+        self.assertEqual(type(statements[-2].value), BinaryOp)
+        self.assertEqual(type(statements[-1].value), BinaryOp)
+    
+    def test_same_output(self):
+        """Test that specialised programs print what unspecialised ones do on every engine."""
+        source = """
+        var i = 0
+        var total = 0
+        var half = 0.0
+        var flags = 0
+        var text = ""
+        function avg(a, b): { return (a + b) / 2 }
+        while (i < 20): {
+            total = total + i * 100000000000000000000
+            half = half + i / 4.0 + avg(i, 3)
+            flags = flags + (i > 10)
+            text = text + "ab"
+            i = i + 1
+        }
+        print(total / 7)
+        print(half)
+        print(flags + True)
+        print(text.length + " " + avg(1.5, 2))
+        print(7 / 2 + -7 / 2)
+        """
+        for engine in ('tree', 'closure', 'vm', 'py'):
+            self.assertEqual(run_code(source, engine=engine, opt_level=2),
+                             run_code(source, engine=engine, opt_level=0), engine)
+        executor = Executor(stdout=io.StringIO())
+        executor.opt_level = 2
+        executor.whole_program = True
+        executor.execute(Parser(Lexer(source).scan()).parse())
+        self.assertIn('specialise-types', dict(executor.optimizations))
+    
+    def test_repl_lines(self):
+        """Test that a later REPL line may change the types an earlier one saw."""
+        output = io.StringIO()
+        executor = Executor(stdout=output)
+        executor.opt_level = 2
+        for line in ('var n = 1', 'function add(a): { return n + a }', 'print(add(2))',
+                     'n = "x"', 'print(add(2))'):
+            executor.execute(Parser(Lexer(line).scan()).parse())
+        self.assertEqual(output.getvalue().split(), ['3', 'x2'])
+    
+    def test_types_option(self):
+        """Test that `novax --types` prints the types and the specialised operations."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'types.nova'
+            path.write_text('var n = 0\n'
+                            'for (var i = 0 : i < 3 : i = i + 1): { n = n + i * 0.5 }\n'
+                            'print(n)\n')
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                self.assertEqual(main(['-O2', '--types', str(path)]), 0)
+        self.assertEqual(output.getvalue().splitlines(), [
+            'top level',
+            '  i: int',
+            '  n: int | float',
+            'specialised (4)',
+            '  i < 3 on int operands',
+            '  i + 1 on int operands',
+            '  n + i * 0.5 on float operands',
+            '  i * 0.5 on float operands',
+        ])
+
+
+class TestProfiles(unittest.TestCase):
+    """Test recording runtime profiles and the optimisations they guide."""
+    
+    def parse(self, source):
+        return Parser(Lexer(source).scan()).parse()
+    
+    def record(self, source):
+        statements = self.parse(source)
+        executor = Executor(stdout=io.StringIO())
+        profile = executor.record_profile()
+        executor.execute(statements)
+        return statements, profile, executor.stdout.getvalue()
+    
+    def test_record(self):
+        """Test that a profile counts nodes and records value types and call targets."""
+        source = (
+            'function half(n): { return n / 2 }\n'
+            'function down(n): { if (n < 1): { return n } return down(half(n)) }\n'
+            'var x = 1\n'
+            'for (i in range(4)): { x = x + i }\n'
+            'x = x + 0.5\n'
+            'print(down(x))'
+        )
+        statements, profile, output = self.record(source)
+        self.assertEqual(output.split(), ['0.9375'])
+        loop = statements[3]
+        self.assertEqual((profile.count(loop), profile.count(loop.body[0])), (1, 4))
+        self.assertTrue(profile.is_hot_loop(loop))
+        self.assertEqual(profile.types_of(loop.body[0].value.left), {'int'})
+        self.assertEqual(profile.types_of(statements[4].value), {'float'})
+        # The tail calls of down() count too
+        tail = statements[1].body[1].value
+        self.assertEqual(profile.count(tail), 3)
+        self.assertEqual(profile.targets[tail], {statements[1]})
+        self.assertEqual(profile.targets[tail.args[0]], {statements[0]})
+        
+        # Profiles name nodes by position, so they apply to a fresh parse
+        data = profile.to_json(statements)
+        again = self.parse(source)
+        self.assertEqual(Profile.from_json(data, again).to_json(again), data)
+        with self.assertRaises(ValueError):
+            Profile.from_json(data, self.parse('print(1)'))
+    
+    def test_guided_passes(self):
+        """Test that inlining and hoisting follow the profile."""
+        source = (
+            'function cold(a): { return a + 1 }\n'
+            'function big(a, b): { return a * b + a * 2 + b * 3 + a * a + b * b + a - b }\n'
+            'var n = 2\n'
+            'var t = 0\n'
+            f'for (var i = 0 : i < {HOT_COUNT} : i = i + 1): {{ t = t + big(i, n) + n * 3 }}\n'
+            'var j = 0\n'
+            'while (j < 1): { j = j + n * 4 }\n'
+            'if (t < 0): { print(cold(t)) }\n'
+            'print(t)'
+        )
+        recorded, profile, output = self.record(source)
+        self.assertGreater(sum(1 for _ in walk(recorded[1].body[0].value)), INLINE_BUDGET)
+        
+        def optimized(guided):
+            statements = self.parse(source)
+            guide = Profile.from_json(profile.to_json(recorded), statements) if guided else None
+            changes = [(name, re.sub(r'\d+tmp', 'tmp', change))
+                       for name, change in optimize(statements, 2, guide)]
+            return statements, changes
+        
+        self.assertEqual(optimized(False)[1], [
+            ('inline-functions', 'cold(t) -> t + 1'),
+            ('hoist-invariants', 'n * 3 -> tmp, before the for loop'),
+            ('hoist-invariants', 'n * 4 -> tmp, before the while loop'),
+        ])
+        # cold() never ran and the while loop ran once; big() is hot
+        statements, changes = optimized(True)
+        self.assertEqual(changes, [
+            ('inline-functions', 'big(i, n) -> i * n + i * 2 + n * 3 + i * i + n * n + i - n'),
+            ('hoist-invariants', 'n * 3 -> tmp, before the for loop'),
+            ('hoist-invariants', 'n * n -> tmp, before the for loop'),
+        ])
+        result = io.StringIO()
+        executor = Executor(stdout=result)
+        executor.opt_level = 0
+        executor.execute(statements)
+        self.assertEqual(result.getvalue(), output)
+    
+    def test_quicken_profiled(self):
+        """Test that the tree walker quickens what the profile saw before it runs."""
+        source = (
+            'function add(a, b): { return a + b }\n'
+            'var xs = [1, 2.5, 3]\n'
+            'print(add(xs[0], xs[2]))\n'
+            'print(add(xs[1], xs[0]))\n'
+            'var k = xs[0]\n'
+            'print(k * 2 + k)'
+        )
+        recorded, profile, output = self.record(source)
+        statements = self.parse(source)
+        executor = Executor(stdout=io.StringIO())
+        executor.profile = Profile.from_json(profile.to_json(recorded), statements)
+        executor.execute(statements)
+        
+        self.assertEqual(executor.stdout.getvalue(), output)
+        self.assertEqual([change for name, change in executor.optimizations], [
+            'a + b kept generic (float, int operands)',
+            'k * 2 + k -> IntAddExprExpr',
+            'k * 2 -> IntMulNameConst',
+        ])
+        # Quickened nodes never ran generic; a + b never quickened
+        self.assertEqual([(stats['state'], stats['hits'], stats['generic'])
+                          for stats in executor.quickening_stats()],
+                         [('generic', 0, 2), ('IntAddExprExpr', 1, 0), ('IntMulNameConst', 1, 0)])
+    
+    def test_profile_files(self):
+        """Test run_code()'s profile_out and profile_in on every engine."""
+        source = """
+        function scale(v): { return v * 3 + 1 }
+        var total = 0
+        for (i in range(200)): { total = total + scale(i) }
+        print(total)
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = str(Path(directory) / 'prof.json')
+            self.assertEqual(run_code(source, engine='vm', profile_out=path), '59900\n')
+            for engine in ('tree', 'closure', 'vm', 'py'):
+                self.assertEqual(run_code(source, engine=engine, opt_level=2, profile_in=path),
+                                 '59900\n', engine)
+            statements = self.parse(source)
+            self.assertGreater(sum(load_profile(path, statements).counts.values()), 200)
+            with self.assertRaises(RuntimeError):
+                run_code('print(1)', profile_in=path)
+            with self.assertRaises(RuntimeError):
+                run_code('print(1)', profile_in=str(Path(directory) / 'missing.json'))
+            save_profile(Profile(), path, statements)
+            self.assertEqual(load_profile(path, statements).counts, {})
+
 
 class TestExecutor(unittest.TestCase):
     """Test the executor (evaluation)."""
     
+    executor_class = Executor
+    
     def test_arithmetic(self):
         """Test arithmetic operations."""
         output = io.StringIO()
-        executor = Executor(stdout=output)
+        executor = self.executor_class(stdout=output)
         
         source = "print(2 + 3)"
         lexer = Lexer(source)
@@ -153,7 +1256,7 @@ class TestExecutor(unittest.TestCase):
     def test_variables(self):
         """Test variable assignment and retrieval."""
         output = io.StringIO()
-        executor = Executor(stdout=output)
+        executor = self.executor_class(stdout=output)
         
         source = "var x = 10\nprint(x)"
         lexer = Lexer(source)
@@ -167,7 +1270,7 @@ class TestExecutor(unittest.TestCase):
     def test_functions(self):
         """Test function definition and calls."""
         output = io.StringIO()
-        executor = Executor(stdout=output)
+        executor = self.executor_class(stdout=output)
         
         source = """
         function add(a, b):
@@ -187,7 +1290,7 @@ class TestExecutor(unittest.TestCase):
     def test_conditionals(self):
         """Test if/else statements."""
         output = io.StringIO()
-        executor = Executor(stdout=output)
+        executor = self.executor_class(stdout=output)
         
         source = """
         var age = 20
@@ -208,7 +1311,7 @@ class TestExecutor(unittest.TestCase):
     def test_while_loop(self):
         """Test while loops."""
         output = io.StringIO()
-        executor = Executor(stdout=output)
+        executor = self.executor_class(stdout=output)
         
         source = """
         var i = 1
@@ -229,7 +1332,7 @@ class TestExecutor(unittest.TestCase):
     def test_for_loop(self):
         """Test for loops."""
         output = io.StringIO()
-        executor = Executor(stdout=output)
+        executor = self.executor_class(stdout=output)
         
         source = """
         for (var i = 1 : i <= 3 : i = i + 1): {
@@ -248,7 +1351,7 @@ class TestExecutor(unittest.TestCase):
     def test_recursion(self):
         """Test recursive functions."""
         output = io.StringIO()
-        executor = Executor(stdout=output)
+        executor = self.executor_class(stdout=output)
         
         source = """
         function factorial(n):
@@ -268,10 +1371,505 @@ class TestExecutor(unittest.TestCase):
         
         self.assertEqual(output.getvalue().strip(), "120")
     
+    def test_rebound_function(self):
+        """Test calling through a name that is rebound to another function."""
+        output = io.StringIO()
+        executor = self.executor_class(stdout=output)
+        
+        source = """
+        function one(x): { return 1 }
+        function two(x): { return x + 2 }
+        function three(x, y): { return 3 }
+        var f = one
+        for (var i = 0 : i < 3 : i = i + 1): {
+            print(f(i))
+            f = two
+        }
+        f = three
+        f(0)
+        """
+        statements = Parser(Lexer(source).scan()).parse()
+        
+        with self.assertRaises(TypeError):
+            executor.execute(statements)
+        self.assertEqual(output.getvalue().split(), ["1", "3", "4"])
+    
+    def test_break_continue(self):
+        """Test break and continue in while and for loops, including nested ones."""
+        output = io.StringIO()
+        executor = self.executor_class(stdout=output)
+        
+        source = """
+        function firstOdd(limit): {
+            var i = 0
+            while (True): {
+                i = i + 1
+                if (i % 2 == 0): { continue }
+                if (i > limit): { return i }
+            }
+        }
+        var total = 0
+        for (var i = 0 : i < 10 : i = i + 1): {
+            if (i == 3): { continue }
+            if (i == 7): { break }
+            for (var j = 0 : j < 10 : j = j + 1): {
+                if (j > i): { break }
+                total = total + j
+            }
+        }
+        print(total)
+        print(i)
+        print(firstOdd(6))
+        """
+        executor.execute(Parser(Lexer(source).scan()).parse())
+        self.assertEqual(output.getvalue().split(), ["50", "7", "7"])
+    
+    def test_for_in(self):
+        """Test for-in loops over range() and strings, with break, continue and return."""
+        output = io.StringIO()
+        executor = self.executor_class(stdout=output)
+        
+        source = """
+        function find(n, target): {
+            for (i in range(n)): {
+                for (var j in range(i, n)): {
+                    if (i * j == target): { return i + ":" + j }
+                }
+            }
+            return "none"
+        }
+        var total = 0
+        for (i in range(0, 10)): {
+            if (i == 7): { break }
+            if (i % 2 == 0): { continue }
+            total = total + i
+        }
+        print(total)
+        print(i)
+        print("<" + find(10, 12) + find(3, 50) + ">")
+        for (c in "ab"): print(c)
+        for (k in range(10, 0, -4)): print(k)
+        for (k in range(3, 0)): print("never")
+        print(k)
+        """
+        executor.execute(Parser(Lexer(source).scan()).parse())
+        self.assertEqual(output.getvalue().split(),
+                         ['9', '7', '<2:6none>', 'a', 'b', '10', '6', '2', '2'])
+    
+    def test_lists(self):
+        """Test list literals, indexing, slicing, assignment and printing."""
+        output = io.StringIO()
+        executor = self.executor_class(stdout=output)
+        
+        source = """
+        var a = [3, 1, 2]
+        a[1] = a[0] + a[-1]
+        print(a)
+        print(a[1:] + a[:1])
+        print(a.length)
+        var grid = [[1, 2], [3, 4]]
+        grid[0][1] = "x"
+        print(grid)
+        print("abcdef"[2:4] + "xyz"[0])
+        print("items: " + [True, 1.5, "s"])
+        var squares = []
+        for (i in range(4)): squares.push(i * i)
+        print(squares)
+        print([] == [] and [1, 2] != [2, 1])
+        """
+        executor.execute(Parser(Lexer(source).scan()).parse())
+        self.assertEqual(output.getvalue().splitlines(), [
+            '[3, 5, 2]', '[5, 2, 3]', '3', '[[1, "x"], [3, 4]]', 'cdx',
+            'items: [true, 1.5, "s"]', '[0, 1, 4, 9]', 'true',
+        ])
+    
+    def test_list_methods(self):
+        """Test the bulk list methods and their NovaScript callbacks."""
+        output = io.StringIO()
+        executor = self.executor_class(stdout=output)
+        
+        source = """
+        function double(x): { return x * 2 }
+        function odd(x): { return x % 2 == 1 }
+        function add(x, y): { return x + y }
+        function descending(x, y): { return y - x }
+        memo function square(n): {
+            print("square " + n)
+            return n * n
+        }
+        var a = [3, 1, 2, 5]
+        print(a.map(double))
+        print(a.filter(odd))
+        print(a.reduce(add) + ", " + a.reduce(add, 100))
+        print(a.map(square).map(square).sum())
+        print([1, 1, 3].map(square))
+        print(a.sort(descending).join("-") + " " + a.sort().join())
+        print(a.indexOf(5) + " " + a.indexOf(4))
+        print(a.push(8, 9) + " " + a.pop() + " " + a.length)
+        """
+        executor.execute(Parser(Lexer(source).scan()).parse())
+        self.assertEqual(output.getvalue().splitlines(), [
+            '[6, 2, 4, 10]', '[3, 1, 5]', '11, 111',
+            'square 3', 'square 1', 'square 2', 'square 5', 'square 9', 'square 4', 'square 25',
+            '723', '[1, 1, 9]', '5-3-2-1 1,2,3,5', '3 -1', '6 9 5',
+        ])
+    
+    def test_objects(self):
+        """Test object literals, property reads and writes, methods and printing."""
+        output = io.StringIO()
+        executor = self.executor_class(stdout=output)
+        
+        source = """
+        function norm(p): { return p.x * p.x + p.y * p.y }
+        function twice(v): { return v * 2 }
+        var p = {x: 3, y: 4}
+        print(norm(p) + " " + norm({x: 1, y: 1}))
+        p.x = 0
+        p.label = "origin"
+        print(p)
+        var e = {}
+        e.ops = {double: twice}
+        print(e.ops.double(21) + " " + {name: "s", "two words": [1, True], inner: {}})
+        var points = []
+        for (i in range(4)): points.push({x: i, y: i * i})
+        print(points.map(norm).sum())
+        print({x: 1} == {x: 1} and p == p)
+        """
+        executor.execute(Parser(Lexer(source).scan()).parse())
+        self.assertEqual(output.getvalue().splitlines(), [
+            '25 2', '{x: 0, y: 4, label: "origin"}',
+            '42 {name: "s", "two words": [1, true], inner: {}}', '112', 'false',
+        ])
+    
+    def test_object_shapes(self):
+        """Test that objects share shapes and member sites cache (shape, offset)."""
+        output = io.StringIO()
+        executor = self.executor_class(stdout=output)
+        
+        source = """
+        function make(i): { return {x: i, y: 0} }
+        var total = 0
+        for (i in range(10)): {
+            var p = make(i)
+            p.y = i
+            total = total + p.x + p.y
+        }
+        var q = make(1)
+        q.z = 5
+        print(total + q.x + q.z)
+        """
+        statements = Parser(Lexer(source).scan()).parse()
+        executor.execute(statements)
+        self.assertEqual(output.getvalue().split(), ['96'])
+        
+        sites = [node.cache for node in walk(statements) if isinstance(node, MemberAccess)]
+        shape = shape_of(['x', 'y'])
+        # p.y = i, p.x and p.y each filled their cache once
+        self.assertEqual([(cache.shape, cache.misses) for cache in sites[:3]],
+                         [(shape, 1), (shape, 1), (shape, 1)])
+        # q.z = 5 added a property: q moved on to the next shape
+        self.assertIs(shape.transitions['z'], shape_of(['x', 'y', 'z']))
+        self.assertIs(sites[5].shape, shape.transitions['z'])
+    
+    def test_templates(self):
+        """Test template literals with values of every type."""
+        output = io.StringIO()
+        executor = self.executor_class(stdout=output)
+        
+        source = """
+        function double(x): { return x * 2 }
+        var count = 3
+        var items = [1, "two", True]
+        print(`Count: ${count} of ${double(count) + 1}`)
+        print(`${items} ${ {a: 1} } ${count > 1}, {} 100% \\${x} \\`q\\``)
+        var rows = []
+        for (i in range(3)): rows.push(`row ${i}: ${"#" + i * i}`)
+        print(rows.join("; "))
+        """
+        executor.execute(Parser(Lexer(source).scan()).parse())
+        self.assertEqual(output.getvalue().splitlines(), [
+            'Count: 3 of 7',
+            '[1, "two", true] {a: 1} true, {} 100% ${x} `q`',
+            'row 0: #0; row 1: #1; row 2: #4',
+        ])
+    
+    def test_ropes(self):
+        """Test that long concatenations behave as strings on every path."""
+        output = io.StringIO()
+        executor = self.executor_class(stdout=output)
+        
+        source = """
+        var s = ""
+        var t = "start"
+        for (i in range(200)): {
+            s = s + "ab"
+            t = t + i
+        }
+        var u = s + "!"
+        print([s.length, u.length, u[0], u[-1], u[398:]])
+        print([s == u[:400], s != u, u > s, s + s == u[:400] + s])
+        var parts = [s, u]
+        print([parts.join("-").length, parts.indexOf(u), t.length])
+        var copy = ""
+        for (c in s): { copy = copy + c }
+        print(copy == s)
+        """
+        executor.execute(Parser(Lexer(source).scan()).parse())
+        self.assertEqual(output.getvalue().splitlines(), [
+            '[400, 401, "a", "!", "ab!"]',
+            '[true, true, true, true]',
+            '[802, 1, 495]',
+            'true',
+        ])
+    
+    def test_tail_calls(self):
+        """Test that self tail calls run in constant stack far past the recursion limit."""
+        output = io.StringIO()
+        executor = self.executor_class(stdout=output)
+        
+        source = """
+        function count(n, acc): {
+            if (n == 0): { return acc }
+            var step = 1
+            if (n % 2 == 0): { return count(n - step, acc + 1) }
+            else: { return count(n - 1, acc + step) }
+        }
+        print(count(DEPTH, 0))
+        """
+        depth = sys.getrecursionlimit() * 5
+        executor.execute(Parser(Lexer(source.replace('DEPTH', str(depth))).scan()).parse())
+        self.assertEqual(output.getvalue().strip(), str(depth))
+    
+    def test_mutual_tail_calls(self):
+        """Test that tail calls between different functions are eliminated too."""
+        output = io.StringIO()
+        executor = self.executor_class(stdout=output)
+        
+        source = """
+        function isEven(n): {
+            if (n == 0): { return True }
+            return isOdd(n - 1)
+        }
+        function isOdd(n): {
+            if (n == 0): { return False }
+            return isEven(n - 1)
+        }
+        print(isEven(DEPTH))
+        """
+        depth = sys.getrecursionlimit() * 5 + 1
+        executor.execute(Parser(Lexer(source.replace('DEPTH', str(depth))).scan()).parse())
+        self.assertEqual(output.getvalue().strip(), "false")
+
+    def test_deep_recursion(self):
+        """Test that non-tail recursion past the Python stack fails with a NovaScript error."""
+        source = """
+        function count(n): {
+            if (n == 0): { return 0 }
+            return 1 + count(n - 1)
+        }
+        print(count(DEPTH))
+        """
+        depth = sys.getrecursionlimit() * 5
+        output = io.StringIO()
+        executor = self.executor_class(stdout=output)
+        with self.assertRaisesRegex(RecursionError, "NovaScript calls that are not tail calls") as caught:
+            executor.execute(Parser(Lexer(source.replace('DEPTH', str(depth))).scan()).parse())
+        self.assertTrue(caught.exception.__suppress_context__)
+        # The executor is left in a state to run more code
+        executor.execute(Parser(Lexer("print(count(3))").scan()).parse())
+        self.assertEqual(output.getvalue().strip(), "3")
+
+    def test_memo_functions(self):
+        """Test that memo functions compute each result once and count hits."""
+        output = io.StringIO()
+        executor = self.executor_class(stdout=output)
+        
+        source = """
+        memo function fib(n): {
+            if (n < 2): { return n }
+            return fib(n - 1) + fib(n - 2)
+        }
+        memo function loud(x): {
+            print("computing " + x)
+            return x * 2
+        }
+        print(fib(80))
+        print(loud(3) + loud(3) + loud(3.0))
+        """
+        executor.execute(Parser(Lexer(source).scan()).parse())
+        self.assertEqual(output.getvalue().split("\n")[:-1], [
+            "23416728348467685", "computing 3", "computing 3.0", "18.0",
+        ])
+        stats = executor.memo_stats()
+        self.assertEqual((stats['fib']['hits'], stats['fib']['misses']), (78, 81))
+        self.assertEqual((stats['loud']['hits'], stats['loud']['misses']), (1, 2))
+    
+    def test_memoize_pure(self):
+        """Test that memoize_pure caches pure functions only, within memo_size."""
+        output = io.StringIO()
+        executor = self.executor_class(stdout=output)
+        executor.memoize_pure = True
+        executor.memo_size = 10
+        
+        source = """
+        function fib(n): {
+            if (n < 2): { return n }
+            return fib(n - 1) + fib(n - 2)
+        }
+        function show(n): { print(n) }
+        show(fib(30))
+        show(fib(30))
+        """
+        executor.execute(Parser(Lexer(source).scan()).parse())
+        self.assertEqual(output.getvalue().split(), ["832040", "832040"])
+        stats = executor.memo_stats()
+        self.assertEqual(list(stats), ['fib'])
+        self.assertEqual(stats['fib']['size'], 10)
+        self.assertEqual(stats['fib']['evictions'], 21)
+    
+    def test_memo_tail_calls(self):
+        """Test that tail calls into memo functions still run in constant stack."""
+        output = io.StringIO()
+        executor = self.executor_class(stdout=output)
+        executor.memoize_pure = True
+        
+        source = """
+        function count(n, acc): {
+            if (n == 0): { return acc }
+            return count(n - 1, acc + 1)
+        }
+        print(count(DEPTH, 0))
+        print(count(DEPTH, 0))
+        """
+        depth = sys.getrecursionlimit() * 5
+        executor.execute(Parser(Lexer(source.replace('DEPTH', str(depth))).scan()).parse())
+        self.assertEqual(output.getvalue().split(), [str(depth)] * 2)
+        self.assertEqual(executor.memo_stats()['count']['hits'], 1)
+
+    def test_short_circuit(self):
+        """Test that 'and' and 'or' evaluate their right side only when needed."""
+        output = io.StringIO()
+        executor = self.executor_class(stdout=output)
+
+        source = """
+        var calls = 0
+        function loud(value): {
+            calls = calls + 1
+            return value
+        }
+        print(False and loud(1))
+        print(0 and loud(1))
+        print(True and loud(0))
+        print(1 or loud(2))
+        print("" or loud("x"))
+        print(0 or 5)
+        print(0 or False)
+        var guarded = 0
+        for (var i = 0 : i < 10 : i = i + 1): {
+            if (i % 5 != 0 or loud(False)): { guarded = guarded + 1 }
+            if (i > 7 and loud(True)): { guarded = guarded + 10 }
+        }
+        print(guarded)
+        print(calls)
+        """
+        executor.execute(Parser(Lexer(source).scan()).parse())
+        self.assertEqual(output.getvalue().split(),
+                         ['false', 'false', 'false', '1', 'x', '5', 'false', '28', '6'])
+
+    def test_member_inline_caches(self):
+        """Test that member sites cache their object until it is rebound."""
+        output = io.StringIO()
+        executor = self.executor_class(stdout=output)
+
+        source = """
+        var math = require("math")
+        function root(x): { return math.sqrt(x) }
+        var total = 0
+        for (var i = 0 : i < 20 : i = i + 1): { total = total + root(16) + math.pi }
+        print(root(9))
+        math = require("math")
+        print(root(25))
+        math = 7
+        print(root(4))
+        """
+        statements = Parser(Lexer(source).scan()).parse()
+        with self.assertRaisesRegex(TypeError, "Cannot call method 'sqrt' on non-object type: int"):
+            executor.execute(statements)
+        self.assertEqual(output.getvalue().split(), ['3.0', '5.0'])
+
+        sites = {node.member: node.cache for node in walk(statements)
+                 if isinstance(node, (MemberAccess, MemberCall))}
+        self.assertEqual(sites['pi'].misses, 1)
+        # Filled by the first module, then by the second one
+        self.assertEqual(sites['sqrt'].misses, 2)
+
+    def test_local_shadows_global(self):
+        """Test that a local falls back to the global until it is bound."""
+        output = io.StringIO()
+        executor = self.executor_class(stdout=output)
+        
+        source = """
+        var x = 1
+        function f(): {
+            print(x)
+            x = x + 1
+            var x = x * 10
+            x = x + 1
+            return x
+        }
+        print(f())
+        print(x)
+        """
+        executor.execute(Parser(Lexer(source).scan()).parse())
+        self.assertEqual(output.getvalue().split(), ["1", "21", "2"])
+
+    def test_parameter_shadows_global(self):
+        """Test that a parameter hides the global of its name, which top-level code still sees."""
+        output = io.StringIO()
+        executor = self.executor_class(stdout=output)
+
+        source = """
+        var n = 100
+        function f(n): {
+            n = n + 1
+            n = n * 2
+            if (n > 5): { return n - 1 }
+            return n
+        }
+        print(f(1))
+        print(f(5))
+        n = n - 1
+        print(n)
+        """
+        executor.execute(Parser(Lexer(source).scan()).parse())
+        self.assertEqual(output.getvalue().split(), ["4", "11", "99"])
+        with self.assertRaisesRegex(NameError, "Undefined variable: m"):
+            executor.execute(Parser(Lexer("m = m + 1").scan()).parse())
+
+    def test_call_site_callee_changes(self):
+        """Test a call site whose callee is redefined, with and without a single return."""
+        output = io.StringIO()
+        executor = self.executor_class(stdout=output)
+
+        source = """
+        var total = ""
+        function pick(a, b): { return a + b }
+        for (var i = 0 : i < 3 : i = i + 1): {
+            total = total + pick(i, 10) + " "
+            function pick(a, b): {
+                var c = a * b
+                return c - 1
+            }
+        }
+        print(total)
+        """
+        executor.execute(Parser(Lexer(source).scan()).parse())
+        self.assertEqual(output.getvalue().split(), ["10", "9", "19"])
+
     def test_string_concatenation(self):
         """Test string concatenation."""
         output = io.StringIO()
-        executor = Executor(stdout=output)
+        executor = self.executor_class(stdout=output)
         
         source = """
         var name = "World"
@@ -288,7 +1886,7 @@ class TestExecutor(unittest.TestCase):
     def test_member_access(self):
         """Test member access (e.g., math.sqrt())."""
         output = io.StringIO()
-        executor = Executor(stdout=output)
+        executor = self.executor_class(stdout=output)
         
         source = """
         var math = require("math")
@@ -305,7 +1903,7 @@ class TestExecutor(unittest.TestCase):
     def test_logical_operators(self):
         """Test logical operators (and, or, not)."""
         output = io.StringIO()
-        executor = Executor(stdout=output)
+        executor = self.executor_class(stdout=output)
         
         source = """
         if (True and True): {
@@ -333,10 +1931,12 @@ class TestExecutor(unittest.TestCase):
 class TestStdlib(unittest.TestCase):
     """Test standard library modules."""
     
+    engine = 'tree'
+    
     def test_math_module(self):
         """Test math module functions."""
         source = 'var math = require("math")\nprint(math.sqrt(4))\nprint(math.pow(2, 3))\nprint(math.abs(5))'
-        result = run_code(source)
+        result = run_code(source, engine=self.engine)
         
         self.assertIn("2.0", result)
         self.assertIn("8", result)
@@ -345,7 +1945,7 @@ class TestStdlib(unittest.TestCase):
     def test_console_module(self):
         """Test console module."""
         source = 'var console = require("console")\nprint("success")'
-        result = run_code(source)
+        result = run_code(source, engine=self.engine)
         
         # Just verify console module loads without error
         self.assertIn("success", result)
@@ -354,10 +1954,12 @@ class TestStdlib(unittest.TestCase):
 class TestRunFunctions(unittest.TestCase):
     """Test the high-level run_code and run_file functions."""
     
+    engine = 'tree'
+    
     def test_run_code(self):
         """Test run_code() function."""
         source = 'var x = 5\nprint(x * 2)'
-        result = run_code(source)
+        result = run_code(source, engine=self.engine)
         self.assertEqual(result.strip(), "10")
     
     def test_run_code_with_error(self):
@@ -365,7 +1967,7 @@ class TestRunFunctions(unittest.TestCase):
         source = 'var x = 5\nprint(x +'  # Incomplete
         
         with self.assertRaises(RuntimeError):
-            run_code(source)
+            run_code(source, engine=self.engine)
     
     def test_run_file(self, temp_file='test_temp.nova'):
         """Test run_file() function."""
@@ -374,7 +1976,7 @@ class TestRunFunctions(unittest.TestCase):
             with open(temp_file, 'w') as f:
                 f.write('var x = 42\nprint(x)')
             
-            result = run_file(temp_file)
+            result = run_file(temp_file, engine=self.engine)
             self.assertEqual(result.strip(), "42")
         finally:
             # Clean up
@@ -390,19 +1992,21 @@ class TestRunFunctions(unittest.TestCase):
 class TestErrorHandling(unittest.TestCase):
     """Test error handling."""
     
+    engine = 'tree'
+    
     def test_undefined_variable(self):
         """Test error when using undefined variable."""
         source = 'print(undefined_var)'
         
         with self.assertRaises(RuntimeError):
-            run_code(source)
+            run_code(source, engine=self.engine)
     
     def test_undefined_function(self):
         """Test error when calling undefined function."""
         source = 'nonexistent_func()'
         
         with self.assertRaises(RuntimeError):
-            run_code(source)
+            run_code(source, engine=self.engine)
     
     def test_wrong_argument_count(self):
         """Test error with wrong number of function arguments."""
@@ -415,21 +2019,209 @@ class TestErrorHandling(unittest.TestCase):
         """
         
         with self.assertRaises(RuntimeError):
-            run_code(source)
+            run_code(source, engine=self.engine)
     
     def test_invalid_module(self):
         """Test error when requiring non-existent module."""
         source = 'var unknown = require("unknown_module")'
         
         with self.assertRaises((RuntimeError, ModuleNotFoundError)):
-            run_code(source)
+            run_code(source, engine=self.engine)
+    
+    def test_for_in_errors(self):
+        """Test errors from iterating a non-iterable and from bad range() arguments."""
+        for source in ('for (x in 5): print(x)', 'for (x in range(1.5)): print(x)',
+                       'print(range())', 'print(range(1, 2, 3, 4))', 'for (x in range(0, 5, 0)): print(x)'):
+            with self.assertRaises(RuntimeError):
+                run_code(source, engine=self.engine)
+        
+        # Calls to range() would never reach a function of that name
+        for source in ('function range(a, b): return b - a\nprint(range(3, 10))',
+                       'memo function require(a): return a'):
+            with self.assertRaisesRegex(RuntimeError, "Cannot redefine built-in function"):
+                run_code(source, engine=self.engine)
+    
+    def test_list_errors(self):
+        """Test errors from bad indexes, list methods and callbacks."""
+        for source in ('print([1][5])', 'print(5[0])', 'print([1]["a"])', 'var s = "ab"\ns[0] = "c"',
+                       'print([1].map(3))', 'print([].pop())', 'print([1, 2][0:"a"])',
+                       'function f(a, b): { return a }\nprint([1].map(f))'):
+            with self.assertRaises(RuntimeError):
+                run_code(source, engine=self.engine)
+        
+        with self.assertRaises(AttributeError):
+            run_code('print([1].nope(2))', engine=self.engine)
+    
+    def test_object_errors(self):
+        """Test errors from assigning members of non-objects and calling non-functions."""
+        for source in ('var n = 5\nn.x = 1', 'var m = require("math")\nm.pi = 3',
+                       'var o = {x: 1}\no.x()', 'for (k in {x: 1}): print(k)', 'print({x: 1 y: 2})'):
+            with self.assertRaises(RuntimeError):
+                run_code(source, engine=self.engine)
+        
+        with self.assertRaises(AttributeError):
+            run_code('var o = {x: 1}\nprint(o.y)', engine=self.engine)
+    
+    def test_template_errors(self):
+        """Test errors in template literals and their expressions."""
+        for source in ('print(`open', 'print(`${1 +}`)', 'print(`${}`)', 'print(`${missing}`)'):
+            with self.assertRaises(RuntimeError):
+                run_code(source, engine=self.engine)
     
     def test_syntax_error(self):
         """Test handling of syntax errors."""
         source = 'var x = ;'  # Invalid syntax
         
         with self.assertRaises(RuntimeError):
-            run_code(source)
+            run_code(source, engine=self.engine)
+
+
+class TestClosureExecutor(TestExecutor):
+    """Run the executor tests on the closure-compilation engine."""
+    
+    executor_class = ClosureExecutor
+    
+    def test_compiled_function_reuse(self):
+        """Test that function bodies are compiled once, at definition."""
+        output = io.StringIO()
+        executor = self.executor_class(stdout=output)
+        source = "function sq(x): { return x * x }\nprint(sq(3))\nprint(sq(4))"
+        executor.execute(Parser(Lexer(source).scan()).parse())
+        
+        self.assertEqual(output.getvalue().split(), ["9", "16"])
+        self.assertEqual(len(executor.functions), 1)
+
+
+class TestClosureStdlib(TestStdlib):
+    """Run the standard library tests on the closure-compilation engine."""
+    
+    engine = 'closure'
+
+
+class TestClosureRunFunctions(TestRunFunctions):
+    """Run the run_code/run_file tests on the closure-compilation engine."""
+    
+    engine = 'closure'
+
+
+class TestClosureErrorHandling(TestErrorHandling):
+    """Run the error handling tests on the closure-compilation engine."""
+    
+    engine = 'closure'
+
+
+class TestVMExecutor(TestExecutor):
+    """Run the executor tests on the bytecode VM."""
+    
+    executor_class = VMExecutor
+    
+    def test_deep_recursion(self):
+        """Test that recursion depth is bounded by max_depth, not Python's limit."""
+        source = """
+        function count(n): {
+            if (n == 0): { return 0 }
+            return 1 + count(n - 1)
+        }
+        print(count(DEPTH))
+        """
+        depth = sys.getrecursionlimit() * 5
+        output = io.StringIO()
+        executor = self.executor_class(stdout=output)
+        executor.execute(Parser(Lexer(source.replace('DEPTH', str(depth))).scan()).parse())
+        self.assertEqual(output.getvalue().strip(), str(depth))
+        
+        executor = self.executor_class(stdout=io.StringIO(), max_depth=100)
+        with self.assertRaises(RecursionError):
+            executor.execute(Parser(Lexer(source.replace('DEPTH', '200')).scan()).parse())
+    
+    def test_disassemble(self):
+        """Test the bytecode listing of a program and its functions."""
+        source = "function inc(x): { return x + 1 }\nvar y = 1\nwhile (y < 3): { y = inc(y) }"
+        compiler = BytecodeCompiler()
+        code = compiler.compile_program(Parser(Lexer(source).scan()).parse())
+        listing = disassemble(code, compiler.functions).splitlines()
+        
+        self.assertEqual(listing[0], "Disassembly of <module>:")
+        self.assertIn("JUMP_IF_FALSE   -> 12", listing[8])
+        self.assertIn("CALL_FUNCTION   1 (inc)", listing[10])
+        self.assertIn("Disassembly of inc:", listing)
+        self.assertTrue(listing[-1].endswith("RETURN_VALUE"))
+        
+        code = BytecodeCompiler().compile_program(Parser(Lexer("print(`a${1}{b}`)").scan()).parse())
+        self.assertIn("BUILD_STRING    1 ('a{}{{b}}')", disassemble(code))
+
+
+class TestVMStdlib(TestStdlib):
+    """Run the standard library tests on the bytecode VM."""
+    
+    engine = 'vm'
+
+
+class TestVMRunFunctions(TestRunFunctions):
+    """Run the run_code/run_file tests on the bytecode VM."""
+    
+    engine = 'vm'
+
+
+class TestVMErrorHandling(TestErrorHandling):
+    """Run the error handling tests on the bytecode VM."""
+    
+    engine = 'vm'
+
+
+class TestPythonExecutor(TestExecutor):
+    """Run the executor tests on the Python transpiler backend."""
+    
+    executor_class = PythonExecutor
+    
+    def test_transpiled_source(self):
+        """Test that functions become Python functions using helpers for '+'."""
+        executor = self.executor_class(stdout=io.StringIO())
+        source = "var total = 0\nfunction add(x): { total = total + x }\nadd(2)"
+        module = executor.transpile(Parser(Lexer(source).scan()).parse())
+        function = module.body[1]
+        
+        self.assertEqual(function.name, "v_add")
+        self.assertEqual(function.body[0].names, ["v_total"])
+        self.assertEqual(function.body[1].value.func.id, "_add")
+    
+    def test_mutual_tail_calls(self):
+        """Test that only self tail calls become loops in the Python backend."""
+        with self.assertRaises(RecursionError):
+            super().test_mutual_tail_calls()
+    
+    def test_call_ignores_locals(self):
+        """Test that calls resolve the global function even when a local shadows it."""
+        source = """
+        function double(x): { return x * 2 }
+        function run(): {
+            var double = 0
+            return double(21)
+        }
+        print(run())
+        """
+        output = io.StringIO()
+        executor = self.executor_class(stdout=output)
+        executor.execute(Parser(Lexer(source).scan()).parse())
+        self.assertEqual(output.getvalue().strip(), "42")
+
+
+class TestPythonStdlib(TestStdlib):
+    """Run the standard library tests on the Python transpiler backend."""
+    
+    engine = 'py'
+
+
+class TestPythonRunFunctions(TestRunFunctions):
+    """Run the run_code/run_file tests on the Python transpiler backend."""
+    
+    engine = 'py'
+
+
+class TestPythonErrorHandling(TestErrorHandling):
+    """Run the error handling tests on the Python transpiler backend."""
+    
+    engine = 'py'
 
 
 if __name__ == '__main__':